@@ -2,9 +2,27 @@
 """
 Script para añadir descripciones a ejercicios que no las tienen.
 Genera descripciones informativas basadas en el tipo de ejercicio.
+
+Las reglas por patron del nombre estan declaradas como datos (NAME_RULES) y
+se compilan en un unico regex de alternancia: una pasada sobre el nombre
+encuentra todas las palabras clave y cada regla se evalua con mascaras de
+bits. El orden de NAME_RULES es la prioridad (gana la primera que cumple).
+
+EJECUCION:
+    python scripts/add_exercise_descriptions.py
+    python scripts/add_exercise_descriptions.py --report            # cobertura de reglas
+    python scripts/add_exercise_descriptions.py --bench 50000       # nombres sinteticos
 """
+import re
+import sys
 import json
+import time
+import random
+import argparse
 from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+from exercise_merge import write_if_changed
 
 # Descripciones por ejercicio específico (prioridad alta)
 SPECIFIC_DESCRIPTIONS = {
@@ -180,168 +198,286 @@ SPECIFIC_DESCRIPTIONS = {
     "Wrist roller": "Enrollar cuerda con peso. Trabaja flexores y extensores.",
 }
 
-# Plantillas genéricas por tipo de ejercicio
-def generate_description(exercise: dict) -> str:
-    nombre = exercise.get("nombre", "")
-    grupo = exercise.get("grupoMuscular", "").lower()
-    equipo = exercise.get("equipo", "").lower()
-    
-    # Primero buscar descripción específica
-    if nombre in SPECIFIC_DESCRIPTIONS:
-        return SPECIFIC_DESCRIPTIONS[nombre]
-    
-    # Generar descripción basada en patrones
-    nombre_lower = nombre.lower()
-    
+# =============================================================================
+# REGLAS (datos)
+# =============================================================================
+
+# (id, grupos de palabras clave, plantilla). La regla se cumple si el nombre
+# contiene alguna palabra de CADA grupo. {grupo} = grupo muscular en minusculas.
+NAME_RULES = [
     # Press
-    if "press" in nombre_lower:
-        if "inclinado" in nombre_lower:
-            return f"Variante inclinada que enfatiza la porción superior del músculo objetivo. Usa un ángulo de 30-45° para óptimos resultados."
-        elif "declinado" in nombre_lower:
-            return f"Variante declinada que enfatiza la porción inferior del músculo objetivo. Requiere banco declinado."
-        elif "militar" in nombre_lower or "hombro" in nombre_lower:
-            return "Press vertical para desarrollo de hombros. Mantén el core apretado y evita arquear la espalda."
-        else:
-            return f"Ejercicio de empuje para {grupo}. Controla el movimiento en ambas fases."
-    
+    ('press-inclinado', [['press'], ['inclinado']], "Variante inclinada que enfatiza la porción superior del músculo objetivo. Usa un ángulo de 30-45° para óptimos resultados."),
+    ('press-declinado', [['press'], ['declinado']], "Variante declinada que enfatiza la porción inferior del músculo objetivo. Requiere banco declinado."),
+    ('press-hombro', [['press'], ['militar', 'hombro']], "Press vertical para desarrollo de hombros. Mantén el core apretado y evita arquear la espalda."),
+    ('press', [['press']], "Ejercicio de empuje para {grupo}. Controla el movimiento en ambas fases."),
     # Curl
-    if "curl" in nombre_lower:
-        if "femoral" in nombre_lower:
-            return "Ejercicio de aislamiento para isquiotibiales. Contrae fuerte en la parte superior del movimiento."
-        elif "martillo" in nombre_lower:
-            return "Agarre neutro que trabaja el braquial además del bíceps. Mantén los codos fijos."
-        else:
-            return "Ejercicio de aislamiento para bíceps. Mantén los codos fijos a los costados durante todo el movimiento."
-    
+    ('curl-femoral', [['curl'], ['femoral']], "Ejercicio de aislamiento para isquiotibiales. Contrae fuerte en la parte superior del movimiento."),
+    ('curl-martillo', [['curl'], ['martillo']], "Agarre neutro que trabaja el braquial además del bíceps. Mantén los codos fijos."),
+    ('curl', [['curl']], "Ejercicio de aislamiento para bíceps. Mantén los codos fijos a los costados durante todo el movimiento."),
     # Extensiones
-    if "extension" in nombre_lower or "extensión" in nombre_lower:
-        if "triceps" in nombre_lower or "tricep" in nombre_lower:
-            return "Aislamiento de tríceps. Mantén los codos fijos y extiende completamente."
-        elif "cuadriceps" in nombre_lower or "pierna" in nombre_lower:
-            return "Aislamiento de cuádriceps. No bloquees completamente las rodillas al final."
-        else:
-            return f"Ejercicio de extensión para {grupo}. Controla el peso en todo el rango de movimiento."
-    
+    ('extension-triceps', [['extension', 'extensión'], ['triceps', 'tricep']], "Aislamiento de tríceps. Mantén los codos fijos y extiende completamente."),
+    ('extension-cuadriceps', [['extension', 'extensión'], ['cuadriceps', 'pierna']], "Aislamiento de cuádriceps. No bloquees completamente las rodillas al final."),
+    ('extension', [['extension', 'extensión']], "Ejercicio de extensión para {grupo}. Controla el peso en todo el rango de movimiento."),
     # Remo
-    if "remo" in nombre_lower:
-        if "polea" in nombre_lower or "cable" in nombre_lower:
-            return "Remo con cable para espalda. Mantén el pecho alto y tira hacia el abdomen."
-        elif "mancuerna" in nombre_lower:
-            return "Remo unilateral con mancuerna. Apoya una mano para estabilidad y tira el codo hacia atrás."
-        else:
-            return "Ejercicio de tracción para la espalda. Mantén la espalda neutra y tira de los codos."
-    
+    ('remo-cable', [['remo'], ['polea', 'cable']], "Remo con cable para espalda. Mantén el pecho alto y tira hacia el abdomen."),
+    ('remo-mancuerna', [['remo'], ['mancuerna']], "Remo unilateral con mancuerna. Apoya una mano para estabilidad y tira el codo hacia atrás."),
+    ('remo', [['remo']], "Ejercicio de tracción para la espalda. Mantén la espalda neutra y tira de los codos."),
     # Elevaciones
-    if "elevacion" in nombre_lower or "elevación" in nombre_lower:
-        if "lateral" in nombre_lower:
-            return "Aislamiento del deltoides lateral. Ligera inclinación hacia adelante, codos ligeramente flexionados."
-        elif "frontal" in nombre_lower:
-            return "Aislamiento del deltoides anterior. Eleva hasta la altura de los hombros."
-        elif "talones" in nombre_lower or "pantorrilla" in nombre_lower:
-            return "Ejercicio para pantorrillas. Usa rango completo: estira abajo, contrae arriba."
-        else:
-            return f"Ejercicio de elevación para {grupo}. Controla el movimiento y evita usar impulso."
-    
+    ('elevacion-lateral', [['elevacion', 'elevación'], ['lateral']], "Aislamiento del deltoides lateral. Ligera inclinación hacia adelante, codos ligeramente flexionados."),
+    ('elevacion-frontal', [['elevacion', 'elevación'], ['frontal']], "Aislamiento del deltoides anterior. Eleva hasta la altura de los hombros."),
+    ('elevacion-talones', [['elevacion', 'elevación'], ['talones', 'pantorrilla']], "Ejercicio para pantorrillas. Usa rango completo: estira abajo, contrae arriba."),
+    ('elevacion', [['elevacion', 'elevación']], "Ejercicio de elevación para {grupo}. Controla el movimiento y evita usar impulso."),
     # Sentadilla
-    if "sentadilla" in nombre_lower or "squat" in nombre_lower:
-        if "bulgara" in nombre_lower or "búlgara" in nombre_lower:
-            return "Sentadilla unilateral con pie trasero elevado. Excelente para fuerza y equilibrio."
-        elif "frontal" in nombre_lower:
-            return "Barra en deltoides anteriores. Mayor énfasis en cuádriceps y core que la sentadilla trasera."
-        else:
-            return "Ejercicio fundamental para piernas. Baja hasta paralelo o más, mantén la espalda neutra."
-    
+    ('sentadilla-bulgara', [['sentadilla', 'squat'], ['bulgara', 'búlgara']], "Sentadilla unilateral con pie trasero elevado. Excelente para fuerza y equilibrio."),
+    ('sentadilla-frontal', [['sentadilla', 'squat'], ['frontal']], "Barra en deltoides anteriores. Mayor énfasis en cuádriceps y core que la sentadilla trasera."),
+    ('sentadilla', [['sentadilla', 'squat']], "Ejercicio fundamental para piernas. Baja hasta paralelo o más, mantén la espalda neutra."),
     # Dominadas/Jalón
-    if "dominada" in nombre_lower or "jalon" in nombre_lower or "jalón" in nombre_lower:
-        return "Ejercicio de tracción vertical para espalda y bíceps. Tira de los codos hacia abajo y atrás."
-    
+    ('traccion-vertical', [['dominada', 'jalon', 'jalón']], "Ejercicio de tracción vertical para espalda y bíceps. Tira de los codos hacia abajo y atrás."),
     # Aperturas
-    if "apertura" in nombre_lower:
-        if "polea" in nombre_lower:
-            return f"Cruces con cable para {grupo}. Tensión constante durante todo el movimiento."
-        else:
-            return f"Ejercicio de aislamiento para {grupo}. Mantén ligera flexión de codos."
-    
+    ('apertura-polea', [['apertura'], ['polea']], "Cruces con cable para {grupo}. Tensión constante durante todo el movimiento."),
+    ('apertura', [['apertura']], "Ejercicio de aislamiento para {grupo}. Mantén ligera flexión de codos."),
     # Hip thrust / Glúteos
-    if "hip thrust" in nombre_lower or "glute" in nombre_lower:
-        return "Ejercicio para desarrollo de glúteos. Contrae fuerte en la parte superior y mantén 1-2 segundos."
-    
-    # Peso muerto
-    if "peso muerto" in nombre_lower:
-        return "Ejercicio fundamental de tracción. Mantén la espalda neutra y empuja el suelo con los pies."
-    
-    # Zancadas
-    if "zancada" in nombre_lower or "lunge" in nombre_lower:
-        return "Ejercicio unilateral para piernas. Mantén el torso erguido y la rodilla alineada con el pie."
-    
-    # Fondos
-    if "fondo" in nombre_lower or "dip" in nombre_lower:
-        return "Ejercicio de empuje con peso corporal. Baja hasta 90° de flexión de codos y empuja fuerte."
-    
-    # Plancha
-    if "plancha" in nombre_lower:
-        return "Ejercicio isométrico para el core. Mantén el cuerpo en línea recta, sin hundir la cadera."
-    
-    # Crunch
-    if "crunch" in nombre_lower:
-        return "Flexión de tronco para abdominales. Eleva los hombros del suelo contrayendo el abdomen."
-    
-    # Por equipo si no hay patrón específico
-    if equipo == "maquina" or equipo == "máquina":
-        return f"Versión en máquina que ofrece movimiento guiado y seguro. Ideal para principiantes o para ir al fallo."
-    elif equipo == "polea" or equipo == "cable":
-        return f"Ejercicio con cable que proporciona tensión constante durante todo el rango de movimiento."
-    elif equipo == "mancuernas":
-        return f"Versión con mancuernas que permite mayor rango de movimiento y trabajo estabilizador."
-    elif equipo == "barra":
-        return f"Versión con barra que permite usar cargas más pesadas. Mantén la técnica estricta."
-    elif equipo == "peso corporal" or equipo == "bodyweight":
-        return f"Ejercicio con peso corporal. Progresa aumentando repeticiones o dificultad."
-    
-    # Descripción genérica por grupo muscular
-    group_descriptions = {
-        "pecho": "Ejercicio para desarrollo del pectoral. Controla el peso y mantén la contracción.",
-        "espalda": "Ejercicio para desarrollo de la espalda. Tira de los codos, no de las manos.",
-        "hombros": "Ejercicio para desarrollo de deltoides. Evita usar impulso del cuerpo.",
-        "biceps": "Ejercicio para bíceps. Mantén los codos fijos durante el movimiento.",
-        "triceps": "Ejercicio para tríceps. Extiende completamente los codos en cada repetición.",
-        "piernas": "Ejercicio para piernas. Usa rango completo de movimiento.",
-        "gluteos": "Ejercicio para glúteos. Contrae fuerte en la parte superior.",
-        "abdominales": "Ejercicio para abdominales. Mantén la tensión y evita usar impulso.",
-        "core": "Ejercicio para el core. Mantén el abdomen contraído durante todo el movimiento.",
+    ('hip-thrust', [['hip thrust', 'glute']], "Ejercicio para desarrollo de glúteos. Contrae fuerte en la parte superior y mantén 1-2 segundos."),
+    ('peso-muerto', [['peso muerto']], "Ejercicio fundamental de tracción. Mantén la espalda neutra y empuja el suelo con los pies."),
+    ('zancada', [['zancada', 'lunge']], "Ejercicio unilateral para piernas. Mantén el torso erguido y la rodilla alineada con el pie."),
+    ('fondos', [['fondo', 'dip']], "Ejercicio de empuje con peso corporal. Baja hasta 90° de flexión de codos y empuja fuerte."),
+    ('plancha', [['plancha']], "Ejercicio isométrico para el core. Mantén el cuerpo en línea recta, sin hundir la cadera."),
+    ('crunch', [['crunch']], "Flexión de tronco para abdominales. Eleva los hombros del suelo contrayendo el abdomen."),
+]
+
+# Por equipo si no hay patrón específico (comparación exacta con `equipo`)
+EQUIPMENT_RULES = [
+    ('equipo-maquina', ['maquina', 'máquina'], "Versión en máquina que ofrece movimiento guiado y seguro. Ideal para principiantes o para ir al fallo."),
+    ('equipo-cable', ['polea', 'cable'], "Ejercicio con cable que proporciona tensión constante durante todo el rango de movimiento."),
+    ('equipo-mancuernas', ['mancuernas'], "Versión con mancuernas que permite mayor rango de movimiento y trabajo estabilizador."),
+    ('equipo-barra', ['barra'], "Versión con barra que permite usar cargas más pesadas. Mantén la técnica estricta."),
+    ('equipo-peso-corporal', ['peso corporal', 'bodyweight'], "Ejercicio con peso corporal. Progresa aumentando repeticiones o dificultad."),
+]
+
+# Descripción genérica por grupo muscular (texto de último recurso)
+GROUP_DESCRIPTIONS = {
+    "pecho": "Ejercicio para desarrollo del pectoral. Controla el peso y mantén la contracción.",
+    "espalda": "Ejercicio para desarrollo de la espalda. Tira de los codos, no de las manos.",
+    "hombros": "Ejercicio para desarrollo de deltoides. Evita usar impulso del cuerpo.",
+    "biceps": "Ejercicio para bíceps. Mantén los codos fijos durante el movimiento.",
+    "triceps": "Ejercicio para tríceps. Extiende completamente los codos en cada repetición.",
+    "piernas": "Ejercicio para piernas. Usa rango completo de movimiento.",
+    "gluteos": "Ejercicio para glúteos. Contrae fuerte en la parte superior.",
+    "abdominales": "Ejercicio para abdominales. Mantén la tensión y evita usar impulso.",
+    "core": "Ejercicio para el core. Mantén el abdomen contraído durante todo el movimiento.",
+}
+GENERIC_DESCRIPTION = "Ejercicio para {grupo}. Mantén buena técnica y control del movimiento."
+
+SPECIFIC_RULE = 'especifica'
+FALLBACK_PREFIXES = ('grupo:', 'generico')
+
+
+# =============================================================================
+# COMPILACION
+# =============================================================================
+
+class RuleMatcher:
+    """
+    NAME_RULES compilado en un regex de alternancia.
+
+    Cada palabra clave recibe un bit. El regex (en lookahead, para encontrar
+    coincidencias solapadas) devuelve la palabra mas larga que empieza en cada
+    posicion; las mas cortas que contiene se añaden via un cierre precalculado.
+    Una regla se cumple si su mascara de cada grupo intersecta las encontradas.
+    """
+
+    def __init__(self, rules=NAME_RULES):
+        keywords = sorted({k for _, groups, _ in rules for group in groups for k in group},
+                          key=lambda k: (-len(k), k))
+        bit = {keyword: 1 << i for i, keyword in enumerate(keywords)}
+        # Cierre por subcadena: "extensión" implica cualquier palabra que contenga
+        self.closure = {
+            keyword: sum(bit[other] for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        self.pattern = re.compile('(?=(' + '|'.join(re.escape(k) for k in keywords) + '))')
+        self.rules = [
+            (rule_id, tuple(sum(bit[k] for k in group) for group in groups), template)
+            for rule_id, groups, template in rules
+        ]
+
+    def keyword_mask(self, text: str) -> int:
+        mask = 0
+        for keyword in self.pattern.findall(text):
+            mask |= self.closure[keyword]
+        return mask
+
+    def match(self, text: str):
+        """(id, plantilla) de la primera regla que cumple, o None."""
+        mask = self.keyword_mask(text)
+        if mask:
+            for rule_id, group_masks, template in self.rules:
+                for group_mask in group_masks:
+                    if not mask & group_mask:
+                        break
+                else:
+                    return rule_id, template
+        return None
+
+
+_MATCHER = RuleMatcher()
+_EQUIPMENT = {value: (rule_id, text) for rule_id, values, text in EQUIPMENT_RULES for value in values}
+
+
+def describe(exercise: dict) -> Tuple[str, str]:
+    """Devuelve (descripcion, id de la regla que la produjo)."""
+    nombre = exercise.get("nombre", "")
+    grupo = exercise.get("grupoMuscular", "").lower()
+    equipo = exercise.get("equipo", "").lower()
+
+    # Primero buscar descripción específica
+    if nombre in SPECIFIC_DESCRIPTIONS:
+        return SPECIFIC_DESCRIPTIONS[nombre], SPECIFIC_RULE
+
+    matched = _MATCHER.match(nombre.lower())
+    if matched:
+        rule_id, template = matched
+        return template.format(grupo=grupo), rule_id
+
+    if equipo in _EQUIPMENT:
+        rule_id, text = _EQUIPMENT[equipo]
+        return text, rule_id
+
+    if grupo in GROUP_DESCRIPTIONS:
+        return GROUP_DESCRIPTIONS[grupo], f"grupo:{grupo}"
+    return GENERIC_DESCRIPTION.format(grupo=grupo), 'generico'
+
+
+def generate_description(exercise: dict) -> str:
+    return describe(exercise)[0]
+
+
+# =============================================================================
+# INFORME DE COBERTURA
+# =============================================================================
+
+def all_rule_ids() -> List[str]:
+    return ([SPECIFIC_RULE] + [rule_id for rule_id, _, _ in NAME_RULES]
+            + [rule_id for rule_id, _, _ in EQUIPMENT_RULES])
+
+
+def coverage_report(exercises: List[dict]) -> Dict[str, object]:
+    hits = {rule_id: 0 for rule_id in all_rule_ids()}
+    fall_through = []
+    for exercise in exercises:
+        _, rule_id = describe(exercise)
+        hits[rule_id] = hits.get(rule_id, 0) + 1
+        if rule_id.startswith(FALLBACK_PREFIXES):
+            fall_through.append(exercise.get("nombre", ""))
+    return {
+        'hits': hits,
+        'never_fired': [rule_id for rule_id, count in hits.items() if count == 0],
+        'fall_through': fall_through,
     }
-    
-    return group_descriptions.get(grupo, f"Ejercicio para {grupo}. Mantén buena técnica y control del movimiento.")
 
 
-def main():
-    # Cargar ejercicios
-    exercises_path = Path(__file__).parent.parent / "assets" / "data" / "exercises_local.json"
-    
-    with open(exercises_path, "r", encoding="utf-8") as f:
+def print_coverage(report: Dict[str, object], total: int):
+    print("\n" + "="*60)
+    print(f"COBERTURA DE REGLAS ({total} ejercicios)")
+    print("="*60)
+    for rule_id, count in report['hits'].items():
+        if count:
+            print(f"   {rule_id:<28}{count:>6}  {count / total * 100:5.1f}%")
+    print(f"\n   Reglas que nunca se disparan: {len(report['never_fired'])}")
+    for rule_id in report['never_fired']:
+        print(f"      - {rule_id}")
+    print(f"\n   Caen al texto genérico de grupo: {len(report['fall_through'])}")
+    for nombre in report['fall_through'][:30]:
+        print(f"      - {nombre}")
+    if len(report['fall_through']) > 30:
+        print(f"      ... y {len(report['fall_through']) - 30} más")
+    print("="*60)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _naive_match(text: str):
+    """Evaluacion regla a regla con `in` (equivale a la cadena de ifs)."""
+    for rule_id, groups, template in NAME_RULES:
+        if all(any(k in text for k in group) for group in groups):
+            return rule_id, template
+    return None
+
+
+def run_benchmark(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocabulary = sorted({k for _, groups, _ in NAME_RULES for group in groups for k in group})
+    vocabulary += ['con', 'en', 'de', 'barra', 'mancuernas', 'maquina', 'agarre', 'cerrado', 'unilateral']
+    names = [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(2, 5))) for _ in range(size)]
+
+    start = time.perf_counter()
+    compiled = [_MATCHER.match(name) for name in names]
+    compiled_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    naive = [_naive_match(name) for name in names]
+    naive_s = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(compiled, naive) if a != b)
+    print(f"Nombres sinteticos: {size:,}  Reglas: {len(NAME_RULES)}")
+    print(f"   Regex compilado: {compiled_s * 1000:8.1f} ms ({size / compiled_s:,.0f} nombres/s)")
+    print(f"   Regla a regla:   {naive_s * 1000:8.1f} ms ({size / naive_s:,.0f} nombres/s)")
+    print(f"   Discrepancias:   {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Añade descripciones a ejercicios sin ellas')
+    parser.add_argument('--exercises', type=Path,
+                        default=Path(__file__).parent.parent / "assets" / "data" / "exercises_local.json")
+    parser.add_argument('--report', action='store_true',
+                        help='Cobertura de reglas sobre todo el catálogo (sin escribir)')
+    parser.add_argument('--bench', type=int, metavar='N', help='Medir el matcher con N nombres sintéticos')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        run_benchmark(args.bench)
+        return
+
+    with open(args.exercises, "r", encoding="utf-8") as f:
         exercises = json.load(f)
-    
+
+    if args.report:
+        print_coverage(coverage_report(exercises), len(exercises))
+        return
+
     # Contar ejercicios sin descripción
     empty_before = sum(1 for e in exercises if not e.get("descripcion"))
     print(f"Ejercicios sin descripción antes: {empty_before}")
-    
+
     # Añadir descripciones
     updated = 0
+    fired: Dict[str, int] = {}
     for exercise in exercises:
         current_desc = exercise.get("descripcion", "")
         if not current_desc or current_desc.strip() == "":
-            new_desc = generate_description(exercise)
+            new_desc, rule_id = describe(exercise)
             exercise["descripcion"] = new_desc
+            fired[rule_id] = fired.get(rule_id, 0) + 1
             updated += 1
-            print(f"  + {exercise['nombre']}: {new_desc[:50]}...")
-    
-    # Guardar
-    with open(exercises_path, "w", encoding="utf-8") as f:
-        json.dump(exercises, f, ensure_ascii=False, indent=2)
-    
+            print(f"  + [{rule_id}] {exercise['nombre']}: {new_desc[:50]}...")
+
+    # Guardar solo si hay cambios
+    if updated:
+        write_if_changed(args.exercises, exercises)
+
     empty_after = sum(1 for e in exercises if not e.get("descripcion"))
     print(f"\n✅ Actualizados: {updated} ejercicios")
     print(f"   Sin descripción después: {empty_after}")
+    for rule_id, count in sorted(fired.items(), key=lambda item: -item[1]):
+        print(f"   {rule_id:<28}{count:>6}")
 
 
 if __name__ == "__main__":
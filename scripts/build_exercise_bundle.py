@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Compila los assets de ejercicios en un unico bundle minificado.
+
+Entradas (assets/data/):
+    - exercises_local.json     Biblioteca de ejercicios
+    - alternativas.json        Alternativas por id de ejercicio
+    - routine_templates.json   Plantillas de rutina
+
+Salida:
+    - exercise_bundle.json     JSON minificado con:
+        * ids enteros en todas partes (las plantillas usaban strings)
+        * alternativas como pares [id, [ids]]
+        * indices precalculados por grupoMuscular, muscles, equipo y nivel
+        * checksum sha256 del contenido
+
+La compilacion falla (codigo de salida 1) si hay referencias colgantes:
+alternativas o ejercicios de plantilla que apuntan a ids inexistentes.
+
+EJECUCION:
+    python scripts/build_exercise_bundle.py
+    python scripts/build_exercise_bundle.py --check          # solo validar
+    python scripts/build_exercise_bundle.py --bench 200      # tiempos de parseo
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+
+DATA_DIR = Path(__file__).parent.parent / "assets" / "data"
+EXERCISES_FILE = "exercises_local.json"
+ALTERNATIVES_FILE = "alternativas.json"
+TEMPLATES_FILE = "routine_templates.json"
+BUNDLE_FILE = "exercise_bundle.json"
+
+BUNDLE_VERSION = 1
+INDEXED_FIELDS = ['grupoMuscular', 'muscles', 'equipo', 'nivel']
+
+
+def load_json(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _as_int(value: Any) -> int:
+    return value if isinstance(value, int) else int(str(value).strip())
+
+
+# =============================================================================
+# COMPILACION
+# =============================================================================
+
+def build_indexes(exercises: List[Dict[str, Any]]) -> Dict[str, Dict[str, List[int]]]:
+    """Indices valor -> ids ordenados. Los campos lista indexan cada elemento."""
+    indexes: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+    for exercise in exercises:
+        for field in INDEXED_FIELDS:
+            values = exercise.get(field)
+            if values is None:
+                continue
+            for value in values if isinstance(values, list) else [values]:
+                indexes[field].setdefault(value, []).append(exercise['id'])
+    return {
+        field: {value: sorted(ids) for value, ids in sorted(index.items())}
+        for field, index in indexes.items()
+    }
+
+
+def compile_bundle(exercises: List[Dict[str, Any]], alternatives: Dict[str, List[int]],
+                   templates: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Devuelve (bundle, errores). Con errores el bundle no debe escribirse."""
+    errors: List[str] = []
+
+    exercises = sorted(exercises, key=lambda e: e['id'])
+    ids = set()
+    for exercise in exercises:
+        if exercise['id'] in ids:
+            errors.append(f"Id de ejercicio duplicado: {exercise['id']} ({exercise['nombre']})")
+        ids.add(exercise['id'])
+
+    alternative_pairs = []
+    for key, alt_ids in sorted(alternatives.items(), key=lambda item: _as_int(item[0])):
+        exercise_id = _as_int(key)
+        if exercise_id not in ids:
+            errors.append(f"alternativas.json: clave {key} no es un ejercicio")
+        dangling = [a for a in alt_ids if _as_int(a) not in ids]
+        if dangling:
+            errors.append(f"alternativas.json: {key} -> ids inexistentes {dangling}")
+        alternative_pairs.append([exercise_id, [_as_int(a) for a in alt_ids]])
+
+    compiled_templates = []
+    for template in templates.get('templates', []):
+        compiled = dict(template)
+        compiled['dias'] = []
+        for day in template.get('dias', []):
+            compiled_day = dict(day)
+            compiled_day['ejercicios'] = []
+            for entry in day.get('ejercicios', []):
+                try:
+                    exercise_id = _as_int(entry['exerciseId'])
+                except (KeyError, ValueError):
+                    errors.append(f"Plantilla {template['id']} / {day['nombre']}: exerciseId invalido {entry}")
+                    continue
+                if exercise_id not in ids:
+                    errors.append(f"Plantilla {template['id']} / {day['nombre']}: ejercicio {exercise_id} no existe")
+                compiled_day['ejercicios'].append({**entry, 'exerciseId': exercise_id})
+            compiled['dias'].append(compiled_day)
+        compiled_templates.append(compiled)
+
+    bundle = {
+        'version': BUNDLE_VERSION,
+        'templatesVersion': templates.get('version'),
+        'lastUpdated': templates.get('lastUpdated'),
+        'exercises': exercises,
+        'alternatives': alternative_pairs,
+        'templates': compiled_templates,
+        'categories': templates.get('categories', []),
+        'levels': templates.get('levels', []),
+        'indexes': build_indexes(exercises),
+    }
+    bundle['checksum'] = 'sha256:' + hashlib.sha256(dumps_minified(bundle).encode('utf-8')).hexdigest()
+    return bundle, errors
+
+
+def dumps_minified(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def verify_checksum(bundle: Dict[str, Any]) -> bool:
+    content = {k: v for k, v in bundle.items() if k != 'checksum'}
+    digest = hashlib.sha256(dumps_minified(content).encode('utf-8')).hexdigest()
+    return bundle.get('checksum') == 'sha256:' + digest
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _runtime_lookups(exercises, alternatives, templates):
+    """Lo que hoy se construye en runtime tras parsear los tres ficheros."""
+    by_id = {e['id']: e for e in exercises}
+    alt_map = {int(k): v for k, v in alternatives.items()}
+    for template in templates['templates']:
+        for day in template['dias']:
+            for entry in day['ejercicios']:
+                by_id.get(int(entry['exerciseId']))
+    build_indexes(exercises)
+    return by_id, alt_map
+
+
+def run_benchmark(data_dir: Path, bundle_text: str, iterations: int):
+    sources = {name: (data_dir / name).read_text(encoding='utf-8')
+               for name in (EXERCISES_FILE, ALTERNATIVES_FILE, TEMPLATES_FILE)}
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        exercises = json.loads(sources[EXERCISES_FILE])
+        alternatives = json.loads(sources[ALTERNATIVES_FILE])
+        templates = json.loads(sources[TEMPLATES_FILE])
+        _runtime_lookups(exercises, alternatives, templates)
+    current_ms = (time.perf_counter() - start) / iterations * 1000
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        bundle = json.loads(bundle_text)
+        {e['id']: e for e in bundle['exercises']}
+        dict((k, v) for k, v in bundle['alternatives'])
+    bundle_ms = (time.perf_counter() - start) / iterations * 1000
+
+    current_bytes = sum(len(text.encode('utf-8')) for text in sources.values())
+    bundle_bytes = len(bundle_text.encode('utf-8'))
+
+    print("\n" + "="*60)
+    print(f"BENCHMARK DE PARSEO ({iterations} iteraciones)")
+    print("="*60)
+    print(f"   {'':<28}{'Bytes':>10}{'ms/carga':>12}")
+    print(f"   {'3 ficheros + indices runtime':<28}{current_bytes:>10,}{current_ms:>12.3f}")
+    print(f"   {'Bundle (indices incluidos)':<28}{bundle_bytes:>10,}{bundle_ms:>12.3f}")
+    if bundle_ms:
+        print(f"   Mejora: x{current_ms / bundle_ms:.2f} en tiempo, "
+              f"{(1 - bundle_bytes / current_bytes) * 100:.0f}% menos bytes")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Compila los assets de ejercicios en un bundle')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--output', type=Path, help=f'Ruta del bundle (por defecto <data-dir>/{BUNDLE_FILE})')
+    parser.add_argument('--check', action='store_true', help='Solo validar referencias, sin escribir')
+    parser.add_argument('--bench', type=int, metavar='N', help='Comparar tiempos de parseo con N iteraciones')
+    args = parser.parse_args(argv)
+
+    exercises = load_json(args.data_dir / EXERCISES_FILE)
+    alternatives = load_json(args.data_dir / ALTERNATIVES_FILE)
+    templates = load_json(args.data_dir / TEMPLATES_FILE)
+
+    bundle, errors = compile_bundle(exercises, alternatives, templates)
+    if errors:
+        print(f"❌ {len(errors)} referencias invalidas:")
+        for error in errors:
+            print(f"   - {error}")
+        sys.exit(1)
+
+    bundle_text = dumps_minified(bundle)
+    print(f"Ejercicios: {len(bundle['exercises'])}  Alternativas: {len(bundle['alternatives'])}  "
+          f"Plantillas: {len(bundle['templates'])}")
+    print(f"Checksum: {bundle['checksum']}")
+
+    if not args.check:
+        output = args.output or args.data_dir / BUNDLE_FILE
+        output.write_text(bundle_text, encoding='utf-8')
+        print(f"✅ Bundle escrito: {output} ({len(bundle_text.encode('utf-8')):,} bytes)")
+
+    if args.bench:
+        run_benchmark(args.data_dir, bundle_text, args.bench)
+
+
+if __name__ == "__main__":
+    main()
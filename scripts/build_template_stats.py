@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Precalcula agregados de las plantillas de rutina para la app.
+
+Para cada plantilla de routine_templates.json (y cada uno de sus dias) cruza
+los exerciseId con exercises_local.json y calcula:
+    - series semanales por musculo (principal = 1.0, secundario = 0.5)
+    - equipo necesario
+    - duracion estimada de la sesion (minutos)
+    - total de series y ejercicios
+
+Asi las pantallas de exploracion y filtrado de plantillas no necesitan hacer
+el join con la biblioteca de ejercicios al arrancar.
+
+Las series semanales se escalan por diasPorSemana / numero de dias: una
+plantilla A/B entrenada 3 dias por semana repite un dia.
+
+Salida: assets/data/routine_template_stats.json (JSON minificado)
+    {
+      "version": 1,
+      "sourceHash": "sha256:...",        # de plantillas + ejercicios
+      "templates": {
+        "ppl-classic": {
+          "weeklySets": {"Pecho": 21.0, ...}, "totalWeeklySets": 132,
+          "equipment": ["barra", ...], "exerciseCount": 36,
+          "sessionMinutes": {"avg": 62, "min": 55, "max": 70},
+          "days": [{"sets": 20, "minutes": 63, "muscles": {...}, "equipment": [...]}]
+        }
+      },
+      "index": {"equipment": {"barra": ["ppl-classic", ...]}}
+    }
+
+EJECUCION:
+    python scripts/build_template_stats.py
+    python scripts/build_template_stats.py --check     # falla si el asset esta desactualizado
+    python scripts/build_template_stats.py --show ppl-classic
+"""
+
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from build_exercise_bundle import DATA_DIR, EXERCISES_FILE, TEMPLATES_FILE, load_json, dumps_minified
+
+
+STATS_FILE = "routine_template_stats.json"
+STATS_VERSION = 1
+
+PRIMARY_WEIGHT = 1.0
+SECONDARY_WEIGHT = 0.5
+
+# Modelo de duracion: tiempo bajo tension + descanso entre series + cambio
+SECONDS_PER_REP = 3
+DEFAULT_REPS = 10                 # "max", "variado"...
+TRANSITION_SECONDS = 60           # preparar el siguiente ejercicio
+REST_BY_REPS = [(6, 180), (12, 90), (float('inf'), 60)]  # reps maximas -> descanso (s)
+TIMED_REST_SECONDS = 45
+
+_NUMBER = re.compile(r'\d+')
+
+
+def parse_reps(reps_range: str) -> Tuple[float, bool]:
+    """(repeticiones o segundos por serie, es_por_tiempo). "8-12" -> (10, False), "30-45s" -> (37.5, True)."""
+    text = (reps_range or '').strip().lower()
+    numbers = [int(n) for n in _NUMBER.findall(text)]
+    timed = bool(numbers) and text.endswith('s') and not text.endswith('rps')
+    if not numbers:
+        return float(DEFAULT_REPS), False
+    if '/' in text:
+        return sum(numbers) / len(numbers), timed   # 5/3/1
+    return (numbers[0] + numbers[-1]) / 2, timed
+
+
+def set_seconds(reps_range: str) -> float:
+    amount, timed = parse_reps(reps_range)
+    if timed:
+        return amount + TIMED_REST_SECONDS
+    rest = next(seconds for limit, seconds in REST_BY_REPS if amount <= limit)
+    return amount * SECONDS_PER_REP + rest
+
+
+def muscle_weights(exercise: Dict[str, Any]) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for muscle in exercise.get('musculosSecundarios') or []:
+        weights[muscle] = SECONDARY_WEIGHT
+    for muscle in exercise.get('muscles') or [exercise['grupoMuscular']]:
+        weights[muscle] = PRIMARY_WEIGHT
+    return weights
+
+
+def _rounded(values: Dict[str, float]) -> Dict[str, float]:
+    return {k: round(v, 1) for k, v in sorted(values.items(), key=lambda item: (-item[1], item[0]))}
+
+
+# =============================================================================
+# AGREGADOS
+# =============================================================================
+
+def day_stats(day: Dict[str, Any], by_id: Dict[int, Dict[str, Any]], errors: List[str],
+              context: str) -> Dict[str, Any]:
+    muscles: Dict[str, float] = {}
+    equipment = set()
+    sets = 0
+    seconds = 0.0
+    for entry in day.get('ejercicios', []):
+        try:
+            exercise_id = int(entry['exerciseId'])
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"{context}: exerciseId invalido {entry.get('exerciseId')!r}")
+            continue
+        exercise = by_id.get(exercise_id)
+        if exercise is None:
+            errors.append(f"{context}: ejercicio {entry['exerciseId']} no existe")
+            continue
+        series = entry.get('series', 0)
+        sets += series
+        seconds += series * set_seconds(entry.get('repsRange', '')) + TRANSITION_SECONDS
+        for muscle, weight in muscle_weights(exercise).items():
+            muscles[muscle] = muscles.get(muscle, 0.0) + series * weight
+        if exercise.get('equipo'):
+            equipment.add(exercise['equipo'])
+    return {
+        'nombre': day['nombre'],
+        'exerciseCount': len(day.get('ejercicios', [])),
+        'sets': sets,
+        'minutes': round(seconds / 60),
+        'muscles': _rounded(muscles),
+        'equipment': sorted(equipment),
+    }
+
+
+def template_stats(template: Dict[str, Any], by_id: Dict[int, Dict[str, Any]],
+                   errors: List[str]) -> Dict[str, Any]:
+    days = [day_stats(day, by_id, errors, f"{template['id']} / {day['nombre']}") for day in template.get('dias', [])]
+    # Cada dia se repite diasPorSemana / len(dias) veces por semana
+    frequency = template.get('diasPorSemana', len(days)) / len(days) if days else 0.0
+
+    weekly: Dict[str, float] = {}
+    for day in days:
+        for muscle, sets in day['muscles'].items():
+            weekly[muscle] = weekly.get(muscle, 0.0) + sets * frequency
+    minutes = [day['minutes'] for day in days] or [0]
+    return {
+        'weeklySets': _rounded(weekly),
+        'totalWeeklySets': round(sum(day['sets'] for day in days) * frequency, 1),
+        'exerciseCount': sum(day['exerciseCount'] for day in days),
+        'equipment': sorted({item for day in days for item in day['equipment']}),
+        'sessionMinutes': {'avg': round(sum(minutes) / len(minutes)), 'min': min(minutes), 'max': max(minutes)},
+        'days': days,
+    }
+
+
+def source_hash(templates_text: str, exercises_text: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(templates_text.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(exercises_text.encode('utf-8'))
+    return 'sha256:' + digest.hexdigest()
+
+
+def build_stats(templates: Dict[str, Any], exercises: List[Dict[str, Any]],
+                digest: Optional[str] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """Devuelve (asset, errores). Con errores el asset no debe escribirse."""
+    by_id = {e['id']: e for e in exercises}
+    errors: List[str] = []
+    stats = {t['id']: template_stats(t, by_id, errors) for t in templates.get('templates', [])}
+
+    equipment_index: Dict[str, List[str]] = {}
+    for template_id, entry in stats.items():
+        for item in entry['equipment']:
+            equipment_index.setdefault(item, []).append(template_id)
+
+    asset = {
+        'version': STATS_VERSION,
+        'templatesVersion': templates.get('version'),
+        'sourceHash': digest,
+        'templates': stats,
+        'index': {'equipment': dict(sorted(equipment_index.items()))},
+    }
+    return asset, errors
+
+
+def print_template(template_id: str, entry: Dict[str, Any]):
+    print("\n" + "="*60)
+    print(f"PLANTILLA: {template_id}")
+    print("="*60)
+    print(f"   Ejercicios: {entry['exerciseCount']}  Series/semana: {entry['totalWeeklySets']}")
+    minutes = entry['sessionMinutes']
+    print(f"   Sesion: ~{minutes['avg']} min ({minutes['min']}-{minutes['max']})")
+    print(f"   Equipo: {', '.join(entry['equipment'])}")
+    print("   Series semanales por musculo:")
+    for muscle, sets in entry['weeklySets'].items():
+        print(f"      {muscle:<14}{sets:>6.1f}")
+    for day in entry['days']:
+        print(f"   - {day['nombre']}: {day['sets']} series, ~{day['minutes']} min")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Precalcula agregados de las plantillas de rutina')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--output', type=Path, help=f'Ruta del asset (por defecto <data-dir>/{STATS_FILE})')
+    parser.add_argument('--check', action='store_true', help='Verificar que el asset esta al dia, sin escribir')
+    parser.add_argument('--show', action='append', default=[], help='Mostrar los agregados de una plantilla')
+    args = parser.parse_args(argv)
+
+    templates_text = (args.data_dir / TEMPLATES_FILE).read_text(encoding='utf-8')
+    exercises_text = (args.data_dir / EXERCISES_FILE).read_text(encoding='utf-8')
+    digest = source_hash(templates_text, exercises_text)
+    asset, errors = build_stats(json.loads(templates_text), json.loads(exercises_text), digest)
+    if errors:
+        print(f"❌ {len(errors)} referencias invalidas:")
+        for error in errors:
+            print(f"   - {error}")
+        sys.exit(1)
+
+    for template_id in args.show:
+        if template_id not in asset['templates']:
+            print(f"[ERROR] Plantilla desconocida: {template_id}")
+            sys.exit(1)
+        print_template(template_id, asset['templates'][template_id])
+
+    output = args.output or args.data_dir / STATS_FILE
+    text = dumps_minified(asset)
+    if args.check:
+        current = load_json(output) if output.exists() else {}
+        if current.get('sourceHash') != digest:
+            print(f"❌ {output.name} desactualizado: ejecuta python scripts/build_template_stats.py")
+            sys.exit(1)
+        print(f"✅ {output.name} al dia")
+        return
+
+    output.write_text(text, encoding='utf-8')
+    print(f"Plantillas: {len(asset['templates'])}  Equipos: {len(asset['index']['equipment'])}")
+    print(f"✅ Asset escrito: {output} ({len(text.encode('utf-8')):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
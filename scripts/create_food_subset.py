@@ -24,25 +24,46 @@ REQUISITOS:
 
 import os
 import sys
-import json
 import gzip
 import shutil
 import argparse
 import time
 import math
+import importlib
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Mapping
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Mapping, Tuple
 from urllib.parse import urlparse
 
-# Dependencias externas
-try:
-    import duckdb
-    import requests
-    from tqdm import tqdm
-except ImportError as e:
-    print(f"Error: Falta dependencia {e.name}")
-    print("Instala con: pip install duckdb requests tqdm")
-    sys.exit(1)
+# Dependencias externas: se importan al necesitarlas (require_dependencies) para
+# que --help y los pasos que no las usan arranquen sin cargarlas
+duckdb = None
+requests = None
+tqdm = None
+
+
+def require_dependencies(*names: str):
+    """Importa bajo demanda duckdb / requests / tqdm; sale con un mensaje si faltan."""
+    module_globals = globals()
+    for name in names or ('duckdb', 'requests', 'tqdm'):
+        if module_globals[name] is not None:
+            continue
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            print(f"Error: Falta dependencia {name}")
+            print("Instala con: pip install duckdb requests tqdm")
+            sys.exit(1)
+        module_globals[name] = module.tqdm if name == 'tqdm' else module
+
+from food_projection import (
+    PROFILES, DEFAULT_PROFILE, REPORT_SAMPLE_SIZE,
+    project_product, dumps_product, field_byte_report, print_field_report,
+)
+from food_filter_cache import FilterCache, DEFAULT_CACHE_MAX_GB
+
+if TYPE_CHECKING:
+    from food_taxonomy import Taxonomy
+from food_subset_estimate import estimate_market, print_estimate, DEFAULT_SAMPLE_FRACTION
 
 
 # =============================================================================
@@ -59,6 +80,9 @@ CSV_PATH = WORK_DIR / CSV_FILENAME
 TARGET_MIN_PRODUCTS = 300_000  # Aumentado a 300k mínimo
 TARGET_MAX_PRODUCTS = 800_000  # Aumentado a 800k máximo
 
+# Columnas de popularidad para --tiers (ver food_tiers.py)
+TIER_COLUMNS = ['unique_scans_n', 'completeness']
+
 # Marcas por mercado
 MARKETS = {
     'spain': {
@@ -243,6 +267,7 @@ def format_size(size_bytes: int) -> str:
 
 
 def download_file(url: str, dest_path: Path, chunk_size: int = 8192) -> bool:
+    require_dependencies('requests', 'tqdm')
     try:
         print(f"\n[DESCARGA] Descargando dump de Open Food Facts...")
         print(f"   URL: {url}")
@@ -282,14 +307,23 @@ def check_existing_file(file_path: Path) -> bool:
     return False
 
 
-def create_duckdb_connection() -> duckdb.DuckDBPyConnection:
+def create_duckdb_connection() -> 'duckdb.DuckDBPyConnection':
+    require_dependencies('duckdb')
     conn = duckdb.connect(':memory:')
     conn.execute("SET memory_limit = '2GB'")
     conn.execute("SET threads TO 4")
     return conn
 
 
-def build_filter_query(market: str) -> str:
+def build_group_predicates(market: str) -> Dict[str, str]:
+    """
+    Predicados SQL del filtro de mercado, separados por grupo.
+
+    - country:  el producto se vende en alguno de los paises del mercado
+    - brand:    la marca es una de las marcas del mercado
+    - category: tiene categorias y alguna es relevante
+    - base:     tiene nombre de producto
+    """
     config = MARKETS[market]
     
     country_conditions = [f"countries_tags ILIKE '%{c}%'" for c in config['countries']]
@@ -302,40 +336,32 @@ def build_filter_query(market: str) -> str:
         cat_clean = cat.replace("'", "''")
         category_conditions.append(f"categories_tags ILIKE '%{cat_clean}%'")
     
-    country_filter = ' OR '.join(country_conditions)
-    brand_filter = ' OR '.join(brand_conditions)
     category_filter = ' OR '.join(category_conditions)
     
-    # Para USA: también incluir productos globales populares (en inglés) con marcas conocidas
-    if market == 'usa':
-        # Productos con marca USA (sin requerir país) + productos de países USA/Canadá
-        location_filter = f"""
-        (
-            ({country_filter})
-            OR 
-            ({brand_filter})
-        )
-        """
-    else:
-        # Para España: requiere país europeo o marca española
-        location_filter = f"""
-        (
-            ({country_filter})
-            OR 
-            ({brand_filter})
-        )
-        """
+    return {
+        'country': ' OR '.join(country_conditions),
+        'brand': ' OR '.join(brand_conditions),
+        'category': f"categories IS NOT NULL AND categories != '' AND ({category_filter})",
+        'base': "product_name IS NOT NULL AND product_name != ''",
+    }
+
+
+def build_filter_query(market: str) -> str:
+    groups = build_group_predicates(market)
     
+    # Todos los mercados: país del mercado o marca conocida (USA incluye así
+    # productos globales populares sin requerir país)
     query = f"""
-    {location_filter}
+    (
+        ({groups['country']})
+        OR 
+        ({groups['brand']})
+    )
     AND
     (
-        categories IS NOT NULL 
-        AND categories != ''
-        AND ({category_filter})
+        {groups['category']}
     )
-    AND product_name IS NOT NULL 
-    AND product_name != ''
+    AND {groups['base']}
     """
     return query
 
@@ -390,36 +416,71 @@ def get_product_name(row: Mapping[str, Any]) -> str:
     return 'Producto sin nombre'
 
 
-def process_and_export(conn: duckdb.DuckDBPyConnection, output_path: Path, market: str, csv_path: Path) -> int:
-    print(f"\n[FILTRO] Filtrando productos para mercado: {market.upper()}")
-    print(f"   Fuente: {csv_path}")
-    
-    filter_query = build_filter_query(market)
-    nutriment_columns = ', '.join([f'"{col}"' for col in NUTRIMENT_FIELDS.keys()])
-    
-    select_query = f"""
-    SELECT 
-        code,
-        product_name,
-        brands,
-        generic_name,
-        nutriscore_grade,
-        categories_tags,
-        countries_tags,
-        brands_tags,
-        {nutriment_columns}
-    FROM read_csv_auto('{csv_path}', 
+def csv_source_sql(csv_path: Path) -> str:
+    """Expresion FROM de DuckDB para leer el dump TSV de Open Food Facts."""
+    return f"""read_csv_auto('{csv_path}', 
         header=true, 
         delim='\\t',
         quote='"',
         escape='"',
         nullstr='',
         ignore_errors=true
-    )
-    WHERE {filter_query}
-    """
+    )"""
+
+
+def export_columns() -> List[str]:
+    """Columnas del dump que necesita el exportador."""
+    base_columns = [
+        'code', 'product_name', 'brands', 'generic_name', 'nutriscore_grade',
+        'categories_tags', 'countries_tags', 'brands_tags',
+    ]
+    return base_columns + [f'"{col}"' for col in NUTRIMENT_FIELDS.keys()]
+
+
+def staging_columns() -> List[str]:
+    """Columnas de la proyeccion cacheada: las exportadas mas las que usan los predicados."""
+    return export_columns() + ['categories'] + TIER_COLUMNS
+
+
+def build_product(row_dict: Mapping[str, Any]) -> Dict[str, Any]:
+    """Registro de exportacion completo (perfil 'full') a partir de una fila del dump."""
+    nutriscore = row_dict.get('nutriscore_grade')
+    if nutriscore not in ['a', 'b', 'c', 'd', 'e']:
+        nutriscore = None
+    
+    brands_val = row_dict.get('brands')
+    generic_val = row_dict.get('generic_name')
     
-    result = conn.execute(select_query).fetchdf()
+    return {
+        'code': str(row_dict.get('code', '')).strip(),
+        'name': get_product_name(row_dict),
+        'brands': str(brands_val).strip() if is_valid_string(brands_val) else None,
+        'generic_name': str(generic_val).strip() if is_valid_string(generic_val) else None,
+        'nutriscore': nutriscore,
+        'nutriments': build_nutriments_dict(row_dict),
+        'categories': clean_categories(row_dict.get('categories_tags')),
+    }
+
+
+def process_and_export(conn: 'duckdb.DuckDBPyConnection', output_path: Path, market: str, csv_path: Path,
+                       profile: str = DEFAULT_PROFILE, field_report: bool = False,
+                       filter_cache: Optional['FilterCache'] = None,
+                       tier_sizes: Optional[Tuple[int, int]] = None, order: str = 'source',
+                       taxonomy: Optional['Taxonomy'] = None, facets: bool = False, quality: bool = False) -> int:
+    print(f"\n[FILTRO] Filtrando productos para mercado: {market.upper()}")
+    print(f"   Fuente: {csv_path}")
+    print(f"   Perfil de campos: {profile}")
+    
+    columns = export_columns() + (TIER_COLUMNS if tier_sizes else [])
+    if filter_cache is not None:
+        result = filter_cache.fetch_candidates(build_group_predicates(market), columns)
+    else:
+        select_query = f"""
+        SELECT {', '.join(columns)}
+        FROM {csv_source_sql(csv_path)}
+        WHERE {build_filter_query(market)}
+        """
+        result = conn.execute(select_query).fetchdf()
     total_found = len(result)
     print(f"   Productos encontrados: {total_found:,}")
     
@@ -436,34 +497,70 @@ def process_and_export(conn: duckdb.DuckDBPyConnection, output_path: Path, marke
         result = result.sort_values(['priority_score', 'completeness_score'], ascending=[False, False]).head(TARGET_MAX_PRODUCTS)
         result = result.drop(columns=['completeness_score', 'priority_score'])
     
+    if order == 'locality':
+        # Import diferido: agrupa marca/categoria/nombre para que deflate encuentre repeticiones
+        from food_ordering import order_dataframe
+        print("   Ordenando por localidad (marca, categoria, nombre, codigo)...")
+        result = order_dataframe(result)
+    
+    category_taxonomy = taxonomy
+    
+    facet_dictionary = None
+    if facets:
+        # Import diferido: ids de marca/categoria estables entre builds (food_facets.json)
+        from food_facets import FacetDictionary, FACETS_FILENAME
+        facet_dictionary = FacetDictionary.load(output_path.parent / FACETS_FILENAME)
+    
+    tier_writer = None
+    if tier_sizes:
+        # Import diferido: solo --tiers necesita food_tiers
+        from food_tiers import TierWriter, assign_tiers
+        tiers = assign_tiers(result, *tier_sizes)
+        tier_writer = TierWriter(output_path.parent, market, profile)
+    
+    require_dependencies('tqdm')
     print(f"\n[EXPORT] Exportando: {output_path.name}")
     count = 0
     jsonl_temp = output_path.with_suffix('')
     
+    report_sample = []
+    
     with open(jsonl_temp, 'w', encoding='utf-8') as f:
-        for _, row in tqdm(result.iterrows(), total=len(result), desc="Procesando"):
+        for index, row in tqdm(result.iterrows(), total=len(result), desc="Procesando"):
             row_dict = row.to_dict()
-            nutriments = build_nutriments_dict(row_dict)
-            categories = clean_categories(row_dict.get('categories_tags'))
-            nutriscore = row_dict.get('nutriscore_grade')
-            if nutriscore not in ['a', 'b', 'c', 'd', 'e']:
-                nutriscore = None
-            
-            brands_val = row_dict.get('brands')
-            generic_val = row_dict.get('generic_name')
-            
-            product = {
-                'code': str(row_dict.get('code', '')).strip(),
-                'name': get_product_name(row_dict),
-                'brands': str(brands_val).strip() if is_valid_string(brands_val) else None,
-                'generic_name': str(generic_val).strip() if is_valid_string(generic_val) else None,
-                'nutriscore': nutriscore,
-                'nutriments': nutriments,
-                'categories': categories,
-            }
-            f.write(json.dumps(product, ensure_ascii=False) + '\n')
+            record = build_product(row_dict)
+            if category_taxonomy is not None:
+                record['category_ids'] = category_taxonomy.product_ids(row_dict.get('categories_tags'))
+            if facet_dictionary is not None:
+                record['brand_ids'] = facet_dictionary.brand_ids(record['brands'])
+            product = project_product(record, profile)
+            line = dumps_product(product)
+            f.write(line + '\n')
+            if tier_writer is not None:
+                tier_writer.write(int(tiers.at[index, 'tier']), line, float(tiers.at[index, 'score']),
+                                  float(tiers.at[index, 'scans']))
+            if field_report and len(report_sample) < REPORT_SAMPLE_SIZE:
+                report_sample.append(product)
             count += 1
     
+    if facet_dictionary is not None:
+        facet_dictionary.finish_market(market)
+        facets_path = facet_dictionary.save(output_path.parent / FACETS_FILENAME)
+        print(f"[FACETAS] {facets_path.name}: {len(facet_dictionary.entries['brands']):,} marcas")
+    
+    if tier_writer is not None:
+        tiers_index = tier_writer.close()
+        print(f"[NIVELES] {tiers_index.name}")
+    
+    if field_report:
+        print_field_report(field_byte_report(report_sample), f"{output_path.name} (perfil {profile})")
+    
+    if quality:
+        # Import diferido: agregados vectorizados sobre las mismas filas exportadas
+        from food_quality import build_profile, frame_from_dump_rows, write_profile, quality_path, print_profile
+        quality_profile = build_profile(frame_from_dump_rows(result), market, MARKETS[market]['countries'])
+        print_profile(quality_profile, write_profile(quality_profile, quality_path(output_path.parent, market)))
+    
     # Comprimir
     print(f"[COMPRESION] Comprimiendo...")
     with open(jsonl_temp, 'rb') as f_in:
@@ -487,7 +584,31 @@ def show_statistics(output_path: Path, count: int, market: str):
     print("="*60)
 
 
-def process_market(market: str, conn: duckdb.DuckDBPyConnection, csv_path: Path) -> bool:
+def build_shared_taxonomy(conn: 'duckdb.DuckDBPyConnection', csv_path: Path) -> 'Taxonomy':
+    """
+    Taxonomia de los productos que cumplen el filtro de algun mercado, guardada
+    en food_taxonomy.json: una por ejecucion, con los mismos ids en todos los subsets.
+    """
+    # Import diferido: solo --taxonomy necesita food_taxonomy
+    from food_taxonomy import build_taxonomy, iter_dump_categories, taxonomy_path, TAXONOMY_FILENAME
+    print("\n[TAXONOMIA] Infiriendo taxonomia de categorias (union de mercados)...")
+    where = ' OR '.join(f"({build_filter_query(market)})" for market in MARKETS)
+    category_taxonomy = build_taxonomy(list(iter_dump_categories(csv_path, conn, where=where)))
+    category_taxonomy.save(taxonomy_path(WORK_DIR))
+    print(f"   [TAXONOMIA] {len(category_taxonomy):,} categorias -> {TAXONOMY_FILENAME}")
+    return category_taxonomy
+
+
+def process_market(market: str, conn: 'duckdb.DuckDBPyConnection', csv_path: Path,
+                   profile: str = DEFAULT_PROFILE, field_report: bool = False,
+                   filter_cache: Optional['FilterCache'] = None, nutrient_index: bool = False,
+                   tier_sizes: Optional[Tuple[int, int]] = None, order: str = 'source',
+                   alternatives: bool = False, taxonomy: bool = False, facets: bool = False,
+                   quality: bool = False, shared_taxonomy: Optional['Taxonomy'] = None) -> bool:
+    """
+    Con `taxonomy` se añaden category_ids usando `shared_taxonomy` (main la
+    construye una vez para todos los mercados); si no se pasa, se construye aqui.
+    """
     if market not in MARKETS:
         print(f"[ERROR] Mercado no soportado: {market}")
         return False
@@ -497,11 +618,27 @@ def process_market(market: str, conn: duckdb.DuckDBPyConnection, csv_path: Path)
         output_path.unlink()
     
     try:
-        count = process_and_export(conn, output_path, market, csv_path)
+        if taxonomy and shared_taxonomy is None:
+            shared_taxonomy = build_shared_taxonomy(conn, csv_path)
+        count = process_and_export(conn, output_path, market, csv_path, profile, field_report, filter_cache,
+                                   tier_sizes, order, shared_taxonomy if taxonomy else None, facets, quality)
         if count == 0:
             print(f"[ERROR] No se encontraron productos para {market}")
             return False
         show_statistics(output_path, count, market)
+        if tier_sizes:
+            from food_tiers import print_tiers, tiers_index_path
+            print_tiers(tiers_index_path(output_path.parent, market), output_path.stat().st_size)
+        if nutrient_index:
+            # Import diferido: numpy solo hace falta para este paso
+            from food_nutrient_index import build_index
+            build_index(output_path)
+        if alternatives:
+            from food_alternatives import build_index as build_alternatives
+            build_alternatives(output_path)
+        if facets:
+            from food_facets import facet_report, FACETS_FILENAME
+            facet_report(output_path, output_path.parent / FACETS_FILENAME)
         return True
     except Exception as e:
         print(f"[ERROR] Procesando {market}: {e}")
@@ -510,16 +647,76 @@ def process_market(market: str, conn: duckdb.DuckDBPyConnection, csv_path: Path)
         return False
 
 
+def estimate_subset(market: str, conn: 'duckdb.DuckDBPyConnection', csv_path: Path, profile: str,
+                    fraction: float, staging_path: Optional[Path] = None,
+                    fixture_path: Optional[Path] = None) -> bool:
+    print(f"\n[ESTIMACION] Muestreando para mercado: {market.upper()}")
+    try:
+        estimate = estimate_market(
+            conn, market, MARKETS[market], build_filter_query(market), export_columns(),
+            lambda row: dumps_product(project_product(build_product(row), profile)),
+            csv_path, csv_source_sql, staging_path=staging_path, fraction=fraction,
+            fixture_path=fixture_path,
+        )
+    except Exception as e:
+        print(f"[ERROR] Estimando {market}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    print_estimate(estimate, format_size, TARGET_MAX_PRODUCTS)
+    return True
+
+
 def get_csv_path_for_market(market: str) -> Path:
     """Retorna el path del CSV. Todos los mercados usan el mismo dump global."""
     return WORK_DIR / "openfoodfacts_products.csv.gz"
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='Crear subsets de Open Food Facts por mercado')
     parser.add_argument('market', choices=['spain', 'usa', 'all'], help='Mercado a procesar')
     parser.add_argument('--keep-csv', action='store_true', help='Mantener CSV descargado')
-    args = parser.parse_args()
+    parser.add_argument('--profile', choices=list(PROFILES), default=DEFAULT_PROFILE,
+                        help='Perfil de campos a exportar (ver food_projection.py)')
+    parser.add_argument('--field-report', action='store_true', help='Informe de bytes por campo en la salida')
+    parser.add_argument('--filter-cache', action='store_true',
+                        help='Reutilizar resultados cacheados por grupo de predicados (ver food_filter_cache.py)')
+    parser.add_argument('--filter-cache-max-gb', type=float, default=DEFAULT_CACHE_MAX_GB,
+                        help='Tamaño maximo de la cache de filtros')
+    parser.add_argument('--estimate', action='store_true',
+                        help='Solo estimar tamaño y composicion con una muestra (no exporta)')
+    parser.add_argument('--sample-fraction', type=float, default=DEFAULT_SAMPLE_FRACTION,
+                        help='Fraccion de bloques a muestrear en --estimate')
+    parser.add_argument('--save-fixture', type=Path, help='Guardar la muestra de --estimate como .csv.gz')
+    parser.add_argument('--nutrient-index', action='store_true',
+                        help='Generar el indice de metricas nutricionales junto al subset (ver food_nutrient_index.py)')
+    parser.add_argument('--alternatives', action='store_true',
+                        help='Generar el indice de alternativas mas saludables (ver food_alternatives.py)')
+    parser.add_argument('--taxonomy', action='store_true',
+                        help='Añadir category_ids y la tabla de cierre de categorias (ver food_taxonomy.py)')
+    parser.add_argument('--facets', action='store_true',
+                        help='Añadir brand_ids y food_facets.json (ver food_facets.py)')
+    parser.add_argument('--quality-profile', action='store_true',
+                        help='Perfil de calidad de datos y diff con el build anterior (ver food_quality.py)')
+    parser.add_argument('--archive', action='store_true',
+                        help='Guardar el dump como snapshot Parquet en el archivo historico (ver food_archive.py)')
+    parser.add_argument('--barcode-filter', action='store_true',
+                        help='Generar el filtro de codigos de barras de todo el dump (ver food_barcode_filter.py)')
+    parser.add_argument('--gzip-index', action='store_true',
+                        help='Indexar el dump para lecturas aleatorias y en paralelo (ver food_gzip_index.py)')
+    parser.add_argument('--tiers', action='store_true',
+                        help='Repartir tambien la salida en niveles hot/cold con manifest (ver food_tiers.py)')
+    parser.add_argument('--hot-size', type=int, default=50_000, help='Productos del nivel hot con --tiers')
+    parser.add_argument('--cold-size', type=int, default=250_000, help='Productos por nivel cold con --tiers')
+    parser.add_argument('--overlays', action='store_true',
+                        help='Generar base compartida + overlays por mercado (ver food_overlays.py)')
+    parser.add_argument('--order', choices=['source', 'locality'], default='source',
+                        help='Orden de filas: el de la consulta o agrupado por localidad (ver food_ordering.py)')
+    args = parser.parse_args(argv)
+    if args.alternatives and 'categories' not in PROFILES[args.profile]['fields']:
+        # Los bloques de vecinos salen de 'categories': sin el campo el indice quedaria vacio
+        parser.error(f"--alternatives necesita el campo 'categories' (el perfil {args.profile} lo elimina)")
+    require_dependencies('duckdb', 'tqdm')
     
     start_time = time.time()
     print("="*60)
@@ -530,6 +727,9 @@ def main():
     markets = ['spain', 'usa'] if args.market == 'all' else [args.market]
     
     results = {}
+    barcode_filter_built = False
+    shared_taxonomy = None
+    dump_archived = False
     
     for market in markets:
         print(f"\n{'='*60}")
@@ -556,13 +756,58 @@ def main():
         # Procesar este mercado
         print(f"\n[DUCKDB] Inicializando para {market}...")
         conn = create_duckdb_connection()
-        results[market] = process_market(market, conn, csv_path)
+        if args.barcode_filter and not barcode_filter_built:
+            # El filtro cubre el dump global: una vez aunque se procesen varios mercados
+            from food_barcode_filter import build_filter
+            build_filter(csv_path, conn=conn)
+            barcode_filter_built = True
+        if args.archive and not dump_archived:
+            # Snapshot del dump global antes de que la limpieza borre el CSV
+            from food_archive import DumpArchive
+            DumpArchive(conn=conn).add_snapshot(csv_path)
+            dump_archived = True
+        if args.taxonomy and shared_taxonomy is None and not args.estimate:
+            # Union de todos los mercados: mismos category_ids en cada subset
+            shared_taxonomy = build_shared_taxonomy(conn, csv_path)
+        if args.gzip_index:
+            # Solo si falta o el dump ha cambiado; --estimate lo usa para muestrear
+            from food_gzip_index import DumpIndex, build_index
+            if DumpIndex.load(csv_path) is None:
+                build_index(csv_path)
+        filter_cache = None
+        if args.filter_cache or args.estimate:
+            filter_cache = FilterCache(
+                conn, csv_path, csv_source_sql(csv_path), staging_columns(),
+                max_bytes=int(args.filter_cache_max_gb * 1024**3),
+            )
+        if args.estimate:
+            results[market] = estimate_subset(market, conn, csv_path, args.profile, args.sample_fraction,
+                                              filter_cache.find_staging(), args.save_fixture)
+        else:
+            results[market] = process_market(market, conn, csv_path, args.profile, args.field_report,
+                                             filter_cache if args.filter_cache else None, args.nutrient_index,
+                                             (args.hot_size, args.cold_size) if args.tiers else None, args.order,
+                                             args.alternatives, args.taxonomy, args.facets, args.quality_profile,
+                                             shared_taxonomy)
         conn.close()
         
-        # Limpiar CSV si no se quiere mantener
-        if not args.keep_csv and csv_path.exists():
+        # Limpiar CSV si no se quiere mantener (la cache de filtros va ligada a este dump
+        # y --estimate es un paso previo a la exportacion)
+        if not (args.keep_csv or args.filter_cache or args.estimate) and csv_path.exists():
             print(f"[LIMPIEZA] Eliminando CSV de {market}...")
             csv_path.unlink()
+            for index_path in csv_path.parent.glob(csv_path.name + '.gzidx*'):
+                index_path.unlink()
+    
+    if args.overlays:
+        # Usa los subsets de todos los mercados presentes (los de este build y los anteriores)
+        subsets = {m: WORK_DIR / MARKETS[m]['filename'] for m in MARKETS
+                   if results.get(m, True) and (WORK_DIR / MARKETS[m]['filename']).exists()}
+        if len(subsets) < 2:
+            print("\n[AVISO] --overlays necesita los subsets de al menos dos mercados (usa 'all')")
+        else:
+            from food_overlays import build_overlays
+            build_overlays(subsets, WORK_DIR)
     
     # Resumen final
     elapsed = time.time() - start_time
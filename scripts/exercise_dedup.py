@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Detector de ejercicios duplicados o casi duplicados.
+
+El catalogo mezcla grafias con y sin acento ("búlgara"/"bulgara",
+"máquina"/"maquina") y variantes casi identicas ("Pullover con mancuernas" /
+"Pullover con mancuerna"). Este analizador:
+
+    1. Canonicaliza el nombre: sin acentos, minusculas, sin palabras vacias
+       ("con", "en", "de"...) y con un plural simple recortado.
+    2. Agrupa directamente los nombres con la misma forma canonica.
+    3. Para el resto usa MinHash sobre n-gramas de caracteres y LSH por
+       bandas (blocking): solo se comparan pares que comparten alguna banda,
+       asi que el coste es casi lineal en el tamaño del catalogo. Los pares
+       candidatos se filtran antes con el Jaccard estimado por las firmas.
+    4. Verifica cada par candidato con Jaccard exacto y exige que cada
+       palabra tenga una parecida en el otro nombre ("inclinado" no casa con
+       "declinado"). Los pares que pasan se unen (union-find) en clusters.
+
+Cada cluster propone un id canonico (el mas antiguo) y alias para el resto.
+Con --write-aliases los alias se guardan en exercise_id_ledger.json
+("aliases": {"id duplicado": id canonico}) para que plantillas, alternativas
+y caches del dispositivo puedan redirigir los ids antiguos.
+
+INSTALACION DE DEPENDENCIAS:
+    pip install numpy
+
+EJECUCION:
+    python scripts/exercise_dedup.py
+    python scripts/exercise_dedup.py --threshold 0.7 --output duplicados.json
+    python scripts/exercise_dedup.py --source terceros.json     # lista externa
+    python scripts/exercise_dedup.py --write-aliases
+    python scripts/exercise_dedup.py --bench 50000
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: Falta dependencia numpy")
+    print("Instala con: pip install numpy")
+    sys.exit(1)
+
+from exercise_merge import DATA_DIR, EXERCISES_FILE, LEDGER_FILE, IdLedger, load_json, normalize_name, write_if_changed
+
+
+STOPWORDS = {'con', 'en', 'de', 'del', 'la', 'el', 'los', 'las', 'a', 'al', 'y', 'sobre'}
+
+NGRAM = 3
+NUM_PERM = 64
+BANDS = 8             # 8 bandas x 8 filas: umbral LSH efectivo ~0.77
+DEFAULT_THRESHOLD = 0.75
+TOKEN_THRESHOLD = 0.6  # "inclinado"/"declinado" = 0.5: palabras distintas
+MAX_BUCKET = 50        # buckets mayores son palabras comunes, no duplicados
+SIGNATURE_CHUNK = 2048
+ESTIMATE_MARGIN = 0.1  # error tipico de MinHash con 64 permutaciones ~0.06
+MAX_HASH = (1 << 32) - 1
+
+
+# =============================================================================
+# CANONICALIZACION Y FIRMAS
+# =============================================================================
+
+def _singular(token: str) -> str:
+    if len(token) > 4 and token.endswith('es') and token[-3] not in 'aeiou':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def canonical_name(name: str) -> str:
+    """Forma canonica para comparar: sin acentos, sin palabras vacias, en singular."""
+    tokens = normalize_name(name).replace('-', ' ').replace('(', ' ').replace(')', ' ').split()
+    return ' '.join(_singular(t) for t in tokens if t not in STOPWORDS)
+
+
+def shingle_list(text: str, n: int = NGRAM) -> List[str]:
+    """n-gramas en orden de aparicion (el orden hace deterministas los ids del MinHasher)."""
+    padded = f" {text} "
+    if len(padded) <= n:
+        return [padded]
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+def shingles(text: str, n: int = NGRAM) -> set:
+    return set(shingle_list(text, n))
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def tokens_aligned(a: str, b: str, threshold: float = TOKEN_THRESHOLD) -> bool:
+    """
+    Cada palabra de un nombre tiene una parecida en el otro. Evita unir
+    nombres con n-gramas similares pero una palabra que los distingue
+    ("press inclinado" / "press declinado", "peso muerto" / "peso muerto sumo").
+    """
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    if tokens_a == tokens_b:
+        return True
+    only_a, only_b = tokens_a - tokens_b, tokens_b - tokens_a
+    if not only_a or not only_b:
+        return False
+    for source, target in ((only_a, only_b), (only_b, only_a)):
+        for token in source:
+            grams = shingles(token)
+            if not any(jaccard(grams, shingles(other)) >= threshold for other in target):
+                return False
+    return True
+
+
+class MinHasher:
+    """
+    Firmas MinHash vectorizadas. Cada n-grama recibe un id entero y cada
+    permutacion es un hash multiply-shift: (a*x + b) mod 2^64 >> 32, con a
+    impar (el desbordamiento de uint64 hace el modulo gratis).
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64) << np.uint64(32) | \
+            rng.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64) << np.uint64(32)
+        self.vocab: Dict[str, int] = {}
+
+    def signatures(self, gram_sets: List[List[str]]) -> np.ndarray:
+        """Matriz (n, num_perm) procesando los n-gramas de varias filas a la vez."""
+        result = np.empty((len(gram_sets), len(self.a)), dtype=np.uint64)
+        for start in range(0, len(gram_sets), SIGNATURE_CHUNK):
+            chunk = gram_sets[start:start + SIGNATURE_CHUNK]
+            lengths = np.fromiter((len(g) for g in chunk), dtype=np.int64, count=len(chunk))
+            vocab = self.vocab
+            ids = np.fromiter((vocab.setdefault(gram, len(vocab) + 1) for grams in chunk for gram in grams),
+                              dtype=np.uint64, count=int(lengths.sum()))
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            permuted = (ids[:, None] * self.a[None, :] + self.b[None, :]) >> np.uint64(32)
+            result[start:start + len(chunk)] = np.minimum.reduceat(permuted, offsets, axis=0)
+        return result
+
+
+# =============================================================================
+# UNION-FIND
+# =============================================================================
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # La raiz es siempre la fila menor: el canonico sale estable
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+# =============================================================================
+# DETECCION
+# =============================================================================
+
+def find_duplicates(exercises: List[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD,
+                    bands: int = BANDS, num_perm: int = NUM_PERM,
+                    max_bucket: int = MAX_BUCKET) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Devuelve (clusters, estadisticas). Cada cluster trae el id canonico
+    sugerido, los miembros y la similitud minima verificada del cluster.
+    """
+    rows_per_band = num_perm // bands
+    canon = [canonical_name(e['nombre']) for e in exercises]
+    gram_lists = [shingle_list(c) for c in canon]
+    grams = [set(g) for g in gram_lists]
+    uf = UnionFind(len(exercises))
+    similarity: Dict[Tuple[int, int], float] = {}
+
+    # 1. Misma forma canonica: duplicado seguro
+    by_canon: Dict[str, int] = {}
+    exact_pairs = 0
+    for row, key in enumerate(canon):
+        if key in by_canon:
+            uf.union(by_canon[key], row)
+            similarity[(by_canon[key], row)] = 1.0
+            exact_pairs += 1
+        else:
+            by_canon[key] = row
+
+    # 2. LSH por bandas sobre los representantes de cada forma canonica
+    hasher = MinHasher(num_perm)
+    representatives = list(by_canon.values())
+    signatures = hasher.signatures([gram_lists[row] for row in representatives])
+    buckets: Dict[Tuple[int, bytes], List[int]] = {}
+    for band in range(bands):
+        band_rows = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+        for position, key in enumerate(band_rows):
+            buckets.setdefault((band, key.tobytes()), []).append(position)
+
+    candidates = set()
+    oversized = 0
+    for members in buckets.values():
+        if len(members) > max_bucket:
+            oversized += 1
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                candidates.add((a, b))
+
+    # 3. Prefiltro vectorizado con el Jaccard estimado por MinHash (con margen)
+    pairs = np.array(sorted(candidates), dtype=np.int64).reshape(-1, 2)
+    kept = []
+    for start in range(0, len(pairs), SIGNATURE_CHUNK * 16):
+        chunk = pairs[start:start + SIGNATURE_CHUNK * 16]
+        estimate = (signatures[chunk[:, 0]] == signatures[chunk[:, 1]]).mean(axis=1)
+        kept.append(chunk[estimate >= threshold - ESTIMATE_MARGIN])
+    pairs = np.concatenate(kept) if kept else pairs
+
+    # 4. Verificacion exacta: Jaccard de n-gramas y alineacion por palabras
+    verified = 0
+    for pa, pb in pairs.tolist():
+        a, b = representatives[pa], representatives[pb]
+        score = jaccard(grams[a], grams[b])
+        if score >= threshold and tokens_aligned(canon[a], canon[b]):
+            uf.union(a, b)
+            similarity[(a, b)] = score
+            verified += 1
+
+    groups: Dict[int, List[int]] = {}
+    for row in range(len(exercises)):
+        groups.setdefault(uf.find(row), []).append(row)
+    cluster_scores: Dict[int, List[float]] = {}
+    for (a, _), score in similarity.items():
+        cluster_scores.setdefault(uf.find(a), []).append(score)
+
+    clusters = []
+    for root, rows in groups.items():
+        if len(rows) < 2:
+            continue
+        members = sorted(rows, key=lambda r: (exercises[r].get('id', 1 << 62), r))
+        scores = cluster_scores.get(root, [])
+        canonical = exercises[members[0]]
+        clusters.append({
+            'canonical': {'id': canonical.get('id'), 'nombre': canonical['nombre']},
+            'aliases': [{'id': exercises[r].get('id'), 'nombre': exercises[r]['nombre']} for r in members[1:]],
+            'min_similarity': round(min(scores), 3) if scores else None,
+            'same_group': len({exercises[r].get('grupoMuscular') for r in members}) == 1,
+            'same_equipment': len({normalize_name(exercises[r].get('equipo') or '') for r in members}) == 1,
+        })
+    clusters.sort(key=lambda c: (c['min_similarity'] is None, -(c['min_similarity'] or 0), c['canonical']['nombre']))
+
+    stats = {
+        'exercises': len(exercises),
+        'canonical_forms': len(representatives),
+        'exact_pairs': exact_pairs,
+        'candidate_pairs': len(candidates),
+        'estimated_pairs': len(pairs),
+        'oversized_buckets': oversized,
+        'verified_pairs': verified,
+        'clusters': len(clusters),
+    }
+    return clusters, stats
+
+
+def alias_map(clusters: List[Dict[str, Any]]) -> Dict[str, int]:
+    """{id duplicado (str): id canonico} para los clusters con ids."""
+    aliases = {}
+    for cluster in clusters:
+        canonical_id = cluster['canonical']['id']
+        if canonical_id is None:
+            continue
+        for alias in cluster['aliases']:
+            if alias['id'] is not None:
+                aliases[str(alias['id'])] = canonical_id
+    return aliases
+
+
+def print_clusters(clusters: List[Dict[str, Any]], stats: Dict[str, int], elapsed: float, limit: int = 50):
+    print("\n" + "="*60)
+    print("POSIBLES DUPLICADOS")
+    print("="*60)
+    print(f"   Ejercicios:          {stats['exercises']:,}")
+    print(f"   Formas canonicas:    {stats['canonical_forms']:,}")
+    print(f"   Pares candidatos:    {stats['candidate_pairs']:,} (LSH)")
+    if stats['oversized_buckets']:
+        print(f"   Buckets ignorados:   {stats['oversized_buckets']:,} (> {MAX_BUCKET} miembros)")
+    print(f"   Tras estimar MinHash:{stats['estimated_pairs']:>8,}")
+    print(f"   Pares verificados:   {stats['verified_pairs'] + stats['exact_pairs']:,}")
+    print(f"   Clusters:            {stats['clusters']:,}")
+    print(f"   Tiempo:              {elapsed:.2f}s")
+    for cluster in clusters[:limit]:
+        similarity = cluster['min_similarity']
+        flags = []
+        if not cluster['same_group']:
+            flags.append('distinto grupo')
+        if not cluster['same_equipment']:
+            flags.append('distinto equipo')
+        print(f"\n   [{similarity if similarity is not None else '-'}] "
+              f"{cluster['canonical']['id']} {cluster['canonical']['nombre']}"
+              + (f"  ({', '.join(flags)})" if flags else ''))
+        for alias in cluster['aliases']:
+            print(f"      <- {alias['id']} {alias['nombre']}")
+    if len(clusters) > limit:
+        print(f"\n   ... y {len(clusters) - limit} clusters más")
+    print("="*60)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def synthetic_with_duplicates(size: int, dup_rate: float = 0.05, seed: int = 11) -> Tuple[List[Dict[str, Any]], int]:
+    """Catalogo sintetico con variantes (acentos, plurales, mayusculas) inyectadas."""
+    rng = random.Random(seed)
+    movements = ['press', 'curl', 'remo', 'sentadilla', 'zancada', 'elevación', 'extensión', 'jalón',
+                 'apertura', 'peso muerto', 'hip thrust', 'fondos', 'pullover', 'encogimiento']
+    modifiers = ['inclinado', 'declinado', 'lateral', 'frontal', 'búlgara', 'sumo', 'cerrado', 'abierto',
+                 'unilateral', 'alterno', 'sentado', 'de pie', 'tumbado', 'con pausa', 'excéntrico']
+    equipment = ['barra', 'mancuernas', 'máquina', 'polea', 'kettlebell', 'bandas', 'landmine']
+    syllables = ['ka', 'ro', 'ti', 'ben', 'sal', 'mu', 'dor', 'zi', 'pe', 'lan', 'vo', 'gra', 'che', 'tus', 'ni']
+    exercises = []
+    seen = set()
+    while len(exercises) < size * (1 - dup_rate):
+        # Nombre propio inventado (variantes de autor, marcas de maquina...)
+        proper = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        name = f"{rng.choice(movements)} {rng.choice(modifiers)} {proper} con {rng.choice(equipment)}"
+        if name not in seen:
+            seen.add(name)
+            exercises.append({'id': 100 + len(exercises), 'nombre': name.capitalize()})
+    originals = len(exercises)
+    while len(exercises) < size:
+        base = exercises[rng.randrange(originals)]['nombre']
+        variant = normalize_name(base) if rng.random() < 0.5 else base.replace('mancuernas', 'mancuerna')
+        exercises.append({'id': 100 + len(exercises), 'nombre': variant.upper() if rng.random() < 0.3 else variant})
+    return exercises, size - originals
+
+
+def run_benchmark(size: int, threshold: float):
+    exercises, injected = synthetic_with_duplicates(size)
+    start = time.perf_counter()
+    clusters, stats = find_duplicates(exercises, threshold)
+    elapsed = time.perf_counter() - start
+    found = sum(len(c['aliases']) for c in clusters)
+    print(f"Catalogo sintetico: {size:,} ejercicios, {injected:,} variantes inyectadas")
+    print(f"   Tiempo:             {elapsed:.2f}s ({size / elapsed:,.0f} ejercicios/s)")
+    print(f"   Pares candidatos:   {stats['candidate_pairs']:,} (vs {size * (size - 1) // 2:,} todos contra todos)")
+    print(f"   Alias propuestos:   {found:,}")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Detecta ejercicios duplicados o casi duplicados')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--source', type=Path, help='Analizar otra lista de ejercicios (JSON)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Jaccard minimo de n-gramas para considerar duplicado')
+    parser.add_argument('--output', type=Path, help='Guardar clusters y alias sugeridos en JSON')
+    parser.add_argument('--write-aliases', action='store_true',
+                        help='Registrar los alias sugeridos en el ledger de ids')
+    parser.add_argument('--bench', type=int, metavar='N', help='Medir con un catalogo sintetico de N ejercicios')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        run_benchmark(args.bench, args.threshold)
+        return
+
+    exercises = load_json(args.source or args.data_dir / EXERCISES_FILE)
+    start = time.perf_counter()
+    clusters, stats = find_duplicates(exercises, args.threshold)
+    print_clusters(clusters, stats, time.perf_counter() - start)
+
+    aliases = alias_map(clusters)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'stats': stats, 'clusters': clusters, 'aliases': aliases}, f, ensure_ascii=False, indent=2)
+        print(f"   [OK] Informe: {args.output}")
+
+    if args.write_aliases:
+        if args.source:
+            print("[ERROR] --write-aliases solo aplica al catalogo de la app")
+            sys.exit(1)
+        ledger_path = args.data_dir / LEDGER_FILE
+        ledger = IdLedger.load(ledger_path)
+        ledger.seed(exercises)
+        ledger.aliases.update(aliases)
+        if write_if_changed(ledger_path, ledger.to_json()):
+            print(f"   [OK] {len(aliases)} alias registrados en {ledger_path.name}")
+        else:
+            print(f"   Sin cambios en {ledger_path.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Merge incremental e idempotente del catalogo de ejercicios.
+
+El catalogo (exercises_local.json) se identifica por nombre normalizado
+(minusculas, sin acentos ni espacios repetidos). Los ids se guardan en un
+ledger persistente, de modo que nunca cambian entre ejecuciones:
+
+    exercise_id_ledger.json
+        {
+          "version": 1,
+          "nextId": 324,
+          "ids": {"press banca con barra": 100, ...}
+        }
+
+    - Un ejercicio que ya existe se actualiza en sitio (upsert): solo cambian
+      los campos que traen valor distinto; el id y el orden se conservan.
+    - Un ejercicio nuevo recibe el id del ledger si ya lo tuvo alguna vez, o
+      el siguiente libre. Los ids de ejercicios eliminados no se reutilizan.
+    - Los ficheros solo se reescriben si su contenido cambia, asi que repetir
+      la misma importacion es un no-op O(n).
+
+Si el ledger no existe se siembra con los ids actuales del catalogo.
+
+EJECUCION:
+    python scripts/exercise_merge.py nuevos.json              # importar lista externa
+    python scripts/exercise_merge.py nuevos.json --dry-run --report diff.json
+    python scripts/exercise_merge.py --seed-ledger            # solo crear/completar ledger
+"""
+
+import sys
+import json
+import argparse
+import unicodedata
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+
+DATA_DIR = Path(__file__).parent.parent / "assets" / "data"
+EXERCISES_FILE = "exercises_local.json"
+LEDGER_FILE = "exercise_id_ledger.json"
+
+LEDGER_VERSION = 1
+FIRST_ID = 100  # 100+ para no colisionar con ejercicios custom del usuario
+
+REQUIRED_FIELDS = ['nombre', 'grupoMuscular']
+
+
+def normalize_name(name: str) -> str:
+    """Clave de identidad: minusculas, sin acentos, espacios colapsados."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.lower().split())
+
+
+def load_json(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dumps_catalog(data: Any) -> str:
+    """Mismo formato que los ficheros versionados (indent=2, sin salto final)."""
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def write_if_changed(path: Path, data: Any) -> bool:
+    """Escribe `data` solo si difiere del contenido actual. Devuelve si escribio."""
+    text = dumps_catalog(data)
+    if path.exists() and path.read_text(encoding='utf-8') == text:
+        return False
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(text, encoding='utf-8')
+    tmp.replace(path)
+    return True
+
+
+# =============================================================================
+# LEDGER
+# =============================================================================
+
+class IdLedger:
+    """Asignacion persistente nombre normalizado -> id."""
+
+    def __init__(self, ids: Optional[Dict[str, int]] = None, next_id: int = FIRST_ID,
+                 aliases: Optional[Dict[str, int]] = None):
+        self.ids: Dict[str, int] = dict(ids or {})
+        # id duplicado (str) -> id canonico, ver exercise_dedup.py
+        self.aliases: Dict[str, int] = dict(aliases or {})
+        self.next_id = max([next_id] + [i + 1 for i in self.ids.values()])
+        self._used = set(self.ids.values())
+
+    @classmethod
+    def load(cls, path: Path) -> 'IdLedger':
+        if not path.exists():
+            return cls()
+        data = load_json(path)
+        return cls(data.get('ids', {}), data.get('nextId', FIRST_ID), data.get('aliases'))
+
+    def to_json(self) -> Dict[str, Any]:
+        data = {
+            'version': LEDGER_VERSION,
+            'nextId': self.next_id,
+            'ids': dict(sorted(self.ids.items(), key=lambda item: item[1])),
+        }
+        if self.aliases:
+            data['aliases'] = dict(sorted(self.aliases.items(), key=lambda item: int(item[0])))
+        return data
+
+    def resolve(self, exercise_id: int) -> int:
+        """Sigue la cadena de alias hasta el id canonico."""
+        seen = set()
+        while str(exercise_id) in self.aliases and exercise_id not in seen:
+            seen.add(exercise_id)
+            exercise_id = self.aliases[str(exercise_id)]
+        return exercise_id
+
+    def seed(self, exercises: List[Dict[str, Any]]) -> List[str]:
+        """Registra los ids ya presentes en el catalogo. Devuelve conflictos."""
+        conflicts = []
+        for exercise in exercises:
+            if 'id' not in exercise:
+                continue
+            key = normalize_name(exercise['nombre'])
+            known = self.ids.get(key)
+            if known is None:
+                if exercise['id'] in self._used:
+                    conflicts.append(f"id {exercise['id']} ya asignado en el ledger ({exercise['nombre']})")
+                    continue
+                self.ids[key] = exercise['id']
+                self._used.add(exercise['id'])
+                self.next_id = max(self.next_id, exercise['id'] + 1)
+            elif known != exercise['id'] and self.resolve(exercise['id']) != known:
+                conflicts.append(f"{exercise['nombre']}: catalogo {exercise['id']} / ledger {known}")
+        return conflicts
+
+    def assign(self, key: str) -> int:
+        if key not in self.ids:
+            self.ids[key] = self.next_id
+            self._used.add(self.next_id)
+            self.next_id += 1
+        return self.ids[key]
+
+
+# =============================================================================
+# MERGE
+# =============================================================================
+
+def _complete_structure(exercise: Dict[str, Any]) -> bool:
+    """Campos que la app espera siempre presentes. Devuelve si faltaba alguno."""
+    changed = False
+    if not exercise.get('muscles'):
+        exercise['muscles'] = [exercise['grupoMuscular']]
+        changed = True
+    if 'musculosSecundarios' not in exercise:
+        exercise['musculosSecundarios'] = []
+        changed = True
+    return changed
+
+
+def complete_catalog(catalog: List[Dict[str, Any]]) -> int:
+    """Completa la estructura de todo el catalogo, no solo de lo importado. Devuelve cuantos."""
+    return sum(_complete_structure(exercise) for exercise in catalog)
+
+
+def merge_exercises(catalog: List[Dict[str, Any]], incoming: List[Dict[str, Any]],
+                    ledger: IdLedger) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Upsert de `incoming` sobre `catalog` (que se modifica en sitio).
+
+    Los campos vacios de `incoming` no borran valores existentes. Devuelve el
+    catalogo y un informe {'added', 'updated', 'unchanged', 'skipped'}.
+    """
+    by_key: Dict[str, Dict[str, Any]] = {normalize_name(e['nombre']): e for e in catalog}
+    report: Dict[str, Any] = {'added': [], 'updated': [], 'unchanged': 0, 'skipped': []}
+
+    for item in incoming:
+        missing = [f for f in REQUIRED_FIELDS if not item.get(f)]
+        if missing:
+            report['skipped'].append({'item': item.get('nombre', '?'), 'reason': f"faltan {missing}"})
+            continue
+        key = normalize_name(item['nombre'])
+        current = by_key.get(key)
+
+        if current is None:
+            exercise = {k: v for k, v in item.items() if k != 'id'}
+            exercise['id'] = ledger.assign(key)
+            _complete_structure(exercise)
+            catalog.append(exercise)
+            by_key[key] = exercise
+            report['added'].append({'id': exercise['id'], 'nombre': exercise['nombre']})
+            continue
+
+        changes = {}
+        for field, value in item.items():
+            if field == 'id' or value in (None, '', []):
+                continue
+            if current.get(field) != value:
+                changes[field] = {'old': current.get(field), 'new': value}
+                current[field] = value
+        if changes:
+            _complete_structure(current)
+            report['updated'].append({'id': current['id'], 'nombre': current['nombre'], 'changes': changes})
+        else:
+            report['unchanged'] += 1
+    return catalog, report
+
+
+def fill_descriptions(catalog: List[Dict[str, Any]], descriptions: Dict[str, str]) -> int:
+    """Rellena descripciones vacias por nombre normalizado. Devuelve cuantas."""
+    by_key = {normalize_name(name): text for name, text in descriptions.items()}
+    filled = 0
+    for exercise in catalog:
+        text = by_key.get(normalize_name(exercise['nombre']))
+        if text and not exercise.get('descripcion'):
+            exercise['descripcion'] = text
+            filled += 1
+    return filled
+
+
+def print_report(report: Dict[str, Any]):
+    print("\n" + "="*60)
+    print("MERGE DEL CATALOGO")
+    print("="*60)
+    print(f"   Nuevos:       {len(report['added'])}")
+    print(f"   Actualizados: {len(report['updated'])}")
+    print(f"   Sin cambios:  {report['unchanged']}")
+    if report['skipped']:
+        print(f"   Descartados:  {len(report['skipped'])}")
+    for entry in report['added'][:20]:
+        print(f"   + {entry['id']} {entry['nombre']}")
+    for entry in report['updated'][:20]:
+        print(f"   ~ {entry['id']} {entry['nombre']}: {', '.join(entry['changes'])}")
+    for entry in report['skipped'][:20]:
+        print(f"   ! {entry['item']}: {entry['reason']}")
+    print("="*60)
+
+
+def run_merge(data_dir: Path, incoming: List[Dict[str, Any]],
+              descriptions: Optional[Dict[str, str]] = None, dry_run: bool = False,
+              report_path: Optional[Path] = None) -> Dict[str, Any]:
+    """Carga catalogo y ledger, aplica el merge y guarda solo lo que cambia."""
+    catalog_path = data_dir / EXERCISES_FILE
+    ledger_path = data_dir / LEDGER_FILE
+    catalog = load_json(catalog_path)
+    ledger = IdLedger.load(ledger_path)
+
+    conflicts = ledger.seed(catalog)
+    if conflicts:
+        print(f"[ERROR] {len(conflicts)} ids del catalogo no cuadran con el ledger:")
+        for conflict in conflicts[:20]:
+            print(f"   - {conflict}")
+        print("   Si son duplicados, registra alias con: python scripts/exercise_dedup.py --write-aliases")
+        sys.exit(1)
+
+    catalog, report = merge_exercises(catalog, incoming, ledger)
+    report['descriptions_filled'] = fill_descriptions(catalog, descriptions or {})
+    report['structure_completed'] = complete_catalog(catalog)
+    print_report(report)
+    if report['descriptions_filled']:
+        print(f"   Descripciones añadidas: {report['descriptions_filled']}")
+    if report['structure_completed']:
+        print(f"   Estructura completada (muscles/musculosSecundarios): {report['structure_completed']}")
+
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"   [OK] Informe: {report_path}")
+
+    if dry_run:
+        print("   (dry-run: no se escribe nada)")
+        return report
+    for path, data in ((catalog_path, catalog), (ledger_path, ledger.to_json())):
+        if write_if_changed(path, data):
+            print(f"   [OK] Guardado {path.name}")
+        else:
+            print(f"   Sin cambios en {path.name}")
+    return report
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Merge idempotente de ejercicios con ledger de ids')
+    parser.add_argument('source', type=Path, nargs='?', help='JSON con una lista de ejercicios a importar')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--dry-run', action='store_true', help='No escribir catalogo ni ledger')
+    parser.add_argument('--report', type=Path, help='Guardar el informe de diferencias en JSON')
+    parser.add_argument('--seed-ledger', action='store_true', help='Solo sembrar el ledger con el catalogo actual')
+    args = parser.parse_args(argv)
+
+    if not args.source and not args.seed_ledger:
+        parser.error('indica un fichero a importar o --seed-ledger')
+
+    incoming = load_json(args.source) if args.source else []
+    if not isinstance(incoming, list):
+        print(f"[ERROR] {args.source} debe contener una lista de ejercicios")
+        sys.exit(1)
+    run_merge(args.data_dir, incoming, dry_run=args.dry_run, report_path=args.report)
+
+
+if __name__ == "__main__":
+    main()
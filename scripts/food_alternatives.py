@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Indice precalculado de alternativas mas saludables.
+
+Para cada producto del subset guarda hasta K productos de su misma categoria
+(la mas especifica de las exportadas) con perfil nutricional parecido y que
+son mejores: Nutri-Score estrictamente mejor si ambos lo tienen o, si falta
+en alguno, una puntuacion de macros (menos kcal, azucar y grasa; mas
+proteina y fibra) mayor por un margen. La app solo lee la lista; no calcula
+similitudes en el dispositivo.
+
+Similitud: vector de los campos de NUTRIMENT_FIELDS (log1p y estandarizado),
+con los huecos rellenados con la mediana de la categoria. Las categorias se
+procesan por separado (blocking); en las grandes los vecinos son aproximados
+(celdas k-means dentro de la categoria y distancia exacta solo contra las
+celdas mas cercanas). --bench mide el recall frente a la busqueda exacta.
+
+Formato (food_index_blob.py), filas = posicion de la linea en el .jsonl.gz:
+    offsets      '<u4'  filas + 1; alternativas de la fila r en [offsets[r], offsets[r+1])
+    rows         '<u4'  filas alternativas, de mas a menos parecida
+    similarity   '<u1'  similitud cuantizada 0-255 (255 = mismo perfil)
+
+INSTALACION DE DEPENDENCIAS:
+    pip install numpy
+
+EJECUCION:
+    python food_alternatives.py spain_subset.jsonl.gz
+    python food_alternatives.py spain_subset.jsonl.gz --code 8410000000000
+    python food_alternatives.py spain_subset.jsonl.gz --bench
+    python create_food_subset.py spain --alternatives      # al exportar
+"""
+
+import sys
+import json
+import gzip
+import time
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: Falta dependencia numpy")
+    print("Instala con: pip install numpy")
+    sys.exit(1)
+
+from food_index_blob import BlobWriter, BlobReader
+from create_food_subset import NUTRIMENT_FIELDS
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+INDEX_KIND = 'alternatives'
+INDEX_SUFFIX = '_alternatives'
+
+FIELDS = list(NUTRIMENT_FIELDS.values())
+# Signo de cada campo en la puntuacion de macros (+ = mejor cuanto mas alto)
+HEALTH_WEIGHTS = {'energy_kcal': -1.0, 'proteins': 1.0, 'carbohydrates': 0.0,
+                  'fat': -1.0, 'fiber': 1.0, 'sugars': -1.5}
+NUTRISCORE_RANK = {'a': 0, 'b': 1, 'c': 2, 'd': 3, 'e': 4}
+
+DEFAULT_K = 5
+MIN_FIELDS = 3                # menos campos con dato: sin vector ni alternativas
+HEALTH_MARGIN = 0.25          # en desviaciones tipicas de la puntuacion de macros
+EXACT_BLOCK = 2000            # categorias hasta este tamaño: busqueda exacta
+PROBES = 12                   # celdas vecinas exploradas en las categorias grandes
+KMEANS_ITERATIONS = 6
+MATRIX_CELLS = 4_000_000      # distancias por trozo (busqueda exacta y celdas IVF)
+SEED = 42
+NO_ROW = np.iinfo(np.uint32).max
+
+
+def index_base_path(subset_path: Path) -> Path:
+    """spain_subset.jsonl.gz -> spain_alternatives (.json / .bin)."""
+    stem = Path(subset_path).name.split('.')[0]
+    market = stem[:-len('_subset')] if stem.endswith('_subset') else stem
+    return Path(subset_path).parent / f"{market}{INDEX_SUFFIX}"
+
+
+# =============================================================================
+# CARGA Y VECTORES
+# =============================================================================
+
+def load_subset(subset_path: Path) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """(nutrientes float64 filas x campos con NaN, rango Nutri-Score o -1, categoria mas especifica)."""
+    values: List[List[float]] = []
+    grades: List[int] = []
+    categories: List[str] = []
+    nan = float('nan')
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            product = json.loads(line)
+            nutriments = product.get('nutriments') or {}
+            values.append([nan if nutriments.get(key) is None else float(nutriments[key]) for key in FIELDS])
+            grades.append(NUTRISCORE_RANK.get(product.get('nutriscore'), -1))
+            names = product.get('categories') or []
+            categories.append(names[-1] if names else '')
+    return (np.array(values, dtype=np.float64).reshape(-1, len(FIELDS)),
+            np.array(grades, dtype=np.int8), categories)
+
+
+def build_vectors(raw: np.ndarray) -> np.ndarray:
+    """log1p + estandarizacion global por campo. NaN se mantiene (se rellena por categoria)."""
+    scaled = np.log1p(np.clip(raw, 0, None))
+    mean = np.nanmean(scaled, axis=0)
+    std = np.nanstd(scaled, axis=0)
+    std[~(std > 0)] = 1.0
+    return ((scaled - np.nan_to_num(mean)) / std).astype(np.float32)
+
+
+def health_scores(vectors: np.ndarray) -> np.ndarray:
+    weights = np.array([HEALTH_WEIGHTS.get(key, 0.0) for key in FIELDS], dtype=np.float32)
+    return vectors @ weights
+
+
+def _fill_block(vectors: np.ndarray) -> np.ndarray:
+    """Huecos de un bloque -> mediana del bloque (0 = media global si todo falta)."""
+    filled = vectors.copy()
+    medians = np.nan_to_num(np.nanmedian(vectors, axis=0)) if len(vectors) else np.zeros(vectors.shape[1])
+    missing = np.isnan(filled)
+    filled[missing] = np.take(medians, np.nonzero(missing)[1])
+    return filled
+
+
+# =============================================================================
+# VECINOS
+# =============================================================================
+
+def _better(grades: np.ndarray, scores: np.ndarray, query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Mascara (consultas x candidatos, 1-D comunes o 2-D por consulta): el candidato es mejor."""
+    qg, cg = grades[query][:, None], grades[candidates]
+    qs, cs = scores[query][:, None], scores[candidates]
+    graded = (qg >= 0) & (cg >= 0)
+    return np.where(graded, cg < qg, cs > qs + HEALTH_MARGIN)
+
+
+def _top_k(distances: np.ndarray, candidates: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Los k candidatos mas cercanos por fila (inf = descartado), de menor a mayor distancia."""
+    k = min(k, distances.shape[1])
+    part = np.argpartition(distances, k - 1, axis=1)[:, :k] if k < distances.shape[1] else \
+        np.tile(np.arange(distances.shape[1]), (len(distances), 1))
+    part_dist = np.take_along_axis(distances, part, axis=1)
+    order = np.argsort(part_dist, axis=1, kind='stable')
+    part = np.take_along_axis(part, order, axis=1)
+    part_dist = np.take_along_axis(part_dist, order, axis=1)
+    picked = candidates[part] if candidates.ndim == 1 else np.take_along_axis(candidates, part, axis=1)
+    return np.where(np.isinf(part_dist), NO_ROW, picked).astype(np.uint32), part_dist
+
+
+def exact_neighbours(block: np.ndarray, vectors: np.ndarray, grades: np.ndarray, scores: np.ndarray,
+                     k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Todos contra todos dentro del bloque, por trozos de ~MATRIX_CELLS distancias."""
+    neighbours, distances = [], []
+    block_vectors = vectors[block]
+    block_norms = np.einsum('ij,ij->i', block_vectors, block_vectors)
+    step = max(1, MATRIX_CELLS // len(block))
+    for start in range(0, len(block), step):
+        query = block[start:start + step]
+        dist = block_norms[start:start + step, None] + block_norms[None, :] \
+            - 2 * block_vectors[start:start + step] @ block_vectors.T
+        np.maximum(dist, 0, out=dist)
+        dist[~_better(grades, scores, query, block)] = np.inf
+        dist[np.arange(len(query)), np.arange(start, start + len(query))] = np.inf
+        rows, dist = _top_k(dist, block, k)
+        neighbours.append(rows)
+        distances.append(dist)
+    return np.vstack(neighbours), np.vstack(distances)
+
+
+def _kmeans(points: np.ndarray, cells: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Lloyd con KMEANS_ITERATIONS pasadas. Devuelve (centroides, celda de cada punto)."""
+    centroids = points[rng.choice(len(points), cells, replace=False)].copy()
+    norms = np.einsum('ij,ij->i', points, points)[:, None]
+    for _ in range(KMEANS_ITERATIONS):
+        dist = norms + np.einsum('ij,ij->i', centroids, centroids)[None, :] - 2 * points @ centroids.T
+        assignment = np.argmin(dist, axis=1)
+        counts = np.bincount(assignment, minlength=cells)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, points)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids, assignment
+
+
+def approximate_neighbours(block: np.ndarray, vectors: np.ndarray, grades: np.ndarray, scores: np.ndarray,
+                           k: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Indice invertido por celdas (IVF): k-means con ~sqrt(n) celdas dentro del
+    bloque; los productos de una celda solo se comparan con los de sus
+    PROBES celdas mas cercanas (ella incluida), con distancia exacta.
+    """
+    size = len(block)
+    points = vectors[block]
+    norms = np.einsum('ij,ij->i', points, points)
+    cells = max(2, int(np.sqrt(size)))
+    centroids, assignment = _kmeans(points, cells, rng)
+    members = [np.flatnonzero(assignment == cell) for cell in range(cells)]
+    centroid_dist = np.einsum('ij,ij->i', centroids, centroids)[:, None] \
+        + np.einsum('ij,ij->i', centroids, centroids)[None, :] - 2 * centroids @ centroids.T
+    probes = np.argsort(centroid_dist, axis=1)[:, :min(PROBES, cells)]
+
+    neighbours = np.full((size, k), NO_ROW, dtype=np.uint32)
+    distances = np.full((size, k), np.inf, dtype=np.float32)
+    for cell in range(cells):
+        local = members[cell]
+        if not len(local):
+            continue
+        local_candidates = np.concatenate([members[c] for c in probes[cell]])
+        candidates = block[local_candidates]
+        candidate_points = points[local_candidates]
+        # Celdas muy desiguales (muchos perfiles identicos) pueden ser enormes:
+        # misma expansion de normas que exact_neighbours, por trozos de ~MATRIX_CELLS
+        step = max(1, MATRIX_CELLS // len(local_candidates))
+        for start in range(0, len(local), step):
+            chunk = local[start:start + step]
+            dist = norms[chunk, None] + norms[None, local_candidates] - 2 * points[chunk] @ candidate_points.T
+            np.maximum(dist, 0, out=dist)
+            dist[~_better(grades, scores, block[chunk], candidates)] = np.inf
+            rows, dist = _top_k(dist, candidates, k)
+            neighbours[chunk, :rows.shape[1]] = rows
+            distances[chunk, :rows.shape[1]] = dist
+    return neighbours, distances
+
+
+def compute_alternatives(vectors: np.ndarray, grades: np.ndarray, categories: List[str], valid: np.ndarray,
+                         k: int = DEFAULT_K, exact: bool = False) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """(vecinos filas x k con NO_ROW, distancias^2, estadisticas) para todo el subset."""
+    total = len(categories)
+    neighbours = np.full((total, k), NO_ROW, dtype=np.uint32)
+    distances = np.full((total, k), np.inf, dtype=np.float32)
+    blocks: Dict[str, List[int]] = {}
+    for row, name in enumerate(categories):
+        if name and valid[row]:
+            blocks.setdefault(name, []).append(row)
+
+    filled = np.zeros_like(vectors)
+    for rows in blocks.values():
+        rows = np.array(rows, dtype=np.int64)
+        filled[rows] = _fill_block(vectors[rows])
+    scores = health_scores(filled)
+    scores = scores / (np.std(scores[valid]) or 1.0) if valid.any() else scores
+
+    rng = np.random.default_rng(SEED)
+    stats = {'blocks': 0, 'approximate_blocks': 0}
+    for name in sorted(blocks):
+        block = np.array(blocks[name], dtype=np.int64)
+        if len(block) < 2:
+            continue
+        stats['blocks'] += 1
+        if exact or len(block) <= EXACT_BLOCK:
+            rows, dist = exact_neighbours(block, filled, grades, scores, k)
+        else:
+            stats['approximate_blocks'] += 1
+            rows, dist = approximate_neighbours(block, filled, grades, scores, k, rng)
+        width = rows.shape[1]
+        neighbours[block, :width] = rows
+        distances[block, :width] = dist
+    return neighbours, distances, stats
+
+
+# =============================================================================
+# CONSTRUCCION
+# =============================================================================
+
+def build_index(subset_path: Path, base_path: Optional[Path] = None, k: int = DEFAULT_K) -> Path:
+    """Construye el indice de alternativas de un subset. Devuelve la ruta base."""
+    subset_path = Path(subset_path)
+    base_path = base_path or index_base_path(subset_path)
+    start = time.time()
+    print(f"\n[ALTERNATIVAS] {subset_path.name} (k={k})")
+
+    raw, grades, categories = load_subset(subset_path)
+    if categories and not any(categories):
+        raise ValueError(f"{subset_path.name} no tiene 'categories' (perfil minimal?): sin bloques por categoria")
+    valid = (~np.isnan(raw)).sum(axis=1) >= MIN_FIELDS
+    vectors = build_vectors(raw)
+    neighbours, distances, stats = compute_alternatives(vectors, grades, categories, valid, k)
+
+    present = neighbours != NO_ROW
+    counts = present.sum(axis=1)
+    offsets = np.zeros(len(categories) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    # exp(-d/dim): 1 = mismo perfil; cuantizado a un byte
+    similarity = np.exp(-distances[present] / len(FIELDS))
+    writer = BlobWriter(base_path, INDEX_KIND, subset_path)
+    writer.add('offsets', offsets, '<u4')
+    writer.add('rows', neighbours[present], '<u4')
+    writer.add('similarity', np.round(similarity * 255), '<u1')
+    size = writer.close({
+        'rows': len(categories),
+        'k': k,
+        'fields': FIELDS,
+        'health_weights': HEALTH_WEIGHTS,
+        'with_alternatives': int((counts > 0).sum()),
+        'links': int(offsets[-1]),
+        'blocks': stats['blocks'],
+        'approximate_blocks': stats['approximate_blocks'],
+    })
+    print(f"   Productos: {len(categories):,}  Con alternativas: {int((counts > 0).sum()):,}  "
+          f"Enlaces: {int(offsets[-1]):,}")
+    print(f"   Categorias: {stats['blocks']:,} ({stats['approximate_blocks']} con vecinos aproximados)")
+    print(f"   [OK] {base_path.name}.bin ({size / 1024 / 1024:.1f} MB) en {time.time() - start:.1f}s")
+    return base_path
+
+
+class AlternativesIndex:
+    """Lectura de las alternativas de una fila sobre el indice mapeado en memoria."""
+
+    def __init__(self, base_path: Path):
+        self.reader = BlobReader(base_path)
+        self.offsets = self.reader.array('offsets')
+        self.rows = self.reader.array('rows')
+        self.similarity = self.reader.array('similarity')
+
+    def alternatives(self, row: int) -> List[Tuple[int, float]]:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return [(int(r), int(s) / 255) for r, s in zip(self.rows[start:end], self.similarity[start:end])]
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def run_benchmark(subset_path: Path, k: int = DEFAULT_K):
+    """Recall@k de los vecinos aproximados frente a la busqueda exacta."""
+    raw, grades, categories = load_subset(subset_path)
+    valid = (~np.isnan(raw)).sum(axis=1) >= MIN_FIELDS
+    vectors = build_vectors(raw)
+
+    start = time.perf_counter()
+    approx, approx_dist, stats = compute_alternatives(vectors, grades, categories, valid, k)
+    approx_s = time.perf_counter() - start
+    start = time.perf_counter()
+    exact, exact_dist, _ = compute_alternatives(vectors, grades, categories, valid, k, exact=True)
+    exact_s = time.perf_counter() - start
+
+    sizes: Dict[str, int] = {}
+    for name in categories:
+        sizes[name] = sizes.get(name, 0) + 1
+    large = np.array([bool(name) and sizes[name] > EXACT_BLOCK for name in categories]) & valid
+    # Con perfiles repetidos el top-k exacto no es unico: cuenta como acierto
+    # cualquier vecino aproximado a distancia <= la k-esima exacta
+    found = (exact[large] != NO_ROW).sum(axis=1)
+    kth = np.where(found > 0, exact_dist[large][np.arange(int(large.sum())), np.maximum(found - 1, 0)], -np.inf)
+    hits = np.minimum((approx_dist[large] <= kth[:, None] * (1 + 1e-5) + 1e-6).sum(axis=1), found)
+    total = int(found.sum())
+    hits = int(hits.sum())
+
+    print("\n" + "="*60)
+    print(f"BENCHMARK DE ALTERNATIVAS ({len(categories):,} productos, k={k})")
+    print("="*60)
+    print(f"   Aproximado (por defecto):  {approx_s:>7.1f}s  ({stats['approximate_blocks']} categorias grandes)")
+    print(f"   Exacto:                    {exact_s:>7.1f}s")
+    if total:
+        print(f"   Recall@{k} en categorias grandes: {hits / total:.1%} ({int(large.sum()):,} productos)")
+    else:
+        print(f"   Sin categorias de mas de {EXACT_BLOCK:,} productos: todo es exacto")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Indice de alternativas mas saludables por categoria')
+    parser.add_argument('subset', type=Path, help='Subset .jsonl.gz')
+    parser.add_argument('-k', type=int, default=DEFAULT_K, help='Alternativas por producto')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruir aunque el indice este al dia')
+    parser.add_argument('--code', help='Mostrar las alternativas de este codigo de barras')
+    parser.add_argument('--bench', action='store_true', help='Recall y tiempos aproximado vs exacto')
+    args = parser.parse_args(argv)
+
+    if not args.subset.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.subset}")
+        sys.exit(1)
+
+    if args.bench:
+        run_benchmark(args.subset, args.k)
+        return
+
+    base_path = index_base_path(args.subset)
+    manifest_exists = base_path.with_suffix('.json').exists()
+    if args.rebuild or not manifest_exists or BlobReader(base_path).is_stale(args.subset) \
+            or BlobReader(base_path).meta.get('k') != args.k:
+        build_index(args.subset, base_path, args.k)
+
+    if args.code:
+        from food_subset_reader import SubsetReader
+        index = AlternativesIndex(base_path)
+        with SubsetReader(args.subset) as reader:
+            row = reader.row_of(args.code)
+            if row is None:
+                print(f"[ERROR] Codigo no encontrado: {args.code}")
+                sys.exit(1)
+            product = reader.get(row)
+            print(f"\n{product.get('name')} ({product.get('brands') or '-'}) "
+                  f"nutriscore={product.get('nutriscore') or '-'}")
+            for alt_row, similarity in index.alternatives(row):
+                alt = reader.get(alt_row)
+                print(f"   {similarity:.2f}  {alt.get('code')}  {alt.get('name')} "
+                      f"({alt.get('brands') or '-'}) nutriscore={alt.get('nutriscore') or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Archivo historico de snapshots del dump en Parquet particionado por fecha.
+
+Cada ejecucion descarta el dump anterior, asi que no se puede responder
+"¿cuando cambiaron las kcal de este producto?" ni comparar la cobertura en
+el tiempo sin volver a descargar. Con --archive (o `--add`) el dump procesado
+se guarda como un snapshot:
+
+    scripts/.dump_archive/
+        snapshot=2026-10-19/data.parquet   Columnas proyectadas (ARCHIVE_COLUMNS),
+                                           ordenadas por codigo, zstd
+        archive_manifest.json              Por snapshot: firma del dump, filas,
+                                           bytes, rango de codigos y estadisticas
+                                           (cobertura y min/media/max por columna)
+
+Consultas (DumpArchive):
+    as_of(fecha, codigos)     snapshot mas reciente <= fecha; solo ese fichero
+    history(codigo, desde, hasta)
+                              valores del producto en cada snapshot del rango;
+                              changes() deja solo los snapshots donde cambian
+    snapshots(desde, hasta)   filas, cobertura y min/media/max por snapshot
+                              solo desde el manifest (sin leer Parquet)
+
+Se leen solo las particiones del rango y las columnas pedidas. Como los datos
+van ordenados por codigo, las estadisticas min/max de cada row group permiten
+a DuckDB saltar los que no pueden contener el codigo buscado, y history()
+descarta sin abrirlos los snapshots cuyo rango de codigos no lo incluye.
+
+Retencion (apply_retention, tras cada alta y con --prune): se conservan los
+KEEP_RECENT snapshots mas recientes y el primero de cada uno de los ultimos
+KEEP_MONTHLY meses; si aun se supera el tamaño maximo se borran los mas
+antiguos.
+
+INSTALACION DE DEPENDENCIAS:
+    pip install duckdb
+
+EJECUCION:
+    python create_food_subset.py spain --archive
+    python food_archive.py --add openfoodfacts_products.csv.gz --date 2026-10-19
+    python food_archive.py --list
+    python food_archive.py --history 8410000000000 --columns energy_kcal,nutriscore_grade
+    python food_archive.py --as-of 2026-06-01 --code 8410000000000
+    python food_archive.py --prune --keep-recent 2 --keep-monthly 6
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable
+
+from create_food_subset import NUTRIMENT_FIELDS, TIER_COLUMNS
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+WORK_DIR = Path(__file__).parent.resolve()
+ARCHIVE_DIR = WORK_DIR / '.dump_archive'
+MANIFEST_FILENAME = 'archive_manifest.json'
+ARCHIVE_FORMAT_VERSION = 1
+DATA_FILENAME = 'data.parquet'
+
+# Columnas del dump que se archivan (las que no existan en el dump se omiten)
+TEXT_COLUMNS = ['product_name', 'brands', 'categories_tags', 'countries_tags', 'nutriscore_grade']
+NUMERIC_COLUMNS = TIER_COLUMNS + ['last_modified_t']
+ARCHIVE_COLUMNS = ['code'] + TEXT_COLUMNS + NUMERIC_COLUMNS + list(NUTRIMENT_FIELDS.values())
+
+ROW_GROUP_SIZE = 100_000
+KEEP_RECENT = 4
+KEEP_MONTHLY = 12
+DEFAULT_ARCHIVE_MAX_GB = 20.0
+
+
+def _format_size(size_bytes: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f} TB"
+
+
+def _connect(conn=None):
+    if conn is not None:
+        return conn
+    from create_food_subset import create_duckdb_connection
+    return create_duckdb_connection()
+
+
+def _quote(values: Iterable[str]) -> str:
+    return ', '.join("'" + str(value).replace("'", "''") + "'" for value in values)
+
+
+def parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+# =============================================================================
+# ARCHIVO
+# =============================================================================
+
+class DumpArchive:
+    """Snapshots Parquet por fecha con manifest de estadisticas."""
+
+    def __init__(self, archive_dir: Path = ARCHIVE_DIR, conn=None):
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = conn
+        self._manifest_path = self.archive_dir / MANIFEST_FILENAME
+        self.manifest = self._load_manifest()
+
+    @property
+    def conn(self):
+        self._conn = _connect(self._conn)
+        return self._conn
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if self._manifest_path.exists():
+            try:
+                with open(self._manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                manifest['snapshots'] = [s for s in manifest.get('snapshots', [])
+                                         if (self.archive_dir / s['path']).exists()]
+                return manifest
+            except (json.JSONDecodeError, OSError):
+                pass
+        return {'version': ARCHIVE_FORMAT_VERSION, 'snapshots': []}
+
+    def _save_manifest(self):
+        self.manifest['snapshots'].sort(key=lambda s: s['date'])
+        tmp = self._manifest_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        tmp.replace(self._manifest_path)
+
+    def snapshots(self, start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Snapshots en [start, end] por fecha ascendente."""
+        return [s for s in sorted(self.manifest['snapshots'], key=lambda s: s['date'])
+                if (start is None or s['date'] >= start.isoformat())
+                and (end is None or s['date'] <= end.isoformat())]
+
+    def total_bytes(self) -> int:
+        return sum(s['bytes'] for s in self.manifest['snapshots'])
+
+    # -------------------------------------------------------------------------
+    # Alta de snapshots
+    # -------------------------------------------------------------------------
+
+    def _select_list(self, source_sql: str) -> List[str]:
+        available = {row[0] for row in self.conn.execute(f"DESCRIBE SELECT * FROM {source_sql}").fetchall()}
+        select = ["TRIM(CAST(code AS VARCHAR)) AS code"]
+        select += [f"CAST({col} AS VARCHAR) AS {col}" for col in TEXT_COLUMNS if col in available]
+        select += [f"TRY_CAST({col} AS DOUBLE) AS {col}" for col in NUMERIC_COLUMNS if col in available]
+        select += [f'TRY_CAST("{col}" AS DOUBLE) AS {name}' for col, name in NUTRIMENT_FIELDS.items()
+                   if col in available]
+        return select
+
+    def add_snapshot(self, csv_path: Path, snapshot_date: Optional[date] = None,
+                     max_bytes: int = int(DEFAULT_ARCHIVE_MAX_GB * 1024**3),
+                     keep_recent: int = KEEP_RECENT, keep_monthly: int = KEEP_MONTHLY) -> Optional[Dict[str, Any]]:
+        """
+        Archiva el dump como snapshot de `snapshot_date` (por defecto, fecha del
+        fichero) y aplica la retencion con `keep_recent`/`keep_monthly`/`max_bytes`.
+        """
+        from create_food_subset import csv_source_sql
+        csv_path = Path(csv_path)
+        stat = csv_path.stat()
+        snapshot_date = snapshot_date or date.fromtimestamp(stat.st_mtime)
+        source = {'file': csv_path.name, 'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        existing = next((s for s in self.manifest['snapshots'] if s['date'] == snapshot_date.isoformat()), None)
+        if existing and existing['source'] == source:
+            print(f"   [HISTORICO] Snapshot {snapshot_date} ya archivado (mismo dump)")
+            return existing
+
+        start = time.time()
+        print(f"\n[HISTORICO] Snapshot {snapshot_date} de {csv_path.name}...")
+        partition = self.archive_dir / f"snapshot={snapshot_date.isoformat()}"
+        tmp_partition = partition.with_name(partition.name + '.tmp')
+        shutil.rmtree(tmp_partition, ignore_errors=True)
+        tmp_partition.mkdir(parents=True)
+        select = self._select_list(csv_source_sql(csv_path))
+        self.conn.execute(f"""
+            COPY (
+                SELECT {', '.join(select)}
+                FROM {csv_source_sql(csv_path)}
+                WHERE code IS NOT NULL
+                ORDER BY 1
+            ) TO '{tmp_partition / DATA_FILENAME}'
+            (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {ROW_GROUP_SIZE})
+        """)
+        shutil.rmtree(partition, ignore_errors=True)
+        tmp_partition.replace(partition)
+
+        entry = {
+            'date': snapshot_date.isoformat(),
+            'path': f"{partition.name}/{DATA_FILENAME}",
+            'source': source,
+            'created': time.time(),
+        }
+        entry.update(self._partition_stats(partition / DATA_FILENAME))
+        self.manifest['snapshots'] = [s for s in self.manifest['snapshots'] if s['date'] != entry['date']]
+        self.manifest['snapshots'].append(entry)
+        self._save_manifest()
+        print(f"   [OK] {entry['rows']:,} productos, {len(entry['columns'])} columnas, "
+              f"{_format_size(entry['bytes'])} en {time.time() - start:.1f}s")
+        self.apply_retention(keep_recent, keep_monthly, max_bytes)
+        return entry
+
+    def _partition_stats(self, path: Path) -> Dict[str, Any]:
+        columns = [row[0] for row in self.conn.execute(
+            f"DESCRIBE SELECT * FROM read_parquet('{path}')").fetchall()]
+        numeric = [c for c in columns if c in NUMERIC_COLUMNS or c in NUTRIMENT_FIELDS.values()]
+        aggregates = ['COUNT(*)', 'MIN(code)', 'MAX(code)']
+        aggregates += [f"COUNT({c})" for c in columns if c != 'code']
+        aggregates += [f"{fn}({c})" for c in numeric for fn in ('MIN', 'AVG', 'MAX')]
+        values = self.conn.execute(f"SELECT {', '.join(aggregates)} FROM read_parquet('{path}')").fetchone()
+        rows, code_min, code_max = values[0], values[1], values[2]
+        position = 3
+        coverage = {}
+        for column in columns:
+            if column == 'code':
+                continue
+            coverage[column] = round(values[position] / rows, 4) if rows else 0.0
+            position += 1
+        numeric_stats = {}
+        for column in numeric:
+            low, mean, high = values[position:position + 3]
+            numeric_stats[column] = {'min': low, 'mean': None if mean is None else round(mean, 3), 'max': high}
+            position += 3
+        return {'rows': rows, 'bytes': path.stat().st_size, 'columns': columns, 'code_min': code_min,
+                'code_max': code_max, 'coverage': coverage, 'numeric': numeric_stats}
+
+    # -------------------------------------------------------------------------
+    # Retencion
+    # -------------------------------------------------------------------------
+
+    def apply_retention(self, keep_recent: int = KEEP_RECENT, keep_monthly: int = KEEP_MONTHLY,
+                        max_bytes: int = int(DEFAULT_ARCHIVE_MAX_GB * 1024**3)) -> List[str]:
+        """Borra los snapshots fuera de la politica. Devuelve las fechas eliminadas."""
+        ordered = self.snapshots()
+        keep = {s['date'] for s in ordered[-keep_recent:]} if keep_recent > 0 else set()
+        months: Dict[str, str] = {}
+        for snapshot in ordered:
+            months.setdefault(snapshot['date'][:7], snapshot['date'])
+        for month in sorted(months)[-keep_monthly:] if keep_monthly > 0 else []:
+            keep.add(months[month])
+        # Tope de tamaño: se sueltan los mas antiguos, nunca el ultimo
+        kept = [s for s in ordered if s['date'] in keep]
+        total = sum(s['bytes'] for s in kept)
+        for snapshot in kept[:-1]:
+            if total <= max_bytes:
+                break
+            keep.discard(snapshot['date'])
+            total -= snapshot['bytes']
+
+        removed = []
+        for snapshot in ordered:
+            if snapshot['date'] not in keep:
+                shutil.rmtree(self.archive_dir / Path(snapshot['path']).parent, ignore_errors=True)
+                removed.append(snapshot['date'])
+                print(f"   [HISTORICO] Retencion: eliminado snapshot {snapshot['date']} "
+                      f"({_format_size(snapshot['bytes'])})")
+        if removed:
+            self.manifest['snapshots'] = [s for s in self.manifest['snapshots'] if s['date'] in keep]
+            self._save_manifest()
+        return removed
+
+    # -------------------------------------------------------------------------
+    # Consultas
+    # -------------------------------------------------------------------------
+
+    def _columns(self, snapshot: Dict[str, Any], columns: Optional[List[str]]) -> List[str]:
+        wanted = columns or [c for c in snapshot['columns'] if c != 'code']
+        unknown = [c for c in wanted if c not in ARCHIVE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columnas no archivadas: {', '.join(unknown)}")
+        return ['code'] + [c for c in wanted if c != 'code']
+
+    def as_of(self, when: date, codes: List[str], columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Filas de `codes` en el snapshot mas reciente con fecha <= `when`."""
+        candidates = self.snapshots(end=when)
+        if not candidates:
+            return []
+        snapshot = candidates[-1]
+        selected = self._columns(snapshot, columns)
+        # Columnas que este snapshot no tiene (dump antiguo) salen como NULL
+        select = ', '.join(c if c in snapshot['columns'] else f"NULL AS {c}" for c in selected)
+        result = self.conn.execute(f"""
+            SELECT {select} FROM read_parquet('{self.archive_dir / snapshot['path']}')
+            WHERE code IN ({_quote(codes)})
+        """).fetchall()
+        return [dict(zip(selected, row), snapshot=snapshot['date']) for row in result]
+
+    def history(self, code: str, columns: Optional[List[str]] = None, start: Optional[date] = None,
+                end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Valores de `code` en cada snapshot de [start, end], por fecha."""
+        rows = []
+        for snapshot in self.snapshots(start, end):
+            if not (snapshot['code_min'] <= code <= snapshot['code_max']):
+                continue
+            rows.extend(self.as_of(parse_date(snapshot['date']), [code], columns))
+        return rows
+
+    def changes(self, code: str, columns: Optional[List[str]] = None, start: Optional[date] = None,
+                end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Como history() pero solo el primer snapshot y aquellos en los que cambia algun valor."""
+        changed = []
+        previous = None
+        for row in self.history(code, columns, start, end):
+            values = {k: v for k, v in row.items() if k != 'snapshot'}
+            if values != previous:
+                changed.append(row)
+            previous = values
+        return changed
+
+
+# =============================================================================
+# INFORME
+# =============================================================================
+
+def print_snapshots(archive: DumpArchive):
+    snapshots = archive.snapshots()
+    print("\n" + "="*60)
+    print(f"ARCHIVO DE SNAPSHOTS ({archive.archive_dir})")
+    print("="*60)
+    if not snapshots:
+        print("   (vacio)")
+    for snapshot in snapshots:
+        coverage = snapshot['coverage']
+        print(f"   {snapshot['date']}  {snapshot['rows']:>10,} productos  {_format_size(snapshot['bytes']):>10}  "
+              f"kcal {coverage.get('energy_kcal', 0):.0%}  nutriscore {coverage.get('nutriscore_grade', 0):.0%}  "
+              f"categorias {coverage.get('categories_tags', 0):.0%}")
+    print(f"   Total: {_format_size(archive.total_bytes())}")
+    print("="*60)
+
+
+def print_rows(rows: List[Dict[str, Any]]):
+    if not rows:
+        print("   (sin resultados)")
+    for row in rows:
+        values = '  '.join(f"{k}={v}" for k, v in row.items() if k not in ('snapshot', 'code'))
+        print(f"   {row['snapshot']}  {row['code']}  {values}")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Archivo historico de snapshots del dump (Parquet por fecha)')
+    parser.add_argument('--archive-dir', type=Path, default=ARCHIVE_DIR, help='Carpeta del archivo')
+    parser.add_argument('--add', type=Path, metavar='DUMP', help='Archivar un dump .csv.gz')
+    parser.add_argument('--date', help='Fecha del snapshot con --add / hasta con --history (AAAA-MM-DD)')
+    parser.add_argument('--since', help='Desde esta fecha con --history (AAAA-MM-DD)')
+    parser.add_argument('--list', action='store_true', help='Listar snapshots y cobertura')
+    parser.add_argument('--history', metavar='CODE', help='Historial de un producto (solo cambios)')
+    parser.add_argument('--all', action='store_true', help='Con --history, todos los snapshots y no solo cambios')
+    parser.add_argument('--as-of', metavar='FECHA', help='Valores en el snapshot vigente en esa fecha (con --code)')
+    parser.add_argument('--code', action='append', default=[], help='Codigo de barras (repetible)')
+    parser.add_argument('--columns', help='Columnas separadas por comas (por defecto todas)')
+    parser.add_argument('--prune', action='store_true', help='Aplicar la politica de retencion')
+    parser.add_argument('--keep-recent', type=int, default=KEEP_RECENT, help='Snapshots recientes a conservar')
+    parser.add_argument('--keep-monthly', type=int, default=KEEP_MONTHLY, help='Meses con un snapshot conservado')
+    parser.add_argument('--max-gb', type=float, default=DEFAULT_ARCHIVE_MAX_GB, help='Tamaño maximo del archivo')
+    args = parser.parse_args(argv)
+
+    if not (args.add or args.list or args.history or args.as_of or args.prune):
+        parser.error('indica --add, --list, --history, --as-of o --prune')
+
+    archive = DumpArchive(args.archive_dir)
+    columns = [c.strip() for c in args.columns.split(',')] if args.columns else None
+    max_bytes = int(args.max_gb * 1024**3)
+    try:
+        if args.add:
+            if not args.add.exists():
+                print(f"[ERROR] No se encuentra el archivo {args.add}")
+                sys.exit(1)
+            archive.add_snapshot(args.add, parse_date(args.date) if args.date else None, max_bytes,
+                                 args.keep_recent, args.keep_monthly)
+        if args.prune:
+            removed = archive.apply_retention(args.keep_recent, args.keep_monthly, max_bytes)
+            print(f"[HISTORICO] Retencion aplicada: {len(removed)} snapshots eliminados")
+        if args.history:
+            start = parse_date(args.since) if args.since else None
+            end = parse_date(args.date) if args.date else None
+            query = archive.history if args.all else archive.changes
+            print(f"\n[HISTORIAL] {args.history}")
+            print_rows(query(args.history, columns, start, end))
+        if args.as_of:
+            if not args.code:
+                parser.error('--as-of necesita al menos un --code')
+            print(f"\n[A FECHA] {args.as_of}")
+            print_rows(archive.as_of(parse_date(args.as_of), args.code, columns))
+        if args.list:
+            print_snapshots(archive)
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
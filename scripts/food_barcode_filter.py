@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Filtro de Bloom con todos los codigos de barras del dump de Open Food Facts.
+
+Cuando un codigo escaneado no esta en el subset local, la app no sabe si
+Open Food Facts lo conoce. Con este filtro (unos MB para ~3M codigos al 1%)
+puede distinguir:
+
+    "no esta en el subset pero existe"  -> merece la pena consultar online
+    "no existe"                         -> se evita la consulta (sin falsos negativos)
+
+Se construye en una sola pasada en streaming sobre la columna `code` del dump;
+la memoria es la del propio filtro mas un lote de codigos.
+
+Esquema (FNV-1a de 32 bits: unas lineas en Dart; queda tambien en el manifest):
+    codigo normalizado: sin espacios y, si es numerico, sin ceros a la izquierda
+    fnv(base): h = base; por cada byte utf-8: h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    h1 = fnv(0x811C9DC5),  h2 = fnv(0x050C5D1F) | 1
+    bit_i = (h1 + i * h2) mod m,   i = 0..k-1   (cabe en 64 bits: h1, h2 < 2^32)
+    bit b vive en bits[b >> 3], mascara 1 << (b & 7)
+
+Formato: ver food_index_blob.py (array 'bits').
+
+INSTALACION DE DEPENDENCIAS:
+    pip install numpy duckdb
+
+EJECUCION:
+    python food_barcode_filter.py openfoodfacts_products.csv.gz
+    python food_barcode_filter.py openfoodfacts_products.csv.gz --fpr 0.005 --capacity 4000000
+    python food_barcode_filter.py --check 8410376040452 0000000000123
+    python food_barcode_filter.py openfoodfacts_products.csv.gz --measure    # FPR real y falsos negativos
+    python create_food_subset.py spain --keep-csv --barcode-filter          # al exportar
+"""
+
+import sys
+import math
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterator, Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: Falta dependencia numpy")
+    print("Instala con: pip install numpy")
+    sys.exit(1)
+
+from food_index_blob import BlobWriter, BlobReader
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+WORK_DIR = Path(__file__).parent.resolve()
+FILTER_KIND = 'barcode-bloom'
+FILTER_NAME = 'off_barcodes_filter'
+HASH_SCHEME = 'fnv1a32-double'
+HASH_SPEC = ('fnv(base): h = base; for each utf-8 byte: h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF; '
+             'h1 = fnv(0x811C9DC5); h2 = fnv(0x050C5D1F) | 1; bit_i = (h1 + i * h2) mod bits, i = 0..hashes-1; '
+             'bit b -> bits[b >> 3] & (1 << (b & 7))')
+FNV_PRIME = 0x01000193
+FNV_BASES = (0x811C9DC5, 0x050C5D1F)
+DEFAULT_FPR = 0.01
+DEFAULT_CAPACITY = 4_000_000      # ~3M codigos en el dump global, con margen
+BATCH_SIZE = 100_000
+PROBE_COUNT = 1_000_000
+PROBE_DIGITS = 18                 # ningun GTIN real tiene 18 digitos
+
+
+def normalize_code(code) -> str:
+    """'0008410376040452 ' -> '8410376040452'. Los codigos no numericos solo se recortan."""
+    code = str(code).strip()
+    if code.isdigit():
+        code = code.lstrip('0') or '0'
+    return code
+
+
+def bloom_parameters(capacity: int, fpr: float) -> Dict[str, int]:
+    """Bits (multiplo de 64) y numero de hashes optimos para capacity elementos."""
+    bits = math.ceil(-capacity * math.log(fpr) / (math.log(2) ** 2))
+    bits = max(64, (bits + 63) // 64 * 64)
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return {'bits': bits, 'hashes': hashes}
+
+
+def expected_fpr(bits: int, hashes: int, count: int) -> float:
+    return (1 - math.exp(-hashes * count / bits)) ** hashes
+
+
+# =============================================================================
+# FILTRO
+# =============================================================================
+
+def fnv1a32_many(codes: Iterable[str]) -> np.ndarray:
+    """
+    Matriz (n, 2) uint64 con FNV-1a de 32 bits de cada codigo para las dos
+    bases de FNV_BASES. Vectorizado por columnas de bytes: los codigos se
+    rellenan a la misma longitud y cada fila deja de mezclar al acabar su codigo.
+    """
+    encoded = [code.encode('utf-8') for code in codes]
+    hashes = np.tile(np.array(FNV_BASES, dtype=np.uint64), (len(encoded), 1))
+    if not encoded:
+        return hashes
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    width = int(lengths.max())
+    data = np.frombuffer(b''.join(e.ljust(width, b'\0') for e in encoded), dtype=np.uint8)
+    data = data.reshape(len(encoded), width).astype(np.uint64)
+    prime, mask = np.uint64(FNV_PRIME), np.uint64(0xFFFFFFFF)
+    for column in range(width):
+        active = (lengths > column)[:, None]
+        mixed = ((hashes ^ data[:, column:column + 1]) * prime) & mask
+        hashes = np.where(active, mixed, hashes)
+    return hashes
+
+
+def fnv1a32(data: bytes, base: int = FNV_BASES[0]) -> int:
+    """Version escalar de referencia (la que se porta a Dart)."""
+    h = base
+    for byte in data:
+        h = ((h ^ byte) * FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+
+class BarcodeFilter:
+    """Filtro de Bloom sobre codigos normalizados, con insercion y consulta por lotes."""
+
+    def __init__(self, bits: int, hashes: int, data: Optional[np.ndarray] = None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = data if data is not None else np.zeros(bits // 8, dtype=np.uint8)
+        self.count = 0
+        self._steps = np.arange(hashes, dtype=np.uint64)
+
+    @classmethod
+    def for_capacity(cls, capacity: int = DEFAULT_CAPACITY, fpr: float = DEFAULT_FPR) -> 'BarcodeFilter':
+        params = bloom_parameters(capacity, fpr)
+        return cls(params['bits'], params['hashes'])
+
+    @classmethod
+    def load(cls, base_path: Path) -> 'BarcodeFilter':
+        reader = BlobReader(base_path)
+        meta = reader.meta
+        if meta.get('hash') != HASH_SCHEME:
+            raise ValueError(f"Esquema de hash no soportado: {meta.get('hash')}")
+        bloom = cls(meta['bits'], meta['hashes'], reader.array('bits'))
+        bloom.count = meta['count']
+        return bloom
+
+    def _positions(self, codes: Iterable[str]) -> np.ndarray:
+        """Matriz (n, k) de posiciones de bit para los codigos ya normalizados."""
+        hashes = fnv1a32_many(codes)
+        h1 = hashes[:, :1]
+        h2 = hashes[:, 1:] | np.uint64(1)
+        return (h1 + self._steps * h2) % np.uint64(self.bits)
+
+    def add_many(self, codes: List[str]):
+        if not codes:
+            return
+        positions = self._positions(codes).ravel()
+        np.bitwise_or.at(self.data, (positions >> np.uint64(3)).astype(np.int64),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+        self.count += len(codes)
+
+    def contains_many(self, codes: List[str]) -> np.ndarray:
+        if not codes:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(codes)
+        words = self.data[(positions >> np.uint64(3)).astype(np.int64)]
+        masks = np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)
+        return np.all(words & masks, axis=1)
+
+    def __contains__(self, code) -> bool:
+        return bool(self.contains_many([normalize_code(code)])[0])
+
+    @property
+    def fill_ratio(self) -> float:
+        return float(np.unpackbits(self.data).mean()) if self.bits else 0.0
+
+    def save(self, base_path: Path, source_path: Optional[Path] = None, meta: Optional[Dict[str, Any]] = None) -> int:
+        writer = BlobWriter(base_path, FILTER_KIND, source_path)
+        writer.add('bits', self.data, '<u1')
+        info = {
+            'hash': HASH_SCHEME,
+            'hash_spec': HASH_SPEC,
+            'normalize': 'strip; numeric codes without leading zeros',
+            'bits': self.bits,
+            'hashes': self.hashes,
+            'count': self.count,
+            'expected_fpr': expected_fpr(self.bits, self.hashes, self.count),
+        }
+        info.update(meta or {})
+        return writer.close(info)
+
+
+# =============================================================================
+# CONSTRUCCION EN STREAMING
+# =============================================================================
+
+def iter_dump_codes(csv_path: Path, conn=None, batch_size: int = BATCH_SIZE) -> Iterator[List[str]]:
+    """Lotes de codigos normalizados leyendo solo la columna `code` del dump."""
+    from create_food_subset import create_duckdb_connection, csv_source_sql
+    own_conn = conn is None
+    conn = conn or create_duckdb_connection()
+    try:
+        result = conn.execute(f"""
+            SELECT CAST(code AS VARCHAR) FROM {csv_source_sql(csv_path)}
+            WHERE code IS NOT NULL
+        """)
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = [normalize_code(row[0]) for row in rows]
+            yield [code for code in batch if code and code != '0']
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def build_filter(csv_path: Path, output_base: Optional[Path] = None, fpr: float = DEFAULT_FPR,
+                 capacity: int = DEFAULT_CAPACITY, conn=None) -> Path:
+    """Construye y guarda el filtro del dump. Devuelve la ruta base (sin extension)."""
+    csv_path = Path(csv_path)
+    output_base = output_base or csv_path.parent / FILTER_NAME
+    bloom = BarcodeFilter.for_capacity(capacity, fpr)
+    print(f"\n[FILTRO] Codigos de barras del dump: {csv_path.name}")
+    print(f"   Capacidad: {capacity:,}  FPR objetivo: {fpr:.3%}  "
+          f"Bits: {bloom.bits:,}  Hashes: {bloom.hashes}")
+
+    start = time.time()
+    for batch in iter_dump_codes(csv_path, conn):
+        bloom.add_many(batch)
+    elapsed = time.time() - start
+
+    # Los duplicados del dump cuentan como insertados; solo afecta al FPR teorico
+    if bloom.count > capacity:
+        print(f"   [AVISO] {bloom.count:,} codigos superan la capacidad ({capacity:,}); "
+              f"el FPR real sera mayor. Usa --capacity")
+    size = bloom.save(output_base, csv_path, {'capacity': capacity, 'target_fpr': fpr})
+    print(f"   Codigos: {bloom.count:,}  Ocupacion: {bloom.fill_ratio:.1%}  "
+          f"FPR teorico: {expected_fpr(bloom.bits, bloom.hashes, bloom.count):.3%}")
+    print(f"   [OK] {output_base.name}.bin ({size / 1024 / 1024:.2f} MB) en {elapsed:.1f}s")
+    return output_base
+
+
+# =============================================================================
+# MEDICION
+# =============================================================================
+
+def random_probes(count: int, seed: int = 42) -> List[str]:
+    """Codigos que no pueden estar en el dump (18 digitos), para medir el FPR."""
+    rng = random.Random(seed)
+    low = 10 ** (PROBE_DIGITS - 1)
+    return [str(rng.randrange(low, low * 10)) for _ in range(count)]
+
+
+def measure(base_path: Path, csv_path: Optional[Path] = None, probes: int = PROBE_COUNT):
+    bloom = BarcodeFilter.load(base_path)
+    print("\n" + "="*60)
+    print("MEDICION DEL FILTRO DE CODIGOS")
+    print("="*60)
+    print(f"   Tamaño:              {bloom.data.nbytes / 1024 / 1024:.2f} MB "
+          f"({bloom.bits / max(bloom.count, 1):.1f} bits/codigo)")
+    print(f"   Codigos:             {bloom.count:,}  Hashes: {bloom.hashes}")
+    print(f"   FPR teorico:         {expected_fpr(bloom.bits, bloom.hashes, bloom.count):.4%}")
+
+    codes = random_probes(probes)
+    start = time.perf_counter()
+    hits = int(bloom.contains_many(codes).sum())
+    elapsed = time.perf_counter() - start
+    print(f"   FPR medido:          {hits / probes:.4%} ({hits:,} de {probes:,} codigos inexistentes)")
+    print(f"   Consultas:           {probes / elapsed:,.0f}/s por lotes, "
+          f"{elapsed / probes * 1e6:.2f} us/codigo")
+
+    if csv_path:
+        missing = total = 0
+        for batch in iter_dump_codes(csv_path):
+            missing += int((~bloom.contains_many(batch)).sum())
+            total += len(batch)
+        flag = '✅' if missing == 0 else '❌'
+        print(f"   Falsos negativos:    {missing:,} de {total:,} codigos del dump {flag}")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Filtro de Bloom con los codigos de barras del dump')
+    parser.add_argument('dump', type=Path, nargs='?', help='Dump TSV .csv.gz de Open Food Facts')
+    parser.add_argument('--output', type=Path, help=f'Ruta base de salida (por defecto {FILTER_NAME} junto al dump)')
+    parser.add_argument('--fpr', type=float, default=DEFAULT_FPR, help='Tasa de falsos positivos objetivo')
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='Numero de codigos esperado')
+    parser.add_argument('--measure', action='store_true',
+                        help='Medir FPR con codigos inexistentes y comprobar que no hay falsos negativos')
+    parser.add_argument('--probes', type=int, default=PROBE_COUNT, help='Codigos inexistentes para --measure')
+    parser.add_argument('--check', nargs='+', metavar='CODE', help='Consultar codigos en un filtro existente')
+    args = parser.parse_args(argv)
+
+    if not 0 < args.fpr < 1:
+        print(f"[ERROR] --fpr debe estar entre 0 y 1: {args.fpr}")
+        sys.exit(1)
+    base_path = args.output or (args.dump.parent if args.dump else WORK_DIR) / FILTER_NAME
+
+    if args.check:
+        if not base_path.with_suffix('.json').exists():
+            print(f"[ERROR] No existe el filtro {base_path}.json")
+            sys.exit(1)
+        bloom = BarcodeFilter.load(base_path)
+        for code in args.check:
+            state = 'probablemente existe' if code in bloom else 'no existe'
+            print(f"   {code:<20} {state}")
+        return
+
+    if not args.dump or not args.dump.exists():
+        print(f"[ERROR] No se encuentra el dump {args.dump}")
+        sys.exit(1)
+
+    if not base_path.with_suffix('.json').exists() or BlobReader(base_path).is_stale(args.dump) \
+            or BlobReader(base_path).meta.get('hash') != HASH_SCHEME or not args.measure:
+        build_filter(args.dump, base_path, args.fpr, args.capacity)
+    if args.measure:
+        measure(base_path, args.dump, args.probes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Diccionario de facetas de marca con ids densos y recuentos.
+
+`brands` se exporta como texto libre ("Hacendado, Mercadona",
+"Coca-Cola,Coca Cola") repetido en cientos de miles de filas, y filtrar por
+marca en el dispositivo es comparar cadenas. Con --facets el exportador:
+
+    - separa las marcas por comas, las pasa a minusculas sin acentos ni
+      signos y aplica BRAND_ALIASES ("Coca-Cola" = "Coca Cola" = "cocacola")
+    - asigna ids enteros densos y estables entre builds y mercados (como el
+      ledger de exercise_merge.py: una clave conserva su id para siempre)
+    - añade a cada producto `brand_ids` (las categorias ya tienen ids enteros:
+      `category_ids` de food_taxonomy.py, con jerarquia)
+    - actualiza food_facets.json con nombre visible (la grafia mas comun
+      sumando todos los mercados), clave y numero de productos por mercado
+
+El informe (al exportar con --facets o con este script) compara el tamaño
+del subset comprimido sin ids, con ids y con solo ids + diccionarios, y lo
+que tarda un filtro por marca en SQLite: LIKE sobre el texto frente a una
+tabla producto-marca indexada por id.
+
+EJECUCION:
+    python create_food_subset.py all --facets
+    python food_facets.py spain_subset.jsonl.gz                     # informe
+    python food_facets.py spain_subset.jsonl.gz --top 20
+"""
+
+import re
+import sys
+import json
+import gzip
+import time
+import sqlite3
+import argparse
+from pathlib import Path
+from collections import Counter
+from typing import Optional, List, Dict, Any, Tuple
+
+from food_lookup_service import normalize_text
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+FACETS_FORMAT_VERSION = 1
+FACETS_FILENAME = 'food_facets.json'
+FACET_KINDS = ['brands']
+FIRST_ID = 1                      # 0 queda libre como "sin dato" en columnas enteras
+
+# Clave compacta (sin espacios) -> clave canonica. Solo variantes de la misma
+# marca; marcas blancas y su cadena (Hacendado / Mercadona) son marcas distintas
+BRAND_ALIASES = {
+    'kellogg': 'kelloggs',
+    'kelloggscompany': 'kelloggs',
+    'thecocacolacompany': 'cocacola',
+    'cocacolacompany': 'cocacola',
+    'nestlesa': 'nestle',
+    'danonesa': 'danone',
+    'pepsico': 'pepsi',
+    'mondelez': 'mondelezinternational',
+    'diasa': 'dia',
+    'lidlstiftung': 'lidl',
+}
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+REPORT_BRANDS = 10
+BENCH_REPEAT = 20
+
+
+def facet_key(text: str) -> str:
+    """'Coca-Cola ' -> 'cocacola'. Vacia si no queda nada alfanumerico."""
+    return _NON_ALNUM.sub('', normalize_text(text))
+
+
+def split_brands(brands: Optional[str]) -> List[Tuple[str, str]]:
+    """[(clave canonica, grafia original)] sin repetir claves, en orden."""
+    if not isinstance(brands, str):
+        return []
+    result = []
+    seen = set()
+    for part in brands.split(','):
+        spelling = ' '.join(part.split())
+        key = facet_key(spelling)
+        key = BRAND_ALIASES.get(key, key)
+        if key and key not in seen:
+            seen.add(key)
+            result.append((key, spelling))
+    return result
+
+
+# =============================================================================
+# DICCIONARIO PERSISTENTE
+# =============================================================================
+
+class FacetDictionary:
+    """clave -> id estable por tipo de faceta, con nombre y recuentos por mercado."""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        data = data or {}
+        self.entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.next_ids: Dict[str, int] = {}
+        for kind in FACET_KINDS:
+            entries = {entry['key']: entry for entry in data.get(kind, [])}
+            self.entries[kind] = entries
+            self.next_ids[kind] = max([data.get('next_ids', {}).get(kind, FIRST_ID)]
+                                      + [entry['id'] + 1 for entry in entries.values()])
+        self._spellings: Dict[str, Dict[str, Counter]] = {kind: {} for kind in FACET_KINDS}
+        self._counts: Dict[str, Counter] = {kind: Counter() for kind in FACET_KINDS}
+
+    @classmethod
+    def load(cls, path: Path) -> 'FacetDictionary':
+        if not Path(path).exists():
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def assign(self, kind: str, key: str, spelling: str) -> int:
+        entry = self.entries[kind].get(key)
+        if entry is None:
+            entry = {'id': self.next_ids[kind], 'key': key, 'name': spelling, 'counts': {}}
+            self.entries[kind][key] = entry
+            self.next_ids[kind] += 1
+        self._spellings[kind].setdefault(key, Counter())[spelling] += 1
+        return entry['id']
+
+    def brand_ids(self, brands: Optional[str]) -> List[int]:
+        ids = [self.assign('brands', key, spelling) for key, spelling in split_brands(brands)]
+        self._counts['brands'].update(ids)
+        return ids
+
+    def finish_market(self, market: str):
+        """
+        Sustituye los recuentos y grafias de `market` por los de este build. El
+        nombre visible es la grafia mas comun sumando todos los mercados, asi
+        que no depende del orden en que se construyan.
+        """
+        for kind in FACET_KINDS:
+            counts = self._counts[kind]
+            for entry in self.entries[kind].values():
+                if counts.get(entry['id']):
+                    entry['counts'][market] = counts[entry['id']]
+                else:
+                    entry['counts'].pop(market, None)
+                spellings = self._spellings[kind].get(entry['key'])
+                by_market = entry.setdefault('spellings', {})
+                if spellings:
+                    by_market[market] = dict(spellings)
+                else:
+                    by_market.pop(market, None)
+                totals: Counter = Counter()
+                for market_spellings in by_market.values():
+                    totals.update(market_spellings)
+                if totals:
+                    entry['name'] = max(totals.items(), key=lambda item: (item[1], item[0]))[0]
+            counts.clear()
+            self._spellings[kind].clear()
+
+    def to_json(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {'version': FACETS_FORMAT_VERSION, 'next_ids': dict(self.next_ids)}
+        for kind in FACET_KINDS:
+            data[kind] = sorted(self.entries[kind].values(), key=lambda entry: entry['id'])
+        return data
+
+    def save(self, path: Path) -> Path:
+        tmp_path = Path(path).with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(',', ':'))
+        tmp_path.replace(path)
+        return Path(path)
+
+
+# =============================================================================
+# INFORME
+# =============================================================================
+
+def _gzip_size(lines: List[str]) -> int:
+    return len(gzip.compress(''.join(lines).encode('utf-8'), compresslevel=9, mtime=0))
+
+
+def _time_ms(func, repeat: int = BENCH_REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def facet_report(subset_path: Path, facets_path: Optional[Path] = None, top: int = REPORT_BRANDS):
+    """Bytes del texto de marca frente a ids + diccionario, y filtro por marca en SQLite."""
+    facets = FacetDictionary.load(facets_path) if facets_path else FacetDictionary()
+    products = []
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                products.append(json.loads(line))
+    # Sin diccionario los brand_ids del subset no corresponden a los ids nuevos:
+    # se recalculan todos para que la tabla y las consultas usen los mismos
+    known = bool(facets.entries['brands'])
+    if not known and any('brand_ids' in product for product in products):
+        print(f"[AVISO] Sin {FACETS_FILENAME}: se recalculan los brand_ids del subset")
+    for product in products:
+        ids = facets.brand_ids(product.get('brands'))
+        if not known or 'brand_ids' not in product:
+            product['brand_ids'] = ids
+    market = Path(subset_path).name.split('_')[0]
+    facets.finish_market(market)
+
+    # Tamaño: registro actual, con ids añadidos (lo que exporta --facets) y
+    # con los ids sustituyendo al texto de marca (nombres en el diccionario)
+    variants = {
+        'texto': [{k: v for k, v in p.items() if k != 'brand_ids'} for p in products],
+        'texto + ids': products,
+        'solo ids': [{k: v for k, v in p.items() if k != 'brands'} for p in products],
+    }
+    sizes = {label: _gzip_size([json.dumps(p, ensure_ascii=False) + '\n' for p in records])
+             for label, records in variants.items()}
+    # En el dispositivo basta id -> nombre visible
+    dictionaries = json.dumps({kind: [[entry['id'], entry['name']] for entry in facets.to_json()[kind]]
+                               for kind in FACET_KINDS}, ensure_ascii=False, separators=(',', ':'))
+    dictionary_gz = len(gzip.compress(dictionaries.encode('utf-8'), compresslevel=9, mtime=0))
+    sizes['solo ids'] += dictionary_gz
+    text_bytes = sum(len(json.dumps(p.get('brands'), ensure_ascii=False)) for p in products)
+    id_bytes = sum(len(json.dumps(p['brand_ids'])) for p in products)
+
+    # Filtro: tabla como la de la app (marca en texto) frente a tabla producto-marca por id
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE foods (id INTEGER PRIMARY KEY, brands TEXT)')
+    db.execute('CREATE TABLE food_brands (brand_id INTEGER, food_id INTEGER)')
+    db.executemany('INSERT INTO foods VALUES (?, ?)', ((i, p.get('brands')) for i, p in enumerate(products)))
+    db.executemany('INSERT INTO food_brands VALUES (?, ?)',
+                   ((brand_id, i) for i, p in enumerate(products) for brand_id in p['brand_ids']))
+    db.execute('CREATE INDEX idx_food_brands ON food_brands (brand_id, food_id)')
+
+    by_id = {entry['id']: entry for entry in facets.entries['brands'].values()}
+    top_brands = sorted(by_id.values(), key=lambda entry: -entry['counts'].get(market, 0))[:top]
+
+    print("\n" + "="*60)
+    print(f"FACETAS DE MARCA: {Path(subset_path).name} ({len(products):,} productos)")
+    print("="*60)
+    print(f"   Marcas canonicas:        {len(by_id):,}")
+    print(f"   Texto de marca:          {text_bytes / 1024 / 1024:.2f} MB sin comprimir")
+    print(f"   brand_ids:               {id_bytes / 1024 / 1024:.2f} MB sin comprimir")
+    for label, size in sizes.items():
+        extra = f" (diccionarios {dictionary_gz / 1024:.1f} KB)" if label == 'solo ids' else ''
+        print(f"   Subset {label + ':':<18}{size / 1024 / 1024:>7.2f} MB gz  "
+              f"({(size - sizes['texto']) / sizes['texto']:+.1%}){extra}")
+    print(f"\n   {'Marca':<22}{'LIKE':>10}{'id':>10}{'LIKE n':>9}{'id n':>9}")
+    like_total = id_total = 0.0
+    for entry in top_brands:
+        pattern = f"%{entry['name'].lower()}%"
+        like_sql = 'SELECT id FROM foods WHERE lower(brands) LIKE ?'
+        id_sql = 'SELECT food_id FROM food_brands WHERE brand_id = ?'
+        like_rows = db.execute(like_sql, (pattern,)).fetchall()
+        id_rows = db.execute(id_sql, (entry['id'],)).fetchall()
+        like_ms = _time_ms(lambda: db.execute(like_sql, (pattern,)).fetchall())
+        id_ms = _time_ms(lambda: db.execute(id_sql, (entry['id'],)).fetchall())
+        like_total += like_ms
+        id_total += id_ms
+        print(f"   {entry['name'][:21]:<22}{like_ms:>8.2f}ms{id_ms:>8.3f}ms{len(like_rows):>9,}{len(id_rows):>9,}")
+    if top_brands:
+        print(f"\n   Filtro por marca: {like_total / len(top_brands):.2f} ms -> "
+              f"{id_total / len(top_brands):.3f} ms ({like_total / max(id_total, 1e-9):.0f}x)")
+    print("   (LIKE n distinto de id n = variantes que el texto no agrupa o subcadenas de otras marcas)")
+    print("="*60)
+    db.close()
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Facetas de marca: ahorro de tamaño y filtro por id')
+    parser.add_argument('subset', type=Path, help='Subset .jsonl.gz')
+    parser.add_argument('--facets', type=Path, help=f'Diccionario existente (por defecto {FACETS_FILENAME} junto al subset)')
+    parser.add_argument('--top', type=int, default=REPORT_BRANDS, help='Marcas a medir en el filtro')
+    args = parser.parse_args(argv)
+
+    if not args.subset.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.subset}")
+        sys.exit(1)
+    facets_path = args.facets or args.subset.parent / FACETS_FILENAME
+    facet_report(args.subset, facets_path if facets_path.exists() else None, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Cache de resultados del filtro de mercado por grupo de predicados.
+
+Al ajustar listas de marcas o RELEVANT_CATEGORIES, cada prueba volvia a
+filtrar el dump completo. Esta cache separa el filtro en grupos (pais, marca,
+categoria, base) y guarda los ids de fila que cumple cada grupo en Parquet,
+con clave = hash de la configuracion de ese grupo. Cambiar una lista de marcas
+solo re-evalua el grupo 'brand'; el resto se recombina desde cache.
+
+Estructura en disco (scripts/.filter_cache/):
+    staging_<firma>.parquet          Proyeccion del dump con un id de fila (rid, por codigo)
+    group_<grupo>_<hash>.parquet     rids que cumplen el predicado del grupo
+    cache_manifest.json              Tamaños y ultimo uso para la expulsion LRU
+
+El staging se crea una vez por dump (su firma incluye tamaño, mtime y
+columnas). La cache se limita por tamaño: al superar el maximo se expulsan
+las entradas usadas hace mas tiempo.
+
+USO (desde create_food_subset.py):
+    python create_food_subset.py spain --keep-csv --filter-cache
+    python food_filter_cache.py --info
+    python food_filter_cache.py --clear
+"""
+
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+WORK_DIR = Path(__file__).parent.resolve()
+CACHE_DIR = WORK_DIR / '.filter_cache'
+MANIFEST_FILENAME = 'cache_manifest.json'
+# Subir al cambiar como se construye el staging (invalida staging y grupos)
+STAGING_VERSION = 2
+DEFAULT_CACHE_MAX_GB = 4.0
+
+
+def _short_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+def _format_size(size_bytes: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f} TB"
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+class FilterCache:
+    """Cache por grupo de predicados sobre una proyeccion Parquet del dump."""
+
+    def __init__(self, conn, csv_path: Path, source_sql: Optional[str] = None,
+                 staging_columns: Optional[List[str]] = None,
+                 cache_dir: Path = CACHE_DIR, max_bytes: int = int(DEFAULT_CACHE_MAX_GB * 1024**3)):
+        self.conn = conn
+        self.csv_path = Path(csv_path)
+        self.source_sql = source_sql
+        self.staging_columns = staging_columns
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self.cache_dir / MANIFEST_FILENAME
+        self._manifest = self._load_manifest()
+        self._pinned: set = set()
+
+    # -------------------------------------------------------------------------
+    # Manifest y expulsion
+    # -------------------------------------------------------------------------
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self._manifest_path.exists():
+            try:
+                with open(self._manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                # Descartar entradas cuyo fichero ya no existe
+                return {name: entry for name, entry in manifest.items() if (self.cache_dir / name).exists()}
+            except (json.JSONDecodeError, OSError):
+                pass
+        return {}
+
+    def _save_manifest(self):
+        tmp = self._manifest_path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, indent=2)
+        tmp.replace(self._manifest_path)
+
+    def _touch(self, name: str, kind: str):
+        path = self.cache_dir / name
+        entry = self._manifest.setdefault(name, {'kind': kind})
+        entry['bytes'] = path.stat().st_size
+        entry['last_used'] = time.time()
+        self._pinned.add(name)
+
+    def total_bytes(self) -> int:
+        return sum(entry['bytes'] for entry in self._manifest.values())
+
+    def evict(self):
+        """Expulsa entradas LRU hasta quedar por debajo de max_bytes (nunca las fijadas)."""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for name, entry in sorted(self._manifest.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if name in self._pinned:
+                continue
+            (self.cache_dir / name).unlink(missing_ok=True)
+            total -= entry['bytes']
+            del self._manifest[name]
+            print(f"   [CACHE] Expulsado {name} ({_format_size(entry['bytes'])})")
+
+    # -------------------------------------------------------------------------
+    # Staging y grupos
+    # -------------------------------------------------------------------------
+
+    def _staging_name(self) -> str:
+        stat = self.csv_path.stat()
+        signature = _short_hash(self.csv_path.name, str(stat.st_size), str(stat.st_mtime_ns),
+                                ','.join(self.staging_columns or []), str(STAGING_VERSION))
+        return f"staging_{signature}.parquet"
+
+    def find_staging(self) -> Optional[Path]:
+        """Staging ya construido para este dump, si existe."""
+        if not self.csv_path.exists() or self.staging_columns is None:
+            return None
+        path = self.cache_dir / self._staging_name()
+        return path if path.exists() else None
+
+    def ensure_staging(self) -> Path:
+        name = self._staging_name()
+        path = self.cache_dir / name
+        if path.exists():
+            print(f"   [CACHE] Staging: HIT ({name})")
+        else:
+            print(f"   [CACHE] Staging: MISS, proyectando dump a Parquet (solo la primera vez)...")
+            start = time.time()
+            tmp = path.with_suffix('.tmp')
+            # read_csv no expone la posicion en el fichero y row_number() OVER ()
+            # sin ORDER BY no tiene orden garantizado: el rid se numera por codigo
+            # (desempate por el resto de columnas) para ser igual en cada build
+            columns = ', '.join(self.staging_columns)
+            self.conn.execute(f"""
+                COPY (
+                    SELECT row_number() OVER (ORDER BY {columns}) AS rid, {columns}
+                    FROM {self.source_sql}
+                    ORDER BY rid
+                ) TO '{tmp}' (FORMAT PARQUET)
+            """)
+            tmp.replace(path)
+            print(f"   [CACHE] Staging creado en {time.time() - start:.1f}s ({_format_size(path.stat().st_size)})")
+        self._touch(name, 'staging')
+        return path
+
+    def group_rows(self, group: str, predicate: str, staging: Path) -> Path:
+        """Parquet con los rids que cumplen `predicate`; se calcula solo si falta."""
+        name = f"group_{group}_{_short_hash(staging.name, group, predicate)}.parquet"
+        path = self.cache_dir / name
+        if path.exists():
+            print(f"   [CACHE] Grupo {group:<9} HIT")
+        else:
+            start = time.time()
+            tmp = path.with_suffix('.tmp')
+            self.conn.execute(f"""
+                COPY (
+                    SELECT rid FROM read_parquet('{staging}')
+                    WHERE {predicate}
+                    ORDER BY rid
+                ) TO '{tmp}' (FORMAT PARQUET)
+            """)
+            tmp.replace(path)
+            print(f"   [CACHE] Grupo {group:<9} MISS, evaluado en {time.time() - start:.1f}s")
+        self._touch(name, 'group')
+        return path
+
+    def fetch_candidates(self, groups: Dict[str, str], columns: List[str],
+                         any_of: Iterable[str] = ('country', 'brand')):
+        """
+        Filas del staging que cumplen alguno de los grupos `any_of` y todos los
+        demas grupos, en orden de rid (por codigo). Devuelve un DataFrame.
+        """
+        any_of = [g for g in any_of if g in groups]
+        staging = self.ensure_staging()
+        paths = {group: self.group_rows(group, predicate, staging) for group, predicate in groups.items()}
+
+        conditions = []
+        if any_of:
+            union = ' UNION '.join(f"SELECT rid FROM read_parquet('{paths[g]}')" for g in any_of)
+            conditions.append(f"s.rid IN ({union})")
+        for group, path in paths.items():
+            if group not in any_of:
+                conditions.append(f"s.rid IN (SELECT rid FROM read_parquet('{path}'))")
+
+        query = f"""
+            SELECT {', '.join(columns)}
+            FROM read_parquet('{staging}') s
+            WHERE {' AND '.join(conditions) or 'TRUE'}
+            ORDER BY s.rid
+        """
+        result = self.conn.execute(query).fetchdf()
+
+        self.evict()
+        self._save_manifest()
+        self._pinned.clear()
+        return result
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Gestion de la cache de filtros de mercado')
+    parser.add_argument('--info', action='store_true', help='Mostrar contenido de la cache')
+    parser.add_argument('--clear', action='store_true', help='Vaciar la cache')
+    parser.add_argument('--cache-dir', type=Path, default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.clear:
+        if args.cache_dir.exists():
+            shutil.rmtree(args.cache_dir)
+        print(f"[CACHE] Eliminada {args.cache_dir}")
+        return
+
+    manifest_path = args.cache_dir / MANIFEST_FILENAME
+    if not manifest_path.exists():
+        print(f"[CACHE] Vacia ({args.cache_dir})")
+        sys.exit(0)
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    total = 0
+    for name, entry in sorted(manifest.items(), key=lambda item: -item[1]['last_used']):
+        age = (time.time() - entry['last_used']) / 3600
+        print(f"   {entry['kind']:<8} {_format_size(entry['bytes']):>10}  hace {age:6.1f} h  {name}")
+        total += entry['bytes']
+    print(f"   Total: {_format_size(total)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Indice de acceso aleatorio para el dump .csv.gz de Open Food Facts.
+
+El dump es un unico flujo gzip: cualquier recorrido, muestreo o estimacion
+descomprime desde el byte 0 en un solo nucleo. Este script recorre el dump
+una vez y guarda puntos de control al estilo zran (offset comprimido,
+offset descomprimido y la ventana de 32 KB del descompresor) usando
+indexed_gzip. Ademas anota el offset descomprimido de cada linea multiplo de
+LINE_STRIDE, para saltar directamente a una fila.
+
+Con el indice:
+    - se puede leer cualquier rango del dump sin descomprimir lo anterior
+    - DumpIndex.partitions(n) parte el dump en n rangos alineados a lineas y
+      parallel_map() los procesa en varios procesos
+    - food_subset_estimate.sample_csv_blocks lee solo los bloques muestreados
+      (mismo resultado que la pasada secuencial)
+
+ARCHIVOS GENERADOS (junto al dump):
+    <dump>.gzidx         Puntos de control (formato de indexed_gzip)
+    <dump>.gzidx.json    Manifest: firma del dump, tamaño descomprimido,
+                         lineas, cabecera y offsets de linea
+
+INSTALACION DE DEPENDENCIAS:
+    pip install indexed_gzip
+
+EJECUCION:
+    python food_gzip_index.py openfoodfacts_products.csv.gz               # construir
+    python food_gzip_index.py openfoodfacts_products.csv.gz --spacing-mb 4
+    python food_gzip_index.py openfoodfacts_products.csv.gz --bench --workers 8
+    python food_gzip_index.py openfoodfacts_products.csv.gz --rows 1000000:1000005
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Tuple, Callable
+
+try:
+    import indexed_gzip
+except ImportError:
+    indexed_gzip = None
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+INDEX_FORMAT_VERSION = 1
+INDEX_SUFFIX = '.gzidx'
+DEFAULT_SPACING_MB = 8            # ~32 KB de ventana por punto: ~4 KB por MB descomprimido
+READ_CHUNK = 16 * 1024 * 1024
+LINE_STRIDE = 2048                # igual que DEFAULT_BLOCK_ROWS de food_subset_estimate
+
+
+def require_indexed_gzip():
+    if indexed_gzip is None:
+        print("Error: Falta dependencia indexed_gzip")
+        print("Instala con: pip install indexed_gzip")
+        sys.exit(1)
+
+
+def index_paths(csv_path: Path) -> Tuple[Path, Path]:
+    csv_path = Path(csv_path)
+    return (csv_path.with_name(csv_path.name + INDEX_SUFFIX),
+            csv_path.with_name(csv_path.name + INDEX_SUFFIX + '.json'))
+
+
+def source_signature(csv_path: Path) -> Dict[str, Any]:
+    stat = Path(csv_path).stat()
+    return {'file': Path(csv_path).name, 'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+# =============================================================================
+# CONSTRUCCION
+# =============================================================================
+
+def build_index(csv_path: Path, spacing_mb: int = DEFAULT_SPACING_MB) -> Path:
+    """Una pasada: puntos de control + offsets de linea. Devuelve el manifest."""
+    require_indexed_gzip()
+    csv_path = Path(csv_path)
+    index_path, manifest_path = index_paths(csv_path)
+    print(f"\n[INDICE GZIP] {csv_path.name} (punto de control cada {spacing_mb} MB)")
+
+    start = time.time()
+    line_offsets: List[int] = []       # offset de las lineas de datos 0, STRIDE, 2*STRIDE...
+    header = b''
+    offset = 0
+    lines = 0                          # lineas completas vistas (cabecera incluida)
+    last_byte = b'\n'
+    with indexed_gzip.IndexedGzipFile(str(csv_path), spacing=spacing_mb * 1024 * 1024) as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            if not header:
+                header = chunk[:chunk.find(b'\n') + 1] if b'\n' in chunk else chunk
+            newlines = chunk.count(b'\n')
+            # La linea de datos d empieza tras el salto de linea numero d + 1 (la 0 es la cabecera)
+            next_mark = len(line_offsets) * LINE_STRIDE + 1
+            if lines < next_mark <= lines + newlines:
+                position = -1
+                seen = lines
+                while seen < lines + newlines:
+                    position = chunk.find(b'\n', position + 1)
+                    seen += 1
+                    if seen == next_mark:
+                        line_offsets.append(offset + position + 1)
+                        next_mark += LINE_STRIDE
+                        if next_mark > lines + newlines:
+                            break
+            lines += newlines
+            offset += len(chunk)
+            last_byte = chunk[-1:]
+        f.raw.export_index(str(index_path))
+        points = f.raw.npoints
+
+    data_lines = max(0, lines - 1 + (0 if last_byte == b'\n' else 1))
+    # Un offset de linea que cae al final del fichero no es una fila
+    line_offsets = [o for o in line_offsets if o < offset]
+    manifest = {
+        'version': INDEX_FORMAT_VERSION,
+        'source': source_signature(csv_path),
+        'index': index_path.name,
+        'spacing': spacing_mb * 1024 * 1024,
+        'points': points,
+        'uncompressed_bytes': offset,
+        'rows': data_lines,
+        'header': header.decode('utf-8', errors='replace'),
+        'line_stride': LINE_STRIDE,
+        'line_offsets': line_offsets,
+    }
+    tmp_path = manifest_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    tmp_path.replace(manifest_path)
+
+    elapsed = time.time() - start
+    print(f"   Descomprimido: {offset / 1024 / 1024:.0f} MB  Filas: {data_lines:,}  Puntos: {points}")
+    print(f"   [OK] {index_path.name} ({index_path.stat().st_size / 1024 / 1024:.1f} MB) en {elapsed:.1f}s")
+    return manifest_path
+
+
+# =============================================================================
+# LECTURA
+# =============================================================================
+
+class DumpIndex:
+    """Lecturas por rango y por fila sobre el dump usando el indice."""
+
+    def __init__(self, csv_path: Path):
+        require_indexed_gzip()
+        self.csv_path = Path(csv_path)
+        self.index_path, manifest_path = index_paths(self.csv_path)
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._file = None
+
+    @classmethod
+    def load(cls, csv_path: Path) -> Optional['DumpIndex']:
+        """El indice del dump si existe y esta al dia; None en otro caso."""
+        if indexed_gzip is None or not index_paths(csv_path)[1].exists():
+            return None
+        index = cls(csv_path)
+        return None if index.is_stale() else index
+
+    def is_stale(self) -> bool:
+        return self.manifest.get('source') != source_signature(self.csv_path) or not self.index_path.exists()
+
+    @property
+    def rows(self) -> int:
+        return self.manifest['rows']
+
+    @property
+    def size(self) -> int:
+        return self.manifest['uncompressed_bytes']
+
+    @property
+    def header(self) -> bytes:
+        return self.manifest['header'].encode('utf-8')
+
+    def _handle(self):
+        if self._file is None:
+            # auto_build: un dump menor que el espaciado no tiene puntos de control y,
+            # sin el, cualquier seek falla (se descomprime desde el inicio, que es poco)
+            self._file = indexed_gzip.IndexedGzipFile(str(self.csv_path), index_file=str(self.index_path),
+                                                      auto_build=True)
+        return self._file
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def read(self, start: int, length: int) -> bytes:
+        f = self._handle()
+        f.seek(start)
+        return f.read(length)
+
+    def read_lines(self, start: int, end: int) -> bytes:
+        """
+        Lineas completas que empiezan en [start, end). Como en los splits de
+        Hadoop, si start no es inicio de linea se salta la parcial (la lee el
+        rango anterior).
+        """
+        f = self._handle()
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                f.readline()
+        else:
+            f.seek(0)
+        position = f.tell()
+        if position >= end:
+            return b''
+        data = f.read(end - position)
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+        return data
+
+    def row_offset(self, row: int) -> Tuple[int, int]:
+        """(offset de la fila de datos multiplo de LINE_STRIDE anterior, filas a saltar)."""
+        stride = self.manifest['line_stride']
+        checkpoint = min(row // stride, len(self.manifest['line_offsets']) - 1)
+        return self.manifest['line_offsets'][checkpoint], row - checkpoint * stride
+
+    def read_rows(self, first: int, count: int) -> bytes:
+        """Filas de datos [first, first + count) sin la cabecera."""
+        if count <= 0 or first >= self.rows or not self.manifest['line_offsets']:
+            return b''
+        offset, skip = self.row_offset(first)
+        f = self._handle()
+        f.seek(offset)
+        for _ in range(skip):
+            f.readline()
+        parts = []
+        for _ in range(min(count, self.rows - first)):
+            line = f.readline()
+            if not line:
+                break
+            parts.append(line)
+        return b''.join(parts)
+
+    def partitions(self, count: int) -> List[Tuple[int, int]]:
+        """Rangos [start, end) del texto descomprimido (sin cabecera) para read_lines."""
+        begin = len(self.header)
+        step = max(1, (self.size - begin) // max(count, 1))
+        bounds = [begin + i * step for i in range(count)] + [self.size]
+        return [(bounds[i], bounds[i + 1]) for i in range(count) if bounds[i] < bounds[i + 1]]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================================================================
+# PROCESAMIENTO EN PARALELO
+# =============================================================================
+
+_worker_index: Optional[DumpIndex] = None
+
+
+def _init_worker(csv_path: str):
+    global _worker_index
+    _worker_index = DumpIndex(Path(csv_path))
+
+
+def _run_partition(task: Tuple[Callable[[bytes], Any], int, int]) -> Any:
+    func, start, end = task
+    return func(_worker_index.read_lines(start, end))
+
+
+def _run_rows(task: Tuple[int, int]) -> bytes:
+    first, count = task
+    return _worker_index.read_rows(first, count)
+
+
+def parallel_map(csv_path: Path, func: Callable[[bytes], Any], workers: Optional[int] = None,
+                 partitions: Optional[int] = None) -> List[Any]:
+    """
+    Aplica func (funcion de modulo, serializable) a cada particion del dump
+    en `workers` procesos. Cada particion son lineas completas sin cabecera.
+    """
+    workers = workers or os.cpu_count() or 1
+    with DumpIndex(csv_path) as index:
+        ranges = index.partitions(partitions or workers * 4)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(csv_path),)) as pool:
+        return list(pool.map(_run_partition, [(func, start, end) for start, end in ranges]))
+
+
+def parallel_read_rows(csv_path: Path, blocks: List[Tuple[int, int]], workers: Optional[int] = None) -> List[bytes]:
+    """Filas (primera, cantidad) de cada bloque, leidas en paralelo y devueltas en orden."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(blocks) <= 1:
+        with DumpIndex(csv_path) as index:
+            return [index.read_rows(first, count) for first, count in blocks]
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(csv_path),)) as pool:
+        return list(pool.map(_run_rows, blocks, chunksize=max(1, len(blocks) // (workers * 4))))
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def count_lines(data: bytes) -> int:
+    return data.count(b'\n')
+
+
+def run_benchmark(csv_path: Path, workers: int):
+    print("\n" + "="*60)
+    print(f"BENCHMARK DE LECTURA ({csv_path.name}, {workers} procesos)")
+    print("="*60)
+
+    start = time.perf_counter()
+    sequential = 0
+    with gzip.open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), b''):
+            sequential += chunk.count(b'\n')
+    sequential_s = time.perf_counter() - start
+    print(f"   gzip secuencial (contar lineas):   {sequential_s:>7.2f}s  ({sequential - 1:,} filas)")
+
+    start = time.perf_counter()
+    parallel = sum(parallel_map(csv_path, count_lines, workers))
+    parallel_s = time.perf_counter() - start
+    flag = '✅' if parallel == sequential - 1 else '❌'
+    print(f"   indice en paralelo:                {parallel_s:>7.2f}s  ({parallel:,} filas) {flag}")
+    print(f"   Aceleracion:                       {sequential_s / parallel_s:>7.1f}x")
+
+    with DumpIndex(csv_path) as index:
+        target = max(0, index.rows - 10)
+        start = time.perf_counter()
+        index.read_rows(target, 5)
+        seek_ms = (time.perf_counter() - start) * 1000
+    print(f"   Saltar a la fila {target:,}:  {seek_ms:>10.1f} ms")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Indice de acceso aleatorio para el dump .csv.gz')
+    parser.add_argument('dump', type=Path, help='Dump .csv.gz de Open Food Facts')
+    parser.add_argument('--spacing-mb', type=int, default=DEFAULT_SPACING_MB,
+                        help='MB descomprimidos entre puntos de control')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruir aunque el indice este al dia')
+    parser.add_argument('--rows', help='Imprimir filas de datos INICIO:FIN usando el indice')
+    parser.add_argument('--bench', action='store_true', help='Comparar lectura secuencial y en paralelo')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Procesos para --bench')
+    args = parser.parse_args(argv)
+
+    require_indexed_gzip()
+    if not args.dump.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.dump}")
+        sys.exit(1)
+
+    if args.rebuild or DumpIndex.load(args.dump) is None:
+        build_index(args.dump, args.spacing_mb)
+
+    if args.rows:
+        first, _, last = args.rows.partition(':')
+        first = int(first)
+        count = (int(last) - first) if last else 1
+        with DumpIndex(args.dump) as index:
+            sys.stdout.write(index.read_rows(first, count).decode('utf-8', errors='replace'))
+    if args.bench:
+        run_benchmark(args.dump, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Simulador de la importacion del subset en el dispositivo.
+
+FoodDatabaseLoader.loadDatabase sigue una estrategia fija: descomprime todo el
+asset, separa todas las lineas, parsea lotes de _batchSize = 5000 en isolates,
+inserta cada lote con insertAll(insertOrReplace) en su transaccion y
+reconstruye foods_fts al final. Este script reproduce esa estrategia (y
+variantes) con sqlite3 sobre un fichero real, para elegir parametros sin
+pasar por un dispositivo:
+
+    formato   whole   como la app: descomprimir todo + separar lineas
+              stream  leer el .jsonl.gz linea a linea (memoria acotada al lote)
+    pragmas   default journal DELETE + synchronous FULL (drift sin PRAGMAs)
+              wal     journal WAL + synchronous NORMAL
+              wal-mem WAL + NORMAL + temp_store MEMORY + cache de 32 MB
+              off     journal OFF + synchronous OFF (solo como cota; no se recomienda)
+    lote      tamaño de _batchSize
+
+Cada combinacion corre en un proceso nuevo para que el pico de memoria
+(ru_maxrss) sea el suyo. Limitaciones configurables para acercarse a un
+movil modesto: numero de CPUs (afinidad), factor de CPU (tras cada lote se
+duerme (factor - 1) x tiempo de CPU del lote) y memoria (RLIMIT_AS; si se
+supera, la prueba queda como OOM).
+
+La recomendacion por artefacto es la combinacion segura mas rapida cuyo p95
+por lote no supera --batch-budget-ms (el hilo de la UI espera a cada lote
+para pintar el progreso) y que cabe en la memoria indicada.
+
+El parseo corre en el mismo proceso (no hay coste de copia entre isolates) y
+la expansion de sinonimos de busqueda no interviene en la carga.
+
+EJECUCION:
+    python food_import_sim.py spain_subset.jsonl.gz
+    python food_import_sim.py spain_subset.jsonl.gz minimal.jsonl.gz --batch-sizes 1000 5000 20000
+    python food_import_sim.py spain_hot.jsonl.gz --cpus 1 --cpu-factor 3 --memory-mb 768
+    python food_import_sim.py spain_subset.jsonl.gz --pragmas default wal --formats whole --json sim.json
+
+REQUISITOS:
+    - Python 3.10+ (solo libreria estandar; limites de CPU/memoria solo en Linux)
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import time
+import uuid
+import sqlite3
+import tempfile
+import statistics
+import subprocess
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+try:
+    import resource
+except ImportError:  # Windows: sin ru_maxrss ni RLIMIT_AS
+    resource = None
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+APP_BATCH_SIZE = 5000
+DEFAULT_BATCH_SIZES = [1000, 2500, 5000, 10000, 20000]
+FORMATS = ['whole', 'stream']
+PRAGMAS: Dict[str, List[str]] = {
+    'default': ['PRAGMA journal_mode = DELETE', 'PRAGMA synchronous = FULL'],
+    'wal': ['PRAGMA journal_mode = WAL', 'PRAGMA synchronous = NORMAL'],
+    'wal-mem': ['PRAGMA journal_mode = WAL', 'PRAGMA synchronous = NORMAL',
+                'PRAGMA temp_store = MEMORY', 'PRAGMA cache_size = -32000'],
+    'off': ['PRAGMA journal_mode = OFF', 'PRAGMA synchronous = OFF'],
+}
+UNSAFE_PRAGMAS = {'off'}
+DEFAULT_BATCH_BUDGET_MS = 250.0
+TRIAL_MARKER = '__TRIAL_RESULT__'
+
+# Esquema de la app (tabla foods de database.dart con sus indices + foods_fts)
+SCHEMA = [
+    """CREATE TABLE foods (
+        id TEXT NOT NULL PRIMARY KEY, name TEXT NOT NULL, brand TEXT, barcode TEXT,
+        kcal_per100g INTEGER NOT NULL, protein_per100g REAL, carbs_per100g REAL, fat_per100g REAL,
+        fiber_per100g REAL, sugar_per100g REAL, saturated_fat_per100g REAL, sodium_per100g REAL,
+        portion_name TEXT, portion_grams REAL, user_created INTEGER NOT NULL DEFAULT 1,
+        verified_source TEXT, source_metadata TEXT, normalized_name TEXT,
+        use_count INTEGER NOT NULL DEFAULT 0, last_used_at INTEGER, nutri_score TEXT,
+        nova_group INTEGER, is_favorite INTEGER NOT NULL DEFAULT 0,
+        created_at INTEGER NOT NULL, updated_at INTEGER NOT NULL
+    )""",
+    "CREATE INDEX foods_name_idx ON foods (name)",
+    "CREATE INDEX foods_barcode_idx ON foods (barcode)",
+    "CREATE VIRTUAL TABLE foods_fts USING fts5(food_id UNINDEXED, name, brand)",
+]
+INSERT_SQL = """INSERT OR REPLACE INTO foods (id, name, brand, kcal_per100g, protein_per100g, carbs_per100g,
+    fat_per100g, nutri_score, source_metadata, user_created, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)"""
+# rebuildFtsIndex()
+REBUILD_FTS = [
+    "UPDATE foods SET normalized_name = LOWER(name) WHERE normalized_name IS NULL",
+    "DELETE FROM foods_fts",
+    "INSERT INTO foods_fts(food_id, name, brand) SELECT id, name, COALESCE(brand, '') FROM foods",
+]
+
+
+# =============================================================================
+# PRUEBA (proceso hijo)
+# =============================================================================
+
+def _parse_double(value) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(',', '.'))
+        except ValueError:
+            return None
+    return None
+
+
+def parse_batch(lines: List[str], now: int) -> List[tuple]:
+    """_parseBatch + _parseFoodCompanion: lineas JSONL -> filas de foods."""
+    rows = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            product = json.loads(line)
+        except ValueError:
+            continue  # Ignorar lineas malformadas
+        nutriments = product.get('nutriments') or {}
+        kcal = _parse_double(nutriments.get('energy_kcal'))
+        rows.append((
+            product.get('code') or str(uuid.uuid4()),
+            re.sub(r'\s+', ' ', (product.get('name') or 'Sin nombre').strip()),
+            product.get('brands'),
+            round(kcal) if kcal is not None else 0,
+            _parse_double(nutriments.get('proteins')),
+            _parse_double(nutriments.get('carbohydrates')),
+            _parse_double(nutriments.get('fat')),
+            product.get('nutriscore'),
+            json.dumps(product, ensure_ascii=False, separators=(',', ':')),
+            now, now,
+        ))
+    return rows
+
+
+def _batches_whole(path: Path, batch_size: int):
+    # Como la app: el texto completo y la lista de lineas viven durante toda la carga
+    text = gzip.decompress(path.read_bytes()).decode('utf-8')
+    lines = text.splitlines()
+    for start in range(0, len(lines), batch_size):
+        yield lines[start:start + batch_size]
+
+
+def _batches_stream(path: Path, batch_size: int):
+    batch = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def apply_throttles(cpus: int, memory_mb: int):
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        available = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, available[:cpus])
+    if memory_mb and resource is not None:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run_trial(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Una importacion completa con la configuracion dada. Corre en su propio proceso."""
+    apply_throttles(config['cpus'], config['memory_mb'])
+    cpu_factor = config['cpu_factor']
+    reader = _batches_whole if config['format'] == 'whole' else _batches_stream
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'foods.db'
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        for pragma in PRAGMAS[config['pragmas']]:
+            conn.execute(pragma).fetchall()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+        now = int(time.time())
+        batch_ms: List[float] = []
+        products = 0
+        start = time.perf_counter()
+        try:
+            for lines in reader(Path(config['artifact']), config['batch_size']):
+                batch_start, cpu_start = time.perf_counter(), time.process_time()
+                rows = parse_batch(lines, now)
+                conn.execute('BEGIN')
+                conn.executemany(INSERT_SQL, rows)
+                conn.execute('COMMIT')
+                if cpu_factor > 1:
+                    time.sleep((time.process_time() - cpu_start) * (cpu_factor - 1))
+                batch_ms.append((time.perf_counter() - batch_start) * 1000)
+                products += len(rows)
+
+            fts_start, cpu_start = time.perf_counter(), time.process_time()
+            conn.execute('BEGIN')
+            for statement in REBUILD_FTS:
+                conn.execute(statement)
+            conn.execute('COMMIT')
+            if cpu_factor > 1:
+                time.sleep((time.process_time() - cpu_start) * (cpu_factor - 1))
+            fts_ms = (time.perf_counter() - fts_start) * 1000
+        except MemoryError:
+            return {'status': 'oom', 'products': products}
+        total_s = time.perf_counter() - start
+        conn.close()
+        db_bytes = sum(p.stat().st_size for p in Path(tmp).iterdir())
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else 0
+    ordered = sorted(batch_ms)
+    return {
+        'status': 'ok',
+        'products': products,
+        'total_s': total_s,
+        'batches': len(batch_ms),
+        'batch_p50_ms': statistics.median(ordered) if ordered else 0.0,
+        'batch_p95_ms': ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+        'batch_max_ms': ordered[-1] if ordered else 0.0,
+        'fts_ms': fts_ms,
+        'peak_rss_mb': peak_kb / 1024,
+        'db_mb': db_bytes / 1024 / 1024,
+    }
+
+
+def launch_trial(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Ejecuta run_trial en un proceso nuevo y recoge su resultado."""
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), '--trial', json.dumps(config)],
+        capture_output=True, text=True,
+    )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(TRIAL_MARKER):
+            return json.loads(line[len(TRIAL_MARKER):])
+    # Sin resultado: el limite de memoria suele acabar en MemoryError fuera de run_trial
+    error = (completed.stderr.strip().splitlines() or ['sin salida'])[-1]
+    return {'status': 'oom' if 'MemoryError' in completed.stderr else 'error', 'error': error}
+
+
+# =============================================================================
+# INFORME Y RECOMENDACION
+# =============================================================================
+
+def recommend(results: List[Dict[str, Any]], batch_budget_ms: float) -> Optional[Dict[str, Any]]:
+    """Combinacion segura mas rapida que respeta el presupuesto por lote."""
+    candidates = [r for r in results if r['status'] == 'ok' and r['pragmas'] not in UNSAFE_PRAGMAS]
+    within = [r for r in candidates if r['batch_p95_ms'] <= batch_budget_ms]
+    pool = within or candidates
+    return min(pool, key=lambda r: (r['total_s'], r['peak_rss_mb'])) if pool else None
+
+
+def print_results(artifact: Path, results: List[Dict[str, Any]], batch_budget_ms: float):
+    print(f"\n[ARTEFACTO] {artifact.name}")
+    print(f"   {'Formato':<8}{'Pragmas':<9}{'Lote':>7}{'Total':>9}{'p50 lote':>10}{'p95 lote':>10}"
+          f"{'FTS':>9}{'RSS pico':>10}{'DB':>8}")
+    for r in results:
+        prefix = f"   {r['format']:<8}{r['pragmas']:<9}{r['batch_size']:>7,}"
+        if r['status'] != 'ok':
+            print(f"{prefix}   {r['status'].upper()} {r.get('error', '')}")
+            continue
+        app = ' <- app' if r['format'] == 'whole' and r['pragmas'] == 'default' \
+            and r['batch_size'] == APP_BATCH_SIZE else ''
+        print(f"{prefix}{r['total_s']:>8.1f}s{r['batch_p50_ms']:>8.0f}ms{r['batch_p95_ms']:>8.0f}ms"
+              f"{r['fts_ms'] / 1000:>8.1f}s{r['peak_rss_mb']:>8.0f}MB{r['db_mb']:>6.0f}MB{app}")
+
+    best = recommend(results, batch_budget_ms)
+    if best is None:
+        print("   [AVISO] Ninguna combinacion segura termino; sube --memory-mb o reduce el lote")
+        return
+    note = '' if best['batch_p95_ms'] <= batch_budget_ms else \
+        f" (ninguna cumple p95 <= {batch_budget_ms:.0f} ms por lote)"
+    print(f"   ✅ Recomendado: lote {best['batch_size']:,}, formato {best['format']}, "
+          f"pragmas {best['pragmas']} -> {best['total_s']:.1f}s, {best['peak_rss_mb']:.0f} MB{note}")
+    app = next((r for r in results if r['format'] == 'whole' and r['pragmas'] == 'default'
+                and r['batch_size'] == APP_BATCH_SIZE and r['status'] == 'ok'), None)
+    if app:
+        print(f"   Estrategia actual: {app['total_s']:.1f}s, {app['peak_rss_mb']:.0f} MB "
+              f"({app['total_s'] / best['total_s']:.1f}x el tiempo recomendado)")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Simular la importacion del subset para ajustar lote, formato y pragmas')
+    parser.add_argument('artifacts', type=Path, nargs='*', help='Artefactos .jsonl.gz (subset, perfiles, niveles)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=DEFAULT_BATCH_SIZES, help='Tamaños de lote')
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=FORMATS, help='Formas de leer el artefacto')
+    parser.add_argument('--pragmas', nargs='+', choices=list(PRAGMAS), default=list(PRAGMAS),
+                        help='Configuraciones de journal/pragmas')
+    parser.add_argument('--cpus', type=int, default=0, help='Limitar a N CPUs (afinidad)')
+    parser.add_argument('--cpu-factor', type=float, default=1.0, help='Simular una CPU N veces mas lenta')
+    parser.add_argument('--memory-mb', type=int, default=0, help='Limite de memoria virtual por prueba (RLIMIT_AS)')
+    parser.add_argument('--batch-budget-ms', type=float, default=DEFAULT_BATCH_BUDGET_MS,
+                        help='p95 maximo por lote para recomendar una combinacion')
+    parser.add_argument('--json', type=Path, help='Guardar todos los resultados en JSON')
+    parser.add_argument('--trial', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.trial:
+        result = run_trial(json.loads(args.trial))
+        print(TRIAL_MARKER + json.dumps(result))
+        return
+
+    if not args.artifacts:
+        parser.error('indica al menos un artefacto .jsonl.gz')
+    for artifact in args.artifacts:
+        if not artifact.exists():
+            print(f"[ERROR] No se encuentra el archivo {artifact}")
+            sys.exit(1)
+    if (args.cpus or args.memory_mb) and resource is None:
+        print("[AVISO] Limites de CPU/memoria no disponibles en esta plataforma")
+
+    combos = [(f, p, b) for f in args.formats for p in args.pragmas for b in sorted(set(args.batch_sizes))]
+    print("="*60)
+    print("SIMULADOR DE IMPORTACION")
+    print("="*60)
+    print(f"   Combinaciones por artefacto: {len(combos)}  CPUs: {args.cpus or 'todas'}  "
+          f"Factor CPU: {args.cpu_factor:g}  Memoria: {f'{args.memory_mb} MB' if args.memory_mb else 'sin limite'}")
+
+    report = {}
+    for artifact in args.artifacts:
+        results = []
+        for fmt, pragmas, batch_size in combos:
+            config = {
+                'artifact': str(artifact.resolve()), 'format': fmt, 'pragmas': pragmas,
+                'batch_size': batch_size, 'cpus': args.cpus, 'cpu_factor': args.cpu_factor,
+                'memory_mb': args.memory_mb,
+            }
+            print(f"   {artifact.name}: {fmt} / {pragmas} / lote {batch_size:,}...", end='\r', flush=True)
+            result = launch_trial(config)
+            result.update({k: config[k] for k in ('format', 'pragmas', 'batch_size')})
+            results.append(result)
+        print_results(artifact, results, args.batch_budget_ms)
+        best = recommend(results, args.batch_budget_ms)
+        report[artifact.name] = {
+            'results': results,
+            'recommended': {k: best[k] for k in ('format', 'pragmas', 'batch_size')} if best else None,
+        }
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'throttles': {'cpus': args.cpus, 'cpu_factor': args.cpu_factor,
+                                     'memory_mb': args.memory_mb},
+                       'batch_budget_ms': args.batch_budget_ms, 'artifacts': report}, f, indent=2)
+        print(f"\n[OK] Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Formato comun para los indices precalculados de los subsets.
+
+Cada indice son dos ficheros junto al subset:
+    <nombre>.json   Manifest: version, tipo, firma del subset y, por array,
+                    dtype / offset / numero de elementos, mas metadatos libres
+    <nombre>.bin    Arrays concatenados en little-endian, alineados a 8 bytes
+
+Los dtypes son siempre explicitos ('<u4', '<f4', '<u1'...), asi el .bin se
+puede mapear tal cual desde Dart (ByteData / Uint32List.view) o con
+numpy.frombuffer sin copias.
+
+INSTALACION DE DEPENDENCIAS:
+    pip install numpy
+"""
+
+import sys
+import json
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: Falta dependencia numpy")
+    print("Instala con: pip install numpy")
+    sys.exit(1)
+
+
+BLOB_FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+
+def source_signature(source_path: Path) -> Dict[str, Any]:
+    stat = Path(source_path).stat()
+    return {'file': Path(source_path).name, 'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def index_paths(base_path: Path) -> Tuple[Path, Path]:
+    base_path = Path(base_path)
+    return base_path.with_suffix('.json'), base_path.with_suffix('.bin')
+
+
+class BlobWriter:
+    """Acumula arrays con nombre y escribe manifest + .bin de una vez."""
+
+    def __init__(self, base_path: Path, kind: str, source_path: Optional[Path] = None):
+        self.manifest_path, self.bin_path = index_paths(base_path)
+        self.kind = kind
+        self.source = source_signature(source_path) if source_path else None
+        self._arrays: Dict[str, Dict[str, Any]] = {}
+        self._chunks = []
+        self._offset = 0
+
+    def add(self, name: str, values, dtype: str) -> Dict[str, Any]:
+        if name in self._arrays:
+            raise ValueError(f"Array duplicado en el indice: {name}")
+        data = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+        raw = data.tobytes()
+        padding = (-len(raw)) % ALIGNMENT
+        entry = {'dtype': data.dtype.str, 'offset': self._offset, 'count': int(data.size)}
+        self._arrays[name] = entry
+        self._chunks.append(raw + b'\0' * padding)
+        self._offset += len(raw) + padding
+        return entry
+
+    def close(self, meta: Optional[Dict[str, Any]] = None) -> int:
+        """Escribe ambos ficheros (atomico por fichero). Devuelve bytes del .bin."""
+        tmp_bin = self.bin_path.with_suffix('.bin.tmp')
+        with open(tmp_bin, 'wb') as f:
+            for chunk in self._chunks:
+                f.write(chunk)
+        tmp_bin.replace(self.bin_path)
+
+        manifest = {
+            'version': BLOB_FORMAT_VERSION,
+            'kind': self.kind,
+            'source': self.source,
+            'bin': self.bin_path.name,
+            'arrays': self._arrays,
+            'meta': meta or {},
+        }
+        tmp_manifest = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        tmp_manifest.replace(self.manifest_path)
+        return self._offset
+
+
+class BlobReader:
+    """Acceso a los arrays de un indice sin copiarlos (mmap de solo lectura)."""
+
+    def __init__(self, base_path: Path):
+        self.manifest_path, self.bin_path = index_paths(base_path)
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._buffer = np.memmap(self.bin_path, dtype=np.uint8, mode='r') if self.bin_path.stat().st_size else \
+            np.zeros(0, dtype=np.uint8)
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.manifest['meta']
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.manifest['arrays']
+
+    def array(self, name: str) -> np.ndarray:
+        entry = self.manifest['arrays'][name]
+        if entry['count'] == 0:
+            return np.zeros(0, dtype=np.dtype(entry['dtype']))
+        return np.frombuffer(self._buffer, dtype=np.dtype(entry['dtype']), count=entry['count'],
+                             offset=entry['offset'])
+
+    def is_stale(self, source_path: Path) -> bool:
+        return self.manifest.get('source') != source_signature(source_path)
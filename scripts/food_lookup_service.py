@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Servicio HTTP local (asyncio) para consultar los subsets de alimentos.
+
+Sirve exactamente el catalogo que se empaqueta en la app (los artefactos
+*_subset.jsonl.gz generados por create_food_subset.py), sin depender de la API
+de Open Food Facts. Pensado para dispositivos de QA y herramientas internas.
+
+ENDPOINTS (GET, respuestas JSON):
+    /health
+    /markets
+    /product/<codigo>?market=spain
+    /search?q=leche desnat&market=spain&limit=20
+    /filter?market=spain&min_proteins=20&max_energy_kcal=150&category=yogurts&sort=-proteins
+
+EJECUCION:
+    python food_lookup_service.py                       # subsets del directorio scripts/
+    python food_lookup_service.py --data-dir ../assets/data --port 8765
+    python food_lookup_service.py --subset spain=spain_subset.jsonl.gz
+
+    python food_service_loadtest.py --url http://127.0.0.1:8765 --market spain
+
+REQUISITOS:
+    - Python 3.10+ (solo libreria estandar)
+"""
+
+import sys
+import json
+import math
+import time
+import asyncio
+import threading
+import argparse
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from food_subset_reader import SubsetReader
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+WORK_DIR = Path(__file__).parent.resolve()
+SUBSET_SUFFIX = '_subset.jsonl.gz'
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+MAX_HEADER_BYTES = 16384
+
+# Mismas claves que escribe el exportador en `nutriments`
+NUTRIMENT_KEYS = ['energy_kcal', 'proteins', 'carbohydrates', 'fat', 'fiber', 'sugars']
+
+
+# =============================================================================
+# NORMALIZACION
+# =============================================================================
+
+def normalize_text(text: str) -> str:
+    """Minusculas y sin acentos, como la busqueda de la app."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in normalize_text(text))
+    return [token for token in cleaned.split() if token]
+
+
+# =============================================================================
+# INDICES EN MEMORIA
+# =============================================================================
+
+class MarketIndex:
+    """Indices en memoria sobre un subset: codigo, prefijo de nombre y macros."""
+
+    def __init__(self, market: str, reader: SubsetReader):
+        self.market = market
+        self.reader = reader
+        self.by_code: Dict[str, int] = {}
+        self.columns: Dict[str, array] = {key: array('d') for key in NUTRIMENT_KEYS}
+        self.sorted_columns: Dict[str, Tuple[array, array]] = {}
+        self.categories: Dict[str, List[int]] = {}
+        self._tokens: List[str] = []
+        self._token_rows: List[int] = []
+        self._build()
+
+    def _build(self):
+        start = time.perf_counter()
+        token_pairs: List[Tuple[str, int]] = []
+
+        for row in range(len(self.reader)):
+            product = self.reader.get(row)
+            self.by_code[str(product.get('code', ''))] = row
+            for token in set(tokenize(product.get('name') or '')):
+                token_pairs.append((token, row))
+            nutriments = product.get('nutriments') or {}
+            for key in NUTRIMENT_KEYS:
+                value = nutriments.get(key)
+                self.columns[key].append(float(value) if value is not None else math.nan)
+            for category in product.get('categories') or []:
+                self.categories.setdefault(normalize_text(category), []).append(row)
+
+        token_pairs.sort()
+        self._tokens = [token for token, _ in token_pairs]
+        self._token_rows = [row for _, row in token_pairs]
+
+        for key, column in self.columns.items():
+            rows = sorted((r for r in range(len(column)) if not math.isnan(column[r])), key=column.__getitem__)
+            self.sorted_columns[key] = (array('d', (column[r] for r in rows)), array('L', rows))
+
+        elapsed = time.perf_counter() - start
+        print(f"   [OK] {self.market}: {len(self.reader):,} productos indexados en {elapsed:.1f}s")
+
+    # -------------------------------------------------------------------------
+    # Consultas
+    # -------------------------------------------------------------------------
+
+    def product(self, code: str) -> Optional[Dict[str, Any]]:
+        row = self.by_code.get(code.strip())
+        return self.reader.get(row) if row is not None else None
+
+    def _prefix_rows(self, prefix: str) -> set:
+        lo = bisect_left(self._tokens, prefix)
+        hi = bisect_left(self._tokens, prefix + '\uffff', lo)
+        return set(self._token_rows[lo:hi])
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Semantica AND de prefijos, igual que searchFoodsFTS (`leche* desnat*`)."""
+        terms = [t for t in tokenize(query) if len(t) >= 2]
+        if not terms:
+            return []
+        # Empezar por el termino mas selectivo
+        candidate_sets = sorted((self._prefix_rows(term) for term in terms), key=len)
+        rows = candidate_sets[0]
+        for other in candidate_sets[1:]:
+            rows &= other
+            if not rows:
+                return []
+        return [self.reader.get(row) for row in sorted(rows)[:limit]]
+
+    def filter(self, ranges: Dict[str, Tuple[float, float]], category: Optional[str],
+               sort_key: Optional[str], descending: bool, limit: int) -> List[Dict[str, Any]]:
+        """Filtro por rangos de macros usando las columnas ordenadas."""
+        candidates: Optional[List[int]] = None
+        if ranges:
+            # Rango mas selectivo primero, via bisect sobre la columna ordenada
+            spans = []
+            for key, (low, high) in ranges.items():
+                values, rows = self.sorted_columns[key]
+                lo = bisect_left(values, low)
+                hi = bisect_right(values, high)
+                spans.append((hi - lo, key, rows[lo:hi]))
+            spans.sort(key=lambda span: span[0])
+            _, first_key, first_rows = spans[0]
+            candidates = [
+                row for row in first_rows
+                if all(ranges[key][0] <= self.columns[key][row] <= ranges[key][1]
+                       for key in ranges if key != first_key)
+            ]
+
+        if category:
+            category_rows = self.categories.get(normalize_text(category), [])
+            if candidates is None:
+                candidates = list(category_rows)
+            else:
+                allowed = set(category_rows)
+                candidates = [row for row in candidates if row in allowed]
+
+        if candidates is None:
+            candidates = list(range(len(self.reader)))
+
+        if sort_key:
+            column = self.columns[sort_key]
+            candidates = [row for row in candidates if not math.isnan(column[row])]
+            candidates.sort(key=column.__getitem__, reverse=descending)
+        else:
+            candidates.sort()
+        return [self.reader.get(row) for row in candidates[:limit]]
+
+
+# =============================================================================
+# CACHE LRU
+# =============================================================================
+
+class LRUCache:
+    """LRU con lock: los fallos se resuelven en hilos del executor."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# =============================================================================
+# SERVICIO HTTP
+# =============================================================================
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           414: 'URI Too Long', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+
+class FoodLookupService:
+    def __init__(self, markets: Dict[str, MarketIndex], cache_size: int = DEFAULT_CACHE_SIZE,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.markets = markets
+        self.cache = LRUCache(cache_size)
+        self.max_concurrency = max_concurrency
+        # El semaforo acota las consultas en curso (await sobre el executor);
+        # los aciertos de cache se sirven en el bucle sin pasar por el
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='lookup')
+        self.requests_served = 0
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    # -------------------------------------------------------------------------
+    # Rutas
+    # -------------------------------------------------------------------------
+
+    def _market(self, params: Dict[str, List[str]]) -> MarketIndex:
+        name = params.get('market', [None])[0] or next(iter(self.markets))
+        index = self.markets.get(name)
+        if index is None:
+            raise HttpError(404, f"Mercado no disponible: {name}")
+        return index
+
+    @staticmethod
+    def _limit(params: Dict[str, List[str]]) -> int:
+        try:
+            limit = int(params.get('limit', [DEFAULT_LIMIT])[0])
+        except ValueError:
+            raise HttpError(400, 'limit debe ser un entero')
+        return max(1, min(limit, MAX_LIMIT))
+
+    def route(self, path: str, params: Dict[str, List[str]]) -> Any:
+        if path == '/health':
+            return {'status': 'ok'}
+        if path == '/markets':
+            return {name: len(index.reader) for name, index in self.markets.items()}
+        if path == '/stats':
+            return {
+                'requests': self.requests_served,
+                'cache_entries': len(self.cache),
+                'cache_hits': self.cache.hits,
+                'cache_misses': self.cache.misses,
+                'max_concurrency': self.max_concurrency,
+            }
+        if path.startswith('/product/'):
+            code = unquote(path[len('/product/'):])
+            product = self._market(params).product(code)
+            if product is None:
+                raise HttpError(404, f"Producto no encontrado: {code}")
+            return product
+        if path == '/search':
+            query = params.get('q', [''])[0]
+            if not query.strip():
+                raise HttpError(400, 'Falta el parametro q')
+            results = self._market(params).search(query, self._limit(params))
+            return {'count': len(results), 'results': results}
+        if path == '/filter':
+            return self._filter(params)
+        raise HttpError(404, f"Ruta desconocida: {path}")
+
+    def _filter(self, params: Dict[str, List[str]]) -> Any:
+        ranges: Dict[str, Tuple[float, float]] = {}
+        for key in NUTRIMENT_KEYS:
+            try:
+                low = float(params['min_' + key][0]) if 'min_' + key in params else -math.inf
+                high = float(params['max_' + key][0]) if 'max_' + key in params else math.inf
+            except ValueError:
+                raise HttpError(400, f"Rango no numerico para {key}")
+            if low != -math.inf or high != math.inf:
+                ranges[key] = (low, high)
+
+        sort_param = params.get('sort', [''])[0]
+        descending = sort_param.startswith('-')
+        sort_key = sort_param.lstrip('-') or None
+        if sort_key is not None and sort_key not in NUTRIMENT_KEYS:
+            raise HttpError(400, f"Orden no soportado: {sort_key}")
+
+        category = params.get('category', [None])[0]
+        if not ranges and not category:
+            raise HttpError(400, 'Indica al menos un rango min_/max_ o una categoria')
+        results = self._market(params).filter(ranges, category, sort_key, descending, self._limit(params))
+        return {'count': len(results), 'results': results}
+
+    # -------------------------------------------------------------------------
+    # Protocolo
+    # -------------------------------------------------------------------------
+
+    def respond(self, target: str) -> Tuple[int, bytes]:
+        cached = self.cache.get(target)
+        if cached is not None:
+            return cached
+        return self._compute(target)
+
+    def _compute(self, target: str) -> Tuple[int, bytes]:
+        parts = urlsplit(target)
+        try:
+            payload = self.route(parts.path, parse_qs(parts.query))
+            result = (200, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+        except HttpError as e:
+            return e.status, json.dumps({'error': e.message}, ensure_ascii=False).encode('utf-8')
+        # Solo se cachean respuestas correctas; los 404 de codigos no
+        # llenarian la cache con basura
+        self.cache.put(target, result)
+        return result
+
+    async def _dispatch(self, target: str) -> Tuple[int, bytes]:
+        cached = self.cache.get(target)
+        if cached is not None:
+            return cached
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._compute, target)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                # Una linea mas larga que el limite del StreamReader (64 KiB)
+                # lanza ValueError/LimitOverrunError en readline()
+                try:
+                    request_line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await self._write(writer, 414, b'{"error": "Peticion demasiado larga"}', False)
+                    break
+                if not request_line:
+                    break
+                if len(request_line) > MAX_REQUEST_LINE:
+                    await self._write(writer, 414, b'{"error": "Peticion demasiado larga"}', False)
+                    break
+
+                keep_alive = True
+                header_count = 0
+                header_bytes = 0
+                headers_too_large = False
+                while True:
+                    try:
+                        header = await reader.readline()
+                    except (ValueError, asyncio.LimitOverrunError):
+                        headers_too_large = True
+                        break
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    header_count += 1
+                    header_bytes += len(header)
+                    if header_count > MAX_HEADERS or header_bytes > MAX_HEADER_BYTES:
+                        headers_too_large = True
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    if name.strip().lower() == 'connection' and value.strip().lower() == 'close':
+                        keep_alive = False
+                if headers_too_large:
+                    await self._write(writer, 431, b'{"error": "Cabeceras demasiado grandes"}', False)
+                    break
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._write(writer, 400, b'{"error": "Peticion malformada"}', False)
+                    break
+                if version == 'HTTP/1.0':
+                    keep_alive = False
+
+                if method != 'GET':
+                    status, body = 405, b'{"error": "Solo GET"}'
+                else:
+                    try:
+                        status, body = await self._dispatch(target)
+                    except Exception as e:
+                        status, body = 500, json.dumps({'error': str(e)}).encode('utf-8')
+                self.requests_served += 1
+                await self._write(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool):
+        headers = (
+            f"HTTP/1.1 {status} {REASONS.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(headers.encode('latin-1') + body)
+        await writer.drain()
+
+
+# =============================================================================
+# CARGA DE SUBSETS
+# =============================================================================
+
+def discover_subsets(data_dir: Path) -> Dict[str, Path]:
+    """Mercados disponibles en un directorio (`<mercado>_subset.jsonl.gz`)."""
+    return {
+        path.name[:-len(SUBSET_SUFFIX)]: path
+        for path in sorted(data_dir.glob('*' + SUBSET_SUFFIX))
+    }
+
+
+def parse_subset_arg(value: str) -> Tuple[str, Path]:
+    market, sep, path = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError('Formato esperado: mercado=ruta')
+    return market, Path(path)
+
+
+def load_markets(subsets: Dict[str, Path]) -> Dict[str, MarketIndex]:
+    print(f"\n[CARGA] Indexando {len(subsets)} subset(s)...")
+    return {market: MarketIndex(market, SubsetReader(path)) for market, path in subsets.items()}
+
+
+async def serve(service: FoodLookupService, host: str, port: int):
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"\n[SERVICIO] Escuchando en http://{host}:{port}")
+    print(f"   Mercados: {', '.join(service.markets)}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Servicio local de consulta de alimentos')
+    parser.add_argument('--data-dir', type=Path, default=WORK_DIR, help='Directorio con *_subset.jsonl.gz')
+    parser.add_argument('--subset', type=parse_subset_arg, action='append', default=[],
+                        help='Subset explicito mercado=ruta (repetible)')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Interfaz (por defecto solo local)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, help='Entradas de la cache LRU')
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help='Peticiones procesadas en paralelo como maximo')
+    args = parser.parse_args(argv)
+
+    subsets = dict(args.subset) if args.subset else discover_subsets(args.data_dir)
+    if not subsets:
+        print(f"[ERROR] No hay subsets en {args.data_dir}. Genera uno con create_food_subset.py")
+        sys.exit(1)
+
+    service = FoodLookupService(load_markets(subsets), args.cache_size, args.max_concurrency)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n[SERVICIO] Detenido")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Metricas nutricionales derivadas e indices para consultas por rango y top-k.
+
+Busquedas como "yogur alto en proteina y bajo en kcal" obligan hoy a recorrer
+todo el subset en el dispositivo. Este paso calcula, con operaciones
+vectorizadas sobre columnas:
+
+    protein_per_100kcal   g de proteina por cada 100 kcal
+    protein_energy_ratio  fraccion de energia que aporta la proteina (4 kcal/g)
+    carb_energy_ratio     fraccion de energia de carbohidratos (4 kcal/g)
+    fat_energy_ratio      fraccion de energia de grasa (9 kcal/g)
+    sugar_share           azucares / carbohidratos
+
+y emite, para esas metricas y los macros crudos:
+    - columnas por fila (float32, NaN = sin dato)
+    - arrays ordenados (valores + filas) globales y por categoria: un rango
+      son dos busquedas binarias y el top-k es leer el final del array
+    - bitmaps por cuantil (8 buckets) para combinar varios rangos con AND
+
+Las filas son la posicion de la linea en el .jsonl.gz (la misma que usa
+food_subset_reader.py). Formato: ver food_index_blob.py.
+
+INSTALACION DE DEPENDENCIAS:
+    pip install numpy
+
+EJECUCION:
+    python food_nutrient_index.py spain_subset.jsonl.gz
+    python food_nutrient_index.py spain_subset.jsonl.gz --query "protein_per_100kcal>=8,energy_kcal<=120" \\
+        --category yogurts --sort protein_per_100kcal -k 10
+    python food_nutrient_index.py spain_subset.jsonl.gz --bench
+    python create_food_subset.py spain --nutrient-index      # al exportar
+"""
+
+import re
+import sys
+import json
+import gzip
+import time
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: Falta dependencia numpy")
+    print("Instala con: pip install numpy")
+    sys.exit(1)
+
+from food_index_blob import BlobWriter, BlobReader
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+INDEX_KIND = 'nutrient-index'
+INDEX_SUFFIX = '_nutrient_index'
+
+RAW_METRICS = ['energy_kcal', 'proteins', 'carbohydrates', 'fat', 'sugars', 'fiber']
+DERIVED_METRICS = ['protein_per_100kcal', 'protein_energy_ratio', 'carb_energy_ratio',
+                   'fat_energy_ratio', 'sugar_share']
+METRICS = RAW_METRICS + DERIVED_METRICS
+
+MIN_KCAL = 5.0                # por debajo los ratios de energia no significan nada
+MAX_ENERGY_RATIO = 1.5        # errores de etiquetado: se descartan como sin dato
+BUCKETS = 8
+MIN_CATEGORY_PRODUCTS = 200
+MAX_CATEGORIES = 150
+
+_CONDITION = re.compile(r'^\s*([a-z0-9_]+)\s*(<=|>=|<|>|=)\s*([-+0-9.eE]+)\s*$')
+
+
+def index_base_path(subset_path: Path) -> Path:
+    """spain_subset.jsonl.gz -> spain_nutrient_index (.json / .bin)."""
+    stem = Path(subset_path).name.split('.')[0]
+    market = stem[:-len('_subset')] if stem.endswith('_subset') else stem
+    return Path(subset_path).parent / f"{market}{INDEX_SUFFIX}"
+
+
+# =============================================================================
+# CARGA Y METRICAS
+# =============================================================================
+
+def load_columns(subset_path: Path) -> Tuple[Dict[str, np.ndarray], List[List[str]]]:
+    """Columnas de macros (float64, NaN = sin dato) y categorias por fila."""
+    values: Dict[str, List[float]] = {key: [] for key in RAW_METRICS}
+    categories: List[List[str]] = []
+    nan = float('nan')
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            product = json.loads(line)
+            nutriments = product.get('nutriments') or {}
+            for key in RAW_METRICS:
+                value = nutriments.get(key)
+                values[key].append(nan if value is None else float(value))
+            categories.append(product.get('categories') or [])
+    return {key: np.array(column, dtype=np.float64) for key, column in values.items()}, categories
+
+
+def derive_metrics(raw: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Metricas derivadas con aritmetica de columnas. Devuelve raw + derivadas."""
+    kcal = raw['energy_kcal']
+    valid_kcal = np.where(kcal >= MIN_KCAL, kcal, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        derived = {
+            'protein_per_100kcal': raw['proteins'] / valid_kcal * 100,
+            'protein_energy_ratio': raw['proteins'] * 4 / valid_kcal,
+            'carb_energy_ratio': raw['carbohydrates'] * 4 / valid_kcal,
+            'fat_energy_ratio': raw['fat'] * 9 / valid_kcal,
+            'sugar_share': raw['sugars'] / np.where(raw['carbohydrates'] > 0, raw['carbohydrates'], np.nan),
+        }
+    for key in ('protein_energy_ratio', 'carb_energy_ratio', 'fat_energy_ratio'):
+        derived[key][derived[key] > MAX_ENERGY_RATIO] = np.nan
+    derived['sugar_share'] = np.clip(derived['sugar_share'], 0.0, 1.0)
+    columns = dict(raw)
+    columns.update(derived)
+    return columns
+
+
+def _sorted_arrays(values: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(valores ascendentes, filas) sin NaN. Empates por fila para ser deterministas."""
+    subset = values[rows]
+    keep = ~np.isnan(subset)
+    rows, subset = rows[keep], subset[keep]
+    order = np.lexsort((rows, subset))
+    return subset[order].astype(np.float32), rows[order].astype(np.uint32)
+
+
+# =============================================================================
+# CONSTRUCCION
+# =============================================================================
+
+def build_index(subset_path: Path, base_path: Optional[Path] = None) -> Path:
+    """Construye el indice de un subset. Devuelve la ruta base (sin extension)."""
+    subset_path = Path(subset_path)
+    base_path = base_path or index_base_path(subset_path)
+    start = time.time()
+    print(f"\n[INDICE] Metricas nutricionales: {subset_path.name}")
+
+    raw, categories = load_columns(subset_path)
+    columns = derive_metrics(raw)
+    total = len(categories)
+    all_rows = np.arange(total, dtype=np.int64)
+
+    category_rows: Dict[str, List[int]] = {}
+    for row, names in enumerate(categories):
+        for name in names:
+            category_rows.setdefault(name, []).append(row)
+    indexed_categories = sorted(
+        ((name, rows) for name, rows in category_rows.items() if len(rows) >= MIN_CATEGORY_PRODUCTS),
+        key=lambda item: (-len(item[1]), item[0]),
+    )[:MAX_CATEGORIES]
+
+    writer = BlobWriter(base_path, INDEX_KIND, subset_path)
+    bucket_edges: Dict[str, List[float]] = {}
+    coverage: Dict[str, int] = {}
+    for metric in METRICS:
+        column = columns[metric]
+        writer.add(f"col/{metric}", column, '<f4')
+        values, rows = _sorted_arrays(column, all_rows)
+        writer.add(f"sorted/{metric}/values", values, '<f4')
+        writer.add(f"sorted/{metric}/rows", rows, '<u4')
+        coverage[metric] = int(len(rows))
+
+        # Bitmaps por cuantil: bucket b = [edges[b], edges[b+1])
+        if len(values):
+            edges = np.quantile(values, np.linspace(0, 1, BUCKETS + 1)).astype(np.float32)
+            edges = np.unique(edges)
+        else:
+            edges = np.zeros(1, dtype=np.float32)
+        bucket_edges[metric] = [float(e) for e in edges]
+        bucket_of = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, max(len(edges) - 2, 0))
+        for bucket in range(max(len(edges) - 1, 1)):
+            mask = np.zeros(total, dtype=bool)
+            mask[rows[bucket_of == bucket]] = True
+            writer.add(f"bitmap/{metric}/{bucket}", np.packbits(mask, bitorder='little'), '<u1')
+
+    category_meta = []
+    for category_id, (name, rows) in enumerate(indexed_categories):
+        rows = np.array(rows, dtype=np.int64)
+        writer.add(f"cat/{category_id}/rows", rows, '<u4')
+        for metric in METRICS:
+            values, sorted_rows = _sorted_arrays(columns[metric], rows)
+            writer.add(f"cat/{category_id}/{metric}/values", values, '<f4')
+            writer.add(f"cat/{category_id}/{metric}/rows", sorted_rows, '<u4')
+        category_meta.append({'id': category_id, 'name': name, 'count': int(len(rows))})
+
+    size = writer.close({
+        'rows': total,
+        'metrics': METRICS,
+        'derived': DERIVED_METRICS,
+        'coverage': coverage,
+        'bucket_edges': bucket_edges,
+        'categories': category_meta,
+    })
+    print(f"   Filas: {total:,}  Metricas: {len(METRICS)}  Categorias indexadas: {len(category_meta)}")
+    print(f"   [OK] {base_path.name}.bin ({size / 1024 / 1024:.1f} MB) en {time.time() - start:.1f}s")
+    return base_path
+
+
+# =============================================================================
+# CONSULTAS
+# =============================================================================
+
+def parse_conditions(text: str) -> Dict[str, Tuple[float, float]]:
+    """
+    'proteins>=10,energy_kcal<=100' -> {'proteins': (10, inf), 'energy_kcal': (-inf, 100)}.
+    Los limites se redondean a float32, la precision de las columnas.
+    """
+    ranges: Dict[str, Tuple[float, float]] = {}
+    for part in filter(None, (p.strip() for p in text.split(','))):
+        match = _CONDITION.match(part)
+        if not match or match.group(1) not in METRICS:
+            raise ValueError(f"Condicion no valida: {part!r} (metricas: {', '.join(METRICS)})")
+        metric, op, number = match.group(1), match.group(2), np.float32(match.group(3))
+        lo, hi = ranges.get(metric, (-np.inf, np.inf))
+        if op in ('>=', '>'):
+            lo = max(lo, float(np.nextafter(number, np.float32(np.inf)) if op == '>' else number))
+        elif op in ('<=', '<'):
+            hi = min(hi, float(np.nextafter(number, np.float32(-np.inf)) if op == '<' else number))
+        else:
+            lo, hi = max(lo, float(number)), min(hi, float(number))
+        ranges[metric] = (lo, hi)
+    return ranges
+
+
+class NutrientIndex:
+    """Consultas por rango / top-k sobre el indice mapeado en memoria."""
+
+    def __init__(self, base_path: Path):
+        self.reader = BlobReader(base_path)
+        meta = self.reader.meta
+        self.rows = meta['rows']
+        self.bucket_edges = meta['bucket_edges']
+        self.categories = {c['name']: c['id'] for c in meta['categories']}
+
+    def _sorted(self, metric: str, category: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        prefix = f"cat/{self.categories[category]}/{metric}" if category else f"sorted/{metric}"
+        return self.reader.array(f"{prefix}/values"), self.reader.array(f"{prefix}/rows")
+
+    def column(self, metric: str) -> np.ndarray:
+        return self.reader.array(f"col/{metric}")
+
+    def range_rows(self, metric: str, lo: float, hi: float, category: Optional[str] = None) -> np.ndarray:
+        values, rows = self._sorted(metric, category)
+        start = np.searchsorted(values, np.float32(lo), side='left') if lo > -np.inf else 0
+        end = np.searchsorted(values, np.float32(hi), side='right') if hi < np.inf else len(values)
+        return rows[start:end]
+
+    def query(self, ranges: Dict[str, Tuple[float, float]], category: Optional[str] = None,
+              sort: Optional[str] = None, k: Optional[int] = None, descending: bool = True) -> np.ndarray:
+        """
+        Filas que cumplen todos los rangos (y la categoria), opcionalmente top-k
+        por `sort`. El rango mas selectivo sale del array ordenado; el resto se
+        comprueba sobre las columnas solo para esos candidatos.
+        """
+        if category is not None and category not in self.categories:
+            raise KeyError(f"Categoria no indexada: {category}")
+
+        if not ranges:
+            if sort and k:
+                values, rows = self._sorted(sort, category)
+                return (rows[::-1] if descending else rows)[:k]
+            if category:
+                candidates = self.reader.array(f"cat/{self.categories[category]}/rows")
+            else:
+                candidates = np.arange(self.rows, dtype=np.uint32)
+        else:
+            sizes = {m: len(self.range_rows(m, lo, hi, category)) for m, (lo, hi) in ranges.items()}
+            driver = min(sizes, key=sizes.get)
+            candidates = self.range_rows(driver, *ranges[driver], category)
+            for metric, (lo, hi) in ranges.items():
+                if metric == driver or not len(candidates):
+                    continue
+                values = self.column(metric)[candidates]
+                candidates = candidates[(values >= np.float32(lo)) & (values <= np.float32(hi))]
+
+        if sort:
+            keys = self.column(sort)[candidates]
+            keep = ~np.isnan(keys)
+            candidates, keys = candidates[keep], keys[keep]
+            order = np.argsort(-keys if descending else keys, kind='stable')
+            candidates = candidates[order]
+        else:
+            candidates = np.sort(candidates)
+        return candidates[:k] if k else candidates
+
+    def bitmap_candidates(self, ranges: Dict[str, Tuple[float, float]]) -> np.ndarray:
+        """Superconjunto de filas por AND de los buckets que tocan cada rango."""
+        if not ranges:
+            return np.arange(self.rows, dtype=np.uint32)
+        combined = None
+        for metric, (lo, hi) in ranges.items():
+            edges = self.bucket_edges[metric]
+            bitmap = None
+            for bucket in range(max(len(edges) - 1, 1)):
+                upper = edges[bucket + 1] if bucket + 1 < len(edges) else np.inf
+                last = bucket == len(edges) - 2
+                if upper < lo and not last or edges[bucket] > hi:
+                    continue
+                bits = self.reader.array(f"bitmap/{metric}/{bucket}")
+                bitmap = bits.copy() if bitmap is None else bitmap | bits
+            if bitmap is None:
+                return np.zeros(0, dtype=np.uint32)
+            combined = bitmap if combined is None else combined & bitmap
+        mask = np.unpackbits(combined, bitorder='little', count=self.rows).astype(bool)
+        return np.flatnonzero(mask).astype(np.uint32)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _scan_products(products: List[Dict[str, Any]], ranges, category, sort, k, descending=True) -> List[int]:
+    """Recorrido completo tal como lo haria el dispositivo sin indice."""
+    matches = []
+    for row, product in enumerate(products):
+        if category and category not in (product.get('categories') or []):
+            continue
+        metrics = product['_metrics']
+        if all(metrics.get(m) is not None and lo <= metrics[m] <= hi for m, (lo, hi) in ranges.items()):
+            matches.append(row)
+    if sort:
+        matches = [r for r in matches if products[r]['_metrics'].get(sort) is not None]
+        matches.sort(key=lambda r: products[r]['_metrics'][sort], reverse=descending)
+    return matches[:k] if k else matches
+
+
+def run_benchmark(subset_path: Path, base_path: Path, repeat: int = 20):
+    index = NutrientIndex(base_path)
+    columns = {m: index.column(m) for m in METRICS}
+    top_category = next(iter(index.categories), None)
+
+    products = []
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        for row, line in enumerate(f):
+            product = json.loads(line)
+            product['_metrics'] = {m: (None if np.isnan(columns[m][row]) else float(columns[m][row]))
+                                   for m in METRICS}
+            products.append(product)
+
+    queries = [
+        ('top-20 proteina/100kcal', {}, None, 'protein_per_100kcal', 20),
+        ('alta proteina + <=120 kcal', parse_conditions('protein_per_100kcal>=8,energy_kcal<=120'), None, None, None),
+        ('poco azucar + poca grasa', parse_conditions('sugar_share<=0.1,fat_energy_ratio<=0.3'), None, None, None),
+    ]
+    if top_category:
+        queries.append((f"{top_category}: top-10 proteina",
+                        parse_conditions('energy_kcal<=150'), top_category, 'protein_per_100kcal', 10))
+
+    print("\n" + "="*60)
+    print(f"BENCHMARK DE CONSULTAS ({len(products):,} productos, {repeat} repeticiones)")
+    print("="*60)
+    print(f"   {'Consulta':<32}{'Scan':>10}{'Indice':>10}{'Filas':>8}")
+    for label, ranges, category, sort, k in queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            expected = _scan_products(products, ranges, category, sort, k)
+        scan_ms = (time.perf_counter() - start) / repeat * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = index.query(ranges, category, sort, k)
+        index_ms = (time.perf_counter() - start) / repeat * 1000
+
+        same = sorted(expected) == sorted(result.tolist()) if not sort else \
+            [columns[sort][r] for r in expected] == [columns[sort][r] for r in result.tolist()]
+        flag = '' if same else '  [DISTINTO]'
+        print(f"   {label:<32}{scan_ms:>8.2f}ms{index_ms:>8.3f}ms{len(result):>8,}{flag}")
+
+    ranges = queries[1][1]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        candidates = index.bitmap_candidates(ranges)
+    bitmap_ms = (time.perf_counter() - start) / repeat * 1000
+    print(f"\n   Bitmaps (consulta 2): {len(candidates):,} candidatos en {bitmap_ms:.3f} ms "
+          f"(superconjunto de {len(index.query(ranges)):,})")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Metricas derivadas e indices nutricionales de un subset')
+    parser.add_argument('subset', type=Path, help='Subset .jsonl.gz')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruir aunque el indice este al dia')
+    parser.add_argument('--query', default='', help='Condiciones: "proteins>=10,energy_kcal<=100"')
+    parser.add_argument('--category', help='Restringir a una categoria indexada')
+    parser.add_argument('--sort', choices=METRICS, help='Ordenar por esta metrica (desc.)')
+    parser.add_argument('--ascending', action='store_true', help='Orden ascendente con --sort')
+    parser.add_argument('-k', type=int, default=20, help='Maximo de resultados')
+    parser.add_argument('--bench', action='store_true', help='Comparar consultas contra un recorrido completo')
+    args = parser.parse_args(argv)
+
+    if not args.subset.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.subset}")
+        sys.exit(1)
+
+    base_path = index_base_path(args.subset)
+    manifest_exists = base_path.with_suffix('.json').exists()
+    if args.rebuild or not manifest_exists or BlobReader(base_path).is_stale(args.subset):
+        build_index(args.subset, base_path)
+
+    if args.bench:
+        run_benchmark(args.subset, base_path)
+        return
+
+    if args.query or args.sort or args.category:
+        try:
+            ranges = parse_conditions(args.query)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+        index = NutrientIndex(base_path)
+        rows = index.query(ranges, args.category, args.sort, args.k, not args.ascending)
+        print(f"\n[CONSULTA] {len(rows):,} filas")
+        columns = {m: index.column(m) for m in set(ranges) | ({args.sort} if args.sort else set())}
+        for row in rows[:args.k].tolist():
+            values = '  '.join(f"{m}={columns[m][row]:.2f}" for m in columns)
+            print(f"   fila {row:>8}  {values}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Orden de filas por localidad para el subset exportado.
+
+Por defecto las filas salen en el orden que devuelve la consulta de filtrado
+(o el sort de priorizacion), asi que productos parecidos quedan lejos en el
+flujo gzip. Con --order locality el exportador agrupa los registros por:
+
+    marca -> categoria mas especifica -> nombre normalizado -> codigo de barras
+
+Las cadenas repetidas (marca, categorias, prefijos de nombre) caen dentro de
+la ventana de 32 KB de deflate y el prefijo GS1 del codigo (empresa) queda
+contiguo dentro de cada marca, lo que tambien hace mas secuenciales las
+escrituras de paginas de SQLite al importar.
+
+Este script tambien reordena un subset ya generado y compara tamaños
+comprimidos antes y despues (mismo nivel 9 que el exportador); con
+--import-sim mide ademas la importacion de ambos con food_import_sim.py.
+
+INSTALACION DE DEPENDENCIAS:
+    pip install pandas          # solo para ordenar dentro de create_food_subset
+
+EJECUCION:
+    python create_food_subset.py spain --order locality
+    python food_ordering.py spain_subset.jsonl.gz                  # informe de compresion
+    python food_ordering.py spain_subset.jsonl.gz --import-sim
+    python food_ordering.py spain_subset.jsonl.gz --write spain_subset_locality.jsonl.gz
+"""
+
+import sys
+import gzip
+import json
+import time
+import tempfile
+import argparse
+from pathlib import Path
+from typing import Optional, List, Tuple
+
+from food_lookup_service import normalize_text
+
+
+ORDERS = ['source', 'locality']
+DEFAULT_ORDER = 'source'
+COMPRESS_LEVEL = 9
+# Sin marca / categoria al final de su grupo, no al principio
+MISSING_KEY = '￿'
+
+
+# =============================================================================
+# CLAVES DE ORDEN
+# =============================================================================
+
+def _first_brand(brands) -> str:
+    if not brands or not isinstance(brands, str):
+        return MISSING_KEY
+    return normalize_text(brands.split(',')[0]).strip() or MISSING_KEY
+
+
+def record_sort_key(product: dict) -> Tuple[str, str, str, str]:
+    """Clave de localidad para un registro del subset ya exportado."""
+    categories = product.get('categories') or []
+    return (
+        _first_brand(product.get('brands')),
+        normalize_text(categories[-1]) if categories else MISSING_KEY,
+        normalize_text(product.get('name') or ''),
+        str(product.get('code') or ''),
+    )
+
+
+def order_dataframe(result):
+    """
+    Reordena las filas del dump (columnas de export_columns) por localidad.
+    Mismas claves que record_sort_key, calculadas de forma vectorizada.
+    """
+    def fold(series):
+        return (series.fillna('').astype(str).str.normalize('NFKD')
+                .str.encode('ascii', 'ignore').str.decode('ascii').str.lower().str.strip())
+
+    brand_source = result['brands'].where(result['brands'].notna(), result['brands_tags'])
+    brand = fold(brand_source.astype('string').str.split(',').str[0])
+    # categories_tags va de general a especifica: la ultima agrupa mejor
+    category = fold(result['categories_tags'].astype('string').str.split(',').str[-1]
+                    .str.replace(r'^[a-z]{2}:', '', regex=True).str.replace('-', ' '))
+    name = fold(result['product_name'].where(result['product_name'].notna(), result['generic_name']))
+    keys = result.assign(
+        _brand=brand.mask(brand == '', MISSING_KEY),
+        _category=category.mask(category == '', MISSING_KEY),
+        _name=name,
+        _code=result['code'].astype(str).str.strip(),
+    )
+    keys = keys.sort_values(['_brand', '_category', '_name', '_code'], kind='stable')
+    return keys.drop(columns=['_brand', '_category', '_name', '_code'])
+
+
+# =============================================================================
+# INFORME
+# =============================================================================
+
+def read_lines(subset_path: Path) -> List[str]:
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        return [line for line in f if line.strip()]
+
+
+def locality_order(lines: List[str]) -> List[str]:
+    keyed = [(record_sort_key(json.loads(line)), line) for line in lines]
+    keyed.sort(key=lambda item: item[0])
+    return [line for _, line in keyed]
+
+
+def compressed_size(lines: List[str]) -> Tuple[int, float]:
+    start = time.perf_counter()
+    size = len(gzip.compress(''.join(lines).encode('utf-8'), compresslevel=COMPRESS_LEVEL, mtime=0))
+    return size, time.perf_counter() - start
+
+
+def write_subset(lines: List[str], output_path: Path):
+    with gzip.open(output_path, 'wt', encoding='utf-8', compresslevel=COMPRESS_LEVEL) as f:
+        f.writelines(lines)
+
+
+def print_report(name: str, lines: List[str], ordered: List[str]):
+    raw = sum(len(line.encode('utf-8')) for line in lines)
+    before, before_s = compressed_size(lines)
+    after, after_s = compressed_size(ordered)
+    print("\n" + "="*60)
+    print(f"COMPRESION POR ORDEN: {name} ({len(lines):,} productos)")
+    print("="*60)
+    print(f"   Sin comprimir:           {raw / 1024 / 1024:.1f} MB")
+    print(f"   Orden original:          {before / 1024 / 1024:.2f} MB  (ratio {raw / before:.2f}x, {before_s:.1f}s)")
+    print(f"   Orden por localidad:     {after / 1024 / 1024:.2f} MB  (ratio {raw / after:.2f}x, {after_s:.1f}s)")
+    print(f"   Diferencia:              {(after - before) / before:+.1%}")
+    print("="*60)
+
+
+def compare_import(lines: List[str], ordered: List[str]):
+    from food_import_sim import run_trial
+    print("\n[IMPORTACION] Estrategia de la app (whole / default / lote 5000)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, variant in (('original', lines), ('localidad', ordered)):
+            path = Path(tmp) / f"{label}.jsonl.gz"
+            write_subset(variant, path)
+            result = run_trial({'artifact': str(path), 'format': 'whole', 'pragmas': 'default',
+                                'batch_size': 5000, 'cpus': 0, 'cpu_factor': 1.0, 'memory_mb': 0})
+            print(f"   {label:<10} total {result['total_s']:.2f}s  lote p95 {result['batch_p95_ms']:.0f} ms  "
+                  f"FTS {result['fts_ms'] / 1000:.2f}s  DB {result['db_mb']:.1f} MB")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Reordenar un subset por localidad e informar de la compresion')
+    parser.add_argument('subset', type=Path, help='Subset .jsonl.gz')
+    parser.add_argument('--write', type=Path, help='Guardar el subset reordenado')
+    parser.add_argument('--import-sim', action='store_true', help='Comparar tambien la importacion simulada')
+    args = parser.parse_args(argv)
+
+    if not args.subset.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.subset}")
+        sys.exit(1)
+
+    lines = read_lines(args.subset)
+    ordered = locality_order(lines)
+    print_report(args.subset.name, lines, ordered)
+    if args.import_sim:
+        compare_import(lines, ordered)
+    if args.write:
+        write_subset(ordered, args.write)
+        print(f"[OK] Subset reordenado: {args.write}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Base compartida entre mercados + overlays por mercado.
+
+Los filtros de España y USA se solapan mucho (nestle, oreo, kellogg,
+coca-cola, pringles...), asi que muchos productos se exportan dos veces y
+FoodDatabaseLoader.switchMarket borra y reimporta todos. A partir de los
+subsets ya generados este script escribe:
+
+    shared_base.jsonl.gz       productos seleccionados por todos los mercados
+    spain_overlay.jsonl.gz     productos solo de España
+    usa_overlay.jsonl.gz       productos solo de USA
+    market_overlays.json       manifest: ficheros, productos, bytes, sha256 y,
+                               por cambio de mercado, productos a quitar/añadir
+
+Mercado X = base + overlay X, sin duplicados. Cambiar de mercado es borrar el
+overlay anterior e insertar el nuevo; la base se queda. Los subsets
+completos se siguen generando igual (la app actual no cambia).
+
+Si un mismo codigo tiene registros distintos en dos mercados (mismo dump y
+perfil: no deberia pasar) se usa el del primer mercado y se informa.
+
+EJECUCION:
+    python create_food_subset.py all --overlays
+    python food_overlays.py spain_subset.jsonl.gz usa_subset.jsonl.gz
+    python food_overlays.py spain=spain_subset.jsonl.gz usa=usa_subset.jsonl.gz --output-dir overlays/
+"""
+
+import sys
+import json
+import gzip
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Set
+
+
+OVERLAYS_FORMAT_VERSION = 1
+BASE_FILENAME = 'shared_base.jsonl.gz'
+MANIFEST_FILENAME = 'market_overlays.json'
+
+# El exportador escribe siempre 'code' como primera clave del registro
+CODE_PREFIX = '{"code": "'
+
+
+def overlay_filename(market: str) -> str:
+    return f"{market}_overlay.jsonl.gz"
+
+
+def _line_code(line: str) -> str:
+    if line.startswith(CODE_PREFIX):
+        end = line.find('"', len(CODE_PREFIX))
+        if end != -1 and '\\' not in line[len(CODE_PREFIX):end]:
+            return line[len(CODE_PREFIX):end]
+    return str(json.loads(line).get('code', ''))
+
+
+def _iter_lines(subset_path: Path):
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield line if line.endswith('\n') else line + '\n'
+
+
+def _open_output(path: Path):
+    # mtime=0: mismo contenido -> mismos bytes y mismo sha256 entre builds
+    return gzip.GzipFile(filename='', mode='wb', compresslevel=9, mtime=0, fileobj=open(path, 'wb'))
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_entry(path: Path, products: int) -> Dict[str, Any]:
+    return {'file': path.name, 'products': products, 'bytes': path.stat().st_size, 'sha256': _sha256(path)}
+
+
+# =============================================================================
+# CONSTRUCCION
+# =============================================================================
+
+def market_codes(subsets: Dict[str, Path]) -> Dict[str, Set[str]]:
+    """Primera pasada: codigos de cada mercado (solo los codigos en memoria)."""
+    return {market: {_line_code(line) for line in _iter_lines(path)} for market, path in subsets.items()}
+
+
+def build_overlays(subsets: Dict[str, Path], output_dir: Path) -> Path:
+    """Escribe base, overlays y manifest. Devuelve la ruta del manifest."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    print(f"\n[OVERLAYS] Base compartida entre: {', '.join(subsets)}")
+    codes = market_codes(subsets)
+    # Interseccion: con un codigo en solo parte de los mercados, base + overlay
+    # dejaria de ser exactamente el subset de los demas
+    shared = set.intersection(*codes.values())
+
+    base_path = output_dir / BASE_FILENAME
+    base_hashes: Dict[str, str] = {}
+    base_written = 0
+    conflicts = 0
+    overlay_entries = {}
+    with _open_output(base_path) as base_out:
+        for market, subset_path in subsets.items():
+            overlay_path = output_dir / overlay_filename(market)
+            written = 0
+            seen: Set[str] = set()
+            with _open_output(overlay_path) as overlay_out:
+                for line in _iter_lines(subset_path):
+                    code = _line_code(line)
+                    if code in seen:
+                        continue
+                    seen.add(code)
+                    if code not in shared:
+                        overlay_out.write(line.encode('utf-8'))
+                        written += 1
+                    elif code not in base_hashes:
+                        # Solo el hash para comparar con el resto de mercados
+                        base_hashes[code] = hashlib.blake2b(line.encode('utf-8'), digest_size=8).hexdigest()
+                        base_out.write(line.encode('utf-8'))
+                        base_written += 1
+                    elif base_hashes[code] != hashlib.blake2b(line.encode('utf-8'), digest_size=8).hexdigest():
+                        conflicts += 1
+            overlay_entries[market] = _file_entry(overlay_path, written)
+
+    base_entry = _file_entry(base_path, base_written)
+    base_entry['markets'] = list(subsets)
+    switches = {}
+    for source in subsets:
+        for target in subsets:
+            if source != target:
+                switches[f"{source}->{target}"] = {
+                    'remove': overlay_entries[source]['products'],
+                    'add': overlay_entries[target]['products'],
+                    'full_reload': base_written + overlay_entries[target]['products'],
+                }
+
+    manifest = {
+        'version': OVERLAYS_FORMAT_VERSION,
+        'base': base_entry,
+        'overlays': overlay_entries,
+        'markets': {market: {'base': True, 'overlay': overlay_entries[market]['file'],
+                             'products': base_written + overlay_entries[market]['products']}
+                    for market in subsets},
+        'switch': switches,
+        'conflicts': conflicts,
+    }
+    manifest_path = output_dir / MANIFEST_FILENAME
+    tmp_path = manifest_path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(manifest_path)
+
+    print_summary(manifest, subsets)
+    return manifest_path
+
+
+def print_summary(manifest: Dict[str, Any], subsets: Dict[str, Path]):
+    base = manifest['base']
+    full_bytes = sum(path.stat().st_size for path in subsets.values())
+    split_bytes = base['bytes'] + sum(o['bytes'] for o in manifest['overlays'].values())
+    print("\n" + "="*60)
+    print("BASE COMPARTIDA + OVERLAYS")
+    print("="*60)
+    print(f"   {'shared_base':<16}{base['products']:>10,} productos  {base['bytes'] / 1024 / 1024:>7.1f} MB")
+    for market, overlay in manifest['overlays'].items():
+        total = manifest['markets'][market]['products']
+        print(f"   {market + ' overlay':<16}{overlay['products']:>10,} productos  "
+              f"{overlay['bytes'] / 1024 / 1024:>7.1f} MB  ({overlay['products'] / max(total, 1):.0%} del mercado)")
+    print(f"\n   Subsets completos:       {full_bytes / 1024 / 1024:.1f} MB")
+    print(f"   Base + overlays:         {split_bytes / 1024 / 1024:.1f} MB ({split_bytes / full_bytes - 1:+.1%})")
+    for switch, plan in manifest['switch'].items():
+        changed = plan['remove'] + plan['add']
+        print(f"   Cambio {switch:<16} -{plan['remove']:,} / +{plan['add']:,} productos "
+              f"(recarga completa: {plan['full_reload']:,}, {changed / max(plan['full_reload'], 1):.0%})")
+    if manifest['conflicts']:
+        print(f"   [AVISO] {manifest['conflicts']:,} codigos con registros distintos entre mercados "
+              f"(se usa el del primero)")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def parse_subset_args(values: List[str]) -> Dict[str, Path]:
+    """'spain=spain_subset.jsonl.gz' o 'spain_subset.jsonl.gz' (mercado por el nombre)."""
+    subsets: Dict[str, Path] = {}
+    for value in values:
+        if '=' in value:
+            market, path = value.split('=', 1)
+        else:
+            path = value
+            market = Path(value).name.split('.')[0]
+            market = market[:-len('_subset')] if market.endswith('_subset') else market
+        subsets[market] = Path(path)
+    return subsets
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Base compartida entre mercados + overlays por mercado')
+    parser.add_argument('subsets', nargs='+', help='Subsets por mercado: [mercado=]ruta.jsonl.gz (2 o mas)')
+    parser.add_argument('--output-dir', type=Path, help='Carpeta de salida (por defecto la del primer subset)')
+    args = parser.parse_args(argv)
+
+    subsets = parse_subset_args(args.subsets)
+    if len(subsets) < 2:
+        print("[ERROR] Hacen falta al menos dos mercados")
+        sys.exit(1)
+    for market, path in subsets.items():
+        if not path.exists():
+            print(f"[ERROR] No se encuentra el archivo {path} ({market})")
+            sys.exit(1)
+    build_overlays(subsets, args.output_dir or next(iter(subsets.values())).parent)
+
+
+if __name__ == "__main__":
+    main()
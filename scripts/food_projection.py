@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Perfiles de proyeccion de campos para los registros exportados.
+
+Cada perfil decide que campos se escriben en el JSONL, si se eliminan los
+campos nulos y con cuantos decimales se guardan los nutrientes. La app guarda
+el registro completo en `sourceMetadata`, asi que cada byte ahorrado aqui se
+ahorra tambien en la descarga, en la importacion y en la base de datos local.
+
+PERFILES:
+    full         Todos los campos, nulos incluidos (formato historico)
+    app-default  Solo lo que lee la app (FoodDatabaseLoader + food_list_item)
+    minimal      Codigo, nombre, marca, nutriscore y macros principales
+
+EJECUCION (informe de bytes por campo sobre un subset existente):
+    python food_projection.py spain_subset.jsonl.gz
+    python food_projection.py spain_subset.jsonl.gz --profile app-default --sample 20000
+"""
+
+import sys
+import json
+import gzip
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable
+
+
+# =============================================================================
+# PERFILES
+# =============================================================================
+
+PROFILES = {
+    'full': {
+        'fields': ['code', 'name', 'brands', 'generic_name', 'nutriscore', 'nutriments', 'categories'],
+        'nutriments': None,  # None = todos
+        'drop_nulls': False,
+        'decimals': None,    # None = sin redondeo
+    },
+    'app-default': {
+        'fields': ['code', 'name', 'brands', 'nutriscore', 'nutriments', 'categories'],
+        'nutriments': None,
+        'drop_nulls': True,
+        'decimals': 1,
+    },
+    'minimal': {
+        'fields': ['code', 'name', 'brands', 'nutriscore', 'nutriments'],
+        'nutriments': ['energy_kcal', 'proteins', 'carbohydrates', 'fat'],
+        'drop_nulls': True,
+        'decimals': 1,
+    },
+}
+
+DEFAULT_PROFILE = 'full'
+
+REPORT_SAMPLE_SIZE = 10_000
+
+
+# =============================================================================
+# PROYECCION
+# =============================================================================
+
+def _round_value(value: Any, decimals: Optional[int]) -> Any:
+    if decimals is None or not isinstance(value, float):
+        return value
+    rounded = round(value, decimals)
+    # 12.0 -> 12 ahorra dos bytes por valor sin perder informacion
+    return int(rounded) if rounded.is_integer() else rounded
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == [] or value == {}
+
+
+def project_product(product: Dict[str, Any], profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+    """Aplica un perfil a un registro ya construido por el exportador."""
+    config = PROFILES[profile]
+    drop_nulls = config['drop_nulls']
+    decimals = config['decimals']
+    projected = {}
+
+    for field in config['fields']:
+        if field not in product:
+            continue
+        value = product[field]
+        if field == 'nutriments' and isinstance(value, dict):
+            keys = config['nutriments'] or list(value.keys())
+            value = {
+                key: _round_value(value.get(key), decimals)
+                for key in keys
+                if not (drop_nulls and value.get(key) is None)
+            }
+        if drop_nulls and _is_empty(value):
+            continue
+        projected[field] = value
+
+    # Campos anadidos por etapas posteriores (indices, ids de facetas...) se
+    # conservan tal cual si el perfil no los menciona
+    for field, value in product.items():
+        if field not in projected and field not in PROFILES['full']['fields']:
+            if not (drop_nulls and _is_empty(value)):
+                projected[field] = value
+    return projected
+
+
+def dumps_product(product: Dict[str, Any]) -> str:
+    return json.dumps(product, ensure_ascii=False)
+
+
+# =============================================================================
+# INFORME DE BYTES POR CAMPO
+# =============================================================================
+
+def _compressed_size(lines: Iterable[str]) -> int:
+    payload = ''.join(lines).encode('utf-8')
+    return len(gzip.compress(payload, compresslevel=9))
+
+
+def _field_paths(products: List[Dict[str, Any]]) -> List[str]:
+    paths = []
+    for product in products:
+        for field, value in product.items():
+            if field not in paths:
+                paths.append(field)
+            if isinstance(value, dict):
+                for key in value:
+                    path = f"{field}.{key}"
+                    if path not in paths:
+                        paths.append(path)
+    return paths
+
+
+def _without(product: Dict[str, Any], path: str) -> Dict[str, Any]:
+    field, _, key = path.partition('.')
+    if not key:
+        return {k: v for k, v in product.items() if k != field}
+    if not isinstance(product.get(field), dict):
+        return product
+    copy = dict(product)
+    copy[field] = {k: v for k, v in product[field].items() if k != key}
+    return copy
+
+
+def field_byte_report(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Coste de cada campo en la salida comprimida.
+
+    El coste comprimido de un campo es la diferencia de tamaño gzip de la
+    muestra con y sin ese campo (el contexto de compresion hace que no sea
+    aditivo, pero es lo que realmente se ahorraria quitandolo).
+    """
+    if not products:
+        return []
+    baseline_lines = [dumps_product(p) + '\n' for p in products]
+    baseline_raw = sum(len(line.encode('utf-8')) for line in baseline_lines)
+    baseline_gz = _compressed_size(baseline_lines)
+
+    report = []
+    for path in _field_paths(products):
+        lines = [dumps_product(_without(p, path)) + '\n' for p in products]
+        raw = baseline_raw - sum(len(line.encode('utf-8')) for line in lines)
+        compressed = baseline_gz - _compressed_size(lines)
+        report.append({
+            'field': path,
+            'raw_bytes_per_record': raw / len(products),
+            'gz_bytes_per_record': compressed / len(products),
+            'gz_share': compressed / baseline_gz if baseline_gz else 0.0,
+        })
+    report.append({
+        'field': 'TOTAL',
+        'raw_bytes_per_record': baseline_raw / len(products),
+        'gz_bytes_per_record': baseline_gz / len(products),
+        'gz_share': 1.0,
+    })
+    return report
+
+
+def print_field_report(report: List[Dict[str, Any]], title: str):
+    print("\n" + "="*60)
+    print(f"BYTES POR CAMPO: {title}")
+    print("="*60)
+    print(f"   {'Campo':<26}{'Bruto/reg':>10}{'Gzip/reg':>10}{'% gzip':>9}")
+    for row in report:
+        print(f"   {row['field']:<26}{row['raw_bytes_per_record']:>10.1f}"
+              f"{row['gz_bytes_per_record']:>10.1f}{row['gz_share'] * 100:>8.1f}%")
+    print("="*60)
+
+
+def load_sample(subset_path: Path, sample_size: int) -> List[Dict[str, Any]]:
+    products = []
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                products.append(json.loads(line))
+            if len(products) >= sample_size:
+                break
+    return products
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Informe de bytes por campo de un subset')
+    parser.add_argument('subset', type=Path, help='Subset .jsonl.gz existente')
+    parser.add_argument('--profile', choices=list(PROFILES), help='Reproyectar la muestra con este perfil')
+    parser.add_argument('--sample', type=int, default=REPORT_SAMPLE_SIZE, help='Registros a analizar')
+    args = parser.parse_args(argv)
+
+    if not args.subset.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.subset}")
+        sys.exit(1)
+
+    products = load_sample(args.subset, args.sample)
+    title = args.subset.name
+    if args.profile:
+        products = [project_product(p, args.profile) for p in products]
+        title += f" (perfil {args.profile})"
+    print_field_report(field_byte_report(products), title)
+
+
+if __name__ == "__main__":
+    main()
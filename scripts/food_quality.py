@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Perfil de calidad de datos de cada subset, con diff frente al build anterior.
+
+La tabla de cobertura de README_FOOD_SUBSET.md se hizo a mano y
+show_statistics solo imprime recuento y tamaño. Este paso calcula con
+agregados vectorizados (pandas) sobre los productos exportados:
+
+    coverage       % de productos con cada campo y cada nutriente
+    nutriscore     reparto a-e
+    countries      productos por pais del mercado (solo al exportar: el
+                   subset no guarda countries_tags)
+    brands         top de marcas canonicas (claves de food_facets.py)
+    nutriments     distribucion por nutriente (media, desviacion, percentiles)
+    outliers       por categoria mas especifica: valores fuera de
+                   [q1 - 3*IQR, q3 + 3*IQR] o fisicamente imposibles
+
+y lo guarda en <mercado>_quality.json. El perfil anterior se conserva como
+<mercado>_quality.prev.json y el nuevo incluye el diff: cambios de filas,
+cobertura (puntos porcentuales) y medianas, con `regressions` para lo que
+supera los umbrales (p. ej. caida de cobertura de kcal). Sin segunda pasada
+sobre el subset: el exportador perfila el mismo DataFrame que exporta.
+
+INSTALACION DE DEPENDENCIAS:
+    pip install pandas
+
+EJECUCION:
+    python create_food_subset.py spain --quality-profile
+    python food_quality.py spain_subset.jsonl.gz                    # perfil de un subset existente
+    python food_quality.py spain_subset.jsonl.gz --compare old_spain_quality.json
+"""
+
+import sys
+import json
+import time
+import shutil
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+try:
+    import pandas as pd
+except ImportError:
+    print("Error: Falta dependencia pandas")
+    print("Instala con: pip install pandas")
+    sys.exit(1)
+
+from create_food_subset import NUTRIMENT_FIELDS
+from food_facets import split_brands
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+QUALITY_FORMAT_VERSION = 1
+QUALITY_SUFFIX = '_quality.json'
+PREVIOUS_SUFFIX = '_quality.prev.json'
+
+NUTRIENTS = list(NUTRIMENT_FIELDS.values())
+PLACEHOLDER_NAME = 'Producto sin nombre'
+TEXT_FIELDS = ['name', 'brands', 'generic_name', 'nutriscore', 'category']
+NUTRISCORE_GRADES = ['a', 'b', 'c', 'd', 'e']
+PERCENTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+# Limites por 100 g: por encima el valor es imposible (error de unidades o de etiquetado)
+PHYSICAL_MAX = {'energy_kcal': 900.0, 'proteins': 100.0, 'carbohydrates': 100.0,
+                'fat': 100.0, 'fiber': 100.0, 'sugars': 100.0}
+IQR_FACTOR = 3.0
+MIN_CATEGORY_PRODUCTS = 30
+TOP_BRANDS = 25
+OUTLIER_EXAMPLES = 3
+
+# Umbrales del diff para marcar una regresion
+MAX_COVERAGE_DROP_PP = 2.0
+MAX_ROWS_DROP = 0.05
+MAX_MEDIAN_SHIFT = 0.10
+
+
+def quality_path(output_dir: Path, market: str) -> Path:
+    return Path(output_dir) / f"{market}{QUALITY_SUFFIX}"
+
+
+def _market_of(subset_path: Path) -> str:
+    stem = Path(subset_path).name.split('.')[0]
+    return stem[:-len('_subset')] if stem.endswith('_subset') else stem
+
+
+def _valid_text(series: 'pd.Series') -> 'pd.Series':
+    text = series.astype('string').str.strip()
+    return series.notna() & text.ne('') & text.str.lower().ne('nan')
+
+
+# =============================================================================
+# TABLA NORMALIZADA
+# =============================================================================
+
+def frame_from_dump_rows(result: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+    Mismas columnas que frame_from_subset a partir de las filas del dump que
+    exporta create_food_subset (reproduce build_product de forma vectorizada).
+    """
+    product_name = result['product_name'].where(_valid_text(result['product_name']))
+    generic_name = result['generic_name'].where(_valid_text(result['generic_name']))
+    categories = (result['categories_tags'].astype('string').str.split(',').str[:5].str[-1]
+                  .str.strip().str.replace(r'^[^:]*:', '', regex=True).str.replace('-', ' '))
+    frame = pd.DataFrame({
+        'code': result['code'].astype(str).str.strip(),
+        'name': product_name.fillna(generic_name),
+        'brands': result['brands'].where(_valid_text(result['brands'])),
+        'generic_name': generic_name,
+        'nutriscore': result['nutriscore_grade'].where(result['nutriscore_grade'].isin(NUTRISCORE_GRADES)),
+        'category': categories.where(categories.notna() & categories.ne('')),
+        'countries_tags': result['countries_tags'],
+    })
+    for column, name in NUTRIMENT_FIELDS.items():
+        frame[name] = pd.to_numeric(result[column], errors='coerce')
+    return frame.reset_index(drop=True)
+
+
+def frame_from_subset(subset_path: Path) -> 'pd.DataFrame':
+    """Tabla normalizada leyendo un subset .jsonl.gz ya generado."""
+    raw = pd.read_json(subset_path, lines=True, compression='gzip', dtype={'code': str})
+    nutriments = pd.json_normalize(raw['nutriments'].where(raw['nutriments'].notna(), {}).tolist()) \
+        if 'nutriments' in raw else pd.DataFrame(index=raw.index)
+    categories = raw['categories'] if 'categories' in raw else pd.Series([None] * len(raw))
+    names = raw.get('name')
+    frame = pd.DataFrame({
+        'code': raw['code'].astype(str),
+        'name': names.where(names != PLACEHOLDER_NAME) if names is not None else None,
+        'brands': raw.get('brands'),
+        'generic_name': raw.get('generic_name'),
+        'nutriscore': raw.get('nutriscore'),
+        'category': categories.map(lambda c: c[-1] if isinstance(c, list) and c else None),
+    })
+    for name in NUTRIENTS:
+        frame[name] = pd.to_numeric(nutriments[name], errors='coerce') if name in nutriments else float('nan')
+    return frame
+
+
+# =============================================================================
+# PERFIL
+# =============================================================================
+
+def _pct(part: float, total: int) -> float:
+    return round(100.0 * part / total, 2) if total else 0.0
+
+
+def _first_brand_key(brands: Any) -> Optional[str]:
+    keys = split_brands(brands)
+    return keys[0][0] if keys else None
+
+
+def build_profile(frame: 'pd.DataFrame', market: str, countries: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Todos los agregados del perfil sobre la tabla normalizada."""
+    total = len(frame)
+    present = frame[TEXT_FIELDS + NUTRIENTS].notna()
+    present[[f for f in TEXT_FIELDS if f in frame]] &= frame[TEXT_FIELDS].astype('string').ne('')
+    counts = present.sum()
+    nutriments = frame[NUTRIENTS]
+
+    profile: Dict[str, Any] = {
+        'version': QUALITY_FORMAT_VERSION,
+        'market': market,
+        'created': time.time(),
+        'rows': total,
+        'coverage': {field: _pct(int(counts[field]), total) for field in TEXT_FIELDS + NUTRIENTS},
+        'complete_macros': _pct(int(present[['energy_kcal', 'proteins', 'carbohydrates', 'fat']].all(axis=1).sum()),
+                                total),
+        'nutriscore': {grade: int(n) for grade, n in
+                       frame['nutriscore'].value_counts().reindex(NUTRISCORE_GRADES, fill_value=0).items()},
+    }
+
+    # Paises: primer pais del mercado que aparece en countries_tags
+    if countries and 'countries_tags' in frame:
+        tags = frame['countries_tags'].astype('string').str.lower()
+        assigned = pd.Series(pd.NA, index=frame.index, dtype='string')
+        for country in countries:
+            assigned = assigned.mask(assigned.isna() & tags.str.contains(country.lower(), regex=False, na=False),
+                                     country)
+        profile['countries'] = {k: int(v) for k, v in assigned.fillna('(solo marca)').value_counts().items()}
+
+    # Marcas: clave canonica de la primera marca (pocos valores distintos: map sobre unicos)
+    unique_brands = frame['brands'].dropna().unique()
+    brand_keys = frame['brands'].map(dict(zip(unique_brands, map(_first_brand_key, unique_brands))))
+    brand_counts = brand_keys.value_counts()
+    profile['brands'] = {
+        'distinct': int(len(brand_counts)),
+        'top': {k: int(v) for k, v in brand_counts.head(TOP_BRANDS).items()},
+    }
+
+    described = nutriments.describe(percentiles=PERCENTILES)
+    profile['nutriments'] = {
+        name: {stat: (None if pd.isna(value) else round(float(value), 3)) for stat, value in described[name].items()}
+        for name in NUTRIENTS
+    }
+    profile['outliers'] = category_outliers(frame)
+    return profile
+
+
+def category_outliers(frame: 'pd.DataFrame') -> Dict[str, Any]:
+    """Valores fuera de [q1 - k*IQR, q3 + k*IQR] dentro de su categoria, o por encima de PHYSICAL_MAX."""
+    with_category = frame[frame['category'].notna()]
+    sizes = with_category['category'].value_counts()
+    large = with_category[with_category['category'].isin(sizes[sizes >= MIN_CATEGORY_PRODUCTS].index)]
+    grouped = large.groupby('category')[NUTRIENTS]
+    q1, q3 = grouped.quantile(0.25), grouped.quantile(0.75)
+    iqr = q3 - q1
+    low = (q1 - IQR_FACTOR * iqr).reindex(large['category']).set_axis(large.index)
+    high = (q3 + IQR_FACTOR * iqr).reindex(large['category']).set_axis(large.index)
+    values = large[NUTRIENTS]
+    statistical = (values < low) | (values > high)
+    physical = pd.DataFrame({name: frame[name] > limit for name, limit in PHYSICAL_MAX.items() if name in frame})
+
+    result: Dict[str, Any] = {
+        'physical': {name: int(physical[name].sum()) for name in physical},
+        'physical_examples': {name: frame.loc[physical[name], 'code'].head(OUTLIER_EXAMPLES).tolist()
+                              for name in physical if physical[name].any()},
+        'categories_checked': int(len(grouped)),
+        'by_category': {},
+    }
+    flagged = statistical.any(axis=1)
+    if flagged.any():
+        per_category = statistical[flagged].groupby(large.loc[flagged, 'category']).sum()
+        for category, row in per_category.iterrows():
+            nutrients = {name: int(n) for name, n in row.items() if n}
+            examples = large.loc[flagged & (large['category'] == category), 'code'].head(OUTLIER_EXAMPLES).tolist()
+            result['by_category'][category] = {'products': int(sizes[category]), 'outliers': nutrients,
+                                               'examples': examples}
+    result['total'] = int(flagged.sum())
+    return result
+
+
+# =============================================================================
+# DIFF
+# =============================================================================
+
+def diff_profiles(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Cambios respecto al perfil anterior y lista de regresiones segun los umbrales."""
+    regressions: List[str] = []
+    rows_change = (current['rows'] - previous['rows']) / previous['rows'] if previous.get('rows') else 0.0
+    if rows_change < -MAX_ROWS_DROP:
+        regressions.append(f"productos {previous['rows']:,} -> {current['rows']:,} ({rows_change:+.1%})")
+
+    coverage = {}
+    for field, value in current['coverage'].items():
+        before = previous.get('coverage', {}).get(field)
+        if before is None:
+            continue
+        coverage[field] = round(value - before, 2)
+        if value - before < -MAX_COVERAGE_DROP_PP:
+            regressions.append(f"cobertura de {field} {before:.1f}% -> {value:.1f}% ({value - before:+.1f} pp)")
+
+    medians = {}
+    for name, stats in current['nutriments'].items():
+        before = previous.get('nutriments', {}).get(name, {}).get('50%')
+        now = stats.get('50%')
+        if before in (None, 0) or now is None:
+            continue
+        shift = (now - before) / abs(before)
+        medians[name] = round(shift, 4)
+        if abs(shift) > MAX_MEDIAN_SHIFT:
+            regressions.append(f"mediana de {name} {before:g} -> {now:g} ({shift:+.1%})")
+
+    outliers_before = previous.get('outliers', {}).get('total', 0)
+    return {
+        'previous_created': previous.get('created'),
+        'rows': current['rows'] - previous.get('rows', 0),
+        'rows_change': round(rows_change, 4),
+        'coverage_pp': coverage,
+        'median_shift': medians,
+        'outliers': current['outliers']['total'] - outliers_before,
+        'regressions': regressions,
+    }
+
+
+def write_profile(profile: Dict[str, Any], path: Path, previous_path: Optional[Path] = None) -> Path:
+    """Guarda el perfil con el diff frente al anterior (que pasa a .prev.json)."""
+    path = Path(path)
+    previous_path = previous_path or path.with_name(path.name.replace(QUALITY_SUFFIX, PREVIOUS_SUFFIX))
+    compare_with = None
+    if path.exists():
+        shutil.copyfile(path, previous_path)
+        compare_with = previous_path
+    elif previous_path.exists():
+        compare_with = previous_path
+    if compare_with is not None:
+        with open(compare_with, 'r', encoding='utf-8') as f:
+            profile['diff'] = diff_profiles(json.load(f), profile)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(path)
+    return path
+
+
+def print_profile(profile: Dict[str, Any], path: Optional[Path] = None):
+    coverage = profile['coverage']
+    diff = profile.get('diff', {})
+    changes = diff.get('coverage_pp', {})
+    print("\n" + "="*60)
+    print(f"PERFIL DE CALIDAD: {profile['market'].upper()} ({profile['rows']:,} productos)")
+    print("="*60)
+    labels = [('nutriscore', 'Con Nutri-Score'), ('brands', 'Con marca'), ('energy_kcal', 'Con calorias (kcal)'),
+              ('proteins', 'Con proteinas'), ('carbohydrates', 'Con carbohidratos'), ('fat', 'Con grasas'),
+              ('sugars', 'Con azucares'), ('fiber', 'Con fibra'), ('category', 'Con categoria')]
+    for field, label in labels:
+        change = f"  ({changes[field]:+.1f} pp)" if field in changes and changes[field] else ''
+        print(f"   {label:<24}{coverage[field]:>6.1f}%{change}")
+    print(f"   {'Macros completos':<24}{profile['complete_macros']:>6.1f}%")
+    print(f"   Marcas distintas:       {profile['brands']['distinct']:,}")
+    outliers = profile['outliers']
+    physical = sum(outliers['physical'].values())
+    print(f"   Atipicos por categoria: {outliers['total']:,} en {len(outliers['by_category'])} de "
+          f"{outliers['categories_checked']} categorias  (imposibles: {physical:,})")
+    if diff:
+        print(f"\n   Frente al build anterior: {diff['rows']:+,} productos ({diff['rows_change']:+.1%}), "
+              f"{diff['outliers']:+,} atipicos")
+        for regression in diff['regressions']:
+            print(f"   [AVISO] Regresion: {regression}")
+        if not diff['regressions']:
+            print("   ✅ Sin regresiones")
+    if path is not None:
+        print(f"\n   [OK] {Path(path).name}")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Perfil de calidad de datos de un subset y diff con el anterior')
+    parser.add_argument('subset', type=Path, help='Subset .jsonl.gz')
+    parser.add_argument('--compare', type=Path, help='Perfil anterior con el que comparar (por defecto el ultimo)')
+    parser.add_argument('--output', type=Path, help='Donde guardar el perfil (por defecto <mercado>_quality.json)')
+    args = parser.parse_args(argv)
+
+    if not args.subset.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.subset}")
+        sys.exit(1)
+    market = _market_of(args.subset)
+    start = time.time()
+    profile = build_profile(frame_from_subset(args.subset), market)
+    path = args.output or quality_path(args.subset.parent, market)
+    if args.compare:
+        if not args.compare.exists():
+            print(f"[ERROR] No se encuentra el archivo {args.compare}")
+            sys.exit(1)
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            profile['diff'] = diff_profiles(json.load(f), profile)
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(path)
+    else:
+        write_profile(profile, path)
+    print_profile(profile, path)
+    print(f"   Perfil calculado en {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
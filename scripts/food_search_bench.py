@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Banco de pruebas offline de la busqueda FTS5 de alimentos.
+
+docs/search_benchmark.md solo se puede rellenar hoy ejecutando el benchmark en
+un dispositivo. Este script reproduce en SQLite la busqueda de la app para
+medirla en cualquier maquina antes de publicar un catalogo:
+
+    - carga un subset .jsonl.gz en foods + foods_fts(food_id UNINDEXED, name, brand)
+      igual que FoodDatabaseLoader (name saneado, brand = brands)
+    - replica searchFoodsFTS: mismos caracteres eliminados, terminos >= 2
+      caracteres, AND de prefijos ("leche* desnatada*") y, si no hay
+      resultados, OR de prefijos. La expansion de sinonimos (paso 3) no se
+      replica. Como _executeFtsQuery, la consulta no lleva ORDER BY
+    - repite un conjunto de consultas de referencia y mide p50/p95 de
+      latencia (FTS + lectura de foods) y calidad del orden (MRR, nDCG@10)
+
+Se pueden comparar tokenizadores (unicode61 por defecto de la app, sin quitar
+diacriticos, remove_diacritics 2, trigram), el orden (el de la app o
+ORDER BY rank) y varios subsets (perfiles, niveles...).
+
+Relevancia de referencia: un producto es relevante (1) si cada termino
+esperado es prefijo de alguna palabra de nombre/marca sin acentos, y muy
+relevante (2) si ademas tiene alguna de las categorias esperadas.
+
+EJECUCION:
+    python food_search_bench.py spain_subset.jsonl.gz
+    python food_search_bench.py spain_subset.jsonl.gz --tokenizers unicode61 trigram --order app rank
+    python food_search_bench.py spain_subset.jsonl.gz spain_hot.jsonl.gz --markdown resultados.md
+    python food_search_bench.py spain_subset.jsonl.gz --golden consultas.json
+
+REQUISITOS:
+    - Python 3.10+ (solo libreria estandar; sqlite3 con FTS5, trigram desde SQLite 3.34)
+"""
+
+import re
+import sys
+import json
+import gzip
+import math
+import time
+import sqlite3
+import statistics
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+from food_lookup_service import normalize_text, tokenize
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+TOKENIZERS = {
+    'unicode61': 'unicode61',                                 # app: remove_diacritics 1 por defecto
+    'unicode61-diacritics': 'unicode61 remove_diacritics 0',
+    'unicode61-rd2': 'unicode61 remove_diacritics 2',
+    'trigram': 'trigram',
+}
+ORDERS = {
+    'app': '',                        # _executeFtsQuery: sin ORDER BY (orden de rowid)
+    'rank': 'ORDER BY rank',          # bm25
+}
+
+# Mismos caracteres que searchFoodsFTS sustituye por espacio
+FTS_SPECIAL_CHARS = "\"'\\-*():;%_[]^~{}|&<>!=@#$"
+MIN_TERM_LENGTH = 2
+TRIGRAM_MIN_TERM_LENGTH = 3       # trigram no encuentra terminos mas cortos
+INSERT_BATCH_SIZE = 5000          # como FoodDatabaseLoader._batchSize
+DEFAULT_LIMIT = 50
+DEFAULT_REPEAT = 30
+NDCG_AT = 10
+SLA_P95_MS = 80.0
+
+# query: texto tal cual lo teclea el usuario
+# terms: prefijos (sin acentos) que debe contener nombre/marca para ser relevante
+# categories: categorias (sin prefijo) que lo hacen muy relevante
+GOLDEN_QUERIES: List[Dict[str, Any]] = [
+    {'query': 'leche', 'terms': ['leche'], 'categories': ['milks']},
+    {'query': 'leche desnatada', 'terms': ['leche', 'desnatada'], 'categories': ['skimmed-milks']},
+    {'query': 'arroz integral', 'terms': ['arroz', 'integral'], 'categories': ['brown-rices', 'rices']},
+    {'query': 'yogur natural', 'terms': ['yogur', 'natural'], 'categories': ['plain-yogurts', 'yogurts']},
+    {'query': 'atún', 'terms': ['atun'], 'categories': ['tunas', 'canned-tunas']},
+    {'query': 'atun claro', 'terms': ['atun', 'claro'], 'categories': ['tunas', 'canned-tunas']},
+    {'query': 'aceite de oliva', 'terms': ['aceite', 'oliva'], 'categories': ['olive-oils']},
+    {'query': 'pan integral', 'terms': ['pan', 'integral'], 'categories': ['breads', 'wholemeal-breads']},
+    {'query': 'queso fresco', 'terms': ['queso', 'fresco'], 'categories': ['cheeses', 'fresh-cheeses']},
+    {'query': 'café', 'terms': ['cafe'], 'categories': ['coffees']},
+    {'query': 'coca cola', 'terms': ['coca', 'cola'], 'categories': ['colas']},
+    {'query': 'galletas maria', 'terms': ['galletas', 'maria'], 'categories': ['biscuits']},
+    {'query': 'chocolate negro', 'terms': ['chocolate', 'negro'], 'categories': ['dark-chocolates']},
+    {'query': 'pechuga pavo', 'terms': ['pechuga', 'pavo'], 'categories': ['turkey-breasts']},
+    {'query': 'jamón serrano', 'terms': ['jamon', 'serrano'], 'categories': ['serrano-hams', 'hams']},
+    {'query': 'xyzqwerty123', 'terms': ['xyzqwerty123'], 'categories': []},
+]
+
+
+# =============================================================================
+# CARGA
+# =============================================================================
+
+def load_products(subset_path: Path) -> List[Dict[str, Any]]:
+    """Productos del subset con los campos que usa la busqueda."""
+    products = []
+    with gzip.open(subset_path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            product = json.loads(line)
+            products.append({
+                'id': product.get('code') or f"row-{len(products)}",
+                'name': re.sub(r'\s+', ' ', (product.get('name') or 'Sin nombre').strip()),
+                'brand': product.get('brands'),
+                'kcal': round((product.get('nutriments') or {}).get('energy_kcal') or 0),
+                'categories': product.get('categories') or [],
+            })
+    return products
+
+
+def build_database(products: List[Dict[str, Any]], tokenizer: str) -> Tuple[sqlite3.Connection, Dict[str, float]]:
+    """Base en memoria con el esquema de la app. Devuelve (conexion, estadisticas de carga)."""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE foods (
+            id TEXT PRIMARY KEY, name TEXT NOT NULL, brand TEXT, kcal_per100g INTEGER NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE foods_fts USING fts5(
+            food_id UNINDEXED, name, brand, tokenize = '{TOKENIZERS[tokenizer]}'
+        )
+    """)
+    start = time.perf_counter()
+    for i in range(0, len(products), INSERT_BATCH_SIZE):
+        batch = products[i:i + INSERT_BATCH_SIZE]
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO foods VALUES (?, ?, ?, ?)",
+                             [(p['id'], p['name'], p['brand'], p['kcal']) for p in batch])
+    load_s = time.perf_counter() - start
+
+    # rebuildFtsIndex()
+    start = time.perf_counter()
+    with conn:
+        conn.execute("INSERT INTO foods_fts(food_id, name, brand) SELECT id, name, COALESCE(brand, '') FROM foods")
+    fts_s = time.perf_counter() - start
+
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    return conn, {'load_s': load_s, 'fts_s': fts_s, 'db_bytes': page_size * pages}
+
+
+# =============================================================================
+# BUSQUEDA (replica de searchFoodsFTS)
+# =============================================================================
+
+def query_terms(query: str, tokenizer: str) -> List[str]:
+    sanitized = query.strip().lower()
+    for char in FTS_SPECIAL_CHARS:
+        sanitized = sanitized.replace(char, ' ')
+    min_length = TRIGRAM_MIN_TERM_LENGTH if tokenizer == 'trigram' else MIN_TERM_LENGTH
+    return [t for t in sanitized.split() if len(t) >= min_length]
+
+
+def match_expression(terms: List[str], tokenizer: str, operator: str = ' ') -> str:
+    """'leche* desnatada*' (AND) o 'leche* OR desnatada*'. trigram busca subcadenas entre comillas."""
+    if tokenizer == 'trigram':
+        return operator.join(f'"{t}"' for t in terms)
+    return operator.join(f'{t}*' for t in terms)
+
+
+def search(conn: sqlite3.Connection, query: str, tokenizer: str, order: str = 'app',
+           limit: int = DEFAULT_LIMIT) -> Tuple[List[str], str]:
+    """(ids en el orden devuelto, paso que produjo resultados: and / or / none)."""
+    terms = query_terms(query, tokenizer)
+    if not terms:
+        return [], 'none'
+    steps = [('and', match_expression(terms, tokenizer))]
+    if len(terms) > 1:
+        steps.append(('or', match_expression(terms, tokenizer, ' OR ')))
+    sql = f"SELECT food_id FROM foods_fts WHERE foods_fts MATCH ? {ORDERS[order]} LIMIT ? OFFSET 0"
+    for path, expression in steps:
+        ids = [row[0] for row in conn.execute(sql, (expression, limit))]
+        if ids:
+            placeholders = ','.join('?' * len(ids))
+            # Segunda consulta de _executeFtsQuery (el resultado conserva el orden de FTS)
+            conn.execute(f"SELECT id, name, brand, kcal_per100g FROM foods WHERE id IN ({placeholders})",
+                         ids).fetchall()
+            return ids, path
+    return [], 'none'
+
+
+# =============================================================================
+# RELEVANCIA
+# =============================================================================
+
+def relevance_grades(products: List[Dict[str, Any]], golden: Dict[str, Any]) -> Dict[str, int]:
+    """id -> grado (1 o 2) de los productos relevantes para una consulta."""
+    terms = [normalize_text(t) for t in golden['terms']]
+    # El subset guarda las categorias sin prefijo y con espacios ('skimmed milks')
+    categories = {c.replace('-', ' ') for c in golden.get('categories') or []}
+    grades = {}
+    for product in products:
+        words = tokenize(f"{product['name']} {product['brand'] or ''}")
+        if all(any(w.startswith(t) for w in words) for t in terms):
+            grades[product['id']] = 2 if categories.intersection(product['categories']) else 1
+    return grades
+
+
+def reciprocal_rank(ids: List[str], grades: Dict[str, int]) -> float:
+    for position, food_id in enumerate(ids, start=1):
+        if grades.get(food_id):
+            return 1.0 / position
+    return 0.0
+
+
+def ndcg(ids: List[str], grades: Dict[str, int], k: int = NDCG_AT) -> Optional[float]:
+    """nDCG@k con ganancia 2^g - 1. None si la consulta no tiene productos relevantes."""
+    ideal = sorted(grades.values(), reverse=True)[:k]
+    if not ideal:
+        return None
+    idcg = sum((2 ** g - 1) / math.log2(i + 2) for i, g in enumerate(ideal))
+    dcg = sum((2 ** grades.get(food_id, 0) - 1) / math.log2(i + 2) for i, food_id in enumerate(ids[:k]))
+    return dcg / idcg
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+# =============================================================================
+# EJECUCION
+# =============================================================================
+
+def run_variant(conn: sqlite3.Connection, tokenizer: str, order: str, golden_set: List[Dict[str, Any]],
+                grades: List[Dict[str, int]], repeat: int, limit: int) -> List[Dict[str, Any]]:
+    rows = []
+    for golden, query_grades in zip(golden_set, grades):
+        query = golden['query']
+        search(conn, query, tokenizer, order, limit)                # calentamiento
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ids, path = search(conn, query, tokenizer, order, limit)
+            samples.append((time.perf_counter() - start) * 1000)
+        rows.append({
+            'query': query,
+            'p50': statistics.median(samples),
+            'p95': percentile(samples, 95),
+            'results': len(ids),
+            'path': path,
+            'relevant': len(query_grades),
+            'mrr': reciprocal_rank(ids, query_grades) if query_grades else None,
+            'ndcg': ndcg(ids, query_grades, NDCG_AT),
+        })
+    return rows
+
+
+def summarize(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    judged = [r for r in rows if r['relevant']]
+    return {
+        'p95_max': max(r['p95'] for r in rows),
+        'p50_median': statistics.median(r['p50'] for r in rows),
+        'mrr': statistics.mean(r['mrr'] for r in judged) if judged else 0.0,
+        'ndcg': statistics.mean(r['ndcg'] for r in judged) if judged else 0.0,
+    }
+
+
+def _fmt(value: Optional[float], pattern: str = '{:.2f}') -> str:
+    return '-' if value is None else pattern.format(value)
+
+
+def markdown_table(rows: List[Dict[str, Any]]) -> List[str]:
+    lines = [
+        '| Query | DB p50 | DB p95 | Results | Path | Relevant | MRR | nDCG@10 |',
+        '|-------|--------|--------|---------|------|----------|-----|---------|',
+    ]
+    for r in rows:
+        lines.append(f"| \"{r['query']}\" | {r['p50']:.2f}ms | {r['p95']:.2f}ms | {r['results']} | "
+                     f"{r['path'].upper()} | {r['relevant']:,} | {_fmt(r['mrr'])} | {_fmt(r['ndcg'])} |")
+    return lines
+
+
+def print_variant(label: str, stats: Dict[str, float], rows: List[Dict[str, Any]], summary: Dict[str, float]):
+    print(f"\n[{label}]")
+    print(f"   Carga: {stats['load_s']:.1f}s + FTS {stats['fts_s']:.1f}s  "
+          f"Base: {stats['db_bytes'] / 1024 / 1024:.1f} MB")
+    print(f"   {'Consulta':<22}{'p50':>9}{'p95':>9}{'Result.':>9}  {'Paso':<5}{'MRR':>6}{'nDCG':>7}")
+    for r in rows:
+        print(f"   {r['query'][:21]:<22}{r['p50']:>7.2f}ms{r['p95']:>7.2f}ms{r['results']:>9}  "
+              f"{r['path']:<5}{_fmt(r['mrr']):>6}{_fmt(r['ndcg']):>7}")
+    sla = '✅' if summary['p95_max'] < SLA_P95_MS else '❌'
+    print(f"   p95 maximo: {summary['p95_max']:.2f} ms {sla}  "
+          f"MRR medio: {summary['mrr']:.3f}  nDCG@{NDCG_AT} medio: {summary['ndcg']:.3f}")
+
+
+def load_golden(path: Optional[Path]) -> List[Dict[str, Any]]:
+    if path is None:
+        return GOLDEN_QUERIES
+    with open(path, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    for entry in golden:
+        if 'query' not in entry:
+            raise ValueError(f"Consulta sin 'query': {entry}")
+        entry.setdefault('terms', tokenize(entry['query']))
+    return golden
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Latencia y relevancia de la busqueda FTS5 sobre subsets')
+    parser.add_argument('subsets', type=Path, nargs='+', help='Subsets .jsonl.gz a comparar')
+    parser.add_argument('--tokenizers', nargs='+', choices=list(TOKENIZERS), default=list(TOKENIZERS),
+                        help='Tokenizadores FTS5 a comparar')
+    parser.add_argument('--order', nargs='+', choices=list(ORDERS), default=list(ORDERS),
+                        help='Orden de resultados: el de la app (sin ORDER BY) o bm25')
+    parser.add_argument('--golden', type=Path, help='JSON con consultas [{query, terms, categories}]')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Repeticiones por consulta')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help='LIMIT de la consulta FTS')
+    parser.add_argument('--markdown', type=Path, help='Guardar tablas en Markdown (formato de docs/search_benchmark.md)')
+    args = parser.parse_args(argv)
+
+    for subset in args.subsets:
+        if not subset.exists():
+            print(f"[ERROR] No se encuentra el archivo {subset}")
+            sys.exit(1)
+    try:
+        golden_set = load_golden(args.golden)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Consultas de referencia: {e}")
+        sys.exit(1)
+
+    print("="*60)
+    print("BENCHMARK DE BUSQUEDA FTS5 (offline)")
+    print("="*60)
+    print(f"   SQLite {sqlite3.sqlite_version}  Consultas: {len(golden_set)}  Repeticiones: {args.repeat}")
+
+    summaries = []
+    markdown = [f"## Offline FTS5 harness (SQLite {sqlite3.sqlite_version})", '']
+    for subset in args.subsets:
+        products = load_products(subset)
+        grades = [relevance_grades(products, golden) for golden in golden_set]
+        print(f"\n[SUBSET] {subset.name}: {len(products):,} productos")
+        for tokenizer in args.tokenizers:
+            try:
+                conn, stats = build_database(products, tokenizer)
+            except sqlite3.OperationalError as e:
+                print(f"   [AVISO] Tokenizador {tokenizer} no disponible: {e}")
+                continue
+            for order in args.order:
+                label = f"{subset.name} | {tokenizer} | orden {order}"
+                rows = run_variant(conn, tokenizer, order, golden_set, grades, args.repeat, args.limit)
+                summary = summarize(rows)
+                print_variant(label, stats, rows, summary)
+                summaries.append((label, summary))
+                markdown += [f"### {label}", '', f"> **Foods in DB:** {len(products):,}", '']
+                markdown += markdown_table(rows) + ['']
+            conn.close()
+
+    print("\n" + "="*60)
+    print("RESUMEN")
+    print("="*60)
+    for label, summary in summaries:
+        print(f"   {label:<52} p95 max {summary['p95_max']:>7.2f} ms  "
+              f"MRR {summary['mrr']:.3f}  nDCG {summary['ndcg']:.3f}")
+    print("="*60)
+
+    if args.markdown:
+        args.markdown.write_text('\n'.join(markdown), encoding='utf-8')
+        print(f"[OK] Tablas guardadas en {args.markdown}")
+
+
+if __name__ == "__main__":
+    main()
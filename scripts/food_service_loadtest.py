@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga para food_lookup_service.py.
+
+Genera una mezcla de consultas (codigo de barras, prefijo de nombre y filtro
+de macros) a partir del propio subset y las lanza con N clientes concurrentes
+con conexiones keep-alive. Reporta latencia p50/p99 y peticiones por segundo.
+
+EJECUCION:
+    python food_lookup_service.py --subset spain=spain_subset.jsonl.gz &
+    python food_service_loadtest.py --subset spain_subset.jsonl.gz --market spain
+    python food_service_loadtest.py --subset spain_subset.jsonl.gz --concurrency 64 --requests 50000
+
+REQUISITOS:
+    - Python 3.10+ (solo libreria estandar)
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict
+from urllib.parse import urlsplit, quote
+
+from food_subset_reader import SubsetReader
+from food_lookup_service import tokenize, DEFAULT_HOST, DEFAULT_PORT
+
+
+# Reparto de la mezcla de consultas (codigo / busqueda / filtro)
+DEFAULT_MIX = (0.6, 0.3, 0.1)
+
+FILTER_QUERIES = [
+    'min_proteins=20&max_energy_kcal=200&sort=-proteins',
+    'max_sugars=5&min_fiber=3',
+    'max_fat=3&category=yogurts',
+    'min_proteins=10&max_carbohydrates=10&sort=energy_kcal',
+]
+
+
+def build_targets(subset_path: Path, market: str, total: int, mix: tuple, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    with SubsetReader(subset_path) as reader:
+        if len(reader) == 0:
+            print("[ERROR] El subset esta vacio")
+            sys.exit(1)
+        sample_rows = [rng.randrange(len(reader)) for _ in range(min(total, 5000))]
+        codes = [reader.code_at(row) for row in sample_rows]
+        prefixes = []
+        for row in sample_rows[:1000]:
+            tokens = [t for t in tokenize(reader.get(row).get('name') or '') if len(t) >= 3]
+            if tokens:
+                words = rng.sample(tokens, min(len(tokens), rng.choice([1, 2])))
+                prefixes.append(' '.join(w[:rng.randint(3, len(w))] for w in words))
+
+    targets = []
+    for _ in range(total):
+        pick = rng.random()
+        if pick < mix[0] or not prefixes:
+            targets.append(f"/product/{quote(rng.choice(codes))}?market={market}")
+        elif pick < mix[0] + mix[1]:
+            targets.append(f"/search?q={quote(rng.choice(prefixes))}&market={market}&limit=20")
+        else:
+            targets.append(f"/filter?{rng.choice(FILTER_QUERIES)}&market={market}&limit=20")
+    return targets
+
+
+async def _worker(host: str, port: int, queue: asyncio.Queue, latencies: List[float], errors: Dict[str, int]):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n"
+            start = time.perf_counter()
+            writer.write(request.encode('latin-1'))
+            await writer.drain()
+
+            status_line = await reader.readline()
+            content_length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b''):
+                    break
+                name, _, value = header.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    content_length = int(value.strip())
+            await reader.readexactly(content_length)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            status = status_line.split()[1].decode() if status_line else 'sin-respuesta'
+            if status not in ('200', '404'):
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(url: str, targets: List[str], concurrency: int) -> Dict[str, float]:
+    parts = urlsplit(url)
+    host, port = parts.hostname or DEFAULT_HOST, parts.port or DEFAULT_PORT
+    queue: asyncio.Queue = asyncio.Queue()
+    for target in targets:
+        queue.put_nowait(target)
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, queue, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] if latencies else 0.0
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors.values()),
+        'elapsed': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50': pct(50),
+        'p99': pct(99),
+        'max': latencies[-1] if latencies else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Prueba de carga del servicio local de alimentos')
+    parser.add_argument('--url', default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    parser.add_argument('--subset', type=Path, required=True, help='Subset del que extraer consultas')
+    parser.add_argument('--market', default='spain')
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--warmup', type=int, default=1_000, help='Peticiones previas no medidas')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    targets = build_targets(args.subset, args.market, args.requests, DEFAULT_MIX, args.seed)
+
+    if args.warmup:
+        # Sorteo independiente: repetir el inicio de `targets` lo dejaria en cache
+        # y rebajaria la latencia medida
+        warmup_targets = build_targets(args.subset, args.market, args.warmup, DEFAULT_MIX, args.seed + 1)
+        asyncio.run(run_load(args.url, warmup_targets, args.concurrency))
+    stats = asyncio.run(run_load(args.url, targets, args.concurrency))
+
+    print("\n" + "="*60)
+    print(f"CARGA: {args.url} (mercado {args.market})")
+    print("="*60)
+    print(f"   Peticiones:              {stats['requests']:,} ({stats['errors']} errores)")
+    print(f"   Concurrencia:            {args.concurrency}")
+    print(f"   Tiempo:                  {stats['elapsed']:.2f}s")
+    print(f"   Peticiones/s:            {stats['rps']:,.0f}")
+    print(f"   Latencia p50:            {stats['p50']:.2f} ms")
+    print(f"   Latencia p99:            {stats['p99']:.2f} ms")
+    print(f"   Latencia max:            {stats['max']:.2f} ms")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Estimacion rapida del tamaño y composicion de un subset antes de exportarlo.
+
+Evalua el filtro de mercado (build_filter_query) sobre una muestra por bloques
+del dump y extrapola:
+    - numero de productos seleccionados (con intervalo de confianza al 95%)
+    - reparto por pais y por marca del mercado
+    - tamaño del .jsonl.gz resultante (con intervalo de confianza al 95%)
+
+Si existe la proyeccion Parquet de la cache de filtros (--filter-cache) se
+muestrea sobre ella; si no, se muestrean bloques de lineas del .csv.gz en
+streaming sin parsear el resto del dump.
+
+La muestra puede guardarse como fixture (.csv.gz con el mismo formato que el
+dump) para pruebas rapidas del exportador.
+
+USO (desde create_food_subset.py):
+    python create_food_subset.py spain --estimate
+    python create_food_subset.py spain --estimate --sample-fraction 0.05
+    python create_food_subset.py spain --estimate --save-fixture fixture_spain.csv.gz
+"""
+
+import math
+import gzip
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+DEFAULT_SAMPLE_FRACTION = 0.02
+DEFAULT_BLOCK_ROWS = 2048
+DEFAULT_SEED = 42
+BLOCK_COLUMN = '_block'
+Z_95 = 1.96
+TOP_BREAKDOWN = 10
+
+
+# =============================================================================
+# ESTADISTICA
+# =============================================================================
+
+def cluster_estimate(block_values: List[float], total_blocks: int) -> Tuple[float, float]:
+    """
+    Total estimado y semiamplitud del IC95 para un muestreo aleatorio de
+    bloques (conglomerados): N * media ± z * N * s / sqrt(n) * sqrt(1 - n/N).
+    """
+    n = len(block_values)
+    if n == 0:
+        return 0.0, 0.0
+    mean = sum(block_values) / n
+    total = total_blocks * mean
+    if n < 2:
+        return total, math.inf
+    variance = sum((v - mean) ** 2 for v in block_values) / (n - 1)
+    fpc = max(0.0, 1 - n / total_blocks) if total_blocks else 0.0
+    half_width = Z_95 * total_blocks * math.sqrt(variance / n) * math.sqrt(fpc)
+    return total, half_width
+
+
+# =============================================================================
+# MUESTREO
+# =============================================================================
+
+def sample_csv_blocks(csv_path: Path, sample_path: Path, fraction: float,
+                      block_rows: int, seed: int) -> Tuple[int, List[int]]:
+    """
+    Copia a `sample_path` (TSV con cabecera) bloques de `block_rows` lineas
+    elegidos al azar, con una primera columna BLOCK_COLUMN con el id de bloque:
+    asi el bloque de cada fila no depende del orden en que la lea DuckDB ni de
+    las filas malformadas que descarte. Devuelve (lineas totales del dump, ids
+    de bloque muestreados en orden). Solo descomprime; no parsea los bloques
+    descartados.
+    """
+    rng = random.Random(seed)
+    indexed = _sample_indexed(csv_path, sample_path, fraction, block_rows, rng)
+    if indexed is not None:
+        return indexed
+    total_rows = 0
+    sampled_blocks: List[int] = []
+    with gzip.open(csv_path, 'rb') as f_in, open(sample_path, 'wb') as f_out:
+        f_out.write(_block_prefix(BLOCK_COLUMN) + f_in.readline())
+        block_id = 0
+        keep = rng.random() < fraction
+        prefix = _block_prefix(block_id)
+        in_block = 0
+        for line in f_in:
+            if in_block == 0 and keep:
+                sampled_blocks.append(block_id)
+            if keep:
+                f_out.write(prefix + line)
+            total_rows += 1
+            in_block += 1
+            if in_block == block_rows:
+                in_block = 0
+                block_id += 1
+                keep = rng.random() < fraction
+                prefix = _block_prefix(block_id)
+    return total_rows, sampled_blocks
+
+
+def _block_prefix(value) -> bytes:
+    return f"{value}\t".encode('ascii')
+
+
+def _sample_indexed(csv_path: Path, sample_path: Path, fraction: float,
+                    block_rows: int, rng: random.Random) -> Optional[Tuple[int, List[int]]]:
+    """
+    Igual que la pasada secuencial (mismas tiradas de `rng`, mismos bytes)
+    pero, si el dump tiene indice de food_gzip_index.py, lee en paralelo solo
+    los bloques elegidos. None si no hay indice al dia.
+    """
+    try:
+        from food_gzip_index import DumpIndex, parallel_read_rows
+    except ImportError:
+        return None
+    index = DumpIndex.load(csv_path)
+    if index is None:
+        return None
+    with index:
+        total_rows = index.rows
+        header = index.header
+    block_count = -(-total_rows // block_rows)
+    sampled_blocks = [block_id for block_id in range(block_count) if rng.random() < fraction]
+    print(f"   [INDICE GZIP] Leyendo {len(sampled_blocks):,} de {block_count:,} bloques con el indice")
+    chunks = parallel_read_rows(csv_path, [(block_id * block_rows, block_rows) for block_id in sampled_blocks])
+    with open(sample_path, 'wb') as f_out:
+        f_out.write(_block_prefix(BLOCK_COLUMN) + header)
+        for block_id, chunk in zip(sampled_blocks, chunks):
+            prefix = _block_prefix(block_id)
+            f_out.write(b''.join(prefix + line for line in chunk.splitlines(keepends=True)))
+    return total_rows, sampled_blocks
+
+
+def _first_match(haystack: Optional[str], needles: List[str]) -> Optional[str]:
+    if not isinstance(haystack, str):
+        return None
+    lowered = haystack.lower()
+    for needle in needles:
+        if needle.lower() in lowered:
+            return needle
+    return None
+
+
+# =============================================================================
+# ESTIMACION
+# =============================================================================
+
+def estimate_market(
+    conn,
+    market: str,
+    market_config: Dict[str, Any],
+    filter_query: str,
+    columns: List[str],
+    build_record: Callable[[Dict[str, Any]], str],
+    csv_path: Path,
+    source_sql: Callable[[Path], str],
+    staging_path: Optional[Path] = None,
+    fraction: float = DEFAULT_SAMPLE_FRACTION,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    seed: int = DEFAULT_SEED,
+    fixture_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Estima el resultado de exportar `market`. `build_record` convierte una fila
+    del dump en la linea JSON que escribiria el exportador (perfil incluido).
+    """
+    select_columns = ', '.join(columns)
+    tmp_dir = Path(tempfile.mkdtemp(prefix='subset_estimate_'))
+    try:
+        if staging_path is not None:
+            print(f"   Fuente de muestra: staging Parquet ({staging_path.name})")
+            total_rows = conn.execute(f"SELECT COUNT(*) FROM read_parquet('{staging_path}')").fetchone()[0]
+            total_blocks = max(1, math.ceil(total_rows / block_rows))
+            threshold = int(fraction * 1_000_000)
+            block_expr = f"(rid - 1) // {block_rows}"
+            sample_filter = f"hash({block_expr} + {seed}) % 1000000 < {threshold}"
+            sampled_blocks = [row[0] for row in conn.execute(f"""
+                SELECT DISTINCT {block_expr} AS block FROM read_parquet('{staging_path}')
+                WHERE {sample_filter} ORDER BY block
+            """).fetchall()]
+            selected = conn.execute(f"""
+                SELECT {block_expr} AS {BLOCK_COLUMN}, {select_columns}
+                FROM read_parquet('{staging_path}')
+                WHERE {sample_filter} AND {filter_query}
+            """).fetchdf()
+            sample_source = f"(SELECT * EXCLUDE (rid) FROM read_parquet('{staging_path}') WHERE {sample_filter})"
+            if not sampled_blocks:
+                raise ValueError(f"La muestra no contiene ningun bloque; aumenta --sample-fraction ({fraction})")
+        else:
+            print(f"   Fuente de muestra: bloques del CSV ({fraction:.1%} de {block_rows} filas)")
+            sample_csv = tmp_dir / 'sample.tsv'
+            total_rows, sampled_blocks = sample_csv_blocks(csv_path, sample_csv, fraction, block_rows, seed)
+            total_blocks = max(1, math.ceil(total_rows / block_rows))
+            if not sampled_blocks:
+                raise ValueError(f"La muestra no contiene ningun bloque; aumenta --sample-fraction ({fraction})")
+            # El id de bloque viene escrito por el muestreador, no de la posicion de la fila
+            selected = conn.execute(f"""
+                SELECT {BLOCK_COLUMN}, {select_columns}
+                FROM {source_sql(sample_csv)}
+                WHERE {filter_query}
+            """).fetchdf()
+            sample_source = f"(SELECT * EXCLUDE ({BLOCK_COLUMN}) FROM {source_sql(sample_csv)})"
+
+        if fixture_path is not None:
+            save_fixture(conn, sample_source, fixture_path)
+
+        # Conteo y bytes por bloque (los bloques sin seleccionados cuentan como 0)
+        counts = {block: 0 for block in sampled_blocks}
+        raw_bytes = {block: 0 for block in sampled_blocks}
+        lines = []
+        countries: Dict[str, int] = {}
+        brands: Dict[str, int] = {}
+        for row in selected.to_dict('records'):
+            block = int(row.pop(BLOCK_COLUMN))
+            line = build_record(row)
+            lines.append(line)
+            counts[block] = counts.get(block, 0) + 1
+            raw_bytes[block] = raw_bytes.get(block, 0) + len(line.encode('utf-8')) + 1
+
+            country = _first_match(row.get('countries_tags'), market_config['countries']) or '(solo marca)'
+            countries[country] = countries.get(country, 0) + 1
+            brand = _first_match(row.get('brands_tags'), market_config['brands']) or '(otras marcas)'
+            brands[brand] = brands.get(brand, 0) + 1
+
+        count_est, count_hw = cluster_estimate(list(counts.values()), total_blocks)
+        raw_est, raw_hw = cluster_estimate(list(raw_bytes.values()), total_blocks)
+        payload = ('\n'.join(lines) + '\n').encode('utf-8') if lines else b''
+        ratio = len(gzip.compress(payload, compresslevel=9)) / len(payload) if payload else 0.0
+
+        sampled = len(selected)
+        return {
+            'market': market,
+            'total_rows': total_rows,
+            'sampled_blocks': len(sampled_blocks),
+            'total_blocks': total_blocks,
+            'sampled_selected': sampled,
+            'count': (count_est, count_hw),
+            'gzip_bytes': (raw_est * ratio, raw_hw * ratio),
+            'compression_ratio': ratio,
+            'countries': {k: v / sampled * count_est for k, v in countries.items()} if sampled else {},
+            'brands': {k: v / sampled * count_est for k, v in brands.items()} if sampled else {},
+        }
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def save_fixture(conn, sample_source: str, fixture_path: Path):
+    """Guarda la muestra cruda como .csv.gz con el formato del dump."""
+    fixture_path = Path(fixture_path)
+    conn.execute(f"""
+        COPY (SELECT * FROM {sample_source})
+        TO '{fixture_path}' (FORMAT CSV, DELIMITER '\\t', HEADER, COMPRESSION GZIP)
+    """)
+    print(f"   [OK] Fixture guardado: {fixture_path}")
+
+
+def print_estimate(estimate: Dict[str, Any], format_size: Callable[[int], str], target_max: Optional[int] = None):
+    count, count_hw = estimate['count']
+    size, size_hw = estimate['gzip_bytes']
+
+    print("\n" + "="*60)
+    print(f"ESTIMACION: {estimate['market'].upper()}")
+    print("="*60)
+    print(f"   Filas en el dump:        {estimate['total_rows']:,}")
+    print(f"   Bloques muestreados:     {estimate['sampled_blocks']:,} de {estimate['total_blocks']:,}")
+    print(f"   Seleccionados en muestra:{estimate['sampled_selected']:>8,}")
+    print(f"   Productos estimados:     {count:,.0f} ± {count_hw:,.0f} (IC 95%)")
+    if target_max is not None and count > target_max:
+        print(f"   (se recortaria a {target_max:,} al exportar)")
+    print(f"   Tamaño .jsonl.gz:        {format_size(int(size))} ± {format_size(int(size_hw))}")
+    print(f"   Ratio de compresion:     {estimate['compression_ratio']:.1%}")
+
+    for title, breakdown in (('PAIS', estimate['countries']), ('MARCA', estimate['brands'])):
+        print(f"\n   Reparto por {title.lower()} (top {TOP_BREAKDOWN}):")
+        for name, value in sorted(breakdown.items(), key=lambda item: -item[1])[:TOP_BREAKDOWN]:
+            print(f"      {name:<28}{value:>12,.0f}")
+    print("="*60)
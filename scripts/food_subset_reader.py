@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Lector de acceso aleatorio para los subsets de Open Food Facts (.jsonl.gz).
+
+La primera vez que se abre un subset se descomprime a un fichero de datos
+plano (mmap-able) y se construye un indice de offsets por linea. A partir de
+ahi las lecturas son directas sobre el mmap: cada registro es un slice sin
+copia y solo se decodifica (json.loads) cuando se pide.
+
+USO COMO LIBRERIA:
+    from food_subset_reader import SubsetReader
+
+    with SubsetReader('spain_subset.jsonl.gz') as reader:
+        product = reader.by_code('8410376040452')
+        for product in reader.iter_brand('hacendado'):
+            ...
+
+EJECUCION:
+    python food_subset_reader.py spain_subset.jsonl.gz --code 8410376040452
+    python food_subset_reader.py spain_subset.jsonl.gz --brand hacendado --limit 20
+    python food_subset_reader.py spain_subset.jsonl.gz --range 1000:1010
+    python food_subset_reader.py spain_subset.jsonl.gz --bench
+
+ARCHIVOS GENERADOS (en .subset_cache/ junto al subset):
+    - <subset>.data    JSONL sin comprimir (mapeado en memoria)
+    - <subset>.idx     Offsets de inicio de cada linea + orden por codigo
+
+REQUISITOS:
+    - Python 3.10+ (solo libreria estandar)
+"""
+
+import os
+import sys
+import json
+import gzip
+import mmap
+import re
+import time
+import random
+import struct
+import argparse
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Callable, Iterator, Iterable, Pattern
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+CACHE_DIRNAME = '.subset_cache'
+
+# Cabecera del indice: magic + version, tamaño y mtime del .gz de origen,
+# numero de registros.
+INDEX_MAGIC = b'JTSUBIX1'
+INDEX_HEADER = struct.Struct('<8sQQQ')
+
+# El exportador escribe siempre 'code' como primera clave del registro, lo que
+# permite leer el codigo sin decodificar el JSON completo.
+CODE_PREFIX = b'{"code": "'
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+# =============================================================================
+# CONSTRUCCION DEL INDICE
+# =============================================================================
+
+def cache_paths(source_path: Path, cache_dir: Optional[Path] = None) -> Dict[str, Path]:
+    """Rutas del fichero de datos y del indice para un subset."""
+    cache_dir = cache_dir or source_path.parent / CACHE_DIRNAME
+    stem = source_path.name[:-3] if source_path.name.endswith('.gz') else source_path.name
+    return {
+        'data': cache_dir / f"{stem}.data",
+        'index': cache_dir / f"{stem}.idx",
+    }
+
+
+def _source_signature(source_path: Path) -> tuple:
+    stat = source_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _extract_code(raw: bytes) -> str:
+    """Codigo del registro; usa el prefijo fijo y cae a json si no coincide."""
+    if raw.startswith(CODE_PREFIX):
+        end = raw.find(b'"', len(CODE_PREFIX))
+        if end != -1:
+            return raw[len(CODE_PREFIX):end].decode('utf-8')
+    return str(json.loads(raw).get('code', ''))
+
+
+def build_cache(source_path: Path, data_path: Path, index_path: Path) -> int:
+    """
+    Descomprime el subset a `data_path` y escribe el indice en `index_path`.
+
+    El indice guarda N+1 offsets (el ultimo es el tamaño del fichero de
+    datos) seguidos de la permutacion de filas ordenada por codigo.
+    """
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_data = data_path.with_suffix('.data.tmp')
+    offsets = array('Q', [0])
+    codes: List[str] = []
+    position = 0
+
+    opener = gzip.open if source_path.name.endswith('.gz') else open
+    with opener(source_path, 'rb') as f_in, open(tmp_data, 'wb') as f_out:
+        for line in f_in:
+            if not line.strip():
+                continue
+            if not line.endswith(b'\n'):
+                line += b'\n'
+            f_out.write(line)
+            position += len(line)
+            offsets.append(position)
+            codes.append(_extract_code(line))
+
+    count = len(offsets) - 1
+    order = array('Q', sorted(range(count), key=codes.__getitem__))
+    size, mtime_ns = _source_signature(source_path)
+
+    tmp_index = index_path.with_suffix('.idx.tmp')
+    with open(tmp_index, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, size, mtime_ns, count))
+        offsets.tofile(f)
+        order.tofile(f)
+
+    os.replace(tmp_data, data_path)
+    os.replace(tmp_index, index_path)
+    return count
+
+
+def _index_is_fresh(source_path: Path, data_path: Path, index_path: Path) -> bool:
+    if not data_path.exists() or not index_path.exists():
+        return False
+    with open(index_path, 'rb') as f:
+        header = f.read(INDEX_HEADER.size)
+    if len(header) != INDEX_HEADER.size:
+        return False
+    magic, size, mtime_ns, _ = INDEX_HEADER.unpack(header)
+    return magic == INDEX_MAGIC and (size, mtime_ns) == _source_signature(source_path)
+
+
+# =============================================================================
+# LECTOR
+# =============================================================================
+
+class SubsetReader:
+    """
+    Acceso aleatorio a un subset JSONL mediante mmap + indice de offsets.
+
+    - reader[i] / reader.get(i): registro decodificado de la fila i
+    - reader.raw(i): memoryview del registro sin decodificar (sin copia)
+    - reader.by_code(code): busqueda binaria sobre el orden por codigo
+    - reader.iter_range(start, stop): iteracion perezosa de un rango
+    - reader.scan(...): escaneo filtrado con prefiltro de bytes sobre el mmap
+    """
+
+    def __init__(self, source_path, cache_dir: Optional[Path] = None, rebuild: bool = False):
+        self.source_path = Path(source_path)
+        paths = cache_paths(self.source_path, Path(cache_dir) if cache_dir else None)
+        self.data_path = paths['data']
+        self.index_path = paths['index']
+
+        if rebuild or not _index_is_fresh(self.source_path, self.data_path, self.index_path):
+            print(f"[INDICE] Construyendo cache de acceso aleatorio para {self.source_path.name}...")
+            start = time.perf_counter()
+            count = build_cache(self.source_path, self.data_path, self.index_path)
+            print(f"   [OK] {count:,} registros indexados en {time.perf_counter() - start:.1f}s")
+
+        self._load_index()
+        self._data_file = open(self.data_path, 'rb')
+        if self._offsets[-1] > 0:
+            self._mm = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mm = b''
+        self._view = memoryview(self._mm)
+
+    def _load_index(self):
+        with open(self.index_path, 'rb') as f:
+            _, _, _, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            self._offsets = array('Q')
+            self._offsets.fromfile(f, count + 1)
+            self._code_order = array('Q')
+            self._code_order.fromfile(f, count)
+        self._count = count
+
+    # -------------------------------------------------------------------------
+    # Ciclo de vida
+    # -------------------------------------------------------------------------
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._data_file.close()
+
+    def __enter__(self) -> 'SubsetReader':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -------------------------------------------------------------------------
+    # Acceso por fila
+    # -------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _bounds(self, row: int) -> tuple:
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError(f"Fila fuera de rango: {row}")
+        # El -1 descarta el salto de linea final
+        return self._offsets[row], self._offsets[row + 1] - 1
+
+    def raw(self, row: int) -> memoryview:
+        """Bytes JSON del registro como memoryview sobre el mmap (sin copia)."""
+        start, end = self._bounds(row)
+        return self._view[start:end]
+
+    def get(self, row: int) -> Dict[str, Any]:
+        return json.loads(self.raw(row).tobytes())
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        return self.get(row)
+
+    def iter_range(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        stop = self._count if stop is None else min(stop, self._count)
+        for row in range(max(start, 0), stop):
+            yield self.get(row)
+
+    # -------------------------------------------------------------------------
+    # Acceso por codigo de barras
+    # -------------------------------------------------------------------------
+
+    def code_at(self, row: int) -> str:
+        return _extract_code(self.raw(row).tobytes())
+
+    def row_of(self, code: str) -> Optional[int]:
+        """Fila del producto con ese codigo (busqueda binaria), o None."""
+        code = str(code).strip()
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.code_at(self._code_order[mid]) < code:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            row = self._code_order[lo]
+            if self.code_at(row) == code:
+                return row
+        return None
+
+    def by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        row = self.row_of(code)
+        return self.get(row) if row is not None else None
+
+    # -------------------------------------------------------------------------
+    # Escaneos filtrados
+    # -------------------------------------------------------------------------
+
+    def _rows_containing(self, needles: Iterable[bytes]) -> List[int]:
+        """Filas cuyo JSON contiene alguno de los `needles` (busqueda en C sobre el mmap)."""
+        rows = set()
+        for needle in needles:
+            if not needle:
+                continue
+            pos = self._mm.find(needle)
+            while pos != -1:
+                row = bisect_right(self._offsets, pos) - 1
+                rows.add(row)
+                # Saltar al siguiente registro: no hace falta mas de un match por fila
+                pos = self._mm.find(needle, self._offsets[row + 1])
+        return sorted(rows)
+
+    def _rows_matching(self, pattern: Pattern[bytes]) -> List[int]:
+        """Filas cuyo JSON casa con la expresion regular de bytes `pattern`."""
+        rows = []
+        match = pattern.search(self._mm)
+        while match is not None:
+            row = bisect_right(self._offsets, match.start()) - 1
+            rows.append(row)
+            match = pattern.search(self._mm, self._offsets[row + 1])
+        return rows
+
+    def scan(
+        self,
+        where: Optional[Callable[[Dict[str, Any]], bool]] = None,
+        contains: Optional[Iterable] = None,
+        limit: Optional[int] = None,
+        matching: Optional[Pattern[bytes]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Itera registros que cumplen `where`.
+
+        `contains` es un prefiltro opcional de cadenas: solo se decodifican las
+        filas cuyo JSON crudo contiene alguna de ellas, lo que evita json.loads
+        sobre la gran mayoria del fichero. `matching` hace lo mismo con una
+        expresion regular de bytes (p. ej. sin distinguir mayusculas).
+        """
+        if matching is not None:
+            rows: Iterable[int] = self._rows_matching(matching)
+        elif contains is not None:
+            needles = [c.encode('utf-8') if isinstance(c, str) else c for c in contains]
+            rows = self._rows_containing(needles)
+        else:
+            rows = range(self._count)
+
+        emitted = 0
+        for row in rows:
+            product = self.get(row)
+            if where is not None and not where(product):
+                continue
+            yield product
+            emitted += 1
+            if limit is not None and emitted >= limit:
+                return
+
+    def iter_brand(self, brand: str, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Productos cuya marca contiene `brand` (sin distinguir mayusculas)."""
+        brand_lower = brand.strip().lower()
+
+        def matches(product: Dict[str, Any]) -> bool:
+            return brand_lower in (product.get('brands') or '').lower()
+
+        # re.IGNORECASE sobre bytes solo pliega ASCII: con otras letras
+        # ('Nestlé' / 'NESTLÉ') el prefiltro podria perder filas y se escanea todo.
+        if brand_lower.isascii():
+            pattern = re.compile(re.escape(brand_lower.encode('ascii')), re.IGNORECASE)
+            yield from self.scan(where=matches, matching=pattern, limit=limit)
+        else:
+            yield from self.scan(where=matches, limit=limit)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_benchmark(reader: SubsetReader, samples: int = 2000):
+    print("\n" + "="*60)
+    print(f"BENCHMARK: {reader.source_path.name} ({len(reader):,} registros)")
+    print("="*60)
+    if len(reader) == 0:
+        print("   Subset vacio")
+        return
+
+    rows = [random.randrange(len(reader)) for _ in range(samples)]
+    codes = [reader.code_at(row) for row in rows]
+
+    timings = {'fila': [], 'codigo': []}
+    for row in rows:
+        start = time.perf_counter()
+        reader.get(row)
+        timings['fila'].append((time.perf_counter() - start) * 1000)
+    for code in codes:
+        start = time.perf_counter()
+        reader.by_code(code)
+        timings['codigo'].append((time.perf_counter() - start) * 1000)
+
+    for name, values in timings.items():
+        values.sort()
+        print(f"   Lectura por {name:<8} p50: {_percentile(values, 50):.4f} ms   "
+              f"p99: {_percentile(values, 99):.4f} ms")
+
+    start = time.perf_counter()
+    total = sum(1 for _ in reader.iter_range(0, min(len(reader), 10_000)))
+    elapsed = time.perf_counter() - start
+    print(f"   Iteracion de rango:      {total / elapsed:,.0f} registros/s")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def parse_range(value: str) -> tuple:
+    start, _, stop = value.partition(':')
+    return int(start or 0), int(stop) if stop else None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Acceso aleatorio a subsets JSONL de Open Food Facts')
+    parser.add_argument('subset', type=Path, help='Ruta al subset (.jsonl.gz o .jsonl)')
+    parser.add_argument('--code', help='Buscar producto por codigo de barras')
+    parser.add_argument('--brand', help='Listar productos de una marca')
+    parser.add_argument('--range', type=parse_range, help='Rango de filas inicio:fin')
+    parser.add_argument('--limit', type=int, default=20, help='Maximo de resultados a mostrar')
+    parser.add_argument('--bench', action='store_true', help='Medir latencia de lecturas puntuales')
+    parser.add_argument('--rebuild', action='store_true', help='Forzar reconstruccion del indice')
+    args = parser.parse_args(argv)
+
+    if not args.subset.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.subset}")
+        sys.exit(1)
+
+    with SubsetReader(args.subset, rebuild=args.rebuild) as reader:
+        if args.code:
+            product = reader.by_code(args.code)
+            if product is None:
+                print(f"[INFO] Codigo no encontrado: {args.code}")
+            else:
+                print(json.dumps(product, ensure_ascii=False, indent=2))
+        if args.brand:
+            for product in reader.iter_brand(args.brand, limit=args.limit):
+                print(json.dumps(product, ensure_ascii=False))
+        if args.range:
+            start, stop = args.range
+            stop = stop if stop is not None else start + args.limit
+            for product in reader.iter_range(start, stop):
+                print(json.dumps(product, ensure_ascii=False))
+        if args.bench:
+            run_benchmark(reader)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Taxonomia de categorias con tabla de cierre (closure table) e ids enteros.
+
+El exportador guarda en cada producto solo las 5 primeras categorias de
+categories_tags, sin prefijo: la jerarquia se pierde y "todos los lacteos"
+en el dispositivo es buscar texto. Este paso infiere la jerarquia a partir de
+las etiquetas completas de los productos exportados:
+
+    padre(B) = la categoria A mas especifica que aparece antes que B en al
+               menos el MIN_PARENT_SUPPORT de los productos con B y que es
+               mas frecuente que B
+
+(categories_tags va de general a especifica, asi que el orden y la
+co-ocurrencia bastan). Cada categoria recibe un id entero en orden
+(frecuencia desc., posicion media en la lista, etiqueta): un padre siempre
+tiene id menor que sus hijos.
+
+La taxonomia se construye una vez por ejecucion con los productos que
+cumplen el filtro de cualquier mercado (la union de todos), asi que los ids
+son los mismos en todos los subsets: la base compartida de food_overlays.py
+puede llevar category_ids sin conflictos. Con --taxonomy el exportador añade
+a cada producto `category_ids` (solo las hojas: los ancestros salen de la
+tabla de cierre) y escribe:
+
+    food_taxonomy.json
+        categories   [{id, tag, name, parent, depth, count}]
+        closure      {ancestor: [...], descendant: [...], distance: [...]}
+                     (incluye cada categoria consigo misma a distancia 0)
+
+"Todos los lacteos" = descendientes de dairies en la tabla de cierre + los
+productos con alguno de esos ids: busquedas por entero indexables en SQLite.
+El campo `categories` del registro se mantiene para la busqueda de texto.
+
+EJECUCION:
+    python create_food_subset.py all --taxonomy
+    python food_taxonomy.py food_taxonomy.json                       # resumen y arbol
+    python food_taxonomy.py food_taxonomy.json --descendants dairies
+    python food_taxonomy.py --dump openfoodfacts_products.csv.gz     # taxonomia del dump completo
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from collections import Counter
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+TAXONOMY_FORMAT_VERSION = 1
+TAXONOMY_SUFFIX = '_taxonomy.json'
+TAXONOMY_FILENAME = 'food_taxonomy.json'       # compartida por todos los mercados
+MIN_CATEGORY_PRODUCTS = 5         # etiquetas mas raras no reciben id
+MIN_PARENT_SUPPORT = 0.8          # fraccion de productos de B en los que A aparece antes
+DUMP_BATCH_SIZE = 100_000
+
+
+def taxonomy_path(output_dir: Path) -> Path:
+    return Path(output_dir) / TAXONOMY_FILENAME
+
+
+def parse_tags(categories_tags: Optional[str]) -> List[str]:
+    """Etiquetas completas ('en:skimmed-milks') sin repetir, en el orden del dump."""
+    if not isinstance(categories_tags, str) or not categories_tags:
+        return []
+    seen = []
+    for tag in categories_tags.split(','):
+        tag = tag.strip()
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def display_name(tag: str) -> str:
+    """Mismo formato que clean_categories: sin prefijo de idioma y con espacios."""
+    return (tag.split(':', 1)[1] if ':' in tag else tag).replace('-', ' ')
+
+
+# =============================================================================
+# INFERENCIA
+# =============================================================================
+
+class Taxonomy:
+    """Categorias con id, padre inferido y tabla de cierre."""
+
+    def __init__(self, tags: List[str], parents: List[Optional[int]], counts: List[int]):
+        self.tags = tags
+        self.parents = parents
+        self.counts = counts
+        self.ids = {tag: index for index, tag in enumerate(tags)}
+        self.depths = []
+        for index in range(len(tags)):
+            # Los padres tienen id menor: su profundidad ya esta calculada
+            parent = parents[index]
+            self.depths.append(0 if parent is None else self.depths[parent] + 1)
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def ancestors(self, category_id: int) -> List[int]:
+        """Ancestros del padre a la raiz, sin incluir la categoria."""
+        chain = []
+        parent = self.parents[category_id]
+        while parent is not None:
+            chain.append(parent)
+            parent = self.parents[parent]
+        return chain
+
+    def closure(self) -> Tuple[List[int], List[int], List[int]]:
+        """(ancestor, descendant, distance) incluyendo las parejas (c, c, 0)."""
+        ancestors, descendants, distances = [], [], []
+        for category_id in range(len(self.tags)):
+            ancestors.append(category_id)
+            descendants.append(category_id)
+            distances.append(0)
+            for distance, ancestor in enumerate(self.ancestors(category_id), start=1):
+                ancestors.append(ancestor)
+                descendants.append(category_id)
+                distances.append(distance)
+        return ancestors, descendants, distances
+
+    def descendants(self, category_id: int) -> List[int]:
+        # Los hijos tienen id mayor: basta una pasada en orden
+        inside = {category_id}
+        for index in range(category_id + 1, len(self.tags)):
+            if self.parents[index] in inside:
+                inside.add(index)
+        return sorted(inside)
+
+    def product_ids(self, categories_tags: Optional[str]) -> List[int]:
+        """Ids de las categorias hoja del producto (sus ancestros sobran: estan en el cierre)."""
+        ids = [self.ids[tag] for tag in parse_tags(categories_tags) if tag in self.ids]
+        if len(ids) < 2:
+            return ids
+        covered = set()
+        for category_id in ids:
+            covered.update(self.ancestors(category_id))
+        return sorted(category_id for category_id in set(ids) if category_id not in covered)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ancestors, descendants, distances = self.closure()
+        return {
+            'version': TAXONOMY_FORMAT_VERSION,
+            'min_category_products': MIN_CATEGORY_PRODUCTS,
+            'min_parent_support': MIN_PARENT_SUPPORT,
+            'categories': [
+                {'id': index, 'tag': tag, 'name': display_name(tag), 'parent': self.parents[index],
+                 'depth': self.depths[index], 'count': self.counts[index]}
+                for index, tag in enumerate(self.tags)
+            ],
+            'closure': {'ancestor': ancestors, 'descendant': descendants, 'distance': distances},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Taxonomy':
+        categories = sorted(data['categories'], key=lambda c: c['id'])
+        return cls([c['tag'] for c in categories], [c['parent'] for c in categories],
+                   [c['count'] for c in categories])
+
+    def save(self, path: Path) -> Path:
+        tmp_path = Path(path).with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        tmp_path.replace(path)
+        return Path(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'Taxonomy':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def build_taxonomy(tag_lists: Iterable[Optional[str]]) -> Taxonomy:
+    """
+    Dos pasadas sobre categories_tags: frecuencias y, entre las etiquetas
+    frecuentes, cuantas veces aparece A antes que B en el mismo producto.
+    `tag_lists` tiene que poder recorrerse dos veces (lista, Series...).
+    """
+    counts: Counter = Counter()
+    positions: Counter = Counter()
+    for value in tag_lists:
+        tags = parse_tags(value)
+        counts.update(tags)
+        for position, tag in enumerate(tags):
+            positions[tag] += position
+    frequent = {tag for tag, count in counts.items() if count >= MIN_CATEGORY_PRODUCTS}
+
+    before: Counter = Counter()
+    for value in tag_lists:
+        tags = [tag for tag in parse_tags(value) if tag in frequent]
+        for i, first in enumerate(tags):
+            for second in tags[i + 1:]:
+                before[(first, second)] += 1
+
+    # Orden total (frecuencia desc., posicion media, etiqueta): el padre siempre va
+    # antes que el hijo, asi que no puede haber ciclos. Con la misma frecuencia
+    # (meats/hams en todos los mismos productos) la mas general sale antes en la lista
+    ordered = sorted(frequent, key=lambda tag: (-counts[tag], positions[tag] / counts[tag], tag))
+    rank = {tag: index for index, tag in enumerate(ordered)}
+    candidates: Dict[str, List[str]] = {}
+    for (first, second), together in before.items():
+        if rank[first] < rank[second] and together >= MIN_PARENT_SUPPORT * counts[second]:
+            candidates.setdefault(second, []).append(first)
+
+    parents: List[Optional[int]] = []
+    for tag in ordered:
+        options = candidates.get(tag)
+        # La mas especifica: la de menor frecuencia (mayor rango)
+        parents.append(max(rank[option] for option in options) if options else None)
+    return Taxonomy(ordered, parents, [counts[tag] for tag in ordered])
+
+
+def iter_dump_categories(csv_path: Path, conn=None, batch_size: int = DUMP_BATCH_SIZE,
+                         where: Optional[str] = None) -> Iterable[str]:
+    """categories_tags del dump (o de las filas que cumplen `where`) leyendo solo esa columna."""
+    from create_food_subset import create_duckdb_connection, csv_source_sql
+    own_conn = conn is None
+    conn = conn or create_duckdb_connection()
+    try:
+        result = conn.execute(f"""
+            SELECT categories_tags FROM {csv_source_sql(csv_path)}
+            WHERE categories_tags IS NOT NULL{f' AND ({where})' if where else ''}
+        """)
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0]
+    finally:
+        if own_conn:
+            conn.close()
+
+
+# =============================================================================
+# INFORME
+# =============================================================================
+
+def print_summary(taxonomy: Taxonomy, path: Optional[Path] = None, top: int = 8):
+    roots = [index for index in range(len(taxonomy)) if taxonomy.parents[index] is None]
+    depth_counts = Counter(taxonomy.depths)
+    closure_rows = sum(depth + 1 for depth in taxonomy.depths)
+    print("\n" + "="*60)
+    print("TAXONOMIA DE CATEGORIAS")
+    print("="*60)
+    print(f"   Categorias:              {len(taxonomy):,} (>= {MIN_CATEGORY_PRODUCTS} productos)")
+    print(f"   Raices:                  {len(roots):,}")
+    print(f"   Profundidad maxima:      {max(taxonomy.depths, default=0)}")
+    print(f"   Por nivel:               " + '  '.join(f"{d}:{n:,}" for d, n in sorted(depth_counts.items())))
+    print(f"   Filas de la tabla cierre: {closure_rows:,}")
+    if path is not None and Path(path).exists():
+        print(f"   Archivo:                 {Path(path).name} ({Path(path).stat().st_size / 1024:.0f} KB)")
+    print(f"\n   Raices principales:")
+    for root in roots[:top]:
+        children = [i for i in range(len(taxonomy)) if taxonomy.parents[i] == root]
+        names = ', '.join(display_name(taxonomy.tags[c]) for c in children[:4])
+        print(f"      {display_name(taxonomy.tags[root]):<24}{taxonomy.counts[root]:>9,}  -> {names or '-'}")
+    print("="*60)
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Taxonomia de categorias con tabla de cierre')
+    parser.add_argument('taxonomy', type=Path, nargs='?', help=f'{TAXONOMY_FILENAME} generado por el exportador')
+    parser.add_argument('--dump', type=Path, help='Construir la taxonomia del dump .csv.gz completo')
+    parser.add_argument('--output', type=Path, help='Donde guardar la taxonomia construida con --dump')
+    parser.add_argument('--descendants', help='Listar una categoria y sus descendientes (nombre o etiqueta)')
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        if not args.dump.exists():
+            print(f"[ERROR] No se encuentra el archivo {args.dump}")
+            sys.exit(1)
+        start = time.time()
+        print(f"\n[TAXONOMIA] Etiquetas de categoria de {args.dump.name}...")
+        tag_lists = list(iter_dump_categories(args.dump))
+        taxonomy = build_taxonomy(tag_lists)
+        path = taxonomy.save(args.output or args.dump.parent / f"dump{TAXONOMY_SUFFIX}")
+        print(f"   [OK] {path.name} en {time.time() - start:.1f}s")
+    elif args.taxonomy:
+        if not args.taxonomy.exists():
+            print(f"[ERROR] No se encuentra el archivo {args.taxonomy}")
+            sys.exit(1)
+        path = args.taxonomy
+        taxonomy = Taxonomy.load(path)
+    else:
+        parser.error(f'indica un {TAXONOMY_FILENAME} o --dump')
+
+    if args.descendants:
+        wanted = args.descendants.strip().lower()
+        matches = [i for i, tag in enumerate(taxonomy.tags) if tag == wanted or display_name(tag) == wanted]
+        if not matches:
+            print(f"[ERROR] Categoria no encontrada: {args.descendants}")
+            sys.exit(1)
+        root = matches[0]
+        print(f"\n{display_name(taxonomy.tags[root])} (id {root})")
+        for category_id in taxonomy.descendants(root)[1:]:
+            depth = taxonomy.depths[category_id] - taxonomy.depths[root]
+            print(f"   {'  ' * (depth - 1)}{display_name(taxonomy.tags[category_id])} "
+                  f"(id {category_id}, {taxonomy.counts[category_id]:,})")
+        return
+
+    print_summary(taxonomy, path)
+
+
+if __name__ == "__main__":
+    main()
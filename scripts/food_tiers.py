@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Subsets por niveles: un nivel "hot" pequeño y niveles "cold" para segundo plano.
+
+Con un solo fichero de ~600k productos la busqueda no funciona hasta importarlo
+entero. Unos pocos productos concentran la mayoria de escaneos, asi que el
+exportador (create_food_subset.py --tiers) los ordena por popularidad y
+completitud y reparte la salida en:
+
+    spain_hot.jsonl.gz       los N productos con mejor puntuacion
+    spain_cold_1.jsonl.gz    los siguientes, en bloques de tamaño fijo
+    spain_cold_2.jsonl.gz    ...
+
+Cada nivel es un .jsonl.gz completo por si mismo (mismo formato que el subset)
+con su manifest (<mercado>_<nivel>.manifest.json: productos, bytes, sha256, rango de
+puntuacion). Ningun codigo aparece en dos niveles. spain_tiers.json lista los
+niveles en orden de carga. El subset completo se sigue generando igual.
+
+Puntuacion (0..1):
+    0.7 * log(1 + unique_scans_n) normalizado
+    0.2 * completeness del dump
+    0.1 * campos utiles presentes (nutriscore, kcal, categorias, marca)
+
+INSTALACION DE DEPENDENCIAS:
+    pip install numpy pandas
+
+EJECUCION:
+    python create_food_subset.py spain --tiers
+    python create_food_subset.py spain --tiers --hot-size 30000 --cold-size 150000
+    python food_tiers.py spain_tiers.json          # verificar niveles y manifests
+"""
+
+import sys
+import json
+import gzip
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError as e:
+    print(f"Error: Falta dependencia {e.name}")
+    print("Instala con: pip install numpy pandas")
+    sys.exit(1)
+
+
+# =============================================================================
+# CONFIGURACION
+# =============================================================================
+
+TIERS_FORMAT_VERSION = 1
+DEFAULT_HOT_PRODUCTS = 50_000
+DEFAULT_COLD_PRODUCTS = 250_000
+SCORE_WEIGHTS = {'scans': 0.7, 'completeness': 0.2, 'fields': 0.1}
+FIELD_COLUMNS = ['nutriscore_grade', 'energy-kcal_100g', 'categories_tags', 'brands']
+
+
+def tier_name(index: int) -> str:
+    return 'hot' if index == 0 else f"cold_{index}"
+
+
+def tier_filename(market: str, index: int) -> str:
+    return f"{market}_{tier_name(index)}.jsonl.gz"
+
+
+def tiers_index_path(output_dir: Path, market: str) -> Path:
+    return Path(output_dir) / f"{market}_tiers.json"
+
+
+# =============================================================================
+# PUNTUACION Y REPARTO
+# =============================================================================
+
+def _numeric(result: 'pd.DataFrame', column: str) -> 'pd.Series':
+    if column not in result:
+        return pd.Series(0.0, index=result.index)
+    return pd.to_numeric(result[column], errors='coerce').fillna(0.0)
+
+
+def popularity_scores(result: 'pd.DataFrame') -> 'pd.Series':
+    """Puntuacion de popularidad + completitud por fila (columnas del dump)."""
+    scans = np.log1p(_numeric(result, 'unique_scans_n').clip(lower=0))
+    scan_score = scans / scans.max() if len(scans) and scans.max() > 0 else scans * 0
+    completeness = _numeric(result, 'completeness').clip(0, 1)
+    fields = sum(result[c].notna().astype(float) for c in FIELD_COLUMNS if c in result) / len(FIELD_COLUMNS)
+    return (SCORE_WEIGHTS['scans'] * scan_score
+            + SCORE_WEIGHTS['completeness'] * completeness
+            + SCORE_WEIGHTS['fields'] * fields)
+
+
+def assign_tiers(result: 'pd.DataFrame', hot_size: int = DEFAULT_HOT_PRODUCTS,
+                 cold_size: int = DEFAULT_COLD_PRODUCTS) -> 'pd.DataFrame':
+    """
+    Columnas 'score', 'tier' y 'scans' por fila (mismo indice que result). Las
+    filas con un codigo repetido quedan con tier -1 para que los niveles no se
+    solapen: se conserva la de mayor puntuacion.
+    """
+    scores = popularity_scores(result)
+    codes = result['code'].astype(str).str.strip()
+    ranking = pd.DataFrame({'score': scores, 'code': codes,
+                            'scans': _numeric(result, 'unique_scans_n').clip(lower=0)})
+    ranking = ranking.sort_values(['score', 'code'], ascending=[False, True], kind='stable')
+    duplicate = ranking['code'].duplicated(keep='first') | (ranking['code'] == '')
+
+    position = np.cumsum(~duplicate.to_numpy()) - 1
+    tier = np.where(position < hot_size, 0, 1 + (position - hot_size) // max(cold_size, 1))
+    ranking['tier'] = np.where(duplicate.to_numpy(), -1, tier)
+    return ranking.loc[result.index, ['score', 'tier', 'scans']]
+
+
+# =============================================================================
+# ESCRITURA
+# =============================================================================
+
+class TierWriter:
+    """Un .jsonl.gz por nivel, abiertos bajo demanda mientras se exporta."""
+
+    def __init__(self, output_dir: Path, market: str, profile: str):
+        self.output_dir = Path(output_dir)
+        self.market = market
+        self.profile = profile
+        self._files: Dict[int, Any] = {}
+        self._stats: Dict[int, Dict[str, Any]] = {}
+        # Niveles de un build anterior (puede haber tenido mas bloques cold)
+        for pattern in (f"{market}_hot.*", f"{market}_cold_*"):
+            for stale in self.output_dir.glob(pattern):
+                stale.unlink()
+
+    def write(self, tier: int, line: str, score: float, scans: float = 0.0):
+        if tier < 0:
+            return
+        if tier not in self._files:
+            path = self.output_dir / tier_filename(self.market, tier)
+            # mtime=0: mismo contenido -> mismos bytes y mismo sha256 entre builds
+            self._files[tier] = gzip.GzipFile(filename='', mode='wb', compresslevel=9, mtime=0,
+                                              fileobj=open(path, 'wb'))
+            self._stats[tier] = {'products': 0, 'score_max': score, 'score_min': score, 'scans': 0.0}
+        self._files[tier].write((line + '\n').encode('utf-8'))
+        stats = self._stats[tier]
+        stats['products'] += 1
+        stats['score_max'] = max(stats['score_max'], score)
+        stats['score_min'] = min(stats['score_min'], score)
+        stats['scans'] += scans
+
+    def close(self) -> Path:
+        """Cierra los ficheros y escribe los manifests. Devuelve el indice de niveles."""
+        for handle in self._files.values():
+            fileobj = handle.fileobj
+            handle.close()
+            fileobj.close()
+
+        total_scans = sum(s['scans'] for s in self._stats.values()) or 1.0
+        tiers = []
+        order = sorted(self._stats)
+        for position, tier in enumerate(order):
+            stats = self._stats[tier]
+            path = self.output_dir / tier_filename(self.market, tier)
+            manifest = {
+                'version': TIERS_FORMAT_VERSION,
+                'market': self.market,
+                'tier': tier_name(tier),
+                'index': tier,
+                'file': path.name,
+                'profile': self.profile,
+                'products': stats['products'],
+                'bytes': path.stat().st_size,
+                'sha256': _sha256(path),
+                'score_range': [round(stats['score_min'], 6), round(stats['score_max'], 6)],
+                'scan_share': round(stats['scans'] / total_scans, 4),
+                'next': tier_filename(self.market, order[position + 1]) if position + 1 < len(order) else None,
+            }
+            manifest_path = path.with_name(f"{self.market}_{tier_name(tier)}.manifest.json")
+            _write_json(manifest_path, manifest)
+            tiers.append({key: manifest[key] for key in ('tier', 'file', 'products', 'bytes', 'sha256', 'scan_share')})
+            tiers[-1]['manifest'] = manifest_path.name
+
+        index_path = tiers_index_path(self.output_dir, self.market)
+        _write_json(index_path, {
+            'version': TIERS_FORMAT_VERSION,
+            'market': self.market,
+            'profile': self.profile,
+            'score_weights': SCORE_WEIGHTS,
+            'tiers': tiers,
+        })
+        return index_path
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(path)
+
+
+def print_tiers(index_path: Path, full_bytes: Optional[int] = None):
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    print("\n" + "="*60)
+    print(f"NIVELES: {index['market'].upper()}")
+    print("="*60)
+    for tier in index['tiers']:
+        print(f"   {tier['tier']:<8}{tier['products']:>10,} productos  "
+              f"{tier['bytes'] / 1024 / 1024:>7.1f} MB  {tier['scan_share']:>6.1%} de escaneos")
+    if full_bytes and index['tiers']:
+        hot = index['tiers'][0]
+        print(f"\n   Primera busqueda tras descargar {hot['bytes'] / full_bytes:.1%} de los bytes del subset")
+    print("="*60)
+
+
+# =============================================================================
+# VERIFICACION
+# =============================================================================
+
+def verify_tiers(index_path: Path) -> bool:
+    """Comprueba sha256, numero de productos y que ningun codigo se repita entre niveles."""
+    index_path = Path(index_path)
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    seen = set()
+    ok = True
+    for tier in index['tiers']:
+        path = index_path.parent / tier['file']
+        with open(index_path.parent / tier['manifest'], 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        problems = []
+        if _sha256(path) != manifest['sha256']:
+            problems.append('sha256 distinto')
+        count = repeated = 0
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                code = json.loads(line)['code']
+                repeated += code in seen
+                seen.add(code)
+                count += 1
+        if count != manifest['products']:
+            problems.append(f"{count:,} productos (manifest: {manifest['products']:,})")
+        if repeated:
+            problems.append(f"{repeated:,} codigos en otro nivel")
+        flag = '✅' if not problems else '❌ ' + ', '.join(problems)
+        print(f"   {tier['file']:<28}{count:>10,}  {flag}")
+        ok = ok and not problems
+    return ok
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Verificar los niveles hot/cold de un subset')
+    parser.add_argument('index', type=Path, help='Indice de niveles (<mercado>_tiers.json)')
+    args = parser.parse_args(argv)
+
+    if not args.index.exists():
+        print(f"[ERROR] No se encuentra el archivo {args.index}")
+        sys.exit(1)
+    print_tiers(args.index)
+    if not verify_tiers(args.index):
+        print("[ERROR] Los niveles no coinciden con sus manifests")
+        sys.exit(1)
+    print("[OK] Niveles verificados")
+
+
+if __name__ == "__main__":
+    main()
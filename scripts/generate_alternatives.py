@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Genera alternativas.json a partir de la similitud entre ejercicios.
+
+Cada ejercicio se codifica como un vector de caracteristicas ponderadas
+(grupoMuscular, muscles, musculosSecundarios, equipo y nivel) y las top-k
+alternativas salen de una matriz de similitud coseno calculada con numpy.
+Solo se comparan ejercicios del mismo bloque (grupo muscular; los bloques
+muy grandes se subdividen por equipo), asi que escala a catalogos de 10k+.
+
+Curacion manual:
+    - Por defecto se conservan las listas existentes de alternativas.json
+      (solo se eliminan ids que ya no existen) y se generan las que faltan.
+    - alternativas_overrides.json (opcional) fija o excluye ids por ejercicio:
+          {"100": {"pin": [103, 106], "exclude": [272]}}
+      Los ids fijados van primero y se respetan incluso con --regenerate-all.
+
+INSTALACION DE DEPENDENCIAS:
+    pip install numpy
+
+EJECUCION:
+    python scripts/generate_alternatives.py                   # completar lo que falta
+    python scripts/generate_alternatives.py --regenerate-all  # recalcular todo
+    python scripts/generate_alternatives.py --dry-run --show 100
+    python scripts/generate_alternatives.py --bench 20000     # catalogo sintetico
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: Falta dependencia numpy")
+    print("Instala con: pip install numpy")
+    sys.exit(1)
+
+
+DATA_DIR = Path(__file__).parent.parent / "assets" / "data"
+EXERCISES_FILE = "exercises_local.json"
+ALTERNATIVES_FILE = "alternativas.json"
+OVERRIDES_FILE = "alternativas_overrides.json"
+
+DEFAULT_TOP_K = 6
+DEFAULT_MAX_BLOCK = 2000
+CHUNK_ROWS = 1024
+
+# Peso de cada grupo de caracteristicas en el vector
+FEATURE_WEIGHTS = {
+    'grupoMuscular': 3.0,
+    'muscles': 2.0,
+    'musculosSecundarios': 1.0,
+    'equipo': 1.0,
+    'nivel': 0.5,
+}
+LEVEL_ORDER = {'basico': 0.0, 'intermedio': 0.5, 'avanzado': 1.0}
+
+
+def load_json(path: Path) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# =============================================================================
+# CARACTERISTICAS
+# =============================================================================
+
+def _values(exercise: Dict[str, Any], field: str) -> List[str]:
+    value = exercise.get(field)
+    if value is None:
+        return []
+    return [v.lower() for v in (value if isinstance(value, list) else [value])]
+
+
+def encode_features(exercises: List[Dict[str, Any]]) -> np.ndarray:
+    """Matriz (n, d) normalizada por filas: one-hot/multi-hot ponderado + nivel ordinal."""
+    vocab: Dict[tuple, int] = {}
+    for exercise in exercises:
+        for field in ('grupoMuscular', 'muscles', 'musculosSecundarios', 'equipo'):
+            for value in _values(exercise, field):
+                vocab.setdefault((field, value), len(vocab))
+
+    level_column = len(vocab)
+    matrix = np.zeros((len(exercises), len(vocab) + 1), dtype=np.float32)
+    for row, exercise in enumerate(exercises):
+        for field in ('grupoMuscular', 'muscles', 'musculosSecundarios', 'equipo'):
+            values = _values(exercise, field)
+            for value in values:
+                # Los multi-hot reparten el peso para no premiar listas largas
+                matrix[row, vocab[(field, value)]] = FEATURE_WEIGHTS[field] / np.sqrt(len(values))
+        level = LEVEL_ORDER.get((exercise.get('nivel') or '').lower(), 0.5)
+        matrix[row, level_column] = FEATURE_WEIGHTS['nivel'] * level
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def build_blocks(exercises: List[Dict[str, Any]], max_block: int) -> List[np.ndarray]:
+    """Indices de fila por bloque: grupo muscular, subdividido por equipo si es muy grande."""
+    groups: Dict[str, List[int]] = {}
+    for row, exercise in enumerate(exercises):
+        groups.setdefault((exercise.get('grupoMuscular') or '').lower(), []).append(row)
+
+    blocks = []
+    for rows in groups.values():
+        if len(rows) <= max_block:
+            blocks.append(np.array(rows))
+            continue
+        by_equipment: Dict[str, List[int]] = {}
+        for row in rows:
+            by_equipment.setdefault((exercises[row].get('equipo') or '').lower(), []).append(row)
+        for sub_rows in by_equipment.values():
+            for start in range(0, len(sub_rows), max_block):
+                blocks.append(np.array(sub_rows[start:start + max_block]))
+    return blocks
+
+
+# =============================================================================
+# TOP-K
+# =============================================================================
+
+def top_k_neighbours(exercises: List[Dict[str, Any]], k: int, max_block: int = DEFAULT_MAX_BLOCK) -> Dict[int, List[int]]:
+    """Top-k ids mas similares por ejercicio (mismo bloque, excluyendo el propio)."""
+    features = encode_features(exercises)
+    ids = np.array([e['id'] for e in exercises])
+    result: Dict[int, List[int]] = {}
+
+    for block in build_blocks(exercises, max_block):
+        block_features = features[block]
+        block_ids = ids[block]
+        kk = min(k, len(block) - 1)
+        if kk <= 0:
+            for exercise_id in block_ids:
+                result[int(exercise_id)] = []
+            continue
+
+        for start in range(0, len(block), CHUNK_ROWS):
+            chunk = slice(start, start + CHUNK_ROWS)
+            similarity = block_features[chunk] @ block_features.T
+            # Excluir el propio ejercicio
+            rows = np.arange(similarity.shape[0])
+            similarity[rows, rows + start] = -np.inf
+            # Desempate estable: a igual similitud, id mas cercano
+            id_distance = np.abs(block_ids[chunk, None] - block_ids[None, :]) / (ids.max() + 1)
+            score = similarity - 1e-6 * id_distance
+            candidates = np.argpartition(-score, kk - 1, axis=1)[:, :kk]
+            candidate_scores = np.take_along_axis(score, candidates, axis=1)
+            order = np.argsort(-candidate_scores, axis=1, kind='stable')
+            best = np.take_along_axis(candidates, order, axis=1)
+            for row, exercise_id in enumerate(block_ids[chunk]):
+                result[int(exercise_id)] = [int(block_ids[c]) for c in best[row]]
+    return result
+
+
+def merge_with_curated(generated: Dict[int, List[int]], existing: Dict[str, List[int]],
+                       overrides: Dict[str, Dict[str, List[int]]], valid_ids: set,
+                       k: int, regenerate_all: bool) -> Dict[str, List[int]]:
+    merged: Dict[str, List[int]] = {}
+    for exercise_id in sorted(valid_ids):
+        key = str(exercise_id)
+        override = overrides.get(key, {})
+        excluded = set(override.get('exclude', [])) | {exercise_id}
+
+        pins = [p for p in override.get('pin', []) if p in valid_ids and p not in excluded]
+        curated = not regenerate_all and key in existing
+        # Lista curada: se respeta tal cual (sin ids colgantes); si no, top-k generado
+        candidates = pins + (existing[key] if curated else generated.get(exercise_id, []))
+
+        alternatives: List[int] = []
+        for candidate in candidates:
+            if candidate in valid_ids and candidate not in excluded and candidate not in alternatives:
+                alternatives.append(candidate)
+        merged[key] = alternatives if curated else alternatives[:max(k, len(pins))]
+    return merged
+
+
+# =============================================================================
+# BENCHMARK SINTETICO
+# =============================================================================
+
+def synthetic_catalog(size: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    groups = ['Pecho', 'Espalda', 'Hombros', 'Biceps', 'Triceps', 'Piernas', 'Gluteos',
+              'Femoral', 'Gemelos', 'Core', 'Trapecio', 'Full body']
+    equipment = ['barra', 'mancuernas', 'maquina', 'cable', 'peso corporal', 'bandas', 'kettlebell']
+    levels = list(LEVEL_ORDER)
+    catalog = []
+    for i in range(size):
+        group = rng.choice(groups)
+        catalog.append({
+            'id': 100 + i,
+            'nombre': f"Ejercicio {i}",
+            'grupoMuscular': group,
+            'muscles': [group] + rng.sample(groups, rng.randint(0, 1)),
+            'musculosSecundarios': rng.sample(groups, rng.randint(0, 3)),
+            'equipo': rng.choice(equipment),
+            'nivel': rng.choice(levels),
+        })
+    return catalog
+
+
+def run_benchmark(size: int, k: int, max_block: int):
+    catalog = synthetic_catalog(size)
+    start = time.perf_counter()
+    result = top_k_neighbours(catalog, k, max_block)
+    elapsed = time.perf_counter() - start
+    print(f"Catalogo sintetico: {size:,} ejercicios, top-{k}, bloque max {max_block}")
+    print(f"   Tiempo: {elapsed:.2f}s ({len(result):,} listas)")
+
+
+# =============================================================================
+# MAIN
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Genera alternativas.json por similitud')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('-k', '--top-k', type=int, default=DEFAULT_TOP_K)
+    parser.add_argument('--max-block', type=int, default=DEFAULT_MAX_BLOCK,
+                        help='Tamaño maximo de bloque antes de subdividir por equipo')
+    parser.add_argument('--regenerate-all', action='store_true',
+                        help='Ignorar listas existentes (los overrides se mantienen)')
+    parser.add_argument('--dry-run', action='store_true', help='No escribir alternativas.json')
+    parser.add_argument('--show', type=int, action='append', default=[], help='Mostrar alternativas de un id')
+    parser.add_argument('--bench', type=int, metavar='N', help='Medir con un catalogo sintetico de N ejercicios')
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        run_benchmark(args.bench, args.top_k, args.max_block)
+        return
+
+    exercises = load_json(args.data_dir / EXERCISES_FILE)
+    alternatives_path = args.data_dir / ALTERNATIVES_FILE
+    existing = load_json(alternatives_path) if alternatives_path.exists() else {}
+    overrides_path = args.data_dir / OVERRIDES_FILE
+    overrides = load_json(overrides_path) if overrides_path.exists() else {}
+
+    start = time.perf_counter()
+    generated = top_k_neighbours(exercises, args.top_k, args.max_block)
+    valid_ids = {e['id'] for e in exercises}
+    merged = merge_with_curated(generated, existing, overrides, valid_ids, args.top_k, args.regenerate_all)
+    elapsed = time.perf_counter() - start
+
+    added = [key for key in merged if key not in existing]
+    changed = [key for key in merged if key in existing and merged[key] != existing[key]]
+    removed = [key for key in existing if key not in merged]
+    print(f"Ejercicios: {len(exercises)}  Overrides: {len(overrides)}  Tiempo: {elapsed * 1000:.0f} ms")
+    print(f"   Listas nuevas: {len(added)}  Modificadas: {len(changed)}  Eliminadas: {len(removed)}")
+
+    by_id = {e['id']: e for e in exercises}
+    for exercise_id in args.show:
+        print(f"\n{exercise_id} {by_id.get(exercise_id, {}).get('nombre', '?')}")
+        for alt in merged.get(str(exercise_id), []):
+            print(f"   {alt} {by_id[alt]['nombre']}")
+
+    if args.dry_run:
+        return
+    if added or changed or removed:
+        with open(alternatives_path, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Guardado {alternatives_path}")
+    else:
+        print("\nSin cambios")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+CLI unificada para los scripts de datos de Juan Tracker.
+
+Agrupa los scripts de alimentos y ejercicios bajo un unico punto de entrada.
+Cada subcomando delega en el main(argv) del script correspondiente, que solo
+se importa al ejecutar ese subcomando: la ayuda y los comandos ligeros no
+cargan duckdb, numpy, pandas ni requests.
+
+Los mismos pasos siguen disponibles como funciones importables en cada
+modulo (create_food_subset.process_market, exercise_merge.run_merge,
+add_exercise_descriptions.describe, ...).
+
+EJECUCION:
+    python scripts/juan_data.py --help
+    python scripts/juan_data.py food subset spain --profile app-default
+    python scripts/juan_data.py food estimate spain
+    python scripts/juan_data.py exercises update --dry-run
+    python scripts/juan_data.py exercises describe --report
+    python scripts/juan_data.py bench-startup
+"""
+
+import sys
+import time
+import statistics
+import importlib
+import subprocess
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+
+SCRIPT_PATH = Path(__file__).resolve()
+
+# grupo -> comando -> (modulo, argumentos fijos, ayuda)
+COMMANDS: Dict[str, Dict[str, Tuple[str, List[str], str]]] = {
+    'food': {
+        'subset': ('create_food_subset', [], 'Crear subsets por mercado (spain, usa, all)'),
+        'estimate': ('create_food_subset', ['--estimate'], 'Estimar tamaño y composicion de un subset'),
+        'fields': ('food_projection', [], 'Informe de bytes por campo de un subset'),
+        'cache': ('food_filter_cache', [], 'Gestionar la cache de filtros de mercado'),
+        'read': ('food_subset_reader', [], 'Lecturas aleatorias sobre un subset .jsonl.gz'),
+        'serve': ('food_lookup_service', [], 'Servicio HTTP local de busqueda de productos'),
+        'loadtest': ('food_service_loadtest', [], 'Prueba de carga del servicio de busqueda'),
+        'nutrients': ('food_nutrient_index', [], 'Indice de metricas nutricionales y consultas por rango'),
+        'barcodes': ('food_barcode_filter', [], 'Filtro de Bloom con los codigos de barras del dump'),
+        'tiers': ('food_tiers', [], 'Verificar los niveles hot/cold de un subset'),
+        'search-bench': ('food_search_bench', [], 'Latencia y relevancia de la busqueda FTS5 offline'),
+        'import-sim': ('food_import_sim', [], 'Simular la importacion en el dispositivo (lote, formato, pragmas)'),
+        'order': ('food_ordering', [], 'Informe de compresion con orden por localidad'),
+        'overlays': ('food_overlays', [], 'Base compartida entre mercados + overlays por mercado'),
+        'gzindex': ('food_gzip_index', [], 'Indice de acceso aleatorio del dump .csv.gz'),
+        'alternatives': ('food_alternatives', [], 'Alternativas mas saludables por categoria (vecinos)'),
+        'taxonomy': ('food_taxonomy', [], 'Taxonomia de categorias con tabla de cierre'),
+        'facets': ('food_facets', [], 'Facetas de marca: ahorro y filtro por id'),
+        'archive': ('food_archive', [], 'Archivo historico de snapshots del dump (Parquet por fecha)'),
+        'quality': ('food_quality', [], 'Perfil de calidad de datos de un subset y diff con el anterior'),
+    },
+    'exercises': {
+        'update': ('update_exercises', [], 'Añadir ejercicios y descripciones base (merge idempotente)'),
+        'merge': ('exercise_merge', [], 'Importar una lista externa de ejercicios'),
+        'describe': ('add_exercise_descriptions', [], 'Generar descripciones para ejercicios sin ella'),
+        'dedup': ('exercise_dedup', [], 'Detectar ejercicios duplicados'),
+        'alternatives': ('generate_alternatives', [], 'Generar alternativas.json por similitud'),
+        'bundle': ('build_exercise_bundle', [], 'Compilar el bundle de ejercicios'),
+    },
+    'templates': {
+        'stats': ('build_template_stats', [], 'Precalcular agregados de las plantillas de rutina'),
+    },
+}
+
+# Invocaciones medidas por bench-startup (sin tocar ficheros)
+STARTUP_CASES = [
+    ('--help', ['--help']),
+    ('food subset --help', ['food', 'subset', '--help']),
+    ('food cache --info', ['food', 'cache', '--info']),
+    ('exercises describe --report', ['exercises', 'describe', '--report']),
+    ('templates stats --check', ['templates', 'stats', '--check']),
+]
+EAGER_IMPORTS = 'import duckdb, requests, tqdm, pandas'
+
+
+def print_help(group: Optional[str] = None):
+    print("uso: juan_data.py <grupo> <comando> [opciones]   (o: juan_data.py bench-startup)")
+    for name, commands in COMMANDS.items():
+        if group and name != group:
+            continue
+        print(f"\n{name}:")
+        for command, (_, _, help_text) in commands.items():
+            print(f"   {command:<14}{help_text}")
+    print("\n<comando> --help muestra las opciones de cada paso.")
+
+
+def run(argv: List[str]) -> int:
+    """Ejecuta un subcomando en proceso. Devuelve el codigo de salida."""
+    if not argv or argv[0] in ('-h', '--help'):
+        print_help()
+        return 0
+    if argv[0] == 'bench-startup':
+        return run_startup_benchmark(argv[1:])
+
+    group = argv[0]
+    if group not in COMMANDS:
+        print(f"[ERROR] Grupo desconocido: {group}")
+        print_help()
+        return 2
+    if len(argv) < 2 or argv[1] in ('-h', '--help'):
+        print_help(group)
+        return 0
+    command = argv[1]
+    if command not in COMMANDS[group]:
+        print(f"[ERROR] Comando desconocido: {group} {command}")
+        print_help(group)
+        return 2
+
+    module_name, fixed_args, _ = COMMANDS[group][command]
+    module = importlib.import_module(module_name)
+    try:
+        module.main(argv[2:] + fixed_args)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return 0
+
+
+# =============================================================================
+# BENCHMARK DE ARRANQUE
+# =============================================================================
+
+def _time_process(args: List[str], runs: int) -> float:
+    """Mediana en ms de lanzar `python args` (salida descartada)."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       cwd=SCRIPT_PATH.parent)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run_startup_benchmark(argv: List[str]) -> int:
+    runs = int(argv[0]) if argv else 5
+    print("\n" + "="*60)
+    print(f"BENCHMARK DE ARRANQUE (mediana de {runs} ejecuciones)")
+    print("="*60)
+    interpreter = _time_process(['-c', 'pass'], runs)
+    print(f"   {'python -c pass':<34}{interpreter:>8.0f} ms")
+    eager = _time_process(['-c', EAGER_IMPORTS], runs)
+    print(f"   {'import duckdb+requests+tqdm+pandas':<34}{eager:>8.0f} ms")
+    for label, args in STARTUP_CASES:
+        elapsed = _time_process([str(SCRIPT_PATH)] + args, runs)
+        print(f"   {label:<34}{elapsed:>8.0f} ms")
+    print("="*60)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
+    sys.exit(run(sys.argv[1:] if argv is None else argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Fixtures compartidas: un dump TSV, un subset JSONL y un catalogo de ejercicios
+sinteticos y pequeños.
+
+Los datos se generan con semilla fija, asi que cada test ve siempre las mismas
+filas. Los scripts no son un paquete: se importan anteponiendo scripts/ a sys.path.
+"""
+
+import sys
+import gzip
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+# =============================================================================
+# DATOS SINTETICOS
+# =============================================================================
+
+DUMP_ROWS = 240
+
+DUMP_COLUMNS = [
+    'code', 'url', 'product_name', 'generic_name', 'brands', 'brands_tags',
+    'categories', 'categories_tags', 'countries_tags', 'nutriscore_grade',
+    'unique_scans_n', 'completeness', 'energy-kcal_100g', 'proteins_100g',
+    'carbohydrates_100g', 'fat_100g', 'fiber_100g', 'sugars_100g',
+]
+
+BRANDS = [
+    ('Hacendado', 'hacendado'),
+    ('HACENDADO', 'hacendado'),
+    ('Dia', 'dia'),
+    ('Nestlé', 'nestle'),
+    ('Coca-Cola', 'coca-cola'),
+    ('Kellogg', 'kellogg'),
+    ('Marca Blanca', 'marca-blanca'),
+]
+
+CATEGORY_PATHS = [
+    'en:dairies,en:milks,en:skimmed-milks',
+    'en:dairies,en:cheeses',
+    'en:beverages,en:sodas',
+    'en:snacks,en:salty-snacks,en:chips',
+    'en:breakfasts,en:cereals',
+    'en:meats,en:hams',
+]
+
+COUNTRIES = ['en:spain', 'en:united-states', 'en:spain,en:france', 'en:japan']
+
+NAMES = ['leche', 'queso', 'refresco', 'patatas', 'cereales', 'jamon']
+
+
+def _number(rng: random.Random, low: float, high: float) -> str:
+    # Algunos nutrientes vacios, como en el dump real
+    return '' if rng.random() < 0.1 else f"{rng.uniform(low, high):.1f}"
+
+
+def dump_rows(count: int = DUMP_ROWS, seed: int = 7) -> List[Dict[str, str]]:
+    """Filas del dump sintetico (todas las columnas como texto)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        brand, brand_tag = BRANDS[i % len(BRANDS)]
+        path = CATEGORY_PATHS[i % len(CATEGORY_PATHS)]
+        rows.append({
+            'code': f"84100000{i:05d}",
+            'url': 'http://x',
+            'product_name': f"{NAMES[i % len(NAMES)]} {i}" if i % 29 else '',
+            'generic_name': 'generico' if i % 3 == 0 else '',
+            'brands': brand,
+            'brands_tags': brand_tag,
+            'categories': path,
+            'categories_tags': path,
+            'countries_tags': COUNTRIES[i % len(COUNTRIES)],
+            'nutriscore_grade': 'abcde'[i % 5] if i % 4 else '',
+            'unique_scans_n': str(rng.randint(0, 500)),
+            'completeness': f"{rng.random():.2f}",
+            'energy-kcal_100g': _number(rng, 20, 600),
+            'proteins_100g': _number(rng, 0, 40),
+            'carbohydrates_100g': _number(rng, 0, 80),
+            'fat_100g': _number(rng, 0, 50),
+            'fiber_100g': _number(rng, 0, 10),
+            'sugars_100g': _number(rng, 0, 40),
+        })
+    return rows
+
+
+def write_dump(path: Path, rows: List[Dict[str, str]]) -> Path:
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('\t'.join(DUMP_COLUMNS) + '\n')
+        for row in rows:
+            f.write('\t'.join(row[column] for column in DUMP_COLUMNS) + '\n')
+    return path
+
+
+def expected_codes(market: str) -> Set[str]:
+    """Filtro de mercado reimplementado en Python sobre las filas sinteticas."""
+    import create_food_subset as exporter
+    config = exporter.MARKETS[market]
+    codes = set()
+    for row in dump_rows():
+        in_market = any(c.lower() in row['countries_tags'].lower() for c in config['countries']) or \
+            any(b.lower() in row['brands_tags'].lower() for b in config['brands'])
+        relevant = any(c in row['categories_tags'].lower() for c in exporter.RELEVANT_CATEGORIES)
+        if in_market and relevant and row['categories'] and row['product_name']:
+            codes.add(row['code'])
+    return codes
+
+
+def subset_products(count: int = 120, seed: int = 11) -> List[Dict[str, Any]]:
+    """Registros en el formato de exportacion (perfil 'full')."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        brand, _ = BRANDS[i % len(BRANDS)]
+        path = CATEGORY_PATHS[i % len(CATEGORY_PATHS)]
+        products.append({
+            'code': f"84100000{i:05d}",
+            'name': f"{NAMES[i % len(NAMES)]} {i}",
+            'brands': brand,
+            'generic_name': None,
+            'nutriscore': 'abcde'[i % 5],
+            'nutriments': {
+                'energy_kcal': round(rng.uniform(20, 600), 1),
+                'proteins': round(rng.uniform(0, 40), 1),
+                'carbohydrates': round(rng.uniform(0, 80), 1),
+                'fat': round(rng.uniform(0, 50), 1),
+                'fiber': round(rng.uniform(0, 10), 1),
+                'sugars': round(rng.uniform(0, 40), 1),
+            },
+            'categories': [tag.split(':', 1)[1].replace('-', ' ') for tag in path.split(',')],
+        })
+    return products
+
+
+def write_subset(path: Path, products: List[Dict[str, Any]]) -> Path:
+    from food_projection import dumps_product
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for product in products:
+            f.write(dumps_product(product) + '\n')
+    return path
+
+
+def exercise_catalog() -> List[Dict[str, Any]]:
+    """Catalogo minimo con el formato de exercises_local.json."""
+    rows = [
+        ('Press banca', 'Pecho', ['Triceps'], 'barra', 'intermedio'),
+        ('Press inclinado con mancuernas', 'Pecho', ['Hombros'], 'mancuernas', 'intermedio'),
+        ('Press declinado con mancuernas', 'Pecho', ['Triceps'], 'mancuernas', 'avanzado'),
+        ('Aperturas en polea', 'Pecho', [], 'cable', 'basico'),
+        ('Remo con barra', 'Espalda', ['Biceps'], 'barra', 'intermedio'),
+        ('Jalón al pecho', 'Espalda', ['Biceps'], 'maquina', 'basico'),
+        ('Dominadas', 'Espalda', ['Biceps', 'Core'], 'peso corporal', 'avanzado'),
+        ('Sentadilla', 'Piernas', ['Gluteos', 'Core'], 'barra', 'intermedio'),
+        ('Prensa', 'Piernas', ['Gluteos'], 'maquina', 'basico'),
+        ('Plancha', 'Core', [], 'peso corporal', 'basico'),
+    ]
+    return [{
+        'id': 100 + i,
+        'nombre': name,
+        'grupoMuscular': group,
+        'musculosSecundarios': secondary,
+        'equipo': equipment,
+        'nivel': level,
+        'descripcion': '',
+        'muscles': [group],
+    } for i, (name, group, secondary, equipment, level) in enumerate(rows)]
+
+
+def routine_templates() -> Dict[str, Any]:
+    """Plantillas con el formato de routine_templates.json (ids como texto)."""
+    return {
+        'version': 3,
+        'lastUpdated': '2026-01-01',
+        'templates': [{
+            'id': 'torso-pierna',
+            'nombre': 'Torso / Pierna',
+            'categoria': 'hipertrofia',
+            'nivel': 'intermedio',
+            'diasPorSemana': 4,
+            'dias': [
+                {'nombre': 'Torso', 'ejercicios': [
+                    {'exerciseId': '100', 'series': 4, 'repsRange': '6-8'},
+                    {'exerciseId': '104', 'series': 3, 'repsRange': '8-12'},
+                ]},
+                {'nombre': 'Pierna', 'ejercicios': [
+                    {'exerciseId': '107', 'series': 4, 'repsRange': '5'},
+                    {'exerciseId': '109', 'series': 3, 'repsRange': '30-45s'},
+                ]},
+            ],
+        }],
+    }
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def dump_path(tmp_path) -> Path:
+    return write_dump(tmp_path / 'dump.csv.gz', dump_rows())
+
+
+@pytest.fixture
+def products() -> List[Dict[str, Any]]:
+    return subset_products()
+
+
+@pytest.fixture
+def subset_path(tmp_path, products) -> Path:
+    return write_subset(tmp_path / 'spain_subset.jsonl.gz', products)
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch) -> Path:
+    """WORK_DIR del exportador redirigido a un directorio temporal."""
+    import create_food_subset
+    monkeypatch.setattr(create_food_subset, 'WORK_DIR', tmp_path)
+    return tmp_path
@@ -0,0 +1,39 @@
+import random
+
+from add_exercise_descriptions import (_MATCHER, _naive_match, NAME_RULES, RuleMatcher, coverage_report,
+                                       describe)
+
+
+def test_compiled_matcher_equals_rule_by_rule():
+    rng = random.Random(3)
+    vocabulary = sorted({k for _, groups, _ in NAME_RULES for group in groups for k in group})
+    vocabulary += ['con', 'de', 'barra', 'mancuernas', 'agarre', 'unilateral']
+    names = [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 5))) for _ in range(3000)]
+    assert [_MATCHER.match(name) for name in names] == [_naive_match(name) for name in names]
+
+
+def test_rule_order_and_overlapping_keywords():
+    matcher = RuleMatcher()
+    assert matcher.match('press inclinado con mancuernas')[0] == 'press-inclinado'
+    assert matcher.match('press de banca')[0] == 'press'
+    assert matcher.match('extensión de tricep')[0] == 'extension-triceps'
+    assert matcher.match('sin palabras clave') is None
+
+
+def test_describe_falls_back_to_equipment_and_group():
+    assert describe({'nombre': 'Press inclinado', 'grupoMuscular': 'Pecho'})[1] == 'press-inclinado'
+    assert describe({'nombre': 'Pec deck', 'grupoMuscular': 'Pecho', 'equipo': 'Máquina'})[1] == 'equipo-maquina'
+    assert describe({'nombre': 'Pec deck', 'grupoMuscular': 'Pecho', 'equipo': ''})[1] == 'grupo:pecho'
+    text, rule_id = describe({'nombre': 'Algo', 'grupoMuscular': 'Antebrazo'})
+    assert rule_id == 'generico' and 'antebrazo' in text
+
+
+def test_coverage_report():
+    report = coverage_report([
+        {'nombre': 'Curl martillo con cuerda', 'grupoMuscular': 'Biceps'},
+        {'nombre': 'Curl martillo alterno', 'grupoMuscular': 'Biceps'},
+        {'nombre': 'Pec deck', 'grupoMuscular': 'Pecho'},
+    ])
+    assert report['hits']['curl-martillo'] == 2
+    assert report['fall_through'] == ['Pec deck']
+    assert 'crunch' in report['never_fired'] and 'curl-martillo' not in report['never_fired']
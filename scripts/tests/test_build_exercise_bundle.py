@@ -0,0 +1,48 @@
+import json
+
+from build_exercise_bundle import (DATA_DIR, ALTERNATIVES_FILE, EXERCISES_FILE, TEMPLATES_FILE,
+                                   compile_bundle, dumps_minified, load_json, verify_checksum)
+from conftest import exercise_catalog, routine_templates
+
+
+def test_bundle_round_trip_and_checksum():
+    catalog = exercise_catalog()
+    alternatives = {'100': [101, 102], '104': ['105']}
+    bundle, errors = compile_bundle(list(reversed(catalog)), alternatives, routine_templates())
+    assert errors == []
+    assert [e['id'] for e in bundle['exercises']] == sorted(e['id'] for e in catalog)
+    assert bundle['alternatives'] == [[100, [101, 102]], [104, [105]]]
+    assert bundle['templates'][0]['dias'][0]['ejercicios'][0]['exerciseId'] == 100
+
+    parsed = json.loads(dumps_minified(bundle))
+    assert parsed == bundle
+    assert verify_checksum(parsed)
+    parsed['exercises'][0]['nombre'] = 'Otro'
+    assert not verify_checksum(parsed)
+
+
+def test_indexes_are_sorted_ids():
+    bundle, _ = compile_bundle(exercise_catalog(), {}, routine_templates())
+    indexes = bundle['indexes']
+    assert indexes['grupoMuscular']['Pecho'] == [100, 101, 102, 103]
+    assert indexes['equipo']['barra'] == [100, 104, 107]
+    assert list(indexes['nivel']) == sorted(indexes['nivel'])
+
+
+def test_dangling_references_are_errors():
+    catalog = exercise_catalog()
+    catalog.append(dict(catalog[0], nombre='Copia'))
+    templates = routine_templates()
+    templates['templates'][0]['dias'][1]['ejercicios'].append({'exerciseId': '999', 'series': 3})
+    _, errors = compile_bundle(catalog, {'100': [998], '997': [101]}, templates)
+    assert any('duplicado: 100' in e for e in errors)
+    assert any('[998]' in e for e in errors)
+    assert any('clave 997' in e for e in errors)
+    assert any('ejercicio 999 no existe' in e for e in errors)
+
+
+def test_versioned_assets_compile_cleanly():
+    _, errors = compile_bundle(load_json(DATA_DIR / EXERCISES_FILE),
+                               load_json(DATA_DIR / ALTERNATIVES_FILE),
+                               load_json(DATA_DIR / TEMPLATES_FILE))
+    assert errors == []
@@ -0,0 +1,56 @@
+import pytest
+
+from build_template_stats import build_stats, parse_reps, set_seconds, source_hash
+from conftest import exercise_catalog, routine_templates
+
+
+@pytest.mark.parametrize('reps_range, expected', [
+    ('8-12', (10.0, False)),
+    ('5', (5.0, False)),
+    ('30-45s', (37.5, True)),
+    ('5/3/1', (3.0, False)),
+    ('max', (10.0, False)),
+])
+def test_parse_reps(reps_range, expected):
+    assert parse_reps(reps_range) == expected
+
+
+def test_set_seconds_uses_rest_by_reps():
+    assert set_seconds('5') == 5 * 3 + 180
+    assert set_seconds('8-12') == 10 * 3 + 90
+    assert set_seconds('30-45s') == 37.5 + 45
+
+
+def test_weekly_sets_weight_secondaries_and_frequency():
+    asset, errors = build_stats(routine_templates(), exercise_catalog(), digest='sha256:x')
+    assert errors == []
+    entry = asset['templates']['torso-pierna']
+    # 2 dias en la plantilla, 4 por semana: cada dia se repite dos veces
+    assert entry['totalWeeklySets'] == (4 + 3 + 4 + 3) * 2
+    assert entry['weeklySets']['Pecho'] == 8.0
+    assert entry['weeklySets']['Triceps'] == 4.0      # secundario: 4 series x 0.5 x 2
+    assert entry['weeklySets']['Core'] == 6 + 4.0     # primario de Plancha + secundario de Sentadilla
+    assert entry['equipment'] == ['barra', 'peso corporal']
+    assert asset['index']['equipment']['barra'] == ['torso-pierna']
+    assert entry['sessionMinutes']['min'] <= entry['sessionMinutes']['avg'] <= entry['sessionMinutes']['max']
+
+
+def test_missing_exercise_is_an_error():
+    templates = routine_templates()
+    templates['templates'][0]['dias'][0]['ejercicios'].append({'exerciseId': '999', 'series': 3})
+    _, errors = build_stats(templates, exercise_catalog())
+    assert errors == ['torso-pierna / Torso: ejercicio 999 no existe']
+
+
+def test_non_numeric_exercise_id_is_an_error():
+    templates = routine_templates()
+    templates['templates'][0]['dias'][1]['ejercicios'].insert(0, {'exerciseId': 'press', 'series': 3})
+    asset, errors = build_stats(templates, exercise_catalog())
+    assert errors == ["torso-pierna / Pierna: exerciseId invalido 'press'"]
+    # La entrada se salta; el resto de la plantilla se agrega igual
+    assert asset['templates']['torso-pierna']['days'][1]['sets'] == 7
+
+
+def test_source_hash_depends_on_both_inputs():
+    assert source_hash('a', 'b') == source_hash('a', 'b')
+    assert source_hash('a', 'b') != source_hash('ab', '')
@@ -0,0 +1,89 @@
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip('duckdb')
+pytest.importorskip('tqdm')
+
+import create_food_subset as exporter
+from conftest import dump_rows, expected_codes
+from food_filter_cache import FilterCache
+from food_overlays import build_overlays
+from food_quality import build_profile, frame_from_subset, quality_path
+from food_taxonomy import Taxonomy, taxonomy_path
+
+
+def read_subset(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_export_matches_market_filter(dump_path, work_dir):
+    conn = exporter.create_duckdb_connection()
+    assert exporter.process_market('spain', conn, dump_path)
+    products = read_subset(work_dir / exporter.MARKETS['spain']['filename'])
+    assert {p['code'] for p in products} == expected_codes('spain')
+    source = {row['code']: row for row in dump_rows()}
+    for product in products:
+        row = source[product['code']]
+        assert product['name'] == row['product_name']
+        assert product['categories'] == exporter.clean_categories(row['categories_tags'])
+        kcal = row['energy-kcal_100g']
+        assert product['nutriments']['energy_kcal'] == (float(kcal) if kcal else None)
+
+
+def test_filter_cache_is_deterministic(dump_path, work_dir):
+    subset = work_dir / exporter.MARKETS['spain']['filename']
+    conn = exporter.create_duckdb_connection()
+    assert exporter.process_market('spain', conn, dump_path)
+    direct = subset.read_bytes()
+
+    outputs = []
+    for build in range(2):
+        cache = FilterCache(conn, dump_path, exporter.csv_source_sql(dump_path), exporter.staging_columns(),
+                            cache_dir=work_dir / f"cache{build}")
+        assert exporter.process_market('spain', conn, dump_path, filter_cache=cache)
+        outputs.append(gzip.decompress(subset.read_bytes()))
+    assert outputs[0] == outputs[1]
+    assert sorted(outputs[0].splitlines()) == sorted(gzip.decompress(direct).splitlines())
+
+
+def test_shared_taxonomy_ids_agree_across_markets(dump_path, work_dir):
+    conn = exporter.create_duckdb_connection()
+    taxonomy = exporter.build_shared_taxonomy(conn, dump_path)
+    assert Taxonomy.load(taxonomy_path(work_dir)).tags == taxonomy.tags
+
+    source = {row['code']: row for row in dump_rows()}
+    tags_by_code = {}
+    for market in ('spain', 'usa'):
+        assert exporter.process_market(market, conn, dump_path, taxonomy=True, shared_taxonomy=taxonomy)
+        for product in read_subset(work_dir / exporter.MARKETS[market]['filename']):
+            tags = [taxonomy.tags[i] for i in product['category_ids']]
+            assert tags_by_code.setdefault(product['code'], tags) == tags
+            assert set(tags) <= set(source[product['code']]['categories_tags'].split(','))
+            assert tags
+
+    # Con taxonomias por mercado los ids diferian y el mismo codigo daba conflicto
+    subsets = {market: work_dir / exporter.MARKETS[market]['filename'] for market in ('spain', 'usa')}
+    manifest = json.loads(build_overlays(subsets, work_dir / 'overlays').read_text(encoding='utf-8'))
+    assert manifest['conflicts'] == 0
+    assert manifest['base']['products'] > 0
+
+
+def test_quality_profile_matches_exported_subset(dump_path, work_dir):
+    conn = exporter.create_duckdb_connection()
+    assert exporter.process_market('spain', conn, dump_path, quality=True)
+    from_rows = json.loads(quality_path(work_dir, 'spain').read_text(encoding='utf-8'))
+    from_subset = build_profile(frame_from_subset(work_dir / exporter.MARKETS['spain']['filename']), 'spain')
+    for key in ('rows', 'coverage', 'nutriscore', 'brands', 'nutriments', 'outliers'):
+        assert from_rows[key] == from_subset[key], key
+
+
+def test_taxonomy_flag_builds_the_taxonomy_when_none_is_shared(dump_path, work_dir):
+    conn = exporter.create_duckdb_connection()
+    assert exporter.process_market('spain', conn, dump_path, taxonomy=True)
+    taxonomy = Taxonomy.load(taxonomy_path(work_dir))
+    products = read_subset(work_dir / exporter.MARKETS['spain']['filename'])
+    assert all(product['category_ids'] for product in products)
+    assert all(i < len(taxonomy.tags) for product in products for i in product['category_ids'])
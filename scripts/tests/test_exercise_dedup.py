@@ -0,0 +1,33 @@
+from exercise_dedup import (alias_map, canonical_name, find_duplicates, jaccard, shingles,
+                            synthetic_with_duplicates, tokens_aligned)
+
+
+def test_canonical_name_folds_variants():
+    assert canonical_name('Elevación  LATERAL con mancuernas') == canonical_name('elevacion lateral con mancuerna')
+    assert jaccard(shingles('press'), shingles('press')) == 1.0
+    assert not tokens_aligned(canonical_name('Press inclinado'), canonical_name('Press declinado'))
+
+
+def test_accent_and_plural_variants_cluster():
+    exercises = [
+        {'id': 100, 'nombre': 'Press inclinado con mancuernas'},
+        {'id': 101, 'nombre': 'Press declinado con mancuernas'},
+        {'id': 102, 'nombre': 'PRESS INCLINADO CON MANCUERNA'},
+        {'id': 103, 'nombre': 'Jalón al pecho'},
+        {'id': 104, 'nombre': 'jalon al pecho'},
+        {'id': 105, 'nombre': 'Sentadilla'},
+    ]
+    clusters, stats = find_duplicates(exercises)
+    assert alias_map(clusters) == {'102': 100, '104': 103}
+    assert stats['clusters'] == 2
+
+
+def test_synthetic_recall():
+    exercises, injected = synthetic_with_duplicates(2000, dup_rate=0.05)
+    clusters, _ = find_duplicates(exercises)
+    found = sum(len(cluster['aliases']) for cluster in clusters)
+    # Cada variante inyectada cae en el cluster de su original
+    assert found >= injected * 0.95
+    by_id = {e['id']: e['nombre'] for e in exercises}
+    for alias, canonical in alias_map(clusters).items():
+        assert tokens_aligned(canonical_name(by_id[int(alias)]), canonical_name(by_id[canonical]))
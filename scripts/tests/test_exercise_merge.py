@@ -0,0 +1,76 @@
+import json
+
+from conftest import exercise_catalog
+from exercise_merge import EXERCISES_FILE, LEDGER_FILE, IdLedger, load_json, merge_exercises, run_merge
+
+
+def write_catalog(data_dir, catalog):
+    (data_dir / EXERCISES_FILE).write_text(json.dumps(catalog, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def test_merge_adds_updates_and_keeps_ids():
+    catalog = exercise_catalog()
+    ledger = IdLedger()
+    assert ledger.seed(catalog) == []
+    incoming = [
+        {'nombre': 'Press banca', 'grupoMuscular': 'Pecho', 'equipo': 'barra', 'descripcion': ''},
+        {'nombre': 'Jalón al pecho', 'grupoMuscular': 'Espalda', 'nivel': 'intermedio'},
+        {'nombre': 'Hip thrust', 'grupoMuscular': 'Gluteos', 'id': 5},
+        {'nombre': 'Sin grupo'},
+    ]
+    catalog, report = merge_exercises(catalog, incoming, ledger)
+    assert report['unchanged'] == 1
+    assert [(e['id'], list(e['changes'])) for e in report['updated']] == [(105, ['nivel'])]
+    assert report['added'] == [{'id': 110, 'nombre': 'Hip thrust'}]
+    assert len(report['skipped']) == 1
+    added = catalog[-1]
+    assert added['muscles'] == ['Gluteos'] and added['musculosSecundarios'] == []
+
+
+def test_removed_ids_are_not_reused():
+    catalog = exercise_catalog()
+    ledger = IdLedger()
+    ledger.seed(catalog)
+    del catalog[-1]
+    data = ledger.to_json()
+    restored = IdLedger(data['ids'], data['nextId'])
+    _, report = merge_exercises(catalog, [{'nombre': 'Plancha', 'grupoMuscular': 'Core'},
+                                          {'nombre': 'Nuevo', 'grupoMuscular': 'Core'}], restored)
+    # Un ejercicio que vuelve recupera su id; uno nuevo no reutiliza ninguno
+    assert [e['id'] for e in report['added']] == [109, 110]
+
+
+def test_run_merge_is_idempotent(tmp_path, capsys):
+    write_catalog(tmp_path, exercise_catalog())
+    incoming = [{'nombre': 'Hip thrust', 'grupoMuscular': 'Gluteos'}]
+    first = run_merge(tmp_path, incoming, descriptions={'plancha': 'Isometrico'})
+    assert len(first['added']) == 1 and first['descriptions_filled'] == 1
+    catalog_text = (tmp_path / EXERCISES_FILE).read_text(encoding='utf-8')
+    ledger = load_json(tmp_path / LEDGER_FILE)
+    assert ledger['ids']['hip thrust'] == 110 and ledger['nextId'] == 111
+
+    second = run_merge(tmp_path, incoming, descriptions={'plancha': 'Isometrico'})
+    assert second['added'] == [] and second['unchanged'] == 1
+    assert (tmp_path / EXERCISES_FILE).read_text(encoding='utf-8') == catalog_text
+    assert 'Sin cambios en' in capsys.readouterr().out
+
+
+def test_ledger_resolves_aliases():
+    ledger = IdLedger({'press banca': 100}, aliases={'101': 100, '102': 101})
+    assert ledger.resolve(102) == 100
+    assert ledger.seed([{'id': 102, 'nombre': 'Press banca'}]) == []
+    assert ledger.seed([{'id': 103, 'nombre': 'Press banca'}]) != []
+
+
+def test_run_merge_backfills_structure_of_existing_exercises(tmp_path, capsys):
+    catalog = exercise_catalog()
+    del catalog[0]['muscles']
+    catalog[1]['muscles'] = []
+    del catalog[2]['musculosSecundarios']
+    write_catalog(tmp_path, catalog)
+    report = run_merge(tmp_path, [])
+    assert report['structure_completed'] == 3
+    saved = load_json(tmp_path / EXERCISES_FILE)
+    assert saved[0]['muscles'] == ['Pecho'] and saved[1]['muscles'] == ['Pecho']
+    assert saved[2]['musculosSecundarios'] == []
+    assert run_merge(tmp_path, [])['structure_completed'] == 0
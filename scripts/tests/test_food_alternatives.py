@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import food_alternatives
+from conftest import write_subset
+from food_alternatives import (
+    NO_ROW, NUTRISCORE_RANK, AlternativesIndex, build_index, compute_alternatives,
+)
+from food_projection import project_product
+
+
+def random_block(size, seed=3):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(size, len(food_alternatives.FIELDS))).astype(np.float32)
+    grades = rng.integers(-1, 5, size=size).astype(np.int8)
+    return vectors, grades, ['milks'] * size, np.ones(size, dtype=bool)
+
+
+def test_alternatives_are_better_products_of_the_same_category(subset_path, products):
+    index = AlternativesIndex(build_index(subset_path))
+    linked = 0
+    for row, product in enumerate(products):
+        alternatives = index.alternatives(row)
+        similarities = [s for _, s in alternatives]
+        assert similarities == sorted(similarities, reverse=True)
+        for other, similarity in alternatives:
+            linked += 1
+            assert other != row and 0 < similarity <= 1
+            assert products[other]['categories'][-1] == product['categories'][-1]
+            assert NUTRISCORE_RANK[products[other]['nutriscore']] < NUTRISCORE_RANK[product['nutriscore']]
+    assert linked > 0
+
+
+def test_chunking_does_not_change_neighbours(monkeypatch):
+    vectors, grades, categories, valid = random_block(300)
+    for exact in (True, False):
+        monkeypatch.setattr(food_alternatives, 'EXACT_BLOCK', 2000 if exact else 50)
+        whole = compute_alternatives(vectors, grades, categories, valid, exact=exact)
+        monkeypatch.setattr(food_alternatives, 'MATRIX_CELLS', 97)
+        chunked = compute_alternatives(vectors, grades, categories, valid, exact=exact)
+        monkeypatch.undo()
+        assert np.array_equal(whole[0], chunked[0])
+        assert np.allclose(whole[1], chunked[1], atol=1e-4)
+
+
+def test_approximate_recall(monkeypatch):
+    vectors, grades, categories, valid = random_block(1500)
+    exact_rows, _, _ = compute_alternatives(vectors, grades, categories, valid, exact=True)
+    monkeypatch.setattr(food_alternatives, 'EXACT_BLOCK', 100)
+    approx_rows, _, stats = compute_alternatives(vectors, grades, categories, valid)
+    assert stats['approximate_blocks'] == 1
+    hits = total = 0
+    for exact, approx in zip(exact_rows, approx_rows):
+        expected = set(exact[exact != NO_ROW].tolist())
+        hits += len(expected & set(approx.tolist()))
+        total += len(expected)
+    assert hits / total > 0.7
+
+
+def test_subset_without_categories_is_rejected(tmp_path, products):
+    # Perfil minimal: sin 'categories' todos los productos caerian en un bloque vacio
+    subset = write_subset(tmp_path / 'spain_subset.jsonl.gz', [project_product(p, 'minimal') for p in products])
+    with pytest.raises(ValueError, match='categories'):
+        build_index(subset)
+
+
+def test_exporter_rejects_alternatives_with_minimal_profile(capsys):
+    import create_food_subset as exporter
+    with pytest.raises(SystemExit):
+        exporter.main(['spain', '--alternatives', '--profile', 'minimal'])
+    assert "--alternatives necesita el campo 'categories'" in capsys.readouterr().err
@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+
+pytest.importorskip('duckdb')
+
+from conftest import dump_rows, write_dump
+from food_archive import DumpArchive
+
+
+def snapshot_dump(tmp_path, name, kcal_delta=0.0):
+    rows = dump_rows(60)
+    for row in rows:
+        if row['energy-kcal_100g']:
+            row['energy-kcal_100g'] = f"{float(row['energy-kcal_100g']) + kcal_delta:.1f}"
+    return write_dump(tmp_path / name, rows), rows
+
+
+def test_as_of_history_and_changes(tmp_path):
+    archive = DumpArchive(tmp_path / 'archive')
+    first, rows = snapshot_dump(tmp_path, 'a.csv.gz')
+    second, _ = snapshot_dump(tmp_path, 'b.csv.gz', kcal_delta=10)
+    archive.add_snapshot(first, date(2026, 1, 10))
+    archive.add_snapshot(second, date(2026, 2, 10))
+    assert archive.add_snapshot(second, date(2026, 2, 10))['source']['file'] == 'b.csv.gz'
+    assert [s['date'] for s in archive.snapshots()] == ['2026-01-10', '2026-02-10']
+    assert archive.snapshots()[0]['rows'] == len(rows)
+
+    row = next(r for r in rows if r['energy-kcal_100g'])
+    kcal = float(row['energy-kcal_100g'])
+    assert archive.as_of(date(2026, 1, 31), [row['code']], ['energy_kcal']) == \
+        [{'code': row['code'], 'energy_kcal': kcal, 'snapshot': '2026-01-10'}]
+    assert archive.as_of(date(2026, 1, 1), [row['code']]) == []
+    history = archive.history(row['code'], ['energy_kcal'])
+    assert [h['energy_kcal'] for h in history] == [kcal, pytest.approx(kcal + 10)]
+    assert len(archive.changes(row['code'], ['nutriscore_grade'])) == 1
+    with pytest.raises(ValueError):
+        archive.as_of(date(2026, 3, 1), [row['code']], ['no_archivada'])
+
+    # Reabrir desde el manifest
+    assert [s['date'] for s in DumpArchive(tmp_path / 'archive').snapshots()] == ['2026-01-10', '2026-02-10']
+
+
+def test_add_snapshot_applies_requested_retention(tmp_path):
+    archive = DumpArchive(tmp_path / 'archive')
+    dump, _ = snapshot_dump(tmp_path, 'a.csv.gz')
+    for day in (1, 2, 3):
+        archive.add_snapshot(dump, date(2026, 3, day), keep_recent=2, keep_monthly=0)
+    assert [s['date'] for s in archive.snapshots()] == ['2026-03-02', '2026-03-03']
+    assert not (tmp_path / 'archive' / 'snapshot=2026-03-01').exists()
+    archive.add_snapshot(dump, date(2026, 4, 1), keep_recent=1, keep_monthly=2)
+    assert [s['date'] for s in archive.snapshots()] == ['2026-03-02', '2026-04-01']
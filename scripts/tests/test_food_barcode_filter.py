@@ -0,0 +1,55 @@
+import pytest
+
+from conftest import dump_rows
+from food_barcode_filter import (
+    FNV_BASES, BarcodeFilter, bloom_parameters, build_filter, fnv1a32, fnv1a32_many, normalize_code,
+    random_probes,
+)
+
+
+def test_fnv_vectors_match_scalar_reference():
+    # Vectores publicados de FNV-1a 32
+    assert fnv1a32(b'') == 0x811C9DC5
+    assert fnv1a32(b'a') == 0xE40C292C
+    assert fnv1a32(b'foobar') == 0xBF9CF968
+    codes = ['8410376040452', 'a', '', 'ñandú', '123456789012345678']
+    hashes = fnv1a32_many(codes)
+    assert hashes.shape == (len(codes), 2)
+    for row, code in enumerate(codes):
+        assert [int(h) for h in hashes[row]] == [fnv1a32(code.encode('utf-8'), base) for base in FNV_BASES]
+
+
+def test_normalize_code():
+    assert normalize_code(' 0008410376040452 ') == '8410376040452'
+    assert normalize_code('000') == '0'
+    assert normalize_code(' ABC-01 ') == 'ABC-01'
+
+
+def test_no_false_negatives_and_bounded_fpr(tmp_path):
+    codes = [normalize_code(row['code']) for row in dump_rows(2000)]
+    bloom = BarcodeFilter.for_capacity(len(codes), 0.01)
+    assert bloom.bits == bloom_parameters(len(codes), 0.01)['bits']
+    bloom.add_many(codes)
+    assert bloom.contains_many(codes).all()
+    assert '0' + codes[0] in bloom
+    assert bloom.contains_many(random_probes(20_000)).mean() < 0.03
+
+    bloom.save(tmp_path / 'barcodes')
+    loaded = BarcodeFilter.load(tmp_path / 'barcodes')
+    assert (loaded.bits, loaded.hashes, loaded.count) == (bloom.bits, bloom.hashes, len(codes))
+    assert loaded.contains_many(codes).all()
+
+
+def test_load_rejects_other_hash_scheme(tmp_path):
+    bloom = BarcodeFilter.for_capacity(100, 0.01)
+    bloom.save(tmp_path / 'barcodes', meta={'hash': 'blake2b-double'})
+    with pytest.raises(ValueError):
+        BarcodeFilter.load(tmp_path / 'barcodes')
+
+
+def test_build_filter_from_dump(dump_path, tmp_path):
+    pytest.importorskip('duckdb')
+    base = build_filter(dump_path, tmp_path / 'barcodes', capacity=1000)
+    bloom = BarcodeFilter.load(base)
+    assert bloom.count == len(dump_rows())
+    assert all(row['code'] in bloom for row in dump_rows())
@@ -0,0 +1,74 @@
+from conftest import write_subset
+from food_facets import FacetDictionary, facet_key, facet_report, split_brands
+
+MARKET_BRANDS = {
+    'spain': ['Coca-Cola', 'Coca-Cola', 'Hacendado, Mercadona', 'Danone S.A.'],
+    'usa': ['Coca Cola', 'COCA COLA', 'COCA COLA', 'COCA COLA', 'Danone'],
+}
+
+
+def build(path, order):
+    for market in order:
+        facets = FacetDictionary.load(path)
+        for brands in MARKET_BRANDS[market]:
+            facets.brand_ids(brands)
+        facets.finish_market(market)
+        facets.save(path)
+    return FacetDictionary.load(path)
+
+
+def names(facets):
+    return {key: entry['name'] for key, entry in facets.entries['brands'].items()}
+
+
+def test_split_brands_normalizes_and_deduplicates():
+    assert facet_key(' Coca-Cola ') == 'cocacola'
+    assert split_brands('Coca-Cola, coca cola,  Fanta ') == [('cocacola', 'Coca-Cola'), ('fanta', 'Fanta')]
+    assert split_brands(None) == [] and split_brands(' , ') == []
+
+
+def test_ids_are_stable_across_builds(tmp_path):
+    path = tmp_path / 'food_facets.json'
+    first = build(path, ['spain', 'usa'])
+    ids = {key: entry['id'] for key, entry in first.entries['brands'].items()}
+    again = build(path, ['usa', 'spain'])
+    assert {key: entry['id'] for key, entry in again.entries['brands'].items()} == ids
+    facets = FacetDictionary.load(path)
+    assert facets.brand_ids('Marca Nueva') == [max(ids.values()) + 1]
+    assert facets.brand_ids('coca-cola') == [ids['cocacola']]
+
+
+def test_names_do_not_depend_on_build_order(tmp_path):
+    forward = build(tmp_path / 'a.json', ['spain', 'usa'])
+    backward = build(tmp_path / 'b.json', ['usa', 'spain'])
+    assert names(forward) == names(backward)
+    # 3 'COCA COLA' en USA frente a 2 'Coca-Cola' en España
+    assert names(forward)['cocacola'] == 'COCA COLA'
+    assert forward.entries['brands']['cocacola']['counts'] == {'spain': 2, 'usa': 4}
+
+
+def test_rebuilding_a_market_replaces_its_counts(tmp_path):
+    path = tmp_path / 'food_facets.json'
+    build(path, ['spain', 'usa'])
+    facets = FacetDictionary.load(path)
+    facets.brand_ids('Coca-Cola')
+    facets.finish_market('usa')
+    entry = facets.entries['brands']['cocacola']
+    assert entry['counts'] == {'spain': 2, 'usa': 1}
+    assert entry['name'] == 'Coca-Cola'
+    assert 'usa' not in facets.entries['brands']['hacendado']['counts']
+
+
+def test_report_without_dictionary_recomputes_brand_ids(tmp_path, products, capsys):
+    # ids de otro diccionario: sin food_facets.json no significan nada
+    tagged = [dict(product, brand_ids=[1000 + i % 3]) for i, product in enumerate(products)]
+    subset = write_subset(tmp_path / 'spain_subset.jsonl.gz', tagged)
+    facet_report(subset, tmp_path / 'food_facets.json')
+    out = capsys.readouterr().out
+    assert 'se recalculan los brand_ids' in out
+    rows = [line.split() for line in out.splitlines() if line.strip().endswith(tuple('0123456789'))
+            and 'ms' in line and '->' not in line]
+    assert rows
+    for row in rows:
+        # Con estas marcas LIKE agrupa lo mismo que el id
+        assert row[-1] == row[-2]
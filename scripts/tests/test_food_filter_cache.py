@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('duckdb')
+
+import create_food_subset as exporter
+from food_filter_cache import MANIFEST_FILENAME, FilterCache
+
+
+def make_cache(conn, dump_path, cache_dir, max_bytes=1 << 30):
+    return FilterCache(conn, dump_path, exporter.csv_source_sql(dump_path), exporter.staging_columns(),
+                       cache_dir=cache_dir, max_bytes=max_bytes)
+
+
+def test_groups_are_reused_and_match_the_filter(dump_path, tmp_path, capsys):
+    conn = exporter.create_duckdb_connection()
+    groups = exporter.build_group_predicates('spain')
+    first = make_cache(conn, dump_path, tmp_path / 'cache').fetch_candidates(groups, ['code'])
+    assert 'MISS' in capsys.readouterr().out
+    again = make_cache(conn, dump_path, tmp_path / 'cache').fetch_candidates(groups, ['code'])
+    output = capsys.readouterr().out
+    assert 'MISS' not in output and 'Staging: HIT' in output
+    assert first['code'].tolist() == again['code'].tolist() == sorted(first['code'].tolist())
+    direct = conn.execute(f"""
+        SELECT code FROM {exporter.csv_source_sql(dump_path)} WHERE {exporter.build_filter_query('spain')}
+    """).fetchdf()
+    assert sorted(first['code'].astype(str)) == sorted(direct['code'].astype(str))
+
+
+def test_eviction_keeps_entries_in_use(dump_path, tmp_path):
+    conn = exporter.create_duckdb_connection()
+    cache_dir = tmp_path / 'cache'
+    make_cache(conn, dump_path, cache_dir).fetch_candidates(exporter.build_group_predicates('spain'), ['code'])
+    spain_groups = {p.name for p in cache_dir.glob('group_*.parquet')}
+
+    # Limite minimo: solo sobreviven las entradas de esta consulta
+    cache = make_cache(conn, dump_path, cache_dir, max_bytes=1)
+    cache.fetch_candidates(exporter.build_group_predicates('usa'), ['code'])
+    remaining = {p.name for p in cache_dir.glob('*.parquet')}
+    # Staging + 4 grupos de USA; de España solo quedan category y base (mismo predicado)
+    assert len(remaining) == 5 and any(name.startswith('staging_') for name in remaining)
+    assert {name.split('_')[1] for name in spain_groups & remaining} == {'category', 'base'}
+    assert set(cache._manifest) == remaining
+    assert (cache_dir / MANIFEST_FILENAME).exists()
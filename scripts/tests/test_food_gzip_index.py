@@ -0,0 +1,46 @@
+import gzip
+
+import pytest
+
+pytest.importorskip('indexed_gzip')
+
+import food_gzip_index
+from conftest import dump_rows, write_dump
+from food_gzip_index import DumpIndex, build_index, count_lines, parallel_map, parallel_read_rows
+
+
+@pytest.fixture(params=[64, food_gzip_index.LINE_STRIDE], ids=['stride-64', 'stride-defecto'])
+def indexed_dump(request, tmp_path, monkeypatch):
+    # Dump menor que el espaciado: sin puntos de control (DumpIndex usa auto_build)
+    monkeypatch.setattr(food_gzip_index, 'LINE_STRIDE', request.param)
+    path = write_dump(tmp_path / 'dump.csv.gz', dump_rows(1500))
+    build_index(path, spacing_mb=1)
+    with gzip.open(path, 'rb') as f:
+        lines = f.read().splitlines(keepends=True)
+    return path, lines
+
+
+def test_read_rows_matches_plain_gzip(indexed_dump):
+    path, lines = indexed_dump
+    rows = lines[1:]
+    with DumpIndex.load(path) as index:
+        assert index.rows == len(rows)
+        assert index.header == lines[0]
+        for first, count in [(0, 1), (63, 2), (64, 64), (len(rows) - 5, 50), (len(rows), 3)]:
+            assert index.read_rows(first, count) == b''.join(rows[first:first + count])
+
+
+def test_partitions_cover_every_line_once(indexed_dump):
+    path, lines = indexed_dump
+    with DumpIndex(path) as index:
+        data = b''.join(index.read_lines(start, end) for start, end in index.partitions(7))
+    assert data == b''.join(lines[1:])
+    assert sum(parallel_map(path, count_lines, workers=2, partitions=5)) == len(lines) - 1
+    assert parallel_read_rows(path, [(10, 3), (100, 2)], workers=2) == \
+        [b''.join(lines[11:14]), b''.join(lines[101:103])]
+
+
+def test_stale_index_is_ignored(indexed_dump):
+    path, _ = indexed_dump
+    write_dump(path, dump_rows(10))
+    assert DumpIndex.load(path) is None
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from food_import_sim import parse_batch, recommend, run_trial
+
+
+def test_parse_batch_mirrors_app_parser():
+    lines = [
+        json.dumps({'code': '1', 'name': '  Leche   entera ', 'nutriments': {'energy_kcal': '64,6', 'fat': 3.6}}),
+        'no es json',
+        '',
+        json.dumps({'name': None, 'nutriments': {'energy_kcal': True}}),
+    ]
+    rows = parse_batch(lines, now=100)
+    assert len(rows) == 2
+    assert rows[0][:7] == ('1', 'Leche entera', None, 65, None, None, 3.6)
+    assert rows[0][-2:] == (100, 100)
+    assert rows[1][1] == 'Sin nombre' and rows[1][3] == 0 and rows[1][0]
+
+
+@pytest.mark.parametrize('fmt', ['whole', 'stream'])
+def test_trial_imports_every_product(subset_path, products, fmt):
+    result = run_trial({'artifact': str(subset_path), 'format': fmt, 'pragmas': 'wal', 'batch_size': 50,
+                        'cpus': 0, 'memory_mb': 0, 'cpu_factor': 1})
+    assert result['status'] == 'ok'
+    assert result['products'] == len(products)
+    assert result['batches'] == 3
+
+
+def test_recommend_skips_unsafe_pragmas():
+    base = {'status': 'ok', 'peak_rss_mb': 10}
+    results = [
+        dict(base, pragmas='off', total_s=1.0, batch_p95_ms=10),
+        dict(base, pragmas='wal', total_s=2.0, batch_p95_ms=500),
+        dict(base, pragmas='default', total_s=3.0, batch_p95_ms=50),
+        {'status': 'oom', 'pragmas': 'wal-mem'},
+    ]
+    assert recommend(results, 100)['pragmas'] == 'default'
+    assert recommend(results, 1)['pragmas'] == 'wal'
+    assert recommend(results[3:], 100) is None
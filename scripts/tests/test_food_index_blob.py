@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from food_index_blob import BlobReader, BlobWriter, index_paths
+
+
+def test_round_trip_keeps_dtype_and_alignment(tmp_path, subset_path):
+    base = tmp_path / 'blob'
+    writer = BlobWriter(base, 'test', subset_path)
+    writer.add('bytes', np.arange(3), '<u1')
+    writer.add('floats', [1.5, -2.0, np.nan], '<f4')
+    writer.add('empty', [], '<u4')
+    with pytest.raises(ValueError):
+        writer.add('bytes', [1], '<u1')
+    size = writer.close({'rows': 3})
+
+    manifest_path, bin_path = index_paths(base)
+    assert bin_path.stat().st_size == size
+    reader = BlobReader(base)
+    assert reader.meta == {'rows': 3}
+    assert 'floats' in reader and 'missing' not in reader
+    assert reader.array('bytes').tolist() == [0, 1, 2]
+    assert reader.manifest['arrays']['floats']['offset'] % 8 == 0
+    floats = reader.array('floats')
+    assert floats.dtype == np.dtype('<f4')
+    assert floats[:2].tolist() == [1.5, -2.0] and np.isnan(floats[2])
+    assert reader.array('empty').size == 0
+    assert not reader.is_stale(subset_path)
+    subset_path.write_bytes(subset_path.read_bytes() + b'\n')
+    assert reader.is_stale(subset_path)
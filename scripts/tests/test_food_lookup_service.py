@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import pytest
+
+from food_lookup_service import FoodLookupService, LRUCache, MarketIndex, MAX_HEADERS, tokenize
+from food_subset_reader import SubsetReader
+
+
+@pytest.fixture
+def service(subset_path, tmp_path):
+    reader = SubsetReader(subset_path, cache_dir=tmp_path / 'cache')
+    service = FoodLookupService({'spain': MarketIndex('spain', reader)}, cache_size=8, max_concurrency=2)
+    yield service
+    service.close()
+    reader.close()
+
+
+def get(service, target):
+    status, body = service.respond(target)
+    return status, json.loads(body)
+
+
+def test_product_and_errors(service, products):
+    assert get(service, f"/product/{products[5]['code']}") == (200, products[5])
+    assert get(service, '/product/0000')[0] == 404
+    assert get(service, '/search?q=')[0] == 400
+    assert get(service, '/search?q=leche&limit=x')[0] == 400
+    assert get(service, '/filter?sort=salt&category=milks')[0] == 400
+    assert get(service, '/nada')[0] == 404
+    assert get(service, '/markets') == (200, {'spain': len(products)})
+
+
+def test_search_uses_and_of_prefixes(service, products):
+    # Terminos de una letra se ignoran, como en la app
+    status, body = get(service, '/search?q=LECH+1+10&limit=200')
+    expected = [p for p in products
+                if any(t.startswith('lech') for t in tokenize(p['name']))
+                and any(t.startswith('10') for t in tokenize(p['name']))]
+    assert status == 200 and body['results'] == expected and expected
+
+
+def test_filter_matches_full_scan(service, products):
+    status, body = get(service, '/filter?min_proteins=10&max_fat=20&category=milks&sort=-energy_kcal&limit=200')
+    expected = [p for p in products
+                if p['nutriments']['proteins'] >= 10 and p['nutriments']['fat'] <= 20 and 'milks' in p['categories']]
+    expected.sort(key=lambda p: p['nutriments']['energy_kcal'], reverse=True)
+    assert status == 200 and body['results'] == expected
+
+
+def test_cache_serves_repeats_only_for_successes(service, products):
+    target = f"/product/{products[0]['code']}"
+    service.respond(target)
+    service.respond(target)
+    service.respond('/product/0000')
+    service.respond('/product/0000')
+    assert (service.cache.hits, len(service.cache)) == (1, 1)
+
+
+def test_lru_evicts_oldest():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert (cache.get('b'), cache.get('a'), cache.get('c')) == (None, 1, 3)
+
+
+async def exchange(service, payload: bytes) -> bytes:
+    server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(payload)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_http_status_lines(service, products):
+    ok = asyncio.run(exchange(service, f"GET /product/{products[1]['code']} HTTP/1.0\r\n\r\n".encode()))
+    assert ok.startswith(b'HTTP/1.1 200 OK') and json.loads(ok.split(b'\r\n\r\n', 1)[1]) == products[1]
+    long_line = asyncio.run(exchange(service, b'GET /' + b'x' * 70_000 + b' HTTP/1.1\r\n\r\n'))
+    assert long_line.startswith(b'HTTP/1.1 414')
+    headers = b''.join(b'X-H%d: 1\r\n' % i for i in range(MAX_HEADERS + 1))
+    too_many = asyncio.run(exchange(service, b'GET /health HTTP/1.1\r\n' + headers + b'\r\n'))
+    assert too_many.startswith(b'HTTP/1.1 431')
+    post = asyncio.run(exchange(service, b'POST /health HTTP/1.0\r\n\r\n'))
+    assert post.startswith(b'HTTP/1.1 405')
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import food_nutrient_index
+from food_nutrient_index import NutrientIndex, build_index, parse_conditions
+
+
+@pytest.fixture
+def index(subset_path, monkeypatch):
+    monkeypatch.setattr(food_nutrient_index, 'MIN_CATEGORY_PRODUCTS', 10)
+    return NutrientIndex(build_index(subset_path))
+
+
+def brute_force(index, ranges, category=None):
+    mask = np.ones(index.rows, dtype=bool)
+    for metric, (lo, hi) in ranges.items():
+        column = index.column(metric)
+        mask &= (column >= np.float32(lo)) & (column <= np.float32(hi))
+    if category:
+        rows = np.zeros(index.rows, dtype=bool)
+        rows[index.reader.array(f"cat/{index.categories[category]}/rows")] = True
+        mask &= rows
+    return np.flatnonzero(mask)
+
+
+def test_range_query_matches_full_scan(index, products):
+    assert index.rows == len(products)
+    assert np.allclose(index.column('proteins'), [p['nutriments']['proteins'] for p in products])
+    ranges = parse_conditions('proteins>=10,energy_kcal<300')
+    assert ranges['energy_kcal'][1] < 300
+    assert index.query(ranges).tolist() == brute_force(index, ranges).tolist()
+    assert 'milks' in index.categories
+    assert index.query(ranges, category='milks').tolist() == brute_force(index, ranges, 'milks').tolist()
+    # Los bitmaps son un superconjunto del resultado exacto
+    assert set(index.query(ranges).tolist()) <= set(index.bitmap_candidates(ranges).tolist())
+
+
+def test_bitmap_candidates_without_ranges_is_every_row(index):
+    candidates = index.bitmap_candidates({})
+    assert candidates.dtype == np.uint32
+    assert candidates.tolist() == index.query({}).tolist() == list(range(index.rows))
+
+
+@pytest.mark.parametrize('k', [None, 5])
+@pytest.mark.parametrize('ranges', [{}, {'fat': (5.0, 40.0)}])
+def test_sorted_query_with_and_without_k(index, ranges, k):
+    rows = index.query(ranges, sort='proteins', k=k)
+    keys = index.column('proteins')[rows]
+    assert keys.tolist() == sorted(keys.tolist(), reverse=True)
+    expected = brute_force(index, ranges)
+    assert len(rows) == (k or len(expected))
+    if k is None:
+        assert sorted(rows.tolist()) == expected.tolist()
+    ascending = index.column('proteins')[index.query(ranges, sort='proteins', k=k, descending=False)].tolist()
+    assert ascending == sorted(ascending)
+    if k is None:
+        assert ascending == sorted(keys.tolist())
+
+
+def test_invalid_condition_and_category(index):
+    with pytest.raises(ValueError):
+        parse_conditions('salt>1')
+    with pytest.raises(KeyError):
+        index.query({}, category='no-existe')
@@ -0,0 +1,50 @@
+import gzip
+import json
+
+from conftest import write_subset
+from food_overlays import BASE_FILENAME, build_overlays, overlay_filename
+
+
+def read_lines(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [line for line in f if line.strip()]
+
+
+def build(tmp_path, products, name='overlays'):
+    subsets = {
+        'spain': write_subset(tmp_path / 'spain_subset.jsonl.gz', products[:80]),
+        'usa': write_subset(tmp_path / 'usa_subset.jsonl.gz', products[40:]),
+    }
+    manifest_path = build_overlays(subsets, tmp_path / name)
+    return subsets, json.loads(manifest_path.read_text(encoding='utf-8'))
+
+
+def test_base_plus_overlay_rebuilds_each_market(tmp_path, products):
+    subsets, manifest = build(tmp_path, products)
+    output_dir = tmp_path / 'overlays'
+    base = read_lines(output_dir / BASE_FILENAME)
+    assert len(base) == 40
+    assert manifest['conflicts'] == 0
+    for market, subset_path in subsets.items():
+        overlay = read_lines(output_dir / overlay_filename(market))
+        assert sorted(base + overlay) == sorted(read_lines(subset_path))
+        assert manifest['markets'][market]['products'] == len(base) + len(overlay)
+    assert manifest['switch']['spain->usa'] == {'remove': 40, 'add': 40, 'full_reload': 80}
+
+
+def test_rebuild_is_byte_identical(tmp_path, products):
+    _, first = build(tmp_path, products, 'first')
+    _, second = build(tmp_path, products, 'second')
+    assert first['base']['sha256'] == second['base']['sha256']
+    assert first['overlays'] == second['overlays']
+
+
+def test_differing_records_are_reported(tmp_path, products):
+    changed = [dict(p) for p in products]
+    changed[50]['name'] = 'otro nombre'
+    subsets = {
+        'spain': write_subset(tmp_path / 'spain_subset.jsonl.gz', products[:80]),
+        'usa': write_subset(tmp_path / 'usa_subset.jsonl.gz', changed[40:]),
+    }
+    manifest = json.loads(build_overlays(subsets, tmp_path / 'overlays').read_text(encoding='utf-8'))
+    assert manifest['conflicts'] == 1
@@ -0,0 +1,46 @@
+import json
+
+from food_projection import dumps_product, field_byte_report, project_product
+
+PRODUCT = {
+    'code': '8410000000001',
+    'name': 'Leche',
+    'brands': None,
+    'generic_name': None,
+    'nutriscore': 'a',
+    'nutriments': {'energy_kcal': 46.04, 'proteins': 3.0, 'carbohydrates': None, 'fat': 1.55,
+                   'fiber': None, 'sugars': 4.7},
+    'categories': [],
+    'category_ids': [3, 7],
+}
+
+
+def test_full_profile_is_identity():
+    assert project_product(PRODUCT, 'full') == PRODUCT
+    assert json.loads(dumps_product(PRODUCT)) == PRODUCT
+    assert dumps_product(PRODUCT).startswith('{"code": "8410000000001"')
+
+
+def test_app_default_drops_nulls_and_rounds():
+    projected = project_product(PRODUCT, 'app-default')
+    assert projected == {
+        'code': '8410000000001', 'name': 'Leche', 'nutriscore': 'a',
+        'nutriments': {'energy_kcal': 46, 'proteins': 3, 'fat': 1.6, 'sugars': 4.7},
+        'category_ids': [3, 7],
+    }
+    assert list(projected)[0] == 'code'
+
+
+def test_minimal_keeps_only_macros():
+    assert project_product(PRODUCT, 'minimal')['nutriments'] == {'energy_kcal': 46, 'proteins': 3, 'fat': 1.6}
+
+
+def test_field_report_totals(products):
+    report = field_byte_report(products)
+    total = report[-1]
+    assert total['field'] == 'TOTAL'
+    raw = sum(len(dumps_product(p).encode('utf-8')) + 1 for p in products) / len(products)
+    assert total['raw_bytes_per_record'] == raw
+    fields = {row['field'] for row in report}
+    assert {'code', 'nutriments', 'nutriments.energy_kcal'} <= fields
+    assert field_byte_report([]) == []
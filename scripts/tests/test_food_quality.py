@@ -0,0 +1,63 @@
+import copy
+import json
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from conftest import subset_products, write_subset
+from food_quality import (
+    build_profile, category_outliers, diff_profiles, frame_from_subset, quality_path, write_profile,
+)
+
+
+def profile_of(tmp_path, products, name='spain_subset.jsonl.gz'):
+    return build_profile(frame_from_subset(write_subset(tmp_path / name, products)), 'spain')
+
+
+def test_profile_counts(tmp_path, products):
+    products[0]['nutriments']['fiber'] = None
+    products[1]['brands'] = None
+    profile = profile_of(tmp_path, products)
+    assert profile['rows'] == len(products)
+    assert profile['coverage']['fiber'] == round(100 * (len(products) - 1) / len(products), 2)
+    assert profile['coverage']['brands'] == profile['coverage']['fiber']
+    assert profile['coverage']['generic_name'] == 0.0
+    assert sum(profile['nutriscore'].values()) == len(products)
+    assert profile['brands']['top']['hacendado'] == sum(1 for p in products if (p['brands'] or '').lower() == 'hacendado')
+
+
+def test_physical_and_category_outliers(tmp_path):
+    products = subset_products(300)
+    products[4]['nutriments']['energy_kcal'] = 2500.0
+    frame = frame_from_subset(write_subset(tmp_path / 'spain_subset.jsonl.gz', products))
+    outliers = category_outliers(frame)
+    assert outliers['physical']['energy_kcal'] == 1
+    assert outliers['physical_examples']['energy_kcal'] == [products[4]['code']]
+    assert products[4]['categories'][-1] in outliers['by_category']
+
+
+def test_diff_flags_regressions(tmp_path, products):
+    before = profile_of(tmp_path, products, 'a.jsonl.gz')
+    assert diff_profiles(before, before)['regressions'] == []
+
+    worse = copy.deepcopy(products[:100])
+    for product in worse:
+        product['nutriments']['energy_kcal'] *= 4.184      # kJ en lugar de kcal
+    for product in worse[:10]:
+        product['nutriments']['proteins'] = None
+    diff = diff_profiles(before, profile_of(tmp_path, worse, 'b.jsonl.gz'))
+    regressions = ' | '.join(diff['regressions'])
+    assert 'productos' in regressions
+    assert 'mediana de energy_kcal' in regressions
+    assert 'cobertura de proteins' in regressions
+    assert diff['rows'] == -20
+
+
+def test_write_profile_keeps_previous(tmp_path, products):
+    path = quality_path(tmp_path, 'spain')
+    write_profile(profile_of(tmp_path, products), path)
+    assert 'diff' not in json.loads(path.read_text(encoding='utf-8'))
+    write_profile(profile_of(tmp_path, products[:50]), path)
+    assert (tmp_path / 'spain_quality.prev.json').exists()
+    assert json.loads(path.read_text(encoding='utf-8'))['diff']['rows'] == -70
@@ -0,0 +1,31 @@
+import pytest
+
+from food_search_bench import (
+    build_database, load_products, ndcg, query_terms, reciprocal_rank, relevance_grades, search,
+)
+
+
+def test_search_follows_app_fallbacks(subset_path):
+    products = load_products(subset_path)
+    conn, stats = build_database(products, 'unicode61')
+    assert stats['db_bytes'] > 0
+    ids, step = search(conn, 'Leche', 'unicode61', limit=500)
+    assert step == 'and'
+    assert set(ids) == {p['id'] for p in products if p['name'].startswith('leche ')}
+    # Sin resultados con AND: se reintenta con OR
+    ids, step = search(conn, 'leche inexistente', 'unicode61', limit=500)
+    assert step == 'or' and ids
+    assert search(conn, 'x', 'unicode61') == ([], 'none')
+    assert query_terms('"café"-con*leche', 'trigram') == ['café', 'con', 'leche']
+
+
+def test_grades_and_metrics(subset_path):
+    products = load_products(subset_path)
+    grades = relevance_grades(products, {'terms': ['leche'], 'categories': ['skimmed-milks']})
+    assert set(grades.values()) == {2}
+    assert set(grades) == {p['id'] for p in products if p['name'].startswith('leche ')}
+    ideal = sorted(grades, key=grades.get, reverse=True)
+    assert ndcg(ideal, grades) == pytest.approx(1.0)
+    assert ndcg(['otro'] + ideal, grades) < 1.0
+    assert ndcg(ideal, {}) is None
+    assert reciprocal_rank(['otro', ideal[0]], grades) == 0.5
@@ -0,0 +1,39 @@
+import asyncio
+
+from food_lookup_service import FoodLookupService, MarketIndex
+from food_service_loadtest import DEFAULT_MIX, build_targets, run_load
+from food_subset_reader import SubsetReader
+
+
+def test_targets_are_reproducible_and_mixed(subset_path):
+    targets = build_targets(subset_path, 'spain', 300, DEFAULT_MIX, seed=1)
+    assert targets == build_targets(subset_path, 'spain', 300, DEFAULT_MIX, seed=1)
+    kinds = {target.split('?')[0].split('/')[1] for target in targets}
+    assert kinds == {'product', 'search', 'filter'}
+    # El calentamiento usa otra semilla: no precarga en cache las peticiones medidas
+    warmup = build_targets(subset_path, 'spain', 300, DEFAULT_MIX, seed=2)
+    assert warmup[:50] != targets[:50]
+
+
+def test_run_load_against_local_service(subset_path, tmp_path):
+    targets = build_targets(subset_path, 'spain', 200, DEFAULT_MIX, seed=3)
+    reader = SubsetReader(subset_path, cache_dir=tmp_path / 'cache')
+    service = FoodLookupService({'spain': MarketIndex('spain', reader)}, max_concurrency=4)
+
+    async def scenario():
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await run_load(f"http://127.0.0.1:{port}", targets, concurrency=8)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    try:
+        stats = asyncio.run(scenario())
+    finally:
+        service.close()
+        reader.close()
+    assert stats['requests'] == len(targets)
+    assert stats['errors'] == 0
+    assert service.requests_served == len(targets)
@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+pytest.importorskip('duckdb')
+
+import create_food_subset as exporter
+from conftest import dump_rows, expected_codes, write_dump
+from food_filter_cache import FilterCache
+from food_subset_estimate import BLOCK_COLUMN, cluster_estimate, estimate_market, sample_csv_blocks
+
+
+def estimate(conn, dump_path, fraction, block_rows=32, staging_path=None, fixture_path=None):
+    return estimate_market(
+        conn, 'spain', exporter.MARKETS['spain'], exporter.build_filter_query('spain'), exporter.export_columns(),
+        lambda row: exporter.dumps_product(exporter.build_product(row)), dump_path, exporter.csv_source_sql,
+        staging_path=staging_path, fraction=fraction, block_rows=block_rows, fixture_path=fixture_path,
+    )
+
+
+def test_cluster_estimate():
+    assert cluster_estimate([], 10) == (0.0, 0.0)
+    assert cluster_estimate([3.0], 10) == (30.0, math.inf)
+    # Todos los bloques muestreados: sin error de muestreo
+    assert cluster_estimate([1.0, 5.0], 2) == (6.0, 0.0)
+
+
+def test_sampled_lines_carry_their_block(dump_path, tmp_path):
+    sample = tmp_path / 'sample.tsv'
+    total_rows, blocks = sample_csv_blocks(dump_path, sample, 0.5, 32, seed=1)
+    assert total_rows == len(dump_rows())
+    assert 0 < len(blocks) < math.ceil(total_rows / 32)
+    lines = sample.read_bytes().decode('utf-8').splitlines()
+    assert lines[0].startswith(f"{BLOCK_COLUMN}\tcode\t")
+    codes = {row['code']: index for index, row in enumerate(dump_rows())}
+    for line in lines[1:]:
+        block, code = line.split('\t')[:2]
+        assert codes[code] // 32 == int(block) and int(block) in blocks
+
+
+def test_indexed_sampler_writes_the_same_sample(dump_path, tmp_path):
+    pytest.importorskip('indexed_gzip')
+    from food_gzip_index import build_index
+    sequential, indexed = tmp_path / 'a.tsv', tmp_path / 'b.tsv'
+    expected = sample_csv_blocks(dump_path, sequential, 0.4, 32, seed=5)
+    build_index(dump_path)
+    assert sample_csv_blocks(dump_path, indexed, 0.4, 32, seed=5) == expected
+    assert indexed.read_bytes() == sequential.read_bytes()
+
+
+def test_full_sample_gives_exact_count(dump_path, tmp_path):
+    conn = exporter.create_duckdb_connection()
+    fixture = tmp_path / 'fixture.csv.gz'
+    result = estimate(conn, dump_path, 1.0, fixture_path=fixture)
+    assert result['count'] == (len(expected_codes('spain')), 0.0)
+    assert result['sampled_blocks'] == result['total_blocks'] == math.ceil(len(dump_rows()) / 32)
+    assert sum(result['countries'].values()) == pytest.approx(result['count'][0])
+    # El fixture es un dump valido sin la columna de bloque
+    assert conn.execute(f"SELECT COUNT(*) FROM {exporter.csv_source_sql(fixture)}").fetchone()[0] == len(dump_rows())
+
+    staging = FilterCache(conn, dump_path, exporter.csv_source_sql(dump_path), exporter.staging_columns(),
+                          cache_dir=tmp_path / 'cache').ensure_staging()
+    assert estimate(conn, dump_path, 1.0, staging_path=staging)['count'] == result['count']
+
+
+def test_empty_sample_is_an_error(tmp_path):
+    dump = write_dump(tmp_path / 'dump.csv.gz', dump_rows(10))
+    conn = exporter.create_duckdb_connection()
+    with pytest.raises(ValueError, match='sample-fraction'):
+        estimate(conn, dump, 0.0)
@@ -0,0 +1,33 @@
+from food_subset_reader import SubsetReader, cache_paths
+
+
+def test_round_trip_by_row_and_code(subset_path, tmp_path, products):
+    with SubsetReader(subset_path, cache_dir=tmp_path / 'cache') as reader:
+        assert len(reader) == len(products)
+        assert list(reader.iter_range()) == products
+        assert reader[-1] == products[-1]
+        for product in products[::7]:
+            assert reader.by_code(product['code']) == product
+        assert reader.by_code('0000000000000') is None
+
+
+def test_cache_is_reused(subset_path, tmp_path, products):
+    cache_dir = tmp_path / 'cache'
+    SubsetReader(subset_path, cache_dir=cache_dir).close()
+    index_path = cache_paths(subset_path, cache_dir)['index']
+    mtime = index_path.stat().st_mtime_ns
+    with SubsetReader(subset_path, cache_dir=cache_dir) as reader:
+        assert reader.get(3) == products[3]
+    assert index_path.stat().st_mtime_ns == mtime
+
+
+def test_iter_brand_ignores_case(subset_path, tmp_path, products):
+    expected = [p for p in products if p['brands'].lower() == 'hacendado']
+    assert {p['brands'] for p in expected} == {'Hacendado', 'HACENDADO'}
+    with SubsetReader(subset_path, cache_dir=tmp_path / 'cache') as reader:
+        assert list(reader.iter_brand('hacendado')) == expected
+        assert list(reader.iter_brand('HaCeNdAdO')) == expected
+        assert len(list(reader.iter_brand('hacendado', limit=3))) == 3
+        # Marca no ASCII: escaneo completo
+        assert [p['brands'] for p in reader.iter_brand('NESTLÉ')] == \
+            [p['brands'] for p in products if p['brands'] == 'Nestlé']
@@ -0,0 +1,49 @@
+from food_taxonomy import Taxonomy, build_taxonomy, display_name, parse_tags
+
+TAG_LISTS = (
+    ['en:dairies,en:milks,en:skimmed-milks'] * 6 +
+    ['en:dairies,en:milks'] * 4 +
+    ['en:dairies,en:cheeses'] * 5 +
+    ['en:beverages,en:sodas'] * 5 +
+    ['en:rare-tag', None, '']
+)
+
+
+def test_parents_follow_dump_order():
+    taxonomy = build_taxonomy(TAG_LISTS)
+    ids = taxonomy.ids
+    assert 'en:rare-tag' not in ids
+    assert taxonomy.parents[ids['en:dairies']] is None
+    assert taxonomy.parents[ids['en:milks']] == ids['en:dairies']
+    assert taxonomy.parents[ids['en:skimmed-milks']] == ids['en:milks']
+    assert taxonomy.parents[ids['en:sodas']] == ids['en:beverages']
+    assert taxonomy.depths[ids['en:skimmed-milks']] == 2
+    # Padres con id menor que sus hijos
+    assert all(parent is None or parent < index for index, parent in enumerate(taxonomy.parents))
+
+
+def test_descendants_closure_and_product_ids():
+    taxonomy = build_taxonomy(TAG_LISTS)
+    ids = taxonomy.ids
+    dairies = taxonomy.descendants(ids['en:dairies'])
+    assert [taxonomy.tags[i] for i in dairies] == \
+        sorted(['en:dairies', 'en:milks', 'en:skimmed-milks', 'en:cheeses'], key=ids.get)
+    ancestors, descendants, distances = taxonomy.closure()
+    pairs = set(zip(ancestors, descendants, distances))
+    assert (ids['en:dairies'], ids['en:skimmed-milks'], 2) in pairs
+    assert all((i, i, 0) in pairs for i in range(len(taxonomy)))
+    # Solo las hojas: los ancestros estan en el cierre
+    assert taxonomy.product_ids('en:dairies,en:milks,en:skimmed-milks,en:rare-tag') == [ids['en:skimmed-milks']]
+    assert taxonomy.product_ids(None) == []
+
+
+def test_save_load_round_trip(tmp_path):
+    taxonomy = build_taxonomy(TAG_LISTS)
+    loaded = Taxonomy.load(taxonomy.save(tmp_path / 'food_taxonomy.json'))
+    assert (loaded.tags, loaded.parents, loaded.counts) == (taxonomy.tags, taxonomy.parents, taxonomy.counts)
+    assert loaded.to_dict() == taxonomy.to_dict()
+
+
+def test_tag_helpers():
+    assert parse_tags('en:a, en:b,en:a,,') == ['en:a', 'en:b']
+    assert display_name('en:skimmed-milks') == 'skimmed milks'
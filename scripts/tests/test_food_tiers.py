@@ -0,0 +1,43 @@
+import gzip
+import json
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('duckdb')
+
+import create_food_subset as exporter
+from food_tiers import assign_tiers, tiers_index_path, verify_tiers
+
+
+def test_assign_tiers_ranks_and_drops_duplicates():
+    result = pd.DataFrame({
+        'code': ['1', '2', '3', '2', '4', ''],
+        'unique_scans_n': [10, 500, 0, 400, 50, 900],
+        'completeness': [0.5, 0.9, 0.1, 0.9, 0.5, 1.0],
+        'nutriscore_grade': ['a', 'b', None, 'b', 'c', 'a'],
+        'energy-kcal_100g': [1.0, 2.0, None, 2.0, 3.0, 1.0],
+        'categories_tags': ['x'] * 6,
+        'brands': ['b'] * 6,
+    }, index=[10, 11, 12, 13, 14, 15])
+    tiers = assign_tiers(result, hot_size=2, cold_size=1)
+    assert list(tiers.index) == list(result.index)
+    # '2' repetido: se queda la fila de mayor puntuacion; el codigo vacio no entra
+    assert tiers['tier'].to_dict() == {10: 1, 11: 0, 12: 2, 13: -1, 14: 0, 15: -1}
+    assert tiers.loc[11, 'score'] > tiers.loc[14, 'score'] > tiers.loc[10, 'score']
+
+
+def test_tiers_partition_the_subset(dump_path, work_dir):
+    conn = exporter.create_duckdb_connection()
+    assert exporter.process_market('spain', conn, dump_path, tier_sizes=(20, 50))
+    index_path = tiers_index_path(work_dir, 'spain')
+    assert verify_tiers(index_path)
+    index = json.loads(index_path.read_text(encoding='utf-8'))
+    assert [t['products'] for t in index['tiers']][:2] == [20, 50]
+
+    lines = []
+    for tier in index['tiers']:
+        with gzip.open(work_dir / tier['file'], 'rt', encoding='utf-8') as f:
+            lines.extend(f)
+    with gzip.open(work_dir / exporter.MARKETS['spain']['filename'], 'rt', encoding='utf-8') as f:
+        assert sorted(lines) == sorted(f)
@@ -0,0 +1,34 @@
+from conftest import exercise_catalog
+from generate_alternatives import build_blocks, merge_with_curated, synthetic_catalog, top_k_neighbours
+
+
+def test_neighbours_stay_in_block_and_exclude_self():
+    catalog = exercise_catalog()
+    groups = {e['id']: e['grupoMuscular'] for e in catalog}
+    result = top_k_neighbours(catalog, k=2)
+    assert set(result) == set(groups)
+    for exercise_id, neighbours in result.items():
+        assert exercise_id not in neighbours
+        assert all(groups[n] == groups[exercise_id] for n in neighbours)
+    assert result[109] == []                       # unico de su grupo
+    assert result[101][0] == 102                   # mismo equipo primero
+
+
+def test_blocks_split_large_groups():
+    catalog = synthetic_catalog(400)
+    blocks = build_blocks(catalog, max_block=20)
+    assert sorted(row for block in blocks for row in block.tolist()) == list(range(400))
+    assert max(len(block) for block in blocks) <= 20
+    result = top_k_neighbours(catalog, k=5, max_block=20)
+    assert all(len(neighbours) <= 5 for neighbours in result.values())
+    assert top_k_neighbours(catalog, k=5, max_block=20) == result
+
+
+def test_curated_lists_and_pins_win():
+    generated = {100: [101, 102], 101: [100, 102], 102: [100, 101]}
+    existing = {'101': [999, 102]}
+    overrides = {'100': {'pin': [103], 'exclude': [102]}}
+    merged = merge_with_curated(generated, existing, overrides, {100, 101, 102, 103}, k=2, regenerate_all=False)
+    assert merged == {'100': [103, 101], '101': [102], '102': [100, 101], '103': []}
+    regenerated = merge_with_curated(generated, existing, {}, {100, 101, 102, 103}, k=2, regenerate_all=True)
+    assert regenerated['101'] == [100, 102]
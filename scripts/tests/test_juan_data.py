@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import juan_data
+from conftest import SCRIPTS_DIR
+
+
+def test_every_command_points_to_a_script():
+    for commands in juan_data.COMMANDS.values():
+        for module_name, _, _ in commands.values():
+            assert (SCRIPTS_DIR / f"{module_name}.py").exists(), module_name
+
+
+def test_help_and_unknown_commands(capsys):
+    assert juan_data.run([]) == 0
+    assert juan_data.run(['food']) == 0
+    assert 'subset' in capsys.readouterr().out
+    assert juan_data.run(['nada']) == 2
+    assert juan_data.run(['food', 'nada']) == 2
+    assert 'Comando desconocido: food nada' in capsys.readouterr().out
+
+
+def test_subcommand_exit_code_is_returned(capsys):
+    assert juan_data.run(['food', 'subset', '--help']) == 0
+    assert '--profile' in capsys.readouterr().out
+
+
+def test_import_does_not_load_heavy_modules():
+    code = ("import sys, juan_data; juan_data.run(['--help']); "
+            "print(sorted(m for m in ('duckdb', 'pandas', 'numpy', 'tqdm') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout.strip().splitlines()[-1] == '[]'
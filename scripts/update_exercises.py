@@ -1,29 +1,27 @@
 #!/usr/bin/env python3
 """
 Script para actualizar la biblioteca de ejercicios:
-1. Asignar IDs numéricos estables
-2. Añadir ejercicios de femorales/glúteos
-3. Poblar descripciones
-"""
+1. Añadir ejercicios de femorales/glúteos
+2. Poblar descripciones
 
-import json
-import os
+Usa el merge idempotente de exercise_merge.py: los ids se leen del ledger
+(exercise_id_ledger.json) y nunca se renumeran, los ejercicios que ya existen
+no se duplican y el fichero solo se reescribe si algo cambia.
 
-os.chdir('assets/data')
+EJECUCION:
+    python scripts/update_exercises.py
+    python scripts/update_exercises.py --dry-run --report diff.json
+"""
 
-# Leer archivo actual
-with open('exercises_local.json', 'r', encoding='utf-8') as f:
-    exercises = json.load(f)
+import argparse
+from pathlib import Path
+from typing import Optional, List
+from collections import Counter
 
-print(f"Ejercicios actuales: {len(exercises)}")
+from exercise_merge import DATA_DIR, EXERCISES_FILE, run_merge, load_json
 
-# 1. Asignar IDs numéricos estables (100-299 para no colisionar con custom)
-for i, ex in enumerate(exercises, start=100):
-    ex['id'] = i
-    if 'muscles' not in ex or not ex.get('muscles'):
-        ex['muscles'] = [ex['grupoMuscular']]
 
-# 2. Nuevos ejercicios de femorales y glúteos
+# Nuevos ejercicios de femorales y glúteos
 new_exercises = [
     # FEMORALES
     {'nombre': 'Curl femoral acostado con maquina', 'grupoMuscular': 'Femoral', 'equipo': 'maquina', 'nivel': 'basico', 'descripcion': 'Ejercicio de aislamiento para femorales en posición acostada boca abajo.', 'musculosSecundarios': ['Gemelos']},
@@ -54,23 +52,8 @@ new_exercises = [
     {'nombre': 'Leg press con maquina', 'grupoMuscular': 'Piernas', 'equipo': 'maquina', 'nivel': 'basico', 'descripcion': 'Prensa de piernas en máquina, posición estándar.', 'musculosSecundarios': ['Gluteos']},
 ]
 
-# Asignar IDs y estructura completa
-next_id = max([e.get('id', 0) for e in exercises]) + 1
-for ex in new_exercises:
-    ex['id'] = next_id
-    ex['muscles'] = [ex['grupoMuscular']]
-    if 'musculosSecundarios' not in ex:
-        ex['musculosSecundarios'] = []
-    next_id += 1
-
-# Añadir a lista principal
-exercises.extend(new_exercises)
 
-print(f"Añadidos {len(new_exercises)} ejercicios nuevos")
-print(f"Total: {len(exercises)} ejercicios")
-print(f"Rango de IDs: 100-{max(e['id'] for e in exercises)}")
-
-# 3. Poblar descripciones para top 50 ejercicios más comunes
+# Descripciones para los ejercicios más comunes (solo si están vacías)
 descriptions = {
     'Press banca con barra': 'Ejercicio compuesto fundamental para desarrollo de pecho. Mantén los pies firmes en el suelo y la espalda con ligero arco natural.',
     'Press banca con mancuernas': 'Variante con mayor rango de movimiento y trabajo estabilizador. Permite rotación natural de muñecas.',
@@ -103,23 +86,26 @@ descriptions = {
     'Peso muerto rumano con barra': 'Énfasis en femorales y glúteos. Mantén las rodillas ligeramente flexionadas, flexiona caderas.',
 }
 
-updated_count = 0
-for ex in exercises:
-    if ex['nombre'] in descriptions and not ex.get('descripcion'):
-        ex['descripcion'] = descriptions[ex['nombre']]
-        updated_count += 1
 
-print(f"Descripciones añadidas: {updated_count}")
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Actualiza la biblioteca de ejercicios')
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR)
+    parser.add_argument('--dry-run', action='store_true', help='No escribir cambios')
+    parser.add_argument('--report', type=Path, help='Guardar el informe de diferencias en JSON')
+    args = parser.parse_args(argv)
 
-# Guardar
-with open('exercises_local.json', 'w', encoding='utf-8') as f:
-    json.dump(exercises, f, ensure_ascii=False, indent=2)
+    run_merge(args.data_dir, new_exercises, descriptions, dry_run=args.dry_run, report_path=args.report)
 
-print("Archivo guardado correctamente")
+    exercises = load_json(args.data_dir / EXERCISES_FILE)
+    print(f"Total: {len(exercises)} ejercicios")
+    print(f"Rango de IDs: {min(e['id'] for e in exercises)}-{max(e['id'] for e in exercises)}")
 
-# Estadísticas por grupo muscular
-from collections import Counter
-groups = Counter(e['grupoMuscular'] for e in exercises)
-print("\nDistribución actual:")
-for group, count in sorted(groups.items(), key=lambda x: -x[1]):
-    print(f"  {group}: {count}")
+    # Estadísticas por grupo muscular
+    groups = Counter(e['grupoMuscular'] for e in exercises)
+    print("\nDistribución actual:")
+    for group, count in sorted(groups.items(), key=lambda x: -x[1]):
+        print(f"  {group}: {count}")
+
+
+if __name__ == "__main__":
+    main()